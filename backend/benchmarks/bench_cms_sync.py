@@ -0,0 +1,164 @@
+"""
+CMS → cms_local.db sync: the previous loop (one table after another,
+fetchall(), DROP + CREATE + executemany on the live table) vs.
+services/sync_cms_to_local._sync_mysql_to_local (parallel workers, chunked
+fetches into shadow tables, one swap, unchanged tables skipped).
+
+The source is a temporary SQLite copy of --tables tables with --rows rows
+each. To stand in for the network to the CMS server, every query waits
+--latency-ms and every fetched row --row-us microseconds (sleeps, so the
+workers overlap them like real socket reads). Reported: seconds for a full
+sync, a resync with nothing changed, and a resync with one table changed.
+
+    cd backend && python -m benchmarks.bench_cms_sync --tables 16 --rows 20000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.sync_cms_to_local import SQLiteSource, _sync_mysql_to_local
+
+
+class _SlowCursor:
+    def __init__(self, cursor, latency, row_cost):
+        self._cursor, self._latency, self._row_cost = cursor, latency, row_cost
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query):
+        time.sleep(self._latency)
+        self._cursor.execute(query)
+
+    def _rows(self, rows):
+        time.sleep(self._latency + self._row_cost * len(rows))
+        return rows
+
+    def fetchall(self):
+        return self._rows(self._cursor.fetchall())
+
+    def fetchmany(self, n):
+        return self._rows(self._cursor.fetchmany(n))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SlowConnection:
+    def __init__(self, conn, latency, row_cost):
+        self._conn, self._latency, self._row_cost = conn, latency, row_cost
+
+    def cursor(self):
+        return _SlowCursor(self._conn.cursor(), self._latency, self._row_cost)
+
+    def execute(self, query):
+        time.sleep(self._latency)
+        return self._conn.execute(query)
+
+    def close(self):
+        self._conn.close()
+
+
+class SlowSource(SQLiteSource):
+    def __init__(self, path, latency, row_cost):
+        super().__init__(path)
+        self.latency, self.row_cost = latency, row_cost
+
+    def connect(self):
+        return _SlowConnection(super().connect(), self.latency, self.row_cost)
+
+    def fingerprint(self, conn, table):
+        # CHECKSUM TABLE runs on the server: one round trip, no rows transferred
+        time.sleep(self.latency)
+        return super().fingerprint(conn._conn, table)
+
+
+def legacy_sync(source, target, queries):
+    """Previous _sync_mysql_to_local, reading from `source`."""
+    src = source.connect()
+    cursor = src.cursor()
+    sqlite_conn = sqlite3.connect(target)
+    for table_name, query in queries.items():
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+        sqlite_conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        col_defs = ", ".join([f'"{c}" TEXT' for c in columns])
+        sqlite_conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({col_defs})")
+        if rows:
+            placeholders = ",".join(["?" for _ in columns])
+            sqlite_conn.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", rows)
+        sqlite_conn.commit()
+    cursor.close()
+    src.close()
+    sqlite_conn.close()
+
+
+def populate(path, tables, rows):
+    conn = sqlite3.connect(path)
+    queries = {}
+    for t in range(tables):
+        name = f"table_{t}"
+        conn.execute(f"CREATE TABLE {name} (id INTEGER, code TEXT, name TEXT, status INTEGER, year INTEGER)")
+        conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?)",
+                         [(i, f"C{i:06}", f"Row {i} of {name}", i % 2, 2020 + i % 5) for i in range(rows)])
+        queries[name] = f"SELECT id, code, name, status, year FROM {name}"
+    conn.commit()
+    conn.close()
+    return queries
+
+
+def _seconds(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CMS sync, sequential fetchall vs. parallel chunked shadow tables.")
+    parser.add_argument("--tables", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--row-us", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, "cms.db")
+        queries = populate(source_path, args.tables, args.rows)
+        source = SlowSource(source_path, args.latency_ms / 1000, args.row_us / 1e6)
+        quiet = lambda level, message: None
+
+        def change_one():
+            conn = sqlite3.connect(source_path)
+            conn.execute("UPDATE table_0 SET status = status + 1 WHERE id = 1")
+            conn.commit()
+            conn.close()
+
+        legacy_db, new_db = os.path.join(tmp, "legacy.db"), os.path.join(tmp, "new.db")
+        run_legacy = lambda: legacy_sync(source, legacy_db, queries)
+        run_new = lambda: _sync_mysql_to_local(quiet, source=source, target=new_db, queries=queries)
+
+        print(f"{args.tables} tables x {args.rows} rows, {args.latency_ms} ms per round trip, "
+              f"{args.row_us} us per row, {settings.cms_sync_workers} workers, "
+              f"{settings.cms_sync_chunk_rows} rows per chunk\n")
+        print(f"{'Sync':>20}{'Previous (s)':>14}{'New (s)':>10}")
+        print(f"{'full':>20}{_seconds(run_legacy):>14.2f}{_seconds(run_new):>10.2f}")
+        print(f"{'nothing changed':>20}{_seconds(run_legacy):>14.2f}{_seconds(run_new):>10.2f}")
+        change_one()
+        print(f"{'one table changed':>20}{_seconds(run_legacy):>14.2f}{_seconds(run_new):>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
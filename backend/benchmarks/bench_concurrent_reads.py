@@ -0,0 +1,149 @@
+"""
+Timetable reads while a generation commit is writing: the old engine
+(SingletonThreadPool, rollback journal, default pragmas) vs. the pooled WAL
+engine from utils/db_engine.py.
+
+A writer keeps replacing one department's timetable the way the solver's
+commit does (delete + bulk insert of --entries rows, then --hold seconds of
+further work in the same transaction). --readers processes — API workers —
+meanwhile load department timetables for --seconds. Reported: reads
+completed, latency percentiles and "database is locked" errors on either
+side.
+
+    cd backend && python -m benchmarks.bench_concurrent_reads --rows 50000 --readers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import SingletonThreadPool
+
+import models
+from benchmarks.bench_conflicts import populate
+from benchmarks.bench_entry_save import _fields
+from services.entry_buffer import EntryBuffer
+from utils.db_engine import create_db_engine
+
+
+def legacy_engines(path, read_only=False):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           poolclass=SingletonThreadPool, pool_size=20)
+    if not read_only:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    return engine
+
+
+def tuned_engines(path, read_only=False):
+    return create_db_engine(f"sqlite:///{path}", read_only=read_only)
+
+
+ENGINES = {"legacy": legacy_engines, "wal": tuned_engines}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def reader(name, path, departments, deadline, seed, out):
+    """One reader process (an API worker serving GET /timetable)."""
+    engine = ENGINES[name](path, read_only=True)
+    Read, rng = sessionmaker(bind=engine), random.Random(seed)
+    table = models.TimetableEntry.__table__
+    latencies, locked = [], 0
+    while time.time() < deadline:
+        dept, sem = rng.choice(departments)
+        started = time.perf_counter()
+        with Read() as db:
+            try:
+                db.execute(table.select().where(table.c.department_code == dept, table.c.semester == sem)).all()
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                locked += 1
+    out.put((latencies, locked))
+
+
+def writer(engine, entries, hold, deadline):
+    """Generation commits: replace one department's rows, then keep the
+    transaction open for `hold` seconds (gap-fill, venue index, caches)."""
+    Write = sessionmaker(bind=engine)
+    commits, locked = 0, 0
+    while time.time() < deadline:
+        db = Write()
+        try:
+            entries_buffer = EntryBuffer(department_code="BENCH", semester=1, learning_mode_ids="1,2")
+            for i in range(entries):
+                entries_buffer.add(**_fields(i))
+            entries_buffer.replace(db, "BENCH", 1)
+            time.sleep(hold)
+            db.commit()
+            commits += 1
+        except OperationalError:
+            db.rollback()
+            locked += 1
+        finally:
+            db.close()
+    return commits, locked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent timetable reads during generation commits.")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--entries", type=int, default=4000, help="Rows written per commit")
+    parser.add_argument("--hold", type=float, default=0.2, help="Seconds the write transaction stays open")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = os.path.join(tmp, "seed.db")
+        seed_engine = create_engine(f"sqlite:///{seed}")
+        populate(seed_engine, args.rows)
+        with seed_engine.connect() as conn:
+            departments = [tuple(r) for r in conn.exec_driver_sql(
+                "SELECT DISTINCT department_code, semester FROM timetable_entries")]
+        seed_engine.dispose()
+
+        print(f"{args.rows} rows, {args.readers} reader processes, {args.entries}-row commits "
+              f"held {args.hold * 1000:.0f} ms, {args.seconds:.0f} s\n")
+        print(f"{'Engine':>8}{'Reads':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}"
+              f"{'Locked R/W':>12}{'Commits':>9}")
+        ctx = multiprocessing.get_context("spawn")
+        for name, make in ENGINES.items():
+            path = os.path.join(tmp, f"{name}.db")
+            shutil.copy(seed, path)
+            write_engine = make(path)
+            out = ctx.Queue()
+            deadline = time.time() + args.seconds + 2           # readers start up first
+            procs = [ctx.Process(target=reader, args=(name, path, departments, deadline, i, out))
+                     for i in range(args.readers)]
+            for p in procs:
+                p.start()
+            time.sleep(2)
+            commits, write_locked = writer(write_engine, args.entries, args.hold, deadline)
+            results = [out.get() for _ in procs]
+            for p in procs:
+                p.join()
+            latencies = [x for lat, _ in results for x in lat]
+            read_locked = sum(locked for _, locked in results)
+            ms = lambda q: _percentile(latencies, q) * 1000
+            print(f"{name:>8}{len(latencies):>8}{ms(0.5):>10.1f}{ms(0.95):>10.1f}{ms(1.0):>10.1f}"
+                  f"{read_locked:>6}/{write_locked:<5}{commits:>9}")
+            write_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
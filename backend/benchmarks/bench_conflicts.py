@@ -0,0 +1,116 @@
+"""
+/api/conflicts at scale: ORM scan + Python dicts vs. the column-array engine.
+
+Fills a scratch SQLite file with a synthetic institution (departments x
+semesters x sections x 48 slots, ~100k TimetableEntry rows by default), with
+a sprinkling of faculty double-bookings, shared and multi-venue rooms, then
+times detect_conflicts for the whole table and for one department/semester.
+The "scan" column is the previous implementation (every row as an ORM object,
+filtered to the target afterwards).
+
+    cd backend && python -m benchmarks.bench_conflicts --rows 100000
+"""
+
+import argparse
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from services import venue_index
+from services.conflict_detector import detect_conflicts
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def scan_conflicts(db, target_department=None, target_semester=None):
+    """Previous algorithm, kept for comparison (exact venue strings, no split)."""
+    faculty_slots = collections.defaultdict(list)
+    venue_slots = collections.defaultdict(list)
+    for e in db.query(models.TimetableEntry).all():
+        if e.faculty_id and e.faculty_id.strip().upper() not in ('NONE', 'UNASSIGNED', ''):
+            faculty_slots[(e.day_of_week, e.period_number, e.faculty_id)].append(e)
+        if e.venue_name and e.venue_name.strip().upper() not in ('NONE', 'UNASSIGNED', '') and e.section_number != 2:
+            venue_slots[(e.day_of_week, e.period_number, e.venue_name)].append(e)
+    found = 0
+    for slots in (faculty_slots, venue_slots):
+        for entries in slots.values():
+            if len(entries) < 2:
+                continue
+            if target_department and not any(e.department_code == target_department for e in entries):
+                continue
+            if target_semester and not any(e.semester == target_semester for e in entries):
+                continue
+            if len(set((e.course_code, e.section_number) for e in entries)) > 1:
+                found += 1
+    return found
+
+
+def populate(engine, n_rows, seed=7):
+    rng = random.Random(seed)
+    per_section = len(DAYS) * 8
+    sections = max(1, n_rows // per_section)
+    depts = [f"D{i:02d}" for i in range(max(1, sections // 24))]
+    models.Base.metadata.create_all(engine)
+    rows = []
+    for s in range(sections):
+        dept, sem, sec = depts[s % len(depts)], 2 + 2 * (s // len(depts) % 4), s // (len(depts) * 4) + 1
+        for d, day in enumerate(DAYS):
+            for period in range(1, 9):
+                course = f"{dept}{sem}{(d * 8 + period) % 9}"
+                faculty = f"F{rng.randrange(sections * 6)}"          # random double-bookings
+                venue = f"R{s}" if rng.random() > 0.02 else f"R{s}, LAB{rng.randrange(40)}"
+                rows.append(dict(department_code=dept, semester=sem, course_code=course, course_name=course,
+                                 faculty_id=faculty, faculty_name=faculty, session_type="THEORY", slot_id=1,
+                                 day_of_week=day, period_number=period, venue_name=venue,
+                                 section_number=sec if rng.random() > 0.05 else 2, learning_mode_ids="1,2",
+                                 created_at="now"))
+    with engine.begin() as conn:
+        conn.execute(insert(models.TimetableEntry.__table__), rows)
+    with sessionmaker(bind=engine)() as db:
+        venue_index.rebuild(db)
+        db.commit()
+    return len(rows), depts[0]
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time conflict detection on a synthetic timetable.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        n, dept = populate(engine, args.rows)
+        db = sessionmaker(bind=engine)()
+        print(f"{n} timetable rows\n")
+        print(f"{'Target':>12}{'Scan (ms)':>12}{'Engine (ms)':>13}{'Speed-up':>10}{'Conflicts':>11}")
+        for label, target in (("all", (None, None)), (f"{dept} sem 4", (dept, 4))):
+            scan, _ = _time(lambda: scan_conflicts(db, *target), args.repeat)
+            engine_s, found = _time(lambda: detect_conflicts(db, *target), args.repeat)
+            total = len(found["faculty_conflicts"]) + len(found["venue_conflicts"])
+            print(f"{label:>12}{scan * 1000:>12.1f}{engine_s * 1000:>13.1f}{scan / engine_s:>9.1f}x{total:>11}")
+        db.close()
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
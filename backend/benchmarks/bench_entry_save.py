@@ -0,0 +1,99 @@
+"""
+Save-phase scaling: per-entry ORM db.add vs. EntryBuffer bulk insert.
+
+Writes N synthetic timetable entries for one department/semester into a
+scratch SQLite file the way the solver's save + gap-fill + commit phases do:
+each entry is followed by a day_has_lab() lookup (the old version scanned
+db.new, the buffer uses its day/session index), and a query halfway through
+stands in for the gap-filler's CourseMaster lookup. Sessions are configured
+like utils.database.SessionLocal (autoflush=False), so db.new holds every
+pending entry until the commit, as it did in the solver.
+
+    cd backend && python -m benchmarks.bench_entry_save --entries 500 2000 8000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from services.entry_buffer import EntryBuffer
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def _fields(i):
+    day = DAYS[i % len(DAYS)]
+    return dict(
+        course_code=f"C{i % 40:03d}", course_name=f"Course {i % 40}",
+        faculty_id=f"F{i % 90:03d}", faculty_name=f"Faculty {i % 90}",
+        session_type="LAB" if i % 5 == 0 else "THEORY",
+        slot_id=1, day_of_week=day, period_number=i % 8 + 1,
+        venue_name=f"V{i % 30}", section_number=i % 6 + 1, created_at="now",
+    )
+
+
+def save_orm(db, n):
+    db.query(models.TimetableEntry).filter_by(department_code="BENCH", semester=1).delete()
+    for i in range(n):
+        db.add(models.TimetableEntry(department_code="BENCH", semester=1, learning_mode_ids="1,2", **_fields(i)))
+        day = DAYS[i % len(DAYS)]
+        any(isinstance(e, models.TimetableEntry) and e.day_of_week == day and e.session_type == "LAB" for e in db.new)
+        if i == n // 2:
+            db.query(models.CourseMaster).first()
+    db.commit()
+
+
+def save_buffered(db, n):
+    entries = EntryBuffer(department_code="BENCH", semester=1, learning_mode_ids="1,2")
+    for i in range(n):
+        entries.add(**_fields(i))
+        entries.has_session(DAYS[i % len(DAYS)], "LAB")
+        if i == n // 2:
+            db.query(models.CourseMaster).first()
+    entries.replace(db, "BENCH", 1)
+    db.commit()
+
+
+def _time(save, session_factory, n, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        db = session_factory()
+        started = time.perf_counter()
+        save(db, n)
+        best = min(best, time.perf_counter() - started)
+        rows = db.query(models.TimetableEntry).filter_by(department_code="BENCH", semester=1).count()
+        db.close()
+    return best, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the solver save phase with db.add vs. EntryBuffer.")
+    parser.add_argument("--entries", type=int, nargs="*", default=[250, 1000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        print(f"{'Entries':>8}{'db.add (ms)':>14}{'Buffer (ms)':>14}{'Speed-up':>10}")
+        for n in args.entries:
+            orm, orm_rows = _time(save_orm, session_factory, n, args.repeat)
+            buffered, buffered_rows = _time(save_buffered, session_factory, n, args.repeat)
+            assert orm_rows == buffered_rows == n
+            print(f"{n:>8}{orm * 1000:>14.1f}{buffered * 1000:>14.1f}{orm / buffered:>9.1f}x")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
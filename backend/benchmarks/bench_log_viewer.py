@@ -0,0 +1,119 @@
+"""
+Admin log viewer on a large activity log: the previous queries on one
+unpartitioned table (count() + OFFSET paging, ilike search, substr() on the
+IST string for dates) vs. services/log_viewer on monthly partitions
+(cached counts, keyset cursors, FTS5 search, timestamp_ms ranges).
+
+--rows activity rows spread over --months months go into both layouts of
+a temporary log.db. Reported: milliseconds per request for the first page,
+a deep page, an email search and a one-day filter - for the partitions both
+with the per-partition counts cached and cold (cache cleared every call).
+
+    cd backend && python -m benchmarks.bench_log_viewer --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import desc, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.log_models import IST, ActivityLog
+from services import log_viewer
+from utils import log_partitions
+from utils.db_engine import create_db_engine
+
+LIMIT = 25
+
+
+def populate(engine, n_rows, months, seed=3):
+    rng = random.Random(seed)
+    end = log_partitions.now_ms()
+    start = end - months * 30 * 86400 * 1000
+    users = [f"user{i}.{rng.choice(['cse', 'ece', 'mech', 'it'])}@bitsathy.ac.in" for i in range(2000)]
+    actions = ["/api/timetable/save", "/api/generate", "/api/departments", "/api/faculty", "/api/venues/12"]
+    Session = sessionmaker(bind=engine)
+    for chunk in range(0, n_rows, 50_000):
+        stamps = sorted(rng.randrange(start, end) for _ in range(min(50_000, n_rows - chunk)))
+        rows = []
+        for ts in stamps:
+            ist = datetime.fromtimestamp(ts / 1000, tz=IST).strftime("%Y-%m-%d %I:%M %p")
+            gmt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y-%m-%d %I:%M %p")
+            rows.append(dict(email=rng.choice(users), action=rng.choice(actions), method="EDIT",
+                             status_code=200, timestamp_ist=ist, timestamp_gmt=gmt, timestamp_ms=ts))
+        with engine.begin() as conn:
+            conn.execute(insert(ActivityLog.__table__), rows)
+        with Session() as db:
+            log_partitions.insert_rows(db, ActivityLog, [dict(r) for r in rows])
+            db.commit()
+    return datetime.fromtimestamp(stamps[len(stamps) // 2] / 1000, tz=IST).strftime("%Y-%m-%d")
+
+
+def legacy_page(db, page=1, email=None, date=None):
+    """Previous get_activity_logs / get_logs query."""
+    query = db.query(ActivityLog)
+    if email:
+        query = query.filter(ActivityLog.email.ilike(f"%{email}%"))
+    if date:
+        query = query.filter(func.substr(ActivityLog.timestamp_ist, 1, 10) == date)
+    total = query.count()
+    return total, query.order_by(desc(ActivityLog.id)).offset((page - 1) * LIMIT).limit(LIMIT).all()
+
+
+def _ms(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Admin log viewer queries, one table vs. monthly partitions.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--deep-page", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'log.db')}")
+        ActivityLog.__table__.create(engine)
+        day = populate(engine, args.rows, args.months)
+        Session = sessionmaker(bind=engine)
+        deep = min(args.deep_page, args.rows // LIMIT)
+
+        with Session() as db:
+            log_viewer.read_page(db, "activity", limit=LIMIT)  # counts of the closed months are cached from here on
+            cursor = None
+            for _ in range(deep - 1):
+                cursor = log_viewer.read_page(db, "activity", limit=LIMIT, cursor=cursor)["next_cursor"]
+            cases = [
+                ("first page", lambda: legacy_page(db),
+                 lambda: log_viewer.read_page(db, "activity", limit=LIMIT)),
+                (f"page {deep}", lambda: legacy_page(db, page=deep),
+                 lambda: log_viewer.read_page(db, "activity", limit=LIMIT, cursor=cursor)),
+                ("email search", lambda: legacy_page(db, email="user42.cse"),
+                 lambda: log_viewer.read_page(db, "activity", limit=LIMIT, email="user42.cse")),
+                (f"date {day}", lambda: legacy_page(db, date=day),
+                 lambda: log_viewer.read_page(db, "activity", limit=LIMIT, date=day)),
+            ]
+            print(f"{args.rows} activity rows over {args.months} months, {LIMIT} per page\n")
+            print(f"{'Request':>18}{'One table (ms)':>16}{'Partitions (ms)':>17}{'cold (ms)':>11}")
+            for name, old, new in cases:
+                assert old()[0] == new()["total"], name
+                cold = _ms(lambda: (log_viewer.clear_counts(), new()))
+                print(f"{name:>18}{_ms(old):>16.1f}{_ms(new):>17.1f}{cold:>11.1f}")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""
+Request latency with the activity log written inline (one INSERT + COMMIT on
+the event loop per mutating request, settings.log_writer_enabled = False) vs.
+queued for the batched writer in utils/log_writer.py.
+
+--concurrency clients send --requests authenticated POSTs in total to an app
+that has only ActivityLoggingMiddleware and a trivial async route, so the
+latency is the middleware's. log.db is a temporary file with the usual
+engine pragmas; --synchronous FULL gives the fsync-per-commit behaviour of a
+rollback-journal database.
+
+    cd backend && python -m benchmarks.bench_log_writer --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import jwt
+from fastapi import FastAPI
+from sqlalchemy import event, func, select
+
+from config.settings import settings
+from middleware.activity_logging_middleware import ActivityLoggingMiddleware
+from models.log_models import ActivityLog
+from utils import log_database, log_partitions, log_writer
+from utils.db_engine import create_db_engine
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(ActivityLoggingMiddleware)
+
+    @app.post("/api/timetable/save")
+    async def save():
+        return {"ok": True}
+
+    return app
+
+
+async def load(app, requests, concurrency, token):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                r = await client.post("/api/timetable/save", headers=headers)
+                latencies.append(time.perf_counter() - started)
+                assert r.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Activity-log overhead per request, inline vs. batched.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    args = parser.parse_args(argv)
+
+    token = jwt.encode({"email": "bench@bitsathy.ac.in"}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    app = build_app()
+    print(f"{args.requests} POSTs, {args.concurrency} concurrent clients, log.db synchronous={args.synchronous}\n")
+    print(f"{'Mode':>8}{'Req/s':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'Rows':>8}{'Commits':>9}{'Dropped':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("inline", "batched"):
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, mode + '.db')}")
+            event.listen(engine, "connect",
+                         lambda conn, _: conn.execute(f"PRAGMA synchronous={args.synchronous}"))
+            log_partitions.ensure_partitions(engine, ActivityLog, [log_partitions.current_month()])
+            commits = []
+            event.listen(engine, "commit", lambda conn: commits.append(1))
+            log_database.LogSessionLocal.configure(bind=engine)
+            settings.log_writer_enabled = mode == "batched"
+
+            latencies, elapsed = asyncio.run(load(app, args.requests, args.concurrency, token))
+            final = log_writer.shutdown() or {"dropped": 0}
+            with engine.connect() as conn:
+                rows = sum(conn.execute(select(func.count()).select_from(table)).scalar()
+                           for _, table in log_partitions.partitions(conn, ActivityLog))
+            ms = lambda q: _percentile(latencies, q) * 1000
+            print(f"{mode:>8}{len(latencies) / elapsed:>9.0f}{ms(0.5):>10.2f}{ms(0.95):>10.2f}{ms(0.99):>10.2f}"
+                  f"{rows:>8}{len(commits):>9}{final['dropped']:>9}")
+            engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""
+Requests per second on GET /api/timetable through the middleware stack:
+the previous BaseHTTPMiddleware versions of AuthMiddleware and
+ActivityLoggingMiddleware (kept below for comparison; the logging one decoded
+the Bearer token on every request, GETs included) vs. the plain ASGI ones,
+plus the bare router as a ceiling.
+
+The real legacy router serves a synthetic timetable (bench_conflicts) from a
+temporary database; responses come from the response cache after the first
+hit, so the middleware is a visible share of each request. --concurrency
+clients send --requests authenticated GETs in total.
+
+    cd backend && python -m benchmarks.bench_middleware --requests 5000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import jwt
+from fastapi import FastAPI, Request
+from sqlalchemy.orm import sessionmaker
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks.bench_conflicts import populate
+from config.settings import settings
+from middleware.activity_logging_middleware import ActivityLoggingMiddleware
+from middleware.auth_middleware import AuthMiddleware, _PUBLIC_EXACT, _PUBLIC_PREFIXES
+from utils.database import get_read_db
+from utils.db_engine import create_db_engine
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """Previous AuthMiddleware."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        path = request.url.path
+        if any(path.startswith(p) for p in _PUBLIC_PREFIXES) or path in _PUBLIC_EXACT:
+            return await call_next(request)
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+class LegacyActivityLoggingMiddleware(BaseHTTPMiddleware):
+    """Previous ActivityLoggingMiddleware, up to the point where GETs return."""
+
+    async def dispatch(self, request: Request, call_next):
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            try:
+                jwt.decode(auth_header.split(" ")[1], settings.jwt_secret,
+                           algorithms=[settings.jwt_algorithm], options={"verify_exp": False})
+            except Exception:
+                pass
+        if request.method not in ["POST", "PUT", "PATCH", "DELETE"]:
+            return await call_next(request)
+        raise NotImplementedError("GET-only benchmark")
+
+
+STACKS = {
+    "none": (),
+    "legacy": (LegacyActivityLoggingMiddleware, LegacyAuthMiddleware),
+    "asgi": (ActivityLoggingMiddleware, AuthMiddleware),
+}
+
+
+def build_app(middlewares, Session):
+    from routes.legacy_routes import router as legacy_router
+
+    def read_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    app.include_router(legacy_router, prefix="/api")
+    app.dependency_overrides[get_read_db] = read_db
+    return app
+
+
+async def load(app, urls, requests, concurrency, token):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for url in urls:  # warm the response cache
+            assert (await client.get(url, headers=headers)).status_code == 200
+        remaining = iter(range(requests))
+
+        async def worker():
+            for i in remaining:
+                r = await client.get(urls[i % len(urls)], headers=headers)
+                assert r.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GET /timetable requests per second per middleware stack.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    token = jwt.encode({"email": "bench@bitsathy.ac.in"}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_engine = create_db_engine(f"sqlite:///{path}")
+        n, _ = populate(seed_engine, args.rows)
+        with seed_engine.connect() as conn:
+            scopes = conn.exec_driver_sql(
+                "SELECT DISTINCT department_code, semester FROM timetable_entries LIMIT 8").all()
+        seed_engine.dispose()
+        urls = [f"/api/timetable?department_code={d}&semester={s}" for d, s in scopes]
+        engine = create_db_engine(f"sqlite:///{path}", read_only=True)
+        Session = sessionmaker(bind=engine)
+
+        print(f"{n} rows, {args.requests} GETs over {len(urls)} timetables, "
+              f"{args.concurrency} concurrent clients, best of {args.repeat}\n")
+        print(f"{'Stack':>8}{'Req/s':>9}")
+        apps = {name: build_app(middlewares, Session) for name, middlewares in STACKS.items()}
+        best = dict.fromkeys(apps, float("inf"))
+        for _ in range(args.repeat):  # interleaved, so drift hits every stack alike
+            for name, app in apps.items():
+                best[name] = min(best[name], asyncio.run(load(app, urls, args.requests, args.concurrency, token)))
+        for name, elapsed in best.items():
+            print(f"{name:>8}{args.requests / elapsed:>9.0f}")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""
+Model-build scaling: full-dict scans vs. VariableIndex.
+
+Builds synthetic theory/lab variable sets for a growing number of courses
+(6 days x 8 periods, lab blocks at 1/3/5) and times the constraint-building
+lookups the solver does per course and per blocked slot, once with the old
+"scan every key" filters and once through VariableIndex. The scan version
+grows with courses^2; the indexed one stays linear.
+
+    cd backend && python -m benchmarks.bench_model_build --courses 10 20 40 80 160
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ortools.sat.python import cp_model
+
+from services.solver_index import VariableIndex
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+PERIODS = range(1, 9)
+BLOCK_STARTS = (1, 3, 5)
+
+
+def _variables(n_courses):
+    model = cp_model.CpModel()
+    codes = [f"C{i:03d}" for i in range(n_courses)]
+    theory = {(c, d, p): model.NewBoolVar(f"th_{c}_{d}_{p}") for c in codes for d in DAYS for p in PERIODS if p <= 7}
+    lab = {(c, d, bs): model.NewBoolVar(f"lab_{c}_{d}_{bs}") for c in codes[::2] for d in DAYS for bs in BLOCK_STARTS}
+    merged = {(d, bs): model.NewBoolVar(f"merged_{d}_{bs}") for d in DAYS for bs in BLOCK_STARTS}
+    return model, codes, theory, lab, merged
+
+
+def build_scan(model, codes, theory, lab, merged, blocked):
+    for code in codes:                                   # C6 weekly counts
+        model.Add(sum(theory[k] for k in theory if k[0] == code) <= 5)
+        lab_sum = [lab[k] for k in lab if k[0] == code]
+        if lab_sum:
+            model.Add(sum(lab_sum) <= 2)
+    for (day, period) in blocked:                        # user slot blocking
+        for key, var in theory.items():
+            if key[1] == day and key[2] == period:
+                model.Add(var == 0)
+        for key, var in lab.items():
+            if key[1] == day and period in (key[2], key[2] + 1):
+                model.Add(var == 0)
+        for key, var in merged.items():
+            if key[0] == day and period in (key[1], key[1] + 1):
+                model.Add(var == 0)
+
+
+def build_indexed(model, codes, theory, lab, merged, blocked):
+    index = VariableIndex(theory, lab, merged)
+    for code in codes:
+        model.Add(sum(index.theory_by_course.get(code, [])) <= 5)
+        lab_sum = index.lab_by_course.get(code, [])
+        if lab_sum:
+            model.Add(sum(lab_sum) <= 2)
+    for (day, period) in blocked:
+        for var in index.vars_using_slot(day, period):
+            model.Add(var == 0)
+
+
+def _time(build, n_courses, blocked, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        model, codes, theory, lab, merged = _variables(n_courses)
+        started = time.perf_counter()
+        build(model, codes, theory, lab, merged, blocked)
+        best = min(best, time.perf_counter() - started)
+        constraints = len(model.Proto().constraints)
+    return best, constraints
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time constraint building with and without VariableIndex.")
+    parser.add_argument("--courses", type=int, nargs="*", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--blocked-slots", type=int, default=6, help="Slots blocked by user constraints")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    all_slots = [(d, p) for d in DAYS for p in PERIODS]
+    blocked = all_slots[::max(1, len(all_slots) // max(1, args.blocked_slots))][:args.blocked_slots]
+
+    print(f"{'Courses':>8}{'Scan (ms)':>12}{'Index (ms)':>12}{'Speed-up':>10}{'Constraints':>13}")
+    for n in args.courses:
+        scan, scan_constraints = _time(build_scan, n, blocked, args.repeat)
+        indexed, index_constraints = _time(build_indexed, n, blocked, args.repeat)
+        assert scan_constraints == index_constraints, "indexed build must add the same constraints"
+        print(f"{n:>8}{scan * 1000:>12.2f}{indexed * 1000:>12.2f}{scan / indexed:>9.1f}x{index_constraints:>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""
+/timetable/venue/{name}: full-table scan + comma splitting vs. the
+timetable_entry_venues index.
+
+Uses the same synthetic institution as bench_conflicts (~100k rows by
+default) and looks up a handful of single rooms and shared labs.
+
+    cd backend && python -m benchmarks.bench_venue_timetable --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from benchmarks.bench_conflicts import _time, populate
+from services import venue_index
+
+
+def scan_venue(db, venue_name):
+    """Previous lookup, kept for comparison."""
+    return [e for e in db.query(models.TimetableEntry).all()
+            if e.venue_name and venue_name in [v.strip() for v in e.venue_name.split(",")]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time venue timetable lookups on a synthetic timetable.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        n, _ = populate(engine, args.rows)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            rebuild_s = _time(lambda: (venue_index.rebuild(db), db.rollback()), 1)[0]
+        print(f"{n} timetable rows, index rebuild {rebuild_s * 1000:.0f} ms\n")
+        print(f"{'Venue':>8}{'Scan (ms)':>12}{'Index (ms)':>12}{'Speed-up':>10}{'Entries':>9}")
+        for venue in ("R0", "R500", "LAB3", "LAB27"):
+            # Fresh sessions so the identity map doesn't carry rows between runs
+            scan, found = _time(lambda: scan_venue(Session(), venue), args.repeat)
+            indexed, hits = _time(lambda: venue_index.entries_in_venue(Session(), venue), args.repeat)
+            assert [e.id for e in found] == [e.id for e in hits]
+            print(f"{venue:>8}{scan * 1000:>12.1f}{indexed * 1000:>12.2f}{scan / indexed:>9.0f}x{len(hits):>9}")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""
+Cold vs. warm-start time-to-first-solution.
+
+For each department: one cold solve (which also leaves a timetable behind),
+then a cold and a warm re-solve of the same inputs. Runs on a copy of the
+database so the real timetable is never touched.
+
+    cd backend && python -m benchmarks.bench_warm_start --semester 6 --departments CSE ECE
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def _solve(Session, dept, semester, mentor_day, **kwargs):
+    from services.solver_engine import generate_schedule
+    db = Session()
+    try:
+        result = generate_schedule(db, dept, semester, mentor_day, **kwargs)
+        return result.get("solve_stats") if isinstance(result, dict) and result.get("success") else None
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cold and hinted CP-SAT solves.")
+    parser.add_argument("--semester", type=int, required=True)
+    parser.add_argument("--departments", nargs="*", help="Department codes (default: all with courses)")
+    parser.add_argument("--mentor-day", default="Wednesday")
+    parser.add_argument("--hint-source", choices=["entries", "snapshot"], default="entries")
+    parser.add_argument("--database", default=None, help="SQLite file to copy (default: the app database)")
+    args = parser.parse_args(argv)
+
+    import models
+    from utils.database import SQLALCHEMY_DATABASE_URL, engine as app_engine
+    models.Base.metadata.create_all(bind=app_engine)  # solver thread leases live in the app database
+    src = args.database or SQLALCHEMY_DATABASE_URL.replace("sqlite:///", "", 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copy(src, path)
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        models.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        departments = args.departments
+        if not departments:
+            from services.batch_generation import default_departments
+            db = Session()
+            try:
+                departments = default_departments(db, args.semester)
+            finally:
+                db.close()
+
+        rows = []
+        for dept in departments:
+            if _solve(Session, dept, args.semester, args.mentor_day) is None:
+                rows.append((dept, None, None))
+                continue
+            cold = _solve(Session, dept, args.semester, args.mentor_day)
+            warm = _solve(Session, dept, args.semester, args.mentor_day, warm_start=True, hint_source=args.hint_source)
+            rows.append((dept, cold, warm))
+        engine.dispose()
+
+    print(f"\n{'Dept':<10}{'Cold first':>12}{'Warm first':>12}{'Cold solve':>12}{'Warm solve':>12}{'Hint':>10}")
+    fmt = lambda v: f"{v:>12.3f}" if v is not None else f"{'-':>12}"
+    for dept, cold, warm in rows:
+        if not cold or not warm:
+            print(f"{dept:<10}{'no solution':>12}")
+            continue
+        print(f"{dept:<10}{fmt(cold['first_solution_seconds'])}{fmt(warm['first_solution_seconds'])}"
+              f"{fmt(cold['solve_seconds'])}{fmt(warm['solve_seconds'])}{warm.get('hint_source', '-'):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,18 +5,19 @@ Endpoints (all prefixed with /api/admin by main.py):
   POST /login           — authenticate admin with email/password, return JWT
   GET  /me              — verify admin session (returns admin email)
   GET  /logs            — fetch auth or activity logs from log.db (query param: type)
+  GET  /logs/stats      — log.db size, partitions and archive inventory
+  GET  /logs/archive    — fetch logs of an archived month
+  POST /logs/retention  — archive old log months now
+  POST /logs/compact    — convert log.db to incremental auto_vacuum (full VACUUM)
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
 from typing import Any, Dict
 from typing import Optional
-import math
 
 from middleware.admin_guard import verify_admin_token
 from utils.log_database import get_log_db
-from models.log_models import AuthLog, ActivityLog
 from services.admin_service import AdminService
 from pydantic import BaseModel
 
@@ -121,6 +122,9 @@ def get_logs(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=500, description="Items per page"),
     date: Optional[str] = Query(None, description="Filter by date (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    email: Optional[str] = Query(None, description="Search by email"),
+    action: Optional[str] = Query(None, description="Search by API endpoint (activity logs)"),
     log_db: Session = Depends(get_log_db),
 ) -> Dict[str, Any]:
     """
@@ -130,55 +134,66 @@ def get_logs(
     - type: 'auth' for authentication logs, 'activity' for activity logs
     - page: Page number (default 1)
     - limit: Items per page (default 50, max 500)
+    - cursor: next_cursor from the previous page (faster than page for deep pages)
 
-    Returns paginated log data with IST/GMT timestamps.
+    Returns paginated log data with IST/GMT timestamps and next_cursor.
     """
+    from services import log_viewer
     try:
-        if type == "auth":
-            query = log_db.query(AuthLog)
-            if date:
-                query = query.filter(func.substr(AuthLog.timestamp_ist, 1, 10) == date)
-                
-            total = query.count()
-            total_pages = math.ceil(total / limit) if total > 0 else 0
-            rows = query.order_by(desc(AuthLog.id)).offset((page - 1) * limit).limit(limit).all()
-
-            logs = [{
-                "id": row.id,
-                "user_id": row.user_id,
-                "email": row.email,
-                "event_type": row.event_type,
-                "timestamp_ist": row.timestamp_ist,
-                "timestamp_gmt": row.timestamp_gmt,
-                "user_agent": row.user_agent,
-            } for row in rows]
-        else:
-            query = log_db.query(ActivityLog)
-            if date:
-                query = query.filter(func.substr(ActivityLog.timestamp_ist, 1, 10) == date)
-            total = query.count()
-            total_pages = math.ceil(total / limit) if total > 0 else 0
-            rows = query.order_by(desc(ActivityLog.id)).offset((page - 1) * limit).limit(limit).all()
-
-            logs = [{
-                "id": row.id,
-                "user_id": row.user_id,
-                "email": row.email,
-                "action": row.action,
-                "method": row.method,
-                "status_code": row.status_code,
-                "timestamp_ist": row.timestamp_ist,
-                "timestamp_gmt": row.timestamp_gmt,
-            } for row in rows]
-
-        return {
-            "data": logs,
-            "total": total,
-            "page": page,
-            "total_pages": total_pages,
-        }
+        return log_viewer.read_page(log_db, type, limit=limit, page=page, cursor=cursor,
+                                    date=date, email=email, action=action)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch {type} logs: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+# ===================================================================
+# Log Retention
+# ===================================================================
+@router.get("/logs/stats", dependencies=[Depends(verify_admin_token)])
+def get_log_stats() -> Dict[str, Any]:
+    """log.db size, rows per monthly partition, archived months and the last retention run."""
+    from services import log_retention
+    return log_retention.stats()
+
+
+@router.get("/logs/archive", dependencies=[Depends(verify_admin_token)])
+def get_archived_logs(
+    month: str = Query(..., description="Archived month (YYYYMM)"),
+    type: str = Query("auth", pattern="^(auth|activity)$", description="Log type: 'auth' or 'activity'"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(50, ge=1, le=500, description="Items per page"),
+    date: Optional[str] = Query(None, description="Filter by date (YYYY-MM-DD)"),
+    email: Optional[str] = Query(None, description="Search by email"),
+    action: Optional[str] = Query(None, description="Search by API endpoint (activity logs)"),
+) -> Dict[str, Any]:
+    """Fetch logs of a month that retention moved to the archive, newest first."""
+    from services import log_viewer
+    try:
+        return log_viewer.read_archive_page(type, month, limit=limit, page=page,
+                                            date=date, email=email, action=action)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No {type} log archive for {month}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/logs/retention", dependencies=[Depends(verify_admin_token)])
+async def trigger_log_retention(background_tasks: BackgroundTasks):
+    """Archive log months past the age or size limit now, in the background."""
+    from services import log_retention
+    background_tasks.add_task(log_retention.run_scheduled, True)
+    return {"status": "started", "message": "Log retention started in the background."}
+
+
+@router.post("/logs/compact", dependencies=[Depends(verify_admin_token)])
+async def trigger_log_compaction(background_tasks: BackgroundTasks):
+    """Rebuild log.db with a full VACUUM and switch it to incremental auto_vacuum,
+    in the background. Log writes wait while it runs; the result shows in /logs/stats."""
+    from services import log_retention
+    background_tasks.add_task(log_retention.run_compaction)
+    return {"status": "started", "message": "Log database compaction started in the background."}
@@ -12,12 +12,10 @@ Endpoints:
 
 from fastapi import APIRouter, Depends, Query, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from utils.log_database import get_log_db
-from models.log_models import AuthLog, ActivityLog
 from middleware.admin_guard import verify_admin_token
+from services import log_viewer
 from typing import List, Dict, Any
-import math
 
 router = APIRouter(prefix="/logs", tags=["Admin Logs"])
 
@@ -32,6 +30,7 @@ def get_auth_logs(
     event_type: str = Query(None, description="Filter by event type (LOGIN, LOGOUT, etc.)"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=500, description="Items per page"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
     log_db: Session = Depends(get_log_db),
 ) -> Dict[str, Any]:
     """
@@ -42,46 +41,15 @@ def get_auth_logs(
     - event_type: Filter by event type (LOGIN, LOGOUT, TOKEN_REFRESH, etc.)
     - page: Page number (default 1)
     - limit: Items per page (default 50, max 500)
+    - cursor: next_cursor from the previous page (keyset paging)
     
     Response includes: id, email, event_type, timestamp_ist, timestamp_gmt, user_agent
     """
     try:
-        query = log_db.query(AuthLog)
-        
-        # Apply filters
-        if email:
-            query = query.filter(AuthLog.email.ilike(f"%{email}%"))
-        if event_type:
-            query = query.filter(AuthLog.event_type == event_type)
-        
-        # Count total
-        total = query.count()
-        total_pages = math.ceil(total / limit) if total > 0 else 0
-        
-        # Fetch paginated results (newest first)
-        logs = query.order_by(desc(AuthLog.id)).offset((page - 1) * limit).limit(limit).all()
-        
-        # Format response
-        logs_data = [
-            {
-                "id": log.id,
-                "user_id": log.user_id,
-                "email": log.email,
-                "event_type": log.event_type,
-                "timestamp_ist": log.timestamp_ist,
-                "timestamp_gmt": log.timestamp_gmt,
-                "user_agent": log.user_agent,
-            }
-            for log in logs
-        ]
-        
-        return {
-            "data": logs_data,
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "total_pages": total_pages,
-        }
+        return log_viewer.read_page(log_db, "auth", limit=limit, page=page, cursor=cursor, email=email,
+                                    event_type=event_type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -101,6 +69,7 @@ def get_activity_logs(
     status_code: int = Query(None, description="Filter by HTTP status code"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=500, description="Items per page"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
     log_db: Session = Depends(get_log_db),
 ) -> Dict[str, Any]:
     """
@@ -113,51 +82,15 @@ def get_activity_logs(
     - status_code: Filter by HTTP response code (200, 404, 500, etc.)
     - page: Page number (default 1)
     - limit: Items per page (default 50, max 500)
+    - cursor: next_cursor from the previous page (keyset paging)
     
     Response includes: id, email, action, method, status_code, timestamp_ist, timestamp_gmt
     """
     try:
-        query = log_db.query(ActivityLog)
-        
-        # Apply filters
-        if email:
-            query = query.filter(ActivityLog.email.ilike(f"%{email}%"))
-        if action:
-            query = query.filter(ActivityLog.action.ilike(f"%{action}%"))
-        if method:
-            query = query.filter(ActivityLog.method == method.upper())
-        if status_code:
-            query = query.filter(ActivityLog.status_code == status_code)
-        
-        # Count total
-        total = query.count()
-        total_pages = math.ceil(total / limit) if total > 0 else 0
-        
-        # Fetch paginated results (newest first)
-        logs = query.order_by(desc(ActivityLog.id)).offset((page - 1) * limit).limit(limit).all()
-        
-        # Format response
-        logs_data = [
-            {
-                "id": log.id,
-                "user_id": log.user_id,
-                "email": log.email,
-                "action": log.action,
-                "method": log.method,
-                "status_code": log.status_code,
-                "timestamp_ist": log.timestamp_ist,
-                "timestamp_gmt": log.timestamp_gmt,
-            }
-            for log in logs
-        ]
-        
-        return {
-            "data": logs_data,
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "total_pages": total_pages,
-        }
+        return log_viewer.read_page(log_db, "activity", limit=limit, page=page, cursor=cursor, email=email, action=action,
+                                    method=method, status_code=status_code)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -187,13 +120,9 @@ def get_all_logs(
     - limit: Items per page (default 50, max 500)
     """
     try:
-        if log_type == "auth":
-            return get_auth_logs(email=email, page=page, limit=limit, log_db=log_db)
-        elif log_type == "activity":
-            return get_activity_logs(email=email, page=page, limit=limit, log_db=log_db)
-        else:  # "all"
-            # For combined view, we just return auth logs (you can expand this if needed)
-            return get_auth_logs(email=email, page=page, limit=limit, log_db=log_db)
+        # For combined view, we just return auth logs (you can expand this if needed)
+        return log_viewer.read_page(log_db, "activity" if log_type == "activity" else "auth",
+                                    limit=limit, page=page, email=email)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
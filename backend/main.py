@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
@@ -21,10 +23,39 @@ async def lifespan(app: FastAPI):
     # Import models so Base.metadata knows about all tables
     import models  # noqa
     import models.log_models  # noqa - Initialize logging models
+    from services import venue_index
+    if venue_index.drop_outdated_table(engine):
+        print("[STARTUP] Dropped timetable_entry_venues with the old venue_id column (rebuilt below)")
     Base.metadata.create_all(bind=engine)
+    from utils.database import create_missing_indexes
+    for name in create_missing_indexes(engine, Base.metadata):
+        print(f"[STARTUP] Created index {name}")
     LoggingBase.metadata.create_all(bind=log_engine)
+    from utils import log_partitions
+    moved = log_partitions.migrate_legacy_rows(log_engine)
+    if moved:
+        print(f"[STARTUP] Moved {moved} log rows into monthly partitions")
     print("[STARTUP] All database tables initialized (college_scheduler.db and log.db)")
+    from utils.database import SessionLocal
+    with SessionLocal() as db:
+        backfilled = venue_index.backfill(db)
+    if backfilled is not None:
+        print(f"[STARTUP] Venue index backfilled ({backfilled} entry venues)")
+    from utils import log_writer
+    if settings.log_writer_enabled:
+        log_writer.get_writer().start()
+    from services import log_retention
+    retention_task = asyncio.create_task(log_retention.scheduler())
     yield
+    retention_task.cancel()
+    from services.generation_jobs import shutdown_executor
+    shutdown_executor()
+    from services import export_jobs
+    export_jobs.shutdown_executor()
+    # Last: requests finishing above may still queue log rows
+    final = log_writer.shutdown()
+    if final:
+        print(f"[SHUTDOWN] Log writer stopped: {final}")
 
 
 app = FastAPI(
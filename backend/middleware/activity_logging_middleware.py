@@ -1,16 +1,18 @@
 """
 Activity Logging Middleware for FastAPI.
 
-Automatically logs every HTTP request made by authenticated users
-to the centralized log.db database.
+Automatically logs every state-changing HTTP request (POST/PUT/PATCH/DELETE)
+to the centralized log.db database, with the user's email when the request
+carries a Bearer token.
 
 Public/unauthenticated requests can be logged optionally.
 """
 
-import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 import jwt
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
 from utils.activity_logging import log_activity
 from config.settings import settings
 
@@ -29,64 +31,95 @@ _PUBLIC_PREFIXES = (
     "/api/admin/login",  # Admin login (already logged separately)
 )
 
+# Map HTTP methods to requested action verbs. Only these are logged:
+# "FETCH" (GET) and other non-state-changing requests are ignored to prevent database bloating
+_METHOD_MAPPING = {
+    "POST": "Generate",
+    "PUT": "Edit",
+    "PATCH": "Edit",
+    "DELETE": "Delete",
+}
+
+_TOKEN_CACHE_MAX = 1024
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()  # signature -> (signed part, email)
+_token_cache_lock = threading.Lock()
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            value = value.decode("latin-1")
+            return value.split(" ")[1] if value.startswith("Bearer ") else None
+    return None
+
+
+def email_from_token(token: str) -> Optional[str]:
+    """The token's email claim, decoded once per token (keyed by signature).
+    Invalid tokens give None - the user is unauthenticated."""
+    signed, _, signature = token.rpartition(".")
+    with _token_cache_lock:
+        cached = _token_cache.get(signature)
+        # Same signature with a different header/payload is a forgery: decode (and reject) it
+        if cached is not None and cached[0] == signed:
+            _token_cache.move_to_end(signature)
+            return cached[1]
+    try:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm], options={"verify_exp": False})
+        email = payload.get("email")
+    except Exception:
+        email = None
+    with _token_cache_lock:
+        _token_cache[signature] = (signed, email)
+        if len(_token_cache) > _TOKEN_CACHE_MAX:
+            _token_cache.popitem(last=False)
+    return email
+
 
-class ActivityLoggingMiddleware(BaseHTTPMiddleware):
+class ActivityLoggingMiddleware:
     """
-    Middleware to automatically log API activity for authenticated users.
-    
+    Plain ASGI middleware to automatically log API activity.
+
     Features:
-    - Logs HTTP method, endpoint, and response status code
-    - Extracts user email from JWT Bearer token
-    - Skips logging for public/health endpoints
-    - Runs asynchronously without blocking request/response
+    - Logs mapped HTTP method, endpoint, and response status code
+    - Extracts user email from the JWT Bearer token, only for logged
+      requests and once per distinct token
+    - Skips logging for public/health endpoints and for GET/HEAD/OPTIONS
+    - Passes response bodies (including StreamingResponse) through untouched
+    - Only queues the row (utils/log_writer.py); log.db is written by a background thread
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        method = request.method
-        
-        # Skip logging for certain public paths
-        if path in _PUBLIC_PATHS:
-            return await call_next(request)
-        
-        if any(path.startswith(prefix) for prefix in _PUBLIC_PREFIXES):
-            return await call_next(request)
-        
-        # Extract user email from Authorization header (JWT Bearer token)
-        user_email = None
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm], options={"verify_exp": False})
-                user_email = payload.get("email")
-            except Exception:
-                # Invalid token, user is unauthenticated
-                pass
-        
-        # Strictly ignore all "FETCH" (GET) and non-state-changing requests to prevent database bloating
-        if method not in ["POST", "PUT", "PATCH", "DELETE"]:
-            return await call_next(request)
-
-        # Map HTTP methods to requested action verbs
-        method_mapping = {
-            "GET": "Fetch",
-            "POST": "Generate",
-            "PUT": "Edit",
-            "PATCH": "Edit",
-            "DELETE": "Delete"
-        }
-        mapped_action = method_mapping.get(method, method)
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        mapped_action = _METHOD_MAPPING.get(scope["method"])
+
+        # Skip non-state-changing requests and certain public paths
+        if mapped_action is None or path in _PUBLIC_PATHS or path.startswith(_PUBLIC_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        status_code = None
+
+        async def send_capturing_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         # Proceed with the request
-        response = await call_next(request)
-        
-        # Log the activity asynchronously (don't block response)
+        await self.app(scope, receive, send_capturing_status)
+        if status_code is None:
+            return
+
+        token = _bearer_token(scope)
+        # Queue the row for the batched log writer (no log.db I/O on the event loop)
         log_activity(
-            email=user_email,
+            email=email_from_token(token) if token else None,
             action=path,
             method=mapped_action,
-            status_code=response.status_code,
+            status_code=status_code,
         )
-        
-        return response
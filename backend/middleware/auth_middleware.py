@@ -1,6 +1,3 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-from fastapi.responses import JSONResponse
 import time
 
 # Public paths that skip authentication completely
@@ -17,23 +14,38 @@ _PUBLIC_PREFIXES = (
 _PUBLIC_EXACT = {"/", "/health", "/docs", "/openapi.json", "/redoc"}
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class AuthMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task/stream wrapping, so
+    streaming responses pass straight through).
+
+    Individual route-level auth is handled via FastAPI Depends() on specific
+    endpoints; this only adds X-Process-Time (seconds until the response
+    headers are sent) to non-public responses.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
         # Allow preflight requests
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
 
-        path = request.url.path
+        path = scope["path"]
 
         # Skip auth for public routes
-        if any(path.startswith(p) for p in _PUBLIC_PREFIXES) or path in _PUBLIC_EXACT:
-            return await call_next(request)
+        if path in _PUBLIC_EXACT or path.startswith(_PUBLIC_PREFIXES):
+            return await self.app(scope, receive, send)
 
-        # For all other routes, just pass through.
-        # Individual route-level auth is handled via FastAPI Depends() on specific endpoints.
-        # The global middleware only tracks timing.
         start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                process_time = time.time() - start_time
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", str(process_time).encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
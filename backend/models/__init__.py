@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, UniqueConstraint, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, UniqueConstraint, DateTime, Float
 from sqlalchemy.sql import func
 from utils.database import Base
 
@@ -68,7 +68,7 @@ class CourseRegistration(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column(String, ForeignKey('student_master.student_id'), nullable=False)
-    course_code = Column(String, ForeignKey('course_master.course_code'), nullable=False)
+    course_code = Column(String, nullable=False)
     semester = Column(Integer, nullable=False)
 
     __table_args__ = (
@@ -78,13 +78,26 @@ class CourseRegistration(Base):
 
 # Index for faster queries
 Index('idx_course_department_semester', CourseMaster.department_code, CourseMaster.semester)
+# Registrants of a course, in student_id order (section ranks)
+Index('idx_registration_course_sem_student', CourseRegistration.course_code, CourseRegistration.semester, CourseRegistration.student_id)
+
+
+class StudentTimetableCache(Base):
+    """Rendered /timetable/student/{id} response per student, rebuilt after
+    timetable writes for the registrants of the courses that changed
+    (services/student_cache). A missing row means "resolve on read"."""
+    __tablename__ = "student_timetable_cache"
+
+    student_id = Column(String, primary_key=True)
+    payload    = Column(String, nullable=False)                  # {"conflicts": [...], "timetable": [...]} JSON
+    built_at   = Column(String)
 
 
 class CourseFacultyMap(Base):
     __tablename__ = "course_faculty_map"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    course_code = Column(String, ForeignKey('course_master.course_code'), nullable=False)
+    course_code = Column(String, nullable=False)
     faculty_id = Column(String, ForeignKey('faculty_master.faculty_id'), nullable=False)
     department_code = Column(String, ForeignKey('department_master.department_code'), nullable=False)
     delivery_type = Column(String)
@@ -155,6 +168,25 @@ class VenueMaster(Base):
 
 # Index for fast retrieval by dept/sem
 Index('idx_timetable_dept_sem', TimetableEntry.department_code, TimetableEntry.semester)
+# Entries of a registered course (student timetables)
+Index('idx_timetable_course_sem', TimetableEntry.course_code, TimetableEntry.semester)
+
+
+class TimetableEntryVenue(Base):
+    """One row per venue an entry books ("LAB 1, LAB 2" -> two rows), so venue
+    timetables and venue clashes are index lookups. Maintained by
+    services/venue_index alongside every timetable write."""
+    __tablename__ = "timetable_entry_venues"
+
+    id            = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id      = Column(Integer, ForeignKey('timetable_entries.id', ondelete="CASCADE"), nullable=False, index=True)
+    venue_name    = Column(String, nullable=False)                  # single, stripped
+    day_of_week   = Column(String)                                  # copied from the entry
+    period_number = Column(Integer)
+
+    __table_args__ = (UniqueConstraint('entry_id', 'venue_name', name='uq_entry_venue'),)
+
+Index('idx_entry_venue_slot', TimetableEntryVenue.venue_name, TimetableEntryVenue.day_of_week, TimetableEntryVenue.period_number)
 
 class DepartmentVenueMap(Base):
     __tablename__ = "department_venue_map"
@@ -194,7 +226,7 @@ class CourseVenueMap(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     department_code = Column(String, ForeignKey('department_master.department_code'), nullable=False)
-    course_code = Column(String, ForeignKey('course_master.course_code'), nullable=False)
+    course_code = Column(String, nullable=False)
     venue_id = Column(Integer, ForeignKey('venue_master.venue_id'), nullable=False)
     venue_type = Column(String, default='BOTH')  # 'THEORY', 'LAB', or 'BOTH'
 
@@ -272,3 +304,97 @@ class ActivityLog(Base):
     event = Column(String, nullable=False)
     details = Column(String, nullable=True)
     user_email = Column(String, nullable=True)
+
+
+class SolverSolution(Base):
+    """The CP-SAT decision values behind the last generated timetable of a
+    dept/sem/modes. Saved rows can't tell solver placements from gap-fill extras,
+    so repair and warm-start runs read this instead when it still matches."""
+    __tablename__ = "solver_solutions"
+
+    id                = Column(Integer, primary_key=True, autoincrement=True)
+    department_code   = Column(String, nullable=False)
+    semester          = Column(Integer, nullable=False)
+    learning_mode_ids = Column(String, default="1,2", nullable=False)
+    assignment_json   = Column(String, nullable=False)   # {"theory": [[code, day, period]], "lab": [[code, day, bs]], "merged": [[day, bs]]}
+    created_at        = Column(String)
+
+    __table_args__ = (
+        UniqueConstraint('department_code', 'semester', 'learning_mode_ids', name='uix_solver_solution'),
+    )
+
+
+class SolverLease(Base):
+    """CP-SAT threads currently held by a running solve. The sum over live rows
+    is capped by settings.solver_max_total_threads across all processes."""
+    __tablename__ = "solver_leases"
+
+    id          = Column(String, primary_key=True)               # uuid4 hex
+    holder      = Column(String, nullable=True)                  # "dept|sem|pid N", for debugging
+    threads     = Column(Integer, nullable=False)
+    acquired_at = Column(String)
+    expires_at  = Column(String, nullable=False)                 # crashed holders stop counting after this
+
+
+class GenerationRun(Base):
+    """Telemetry for one generate_schedule call: phase timings, query counts,
+    model size and CP-SAT statistics (full detail in telemetry_json)."""
+    __tablename__ = "generation_runs"
+
+    id                = Column(Integer, primary_key=True, autoincrement=True)
+    department_code   = Column(String, nullable=False)
+    semester          = Column(Integer, nullable=False)
+    learning_mode_ids = Column(String, default="1,2")
+    status            = Column(String, nullable=False)              # SUCCEEDED | FAILED | CANCELLED | ERROR
+    error_type        = Column(String, nullable=True)
+    error             = Column(String, nullable=True)
+    started_at        = Column(String)
+    total_seconds     = Column(Float)
+    solve_seconds     = Column(Float, nullable=True)
+    query_count       = Column(Integer)
+    bool_vars         = Column(Integer, nullable=True)
+    constraints       = Column(Integer, nullable=True)
+    entries_saved     = Column(Integer, default=0)
+    telemetry_json    = Column(String)
+
+Index('idx_generation_run_dept_sem', GenerationRun.department_code, GenerationRun.semester)
+
+
+class DataVersion(Base):
+    """Change token per dataset (e.g. "timetable"). Writers replace the token in
+    the same transaction as their change; per-process caches compare it to decide
+    whether to rebuild, which keeps every gunicorn worker consistent."""
+    __tablename__ = "data_versions"
+
+    name       = Column(String, primary_key=True)
+    version    = Column(String, nullable=False)                  # uuid4 hex, opaque
+    updated_at = Column(String)
+
+
+class BackgroundJob(Base):
+    """Long-running work (timetable generation) executed outside the request cycle.
+    The row is the single source of truth for status/progress so that any API
+    worker can report on — or cancel — a job started by another worker."""
+    __tablename__ = "background_jobs"
+
+    id               = Column(String, primary_key=True)            # uuid4 hex
+    job_type         = Column(String, nullable=False, default='GENERATE')   # GENERATE | BATCH_GENERATE
+    parent_id        = Column(String, nullable=True)               # batch job this department run belongs to
+    dedup_key        = Column(String, nullable=True)               # e.g. "CSE|6|1,2"
+    status           = Column(String, nullable=False, default='QUEUED')  # QUEUED | RUNNING | CANCELLING | CANCELLED | SUCCEEDED | FAILED
+    phase            = Column(String, nullable=True)               # FETCH | MODEL_BUILD | SOLVE | SAVE
+    progress         = Column(Integer, default=0)                  # 0-100
+    cancel_requested = Column(Boolean, default=False)
+    params_json      = Column(String, nullable=False)
+    result_json      = Column(String, nullable=True)
+    error            = Column(String, nullable=True)
+    created_at       = Column(String)
+    started_at       = Column(String, nullable=True)
+    finished_at      = Column(String, nullable=True)
+    updated_at       = Column(String, nullable=True)               # heartbeat; stale detection
+
+Index('idx_background_job_parent', BackgroundJob.parent_id)
+# At most one active job per dedup key — enforced by the DB so concurrent API workers can't race
+Index('uix_background_job_active', BackgroundJob.dedup_key, unique=True,
+      sqlite_where=BackgroundJob.status.in_(['QUEUED', 'RUNNING', 'CANCELLING']),
+      postgresql_where=BackgroundJob.status.in_(['QUEUED', 'RUNNING', 'CANCELLING']))
@@ -5,10 +5,13 @@ Tables:
   - auth_logs: Tracks user authentication events (Login/Logout)
   - activity_logs: Tracks user API activity (HTTP requests)
 
-All timestamps are stored in both IST and GMT in readable format (AM/PM).
+All timestamps are stored in both IST and GMT in readable format (AM/PM),
+plus timestamp_ms (epoch milliseconds) for ordering and range queries.
+Rows live in monthly copies of these tables (activity_logs_YYYYMM, ...);
+see utils/log_partitions.py.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from utils.log_database import LoggingBase
 from datetime import datetime
@@ -44,6 +47,7 @@ class AuthLog(LoggingBase):
     timestamp_ist = Column(String(100), nullable=False, default=get_ist_time)  # e.g., "2026-04-20 11:30 AM"
     timestamp_gmt = Column(String(100), nullable=False, default=get_gmt_time)  # e.g., "2026-04-20 06:00 AM"
     user_agent = Column(String(512), nullable=True)  # Browser/client info
+    timestamp_ms = Column(BigInteger, nullable=True)  # Epoch milliseconds (UTC); picks the month partition
     
     # Indexes for faster queries
     __table_args__ = (
@@ -67,6 +71,7 @@ class ActivityLog(LoggingBase):
     status_code = Column(Integer, nullable=False)  # HTTP response code (200, 404, 500, etc.)
     timestamp_ist = Column(String(100), nullable=False, default=get_ist_time)  # e.g., "2026-04-20 11:30 AM"
     timestamp_gmt = Column(String(100), nullable=False, default=get_gmt_time)  # e.g., "2026-04-20 06:00 AM"
+    timestamp_ms = Column(BigInteger, nullable=True)  # Epoch milliseconds (UTC); picks the month partition
     
     # Indexes for faster queries
     __table_args__ = (
@@ -4,23 +4,24 @@ All working endpoints consolidated into a single APIRouter.
 Mounted at /api prefix in main.py so all paths are /api/...
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import json
 import math
-import io
 import re
 import os
 import copy
 import uuid as uuid_lib
 from datetime import datetime
 
-from utils.database import get_db
+from utils.database import get_db, get_read_db
 import models
 import schemas
+from services import data_version, student_cache, venue_index
+from services.response_cache import cached_json
 
 router = APIRouter()
 
@@ -294,8 +295,14 @@ def update_course(code: str, req: schemas.CourseUpdate, db: Session = Depends(ge
         db.query(models.CourseFacultyMap).filter_by(course_code=code).update({"course_code": new_code})
         db.query(models.CourseVenueMap).filter_by(course_code=code).update({"course_code": new_code})
         db.query(models.CommonCourseMap).filter_by(course_code=code).update({"course_code": new_code})
-        db.query(models.CourseRegistration).filter_by(course_code=code).update({"course_code": new_code})
-        db.query(models.TimetableEntry).filter_by(course_code=code).update({"course_code": new_code})
+        renamed_regs = db.query(models.CourseRegistration).filter_by(course_code=code).update({"course_code": new_code})
+        if renamed_regs:
+            data_version.bump(db, data_version.REGISTRATIONS)
+        renamed_entries = db.query(models.TimetableEntry).filter_by(course_code=code).update({"course_code": new_code})
+        if renamed_entries:
+            data_version.bump(db)
+        if renamed_regs or renamed_entries:
+            student_cache.invalidate(db, [new_code])
         for existing in existing_courses:
             db.delete(existing)
         db.flush()
@@ -747,6 +754,14 @@ DEFAULT_CONFIG = {
     },
     "honours_minor": {
         "slot_restriction": {"value": 8, "enabled": True, "type": "number", "label": "Honours/Minor Period", "description": "Period for honours/minor courses"}
+    },
+    "solver": {
+        "time_limit_seconds": {"value": 60, "enabled": True, "type": "number", "label": "Solver Time Limit (s)", "description": "Max CP-SAT search time per generation"},
+        "num_workers": {"value": 4, "enabled": True, "type": "number", "label": "Solver Threads", "description": "CP-SAT search workers (capped by the server-wide thread budget)"},
+        "relative_gap_limit": {"value": 0, "enabled": True, "type": "number", "label": "Relative Gap Limit", "description": "Stop once within this fraction of the best bound (0 = prove optimal)"},
+        "random_seed": {"value": 1, "enabled": True, "type": "number", "label": "Random Seed", "description": "CP-SAT random seed (1 = CP-SAT default)"},
+        "deterministic_time_limit": {"value": 0, "enabled": True, "type": "number", "label": "Deterministic Time Limit", "description": "Machine-independent work limit (0 = off)"},
+        "stop_at_first_solution": {"value": False, "enabled": True, "type": "boolean", "label": "Stop at First Solution", "description": "Return the first feasible timetable instead of optimizing"}
     }
 }
 
@@ -768,15 +783,9 @@ def merge_configs(default_c, saved_c):
     return result
 
 
-@router.post("/generate")
-async def generate_timetable(request: schemas.GenerateRequest, db: Session = Depends(get_db)):
-    from services.solver_engine import generate_schedule
-    import asyncio
-
-    def _get_config():
-        return db.query(models.SchedulerConfig).first()
-
-    config_record = await asyncio.to_thread(_get_config)
+def _resolve_hard_mode(db: Session) -> bool:
+    """Hard constraint mode comes from the saved scheduler config (validation.hard_constraint_mode)."""
+    config_record = db.query(models.SchedulerConfig).first()
     config = DEFAULT_CONFIG
     if config_record and config_record.config_json:
         if isinstance(config_record.config_json, str):
@@ -784,12 +793,30 @@ async def generate_timetable(request: schemas.GenerateRequest, db: Session = Dep
         else:
             config = config_record.config_json
 
-    hard_mode = False
     try:
         hard_mode_cfg = config.get("validation", {}).get("hard_constraint_mode", {})
-        hard_mode = bool(hard_mode_cfg.get("enabled", False))
+        return bool(hard_mode_cfg.get("enabled", False))
     except (KeyError, AttributeError):
-        pass
+        return False
+
+
+def _check_hint_source(request: schemas.GenerateRequest) -> None:
+    """400 for a warm start / repair hint source that doesn't fit the requested learning modes."""
+    from services.solver_hints import check_hint_source
+    modes = request.learning_mode_ids
+    try:
+        check_hint_source(request.hint_source, ",".join(sorted(map(str, modes))) if modes else "1,2")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/generate")
+async def generate_timetable(request: schemas.GenerateRequest, db: Session = Depends(get_db)):
+    from services.solver_engine import generate_schedule
+    import asyncio
+
+    _check_hint_source(request)
+    hard_mode = await asyncio.to_thread(_resolve_hard_mode, db)
 
     # Process CP-SAT solver in a separate thread so it doesn't block the async event loop
     result = await asyncio.to_thread(
@@ -800,7 +827,12 @@ async def generate_timetable(request: schemas.GenerateRequest, db: Session = Dep
         request.mentor_day,
         request.mentor_period,
         hard_mode,
-        request.learning_mode_ids
+        request.learning_mode_ids,
+        repair=request.repair,
+        repair_scope=request.repair_scope.model_dump() if request.repair_scope else None,
+        warm_start=request.warm_start,
+        hint_source=request.hint_source,
+        solver_params=request.solver.model_dump(exclude_none=True) if request.solver else None,
     )
 
     if isinstance(result, bool):
@@ -816,6 +848,8 @@ async def generate_timetable(request: schemas.GenerateRequest, db: Session = Dep
             raise HTTPException(status_code=400, detail=f"Cannot generate: {total_ws} weekly sessions. Schedule may be overloaded.")
 
     if not result.get("success", False):
+        if any(e.get("type") == "SOLVER_BUSY" for e in result.get("errors", [])):
+            raise HTTPException(status_code=503, detail=result["errors"][0]["suggestion"])
         if result.get("errors"):
             raise HTTPException(status_code=422, detail={
                 "message": "Resource verification failed.",
@@ -825,24 +859,142 @@ async def generate_timetable(request: schemas.GenerateRequest, db: Session = Dep
         else:
             raise HTTPException(status_code=400, detail="Solver failed to find a valid arrangement.")
 
-    return {
+    response = {
         "status": "success",
         "message": f"Successfully generated and saved {result.get('entries_saved', 0)} entries.",
         "warnings": result.get("warnings", []),
         "entries_saved": result.get("entries_saved", 0)
     }
+    if "repair" in result:
+        response["repair"] = result["repair"]
+    if "solve_stats" in result:
+        response["solve_stats"] = result["solve_stats"]
+    if "telemetry" in result:
+        response["telemetry"] = result["telemetry"]
+    return response
+
+
+@router.get("/generate/runs")
+def list_generation_runs(department_code: Optional[str] = None, semester: Optional[int] = None,
+                         status: Optional[str] = None, limit: int = 50, db: Session = Depends(get_read_db)):
+    """Recent generation runs with timings, query counts and model size (newest first)."""
+    from services.solver_telemetry import run_to_dict
+    query = db.query(models.GenerationRun)
+    if department_code:
+        query = query.filter_by(department_code=department_code)
+    if semester:
+        query = query.filter_by(semester=semester)
+    if status:
+        query = query.filter_by(status=status)
+    runs = query.order_by(models.GenerationRun.id.desc()).limit(max(1, min(limit, 500))).all()
+    return [run_to_dict(r) for r in runs]
+
+
+@router.get("/generate/runs/{run_id}")
+def get_generation_run(run_id: int, db: Session = Depends(get_read_db)):
+    from services.solver_telemetry import run_to_dict
+    run = db.query(models.GenerationRun).filter_by(id=run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Generation run not found")
+    return run_to_dict(run, detail=True)
+
+
+# ============================================
+# GENERATION JOBS (non-blocking /generate)
+# ============================================
+
+@router.post("/generate/jobs", status_code=202)
+def submit_generation_job(request: schemas.GenerateRequest, db: Session = Depends(get_db)):
+    """Queue a generation run and return its job id immediately.
+    A job already queued/running for the same dept/sem/modes is returned instead of starting a second solve."""
+    from services.generation_jobs import submit_generation_job as _submit, job_to_dict
+
+    _check_hint_source(request)
+    params = {
+        "department_code": request.department_code,
+        "semester": request.semester,
+        "mentor_day": request.mentor_day,
+        "mentor_period": request.mentor_period,
+        "hard_mode": _resolve_hard_mode(db),
+        "learning_mode_ids": request.learning_mode_ids,
+        "repair": request.repair,
+        "repair_scope": request.repair_scope.model_dump() if request.repair_scope else None,
+        "warm_start": request.warm_start,
+        "hint_source": request.hint_source,
+        "solver_params": request.solver.model_dump(exclude_none=True) if request.solver else None,
+    }
+    job, created = _submit(db, params)
+    return {**job_to_dict(job), "deduplicated": not created}
+
+
+@router.post("/generate/batch", status_code=202)
+def submit_batch_generation(request: schemas.BatchGenerateRequest, db: Session = Depends(get_db)):
+    """Generate every listed department of a semester. Independent departments run in parallel;
+    departments sharing faculty/venues/common courses run in ordered rounds. Poll via /generate/jobs/{id}."""
+    from services.batch_generation import submit_batch_job, BatchConflictError
+    from services.generation_jobs import job_to_dict
+
+    try:
+        batch = submit_batch_job(
+            db, request.semester, request.mentor_day, request.mentor_period,
+            hard_mode=_resolve_hard_mode(db),
+            learning_mode_ids=request.learning_mode_ids,
+            departments=request.department_codes,
+            mentor_days=request.mentor_days,
+        )
+    except BatchConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_to_dict(batch)
+
+
+@router.get("/generate/batch/plan")
+def get_batch_generation_plan(semester: int = Query(...), department_codes: Optional[List[str]] = Query(None), db: Session = Depends(get_db)):
+    """Preview the department interaction graph and round order without generating anything."""
+    from services.batch_generation import plan_batch
+    return plan_batch(db, semester, department_codes)
+
+
+@router.get("/generate/jobs/{job_id}")
+def get_generation_job(job_id: str, db: Session = Depends(get_read_db)):
+    from services.generation_jobs import job_to_dict
+    job = db.query(models.BackgroundJob).filter_by(id=job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    data = job_to_dict(job)
+    if job.job_type == "BATCH_GENERATE":
+        from services.batch_generation import get_children
+        data["children"] = [
+            {"job_id": c.id, "department_code": json.loads(c.params_json).get("department_code"),
+             "status": c.status, "phase": c.phase, "progress": c.progress or 0, "error": c.error}
+            for c in get_children(db, job.id)
+        ]
+    return data
+
+
+@router.delete("/generate/jobs/{job_id}")
+def cancel_generation_job(job_id: str, db: Session = Depends(get_db)):
+    from services.generation_jobs import cancel_job, job_to_dict
+    job = db.query(models.BackgroundJob).filter_by(id=job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(cancel_job(db, job))
 
 
 @router.get("/timetable", response_model=List[schemas.TimetableEntry])
-def get_timetable(department_code: Optional[str] = None, semester: Optional[int] = None, learning_mode_ids: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.TimetableEntry)
-    if department_code and department_code.strip():
-        query = query.filter(models.TimetableEntry.department_code == department_code)
-    if semester:
-        query = query.filter(models.TimetableEntry.semester == semester)
-    if learning_mode_ids:
-        query = query.filter(models.TimetableEntry.learning_mode_ids == learning_mode_ids)
-    return query.all()
+def get_timetable(request: Request, department_code: Optional[str] = None, semester: Optional[int] = None, learning_mode_ids: Optional[str] = None, db: Session = Depends(get_read_db)):
+    def load():
+        query = db.query(models.TimetableEntry)
+        if department_code and department_code.strip():
+            query = query.filter(models.TimetableEntry.department_code == department_code)
+        if semester:
+            query = query.filter(models.TimetableEntry.semester == semester)
+        if learning_mode_ids:
+            query = query.filter(models.TimetableEntry.learning_mode_ids == learning_mode_ids)
+        return query.all()
+    return cached_json(request, db, ("timetable", department_code, semester, learning_mode_ids), load,
+                       response_model=List[schemas.TimetableEntry])
 
 @router.post("/timetable/save")
 def save_timetable(request: schemas.TimetableSaveRequest, db: Session = Depends(get_db)):
@@ -850,10 +1002,12 @@ def save_timetable(request: schemas.TimetableSaveRequest, db: Session = Depends(
     mode_str = request.learning_mode_ids or '1,2'
     
     # Delete only the specific mode's entries for this dept/sem
-    db.query(models.TimetableEntry).filter_by(
-        department_code=request.department_code, semester=request.semester,
-        learning_mode_ids=mode_str
-    ).delete()
+    scope = (models.TimetableEntry.department_code == request.department_code,
+             models.TimetableEntry.semester == request.semester,
+             models.TimetableEntry.learning_mode_ids == mode_str)
+    touched_courses = student_cache.touched_courses(db, *scope, new_codes=(e.course_code for e in request.entries))
+    venue_index.forget(db, *scope)
+    db.query(models.TimetableEntry).filter(*scope).delete()
     
     new_entries = [models.TimetableEntry(**entry.dict()) for entry in request.entries]
     # Ensure all saved entries have the correct mode string
@@ -861,14 +1015,29 @@ def save_timetable(request: schemas.TimetableSaveRequest, db: Session = Depends(
         e.learning_mode_ids = mode_str
         
     db.add_all(new_entries)
+    data_version.bump(db)
     try:
+        db.flush()
+        venue_index.reindex(db, *scope)
+        student_cache.invalidate(db, touched_courses, request.semester)
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Save failed: {str(e)}")
+    _refresh_student_cache(db, touched_courses, request.semester)
     return {"status": "success"}
 
 
+def _refresh_student_cache(db: Session, course_codes, semester: int):
+    """Rebuild cached student timetables after a committed write. A failure
+    only leaves rows invalidated; student_cache.read() rebuilds them on demand."""
+    try:
+        student_cache.refresh(db, course_codes, semester)
+    except Exception as e:
+        db.rollback()
+        print(f"[STUDENT CACHE] Refresh failed for {sorted(course_codes)} sem {semester}: {e}")
+
+
 # ============================================
 # CONFLICTS
 # ============================================
@@ -876,39 +1045,29 @@ def save_timetable(request: schemas.TimetableSaveRequest, db: Session = Depends(
 # Note: Frontend calls ${API_URL}/api/conflicts which becomes /api/api/conflicts
 # So we register at /api/conflicts to match 
 @router.get("/api/conflicts")
-def get_conflicts(department_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_db)):
+def get_conflicts(department_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_read_db)):
     from services.conflict_detector import detect_conflicts
     return detect_conflicts(db, department_code, semester)
 
 @router.post("/check-conflicts")
-def check_conflicts(request: schemas.ConflictCheckRequest, db: Session = Depends(get_db)):
+def check_conflicts(request: schemas.ConflictCheckRequest, stream: bool = False, db: Session = Depends(get_db)):
+    """Cross-department clashes for editor entries. ?stream=true answers with NDJSON:
+    one conflict per line as it is found, then a {"type": "summary"} line."""
+    from services.occupancy import get_index, find_conflicts
+    conflicts = find_conflicts(get_index(db), request.entries, request.department_code, request.semester)
+    if stream:
+        def ndjson():
+            counts = {"faculty": 0, "venue": 0}
+            for c in conflicts:
+                counts[c["type"]] += 1
+                yield json.dumps(c) + "\n"
+            yield json.dumps({"type": "summary", "has_conflicts": any(counts.values()),
+                              "faculty_conflicts": counts["faculty"], "venue_conflicts": counts["venue"]}) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
     faculty_conflicts = []
     venue_conflicts = []
-    for entry in request.entries:
-        day = entry.day_of_week
-        period = entry.period_number
-        if entry.faculty_name and entry.faculty_name.strip() and entry.faculty_name not in ('', 'Unassigned'):
-            busy = db.query(models.TimetableEntry).filter(
-                models.TimetableEntry.day_of_week == day,
-                models.TimetableEntry.period_number == period,
-                models.TimetableEntry.faculty_name == entry.faculty_name,
-                ~((models.TimetableEntry.department_code == request.department_code) & (models.TimetableEntry.semester == request.semester))
-            ).all()
-            for b in busy:
-                msg = f"{entry.faculty_name} is occupied by {b.department_code} Sem {b.semester} ({b.course_code}) at {day} Period {period}"
-                if msg not in [c['message'] for c in faculty_conflicts]:
-                    faculty_conflicts.append({"type": "faculty", "name": entry.faculty_name, "day": day, "period": period, "occupied_by_dept": b.department_code, "occupied_by_sem": b.semester, "occupied_by_course": b.course_code, "message": msg})
-        if entry.venue_name and entry.venue_name.strip():
-            busy = db.query(models.TimetableEntry).filter(
-                models.TimetableEntry.day_of_week == day,
-                models.TimetableEntry.period_number == period,
-                models.TimetableEntry.venue_name == entry.venue_name,
-                ~((models.TimetableEntry.department_code == request.department_code) & (models.TimetableEntry.semester == request.semester))
-            ).all()
-            for b in busy:
-                msg = f"{entry.venue_name} is occupied by {b.department_code} Sem {b.semester} ({b.course_code}) at {day} Period {period}"
-                if msg not in [c['message'] for c in venue_conflicts]:
-                    venue_conflicts.append({"type": "venue", "name": entry.venue_name, "day": day, "period": period, "occupied_by_dept": b.department_code, "occupied_by_sem": b.semester, "occupied_by_course": b.course_code, "message": msg})
+    for c in conflicts:
+        (faculty_conflicts if c["type"] == "faculty" else venue_conflicts).append(c)
     return {"has_conflicts": len(faculty_conflicts) > 0 or len(venue_conflicts) > 0, "faculty_conflicts": faculty_conflicts, "venue_conflicts": venue_conflicts}
 
 
@@ -917,15 +1076,9 @@ def check_conflicts(request: schemas.ConflictCheckRequest, db: Session = Depends
 # ============================================
 
 @router.get("/available-faculty")
-def get_available_faculty(department_code: str = Query(...), day: str = Query(...), period: int = Query(...), course_code: str = None, show_all: bool = False, db: Session = Depends(get_db)):
-    busy_names = set()
-    busy_entries = db.query(models.TimetableEntry.faculty_name).filter(
-        models.TimetableEntry.day_of_week == day, models.TimetableEntry.period_number == period,
-        models.TimetableEntry.faculty_name.isnot(None), models.TimetableEntry.faculty_name != '',
-        models.TimetableEntry.faculty_name != 'Unassigned'
-    ).all()
-    for (name,) in busy_entries:
-        busy_names.add(name)
+def get_available_faculty(department_code: str = Query(...), day: str = Query(...), period: int = Query(...), course_code: str = None, show_all: bool = False, db: Session = Depends(get_read_db)):
+    from services.occupancy import get_index
+    busy_names = get_index(db).busy_faculty_names(day, period)
     base_faculty = []
     if show_all:
         base_faculty = db.query(models.FacultyMaster).all()
@@ -941,14 +1094,9 @@ def get_available_faculty(department_code: str = Query(...), day: str = Query(..
     return result
 
 @router.get("/available-venues")
-def get_available_venues(department_code: str = Query(...), semester: int = Query(...), day: str = Query(...), period: int = Query(...), course_code: str = None, show_all: bool = False, db: Session = Depends(get_db)):
-    busy_venue_names = set()
-    busy_entries = db.query(models.TimetableEntry.venue_name).filter(
-        models.TimetableEntry.day_of_week == day, models.TimetableEntry.period_number == period,
-        models.TimetableEntry.venue_name.isnot(None), models.TimetableEntry.venue_name != ''
-    ).all()
-    for (name,) in busy_entries:
-        busy_venue_names.add(name)
+def get_available_venues(department_code: str = Query(...), semester: int = Query(...), day: str = Query(...), period: int = Query(...), course_code: str = None, show_all: bool = False, db: Session = Depends(get_read_db)):
+    from services.occupancy import get_index
+    busy_venue_names = get_index(db).busy_venues(day, period)
     base_venues = []
     if show_all:
         base_venues = db.query(models.VenueMaster).all()
@@ -979,7 +1127,10 @@ def get_available_venues(department_code: str = Query(...), semester: int = Quer
 # ============================================
 
 @router.get("/timetable/faculty/{faculty_id}")
-def get_faculty_timetable(faculty_id: str, db: Session = Depends(get_db)):
+def get_faculty_timetable(faculty_id: str, request: Request, db: Session = Depends(get_read_db)):
+    return cached_json(request, db, ("faculty", faculty_id), lambda: _faculty_timetable(db, faculty_id))
+
+def _faculty_timetable(db: Session, faculty_id: str):
     entries = db.query(models.TimetableEntry).filter_by(faculty_id=faculty_id).all()
     slot_map = {}
     conflicts = set()
@@ -995,45 +1146,27 @@ def get_faculty_timetable(faculty_id: str, db: Session = Depends(get_db)):
     return {"conflicts": list(conflicts), "timetable": entries}
 
 @router.get("/timetable/student/{student_id}")
-def get_student_timetable(student_id: str, db: Session = Depends(get_db)):
-    student = db.query(models.StudentMaster).filter_by(student_id=student_id).first()
-    if not student:
+def get_student_timetable(student_id: str, request: Request, db: Session = Depends(get_db)):
+    from services.response_cache import json_response
+    payload = student_cache.read(db, student_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Student not found")
-    regs = db.query(models.CourseRegistration).filter_by(student_id=student_id).all()
-    valid_entries = {}
-    student_semester = None
-    dept_master_slots = []
-    for r in regs:
-        if student_semester is None:
-            student_semester = r.semester
-            dept_master_slots = db.query(models.TimetableEntry).filter_by(department_code=student.department_code, semester=student_semester).all()
-        c_entries = db.query(models.TimetableEntry).filter_by(course_code=r.course_code, semester=r.semester).all()
-        for e in c_entries:
-            if e.section_number == 1 or e.section_number is None:
-                k = (e.course_code, e.day_of_week, e.period_number)
-                if k not in valid_entries:
-                    valid_entries[k] = e
-    entries = list(valid_entries.values())
-    slot_map = {}
-    conflicts = set()
-    for e in entries:
-        key = (e.day_of_week, e.period_number)
-        slot_map.setdefault(key, []).append(e)
-    for key, items in slot_map.items():
-        if len(items) > 1:
-            course_codes = set(i.course_code for i in items)
-            if len(course_codes) > 1:
-                courses_str = " & ".join(course_codes)
-                conflicts.add(f"Conflict on {key[0]} Period {key[1]}: {courses_str}")
-    return {"conflicts": list(conflicts), "timetable": entries}
+    return json_response(request, payload.encode("utf-8"))
+
+@router.get("/timetable/students")
+def get_cohort_timetables(department_code: str, semester: int, request: Request, db: Session = Depends(get_read_db)):
+    """Every student's timetable for a department/semester in one pass (for printing)."""
+    from services.student_timetable import encode_views, resolve_cohort
+    return cached_json(request, db, ("students", department_code, semester),
+                       lambda: encode_views(resolve_cohort(db, department_code, semester)),
+                       depends=(data_version.TIMETABLE, data_version.REGISTRATIONS), encoded=True)
 
 @router.get("/timetable/venue/{venue_name}")
-def get_venue_timetable(venue_name: str, db: Session = Depends(get_db)):
-    all_entries = db.query(models.TimetableEntry).all()
-    raw_entries = []
-    for e in all_entries:
-        if e.venue_name and venue_name in [v.strip() for v in e.venue_name.split(",")]:
-            raw_entries.append(e)
+def get_venue_timetable(venue_name: str, request: Request, db: Session = Depends(get_read_db)):
+    return cached_json(request, db, ("venue", venue_name), lambda: _venue_timetable(db, venue_name))
+
+def _venue_timetable(db: Session, venue_name: str):
+    raw_entries = venue_index.entries_in_venue(db, venue_name)
     conflicts = set()
     slot_groups = {}
     for e in raw_entries:
@@ -1053,12 +1186,19 @@ def get_venue_timetable(venue_name: str, db: Session = Depends(get_db)):
     return {"conflicts": list(conflicts), "timetable": entries}
 
 
+@router.get("/timetable/cache/stats")
+def get_response_cache_stats():
+    """Hit/miss counters of this worker's timetable response cache."""
+    from services.response_cache import cache
+    return cache.stats()
+
+
 # ============================================
 # STUDENTS & REGISTRATIONS
 # ============================================
 
 @router.get("/students", response_model=List[schemas.StudentResponse])
-def get_students(department_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_db)):
+def get_students(department_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_read_db)):
     query = db.query(models.StudentMaster)
     if department_code:
         query = query.filter_by(department_code=department_code)
@@ -1073,6 +1213,7 @@ def create_student(req: schemas.StudentCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Student ID already exists")
     student = models.StudentMaster(**req.dict())
     db.add(student)
+    data_version.bump(db, data_version.REGISTRATIONS)
     db.commit()
     db.refresh(student)
     return student
@@ -1083,14 +1224,17 @@ def delete_student(student_id: str, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     regs = db.query(models.CourseRegistration).filter_by(student_id=student_id).all()
+    # Classmates' section ranks shift too
+    student_cache.invalidate(db, {r.course_code for r in regs}, student_ids=[student_id])
     for r in regs:
         db.delete(r)
     db.delete(student)
+    data_version.bump(db, data_version.REGISTRATIONS)
     db.commit()
     return {"status": "success", "student_id": student_id}
 
 @router.get("/registrations", response_model=List[schemas.CourseRegistrationResponse])
-def get_registrations(course_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_db)):
+def get_registrations(course_code: Optional[str] = None, semester: Optional[int] = None, db: Session = Depends(get_read_db)):
     query = db.query(models.CourseRegistration)
     if course_code: query = query.filter_by(course_code=course_code)
     if semester: query = query.filter_by(semester=semester)
@@ -1106,6 +1250,8 @@ def create_registration(req: schemas.CourseRegistrationCreate, db: Session = Dep
         raise HTTPException(status_code=400, detail="Student already registered for this course")
     reg = models.CourseRegistration(**req.dict())
     db.add(reg)
+    data_version.bump(db, data_version.REGISTRATIONS)
+    student_cache.invalidate(db, [req.course_code], req.semester, student_ids=[req.student_id])
     db.commit()
     db.refresh(reg)
     return reg
@@ -1115,7 +1261,9 @@ def delete_registration(reg_id: int, db: Session = Depends(get_db)):
     reg = db.query(models.CourseRegistration).filter_by(id=reg_id).first()
     if not reg:
         raise HTTPException(status_code=404, detail="Registration not found")
+    student_cache.invalidate(db, [reg.course_code], reg.semester)
     db.delete(reg)
+    data_version.bump(db, data_version.REGISTRATIONS)
     db.commit()
     return {"status": "success", "id": reg_id}
 
@@ -1241,8 +1389,15 @@ def set_common_course_venue(req: CommonCourseVenueRequest, db: Session = Depends
         raise HTTPException(status_code=404, detail=f"No common course found for {req.course_code} semester {req.semester}")
     vtype = (req.venue_type or 'BOTH').upper()
     db.query(models.CommonCourseMap).filter_by(course_code=req.course_code, semester=req.semester).update({"venue_name": req.venue_name, "venue_type": vtype})
-    db.query(models.TimetableEntry).filter_by(course_code=req.course_code, semester=req.semester).update({"venue_name": req.venue_name})
+    scope = (models.TimetableEntry.course_code == req.course_code, models.TimetableEntry.semester == req.semester)
+    venue_changed = db.query(models.TimetableEntry).filter(*scope).update({"venue_name": req.venue_name})
+    if venue_changed:
+        venue_index.reindex(db, *scope)
+        data_version.bump(db)
+        student_cache.invalidate(db, [req.course_code], req.semester)
     db.commit()
+    if venue_changed:
+        _refresh_student_cache(db, [req.course_code], req.semester)
     dept_codes = [r.department_code for r in rows]
     return {"status": "saved", "course_code": req.course_code, "semester": req.semester, "venue_name": req.venue_name, "venue_type": vtype, "synced_departments": dept_codes}
 
@@ -1389,104 +1544,70 @@ def validate_user_constraint(data: schemas.UserConstraintCreate, db: Session = D
 # ============================================
 
 @router.get("/export/timetable/excel")
-def export_timetable_excel(department_code: str = None, semester: int = None, db: Session = Depends(get_db)):
+def export_timetable_excel(department_code: str = None, semester: int = None,
+                           sheets: Optional[str] = Query(None, description="One sheet per department, section, faculty or venue"),
+                           db: Session = Depends(get_read_db)):
     try:
-        import openpyxl
-        from openpyxl.utils import get_column_letter
-        from openpyxl.styles import Alignment, PatternFill, Border, Side, Font
+        import openpyxl  # noqa: F401
     except ImportError:
         raise HTTPException(status_code=500, detail="openpyxl not installed")
+    from services import excel_export
 
-    slots = db.query(models.SlotMaster).order_by(models.SlotMaster.day_of_week, models.SlotMaster.period_number).all()
-    if not slots:
+    if sheets is not None and sheets not in excel_export.SHEET_KINDS:
+        raise HTTPException(status_code=400, detail=f"sheets must be one of: {', '.join(excel_export.SHEET_KINDS)}")
+    grid = excel_export.Grid.from_slots(db)
+    if grid is None:
         raise HTTPException(status_code=400, detail="No slots configured")
 
-    days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    active_days = [d for d in days_order if any(s.day_of_week == d for s in slots)]
-    if not active_days: active_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-
-    max_period = max([s.period_number for s in slots], default=8)
-    periods = list(range(1, max_period + 1))
-
-    query = db.query(models.TimetableEntry)
-    if department_code: query = query.filter(models.TimetableEntry.department_code == department_code)
-    if semester: query = query.filter(models.TimetableEntry.semester == semester)
-    entries = query.all()
-
-    timetable_dict = {}
-    for e in entries:
-        key = (e.day_of_week, e.period_number)
-        timetable_dict.setdefault(key, []).append(e)
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Timetable"
-
-    thin = Side(border_style="thin", color="D1D5DB")
-    border_all = Border(top=thin, left=thin, right=thin, bottom=thin)
-    fill_header = PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid")
-    fill_day = PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid")
-    fill_lab = PatternFill(start_color="FEF9C3", end_color="FEF9C3", fill_type="solid")
-    fill_class = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-    fill_empty = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-    font_bold = Font(bold=True, color="1F2937", size=11)
-    align_center = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-    header_row = 2
-    d_cell = ws.cell(row=header_row, column=1, value="DAY / PERIOD")
-    d_cell.font = font_bold
-    d_cell.alignment = align_center
-    d_cell.fill = fill_day
-    d_cell.border = border_all
-    ws.column_dimensions['A'].width = 16
-
-    for i, p in enumerate(periods):
-        col = i + 2
-        slot = next((s for s in slots if s.period_number == p and s.day_of_week == 'Monday'), None)
-        time_str = f"{slot.start_time} - {slot.end_time}" if slot else ""
-        header_text = f"Period {p}\n({time_str})"
-        c = ws.cell(row=header_row, column=col, value=header_text)
-        c.font = Font(bold=True, color="374151", size=10)
-        c.alignment = align_center
-        c.fill = fill_header
-        c.border = border_all
-        ws.column_dimensions[get_column_letter(col)].width = 24
-
-    current_row = header_row + 1
-    for day in active_days:
-        dc = ws.cell(row=current_row, column=1, value=day[:3].upper())
-        dc.font = Font(bold=True, size=12, color="1F2937")
-        dc.alignment = align_center
-        dc.fill = fill_day
-        dc.border = border_all
-        ws.row_dimensions[current_row].height = 85
-
-        for i, p in enumerate(periods):
-            col = i + 2
-            cell_entries = timetable_dict.get((day, p), [])
-            if not cell_entries:
-                cell_text = "Empty Slot"
-                fill = fill_empty
-                cell_font = Font(italic=True, color="9CA3AF", size=10)
-            else:
-                is_lab = any(e.session_type and e.session_type.upper() == 'LAB' for e in cell_entries)
-                lines = []
-                for e in cell_entries:
-                    block = f"{e.course_code}\n{e.course_name or ''}\n({e.faculty_name or 'Unassigned'})\n[{e.venue_name or ''}]"
-                    lines.append(block)
-                cell_text = "\n---\n".join(lines)
-                fill = fill_lab if is_lab else fill_class
-                cell_font = Font(bold=False, size=10, color="111827")
-
-            c = ws.cell(row=current_row, column=col, value=cell_text)
-            c.alignment = align_center
-            c.fill = fill
-            c.border = border_all
-            c.font = cell_font
-        current_row += 1
-
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    headers = {'Content-Disposition': f'attachment; filename="timetable_{department_code or "all"}_{semester or "all"}.xlsx"'}
-    return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    # Built into a temporary file, then streamed in chunks
+    output = excel_export.export_file(db, sheets, department_code, semester, grid)
+    name = f"timetable_{department_code or 'all'}_{semester or 'all'}" + (f"_by_{sheets}" if sheets else "")
+    headers = {'Content-Disposition': f'attachment; filename="{name}.xlsx"'}
+    return StreamingResponse(excel_export.iter_file(output), headers=headers,
+                             media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+def _export_job_dict(job: models.BackgroundJob) -> dict:
+    from services.generation_jobs import job_to_dict
+    data = job_to_dict(job)
+    if job.status == "SUCCEEDED":
+        data["download_url"] = f"/api/export/jobs/{job.id}/download"
+    return data
+
+
+@router.post("/export/jobs", status_code=202)
+def submit_export_job(request: schemas.ExportJobRequest, db: Session = Depends(get_db)):
+    """Render a (multi-sheet) workbook in the background. An export of unchanged
+    data comes back already SUCCEEDED from the artifact cache."""
+    from services.export_jobs import submit_export_job as _submit
+    job, created = _submit(db, request.model_dump())
+    return {**_export_job_dict(job), "deduplicated": not created}
+
+
+def _get_export_job(db: Session, job_id: str) -> models.BackgroundJob:
+    job = db.query(models.BackgroundJob).filter_by(id=job_id, job_type="EXPORT").first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.get("/export/jobs/{job_id}")
+def get_export_job(job_id: str, db: Session = Depends(get_read_db)):
+    return _export_job_dict(_get_export_job(db, job_id))
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export(job_id: str, db: Session = Depends(get_read_db)):
+    from services.export_jobs import job_artifact
+    job = _get_export_job(db, job_id)
+    if job.status != "SUCCEEDED":
+        raise HTTPException(status_code=409, detail=f"Export is {job.status}")
+    path = job_artifact(job)
+    if path is None:
+        raise HTTPException(status_code=410, detail="Export artifact expired; submit the export again")
+    params = json.loads(job.params_json)
+    name = f"timetable_{params.get('department_code') or 'all'}_{params.get('semester') or 'all'}"
+    if params.get("sheets"):
+        name += f"_by_{params['sheets']}"
+    return FileResponse(path, filename=f"{name}.xlsx",
+                        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
@@ -1,13 +1,46 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 # --- Requests ---
+class RepairScope(BaseModel):
+    courses: Optional[List[str]] = None       # course codes to re-solve
+    faculty_ids: Optional[List[str]] = None   # re-solve every course these faculty teach
+    slots: Optional[List[List]] = None        # [["Monday", 3], ...] — courses placed here are re-solved
+
+class SolverParams(BaseModel):
+    """Per-request CP-SAT overrides; unset fields use the "solver" config category."""
+    time_limit_seconds: Optional[float] = None
+    num_workers: Optional[int] = None
+    relative_gap_limit: Optional[float] = None
+    random_seed: Optional[int] = None
+    deterministic_time_limit: Optional[float] = None
+    stop_at_first_solution: Optional[bool] = None
+
 class GenerateRequest(BaseModel):
     department_code: str
     semester: int
     mentor_day: str
     mentor_period: int = 8
     learning_mode_ids: Optional[List[int]] = None  # None means all modes (combined)
+    repair: bool = False  # Keep unchanged courses where they are; only re-solve what changed
+    repair_scope: Optional[RepairScope] = None
+    warm_start: bool = False  # Hint the solver with the previous timetable (no pinning)
+    hint_source: Literal["entries", "snapshot"] = "entries"  # "snapshot" holds all modes: combined runs only
+    solver: Optional[SolverParams] = None
+
+class BatchGenerateRequest(BaseModel):
+    semester: int
+    mentor_day: str
+    mentor_period: int = 8
+    department_codes: Optional[List[str]] = None  # None means every department with courses this semester
+    mentor_days: Optional[Dict[str, str]] = None  # Per-department mentor day overrides
+    learning_mode_ids: Optional[List[int]] = None
+
+class ExportJobRequest(BaseModel):
+    department_code: Optional[str] = None  # None means every department
+    semester: Optional[int] = None
+    sheets: Optional[Literal["department", "section", "faculty", "venue"]] = "department"  # None = one combined grid
+    format: Literal["xlsx"] = "xlsx"
 
 class SemesterConfigUpdate(BaseModel):
     academic_year: str
@@ -2,13 +2,12 @@ import os
 import json
 from datetime import datetime, timedelta
 import jwt
-import math
 from typing import Dict, Any, List
 from config.settings import settings
 from utils.security import verify_password, hash_password
 from core.exceptions import AppException
 from sqlalchemy.orm import Session
-from models.log_models import AuthLog, ActivityLog
+from services import log_viewer
 from utils.auth_logging import log_login, log_failed_login
 
 class AdminService:
@@ -59,49 +58,12 @@ class AdminService:
         return hash_password(plain_text_password)
 
     def read_logs(self, log_type: str, page: int = 1, limit: int = 50) -> Dict[str, Any]:
-        """Reads logs from ActivityLog table"""
+        """Reads a page of auth or activity logs (services/log_viewer.py)"""
         if not self.db:
             return {"data": [], "total": 0, "page": page, "total_pages": 0}
             
         try:
-            if log_type == "auth":
-                query = self.db.query(AuthLog)
-                total = query.count()
-                total_pages = math.ceil(total / limit) if total > 0 else 0
-                rows = query.order_by(AuthLog.id.desc()).offset((page - 1) * limit).limit(limit).all()
-                
-                logs = [{
-                    "id": row.id,
-                    "user_id": row.user_id,
-                    "email": row.email,
-                    "event_type": row.event_type,
-                    "timestamp_ist": row.timestamp_ist,
-                    "timestamp_gmt": row.timestamp_gmt,
-                    "user_agent": row.user_agent
-                } for row in rows]
-            else:
-                query = self.db.query(ActivityLog)
-                total = query.count()
-                total_pages = math.ceil(total / limit) if total > 0 else 0
-                rows = query.order_by(ActivityLog.id.desc()).offset((page - 1) * limit).limit(limit).all()
-                
-                logs = [{
-                    "id": row.id,
-                    "user_id": row.user_id,
-                    "email": row.email,
-                    "action": row.action,
-                    "method": row.method,
-                    "status_code": row.status_code,
-                    "timestamp_ist": row.timestamp_ist,
-                    "timestamp_gmt": row.timestamp_gmt
-                } for row in rows]
-                
-            return {
-                "data": logs,
-                "total": total,
-                "page": page,
-                "total_pages": total_pages
-            }
+            return log_viewer.read_page(self.db, "auth" if log_type == "auth" else "activity", limit=limit, page=page)
         except Exception as e:
             raise AppException(500, "LOG_READ_ERROR", "Failed to read logs from database", str(e))
 
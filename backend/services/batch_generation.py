@@ -0,0 +1,425 @@
+"""
+Whole-semester batch generation.
+
+Departments interact only through shared resources: a faculty member teaching
+in both, a venue in both pools, or a common course (CommonCourseMap) that
+must sit in the same slot everywhere. We build that interaction graph, split
+it into connected components, and solve:
+
+  * independent components concurrently (process pool), and
+  * coupled departments in ordered rounds — a greedy colouring of the
+    component in a fixed order (heaviest weekly load first, then code).
+    A department starts once its lower-round neighbours have finished and
+    treats every other batch department's saved rows as not yet scheduled,
+    so the outcome no longer depends on request order or timing.
+
+Every department is a child BackgroundJob of the BATCH_GENERATE job, so the
+usual GET/DELETE /generate/jobs endpoints work for both.
+
+CLI:  python -m services.batch_generation --semester 6 [--departments CSE ECE] [--workers 4]
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from services import generation_jobs
+from services.generation_jobs import make_dedup_key, _now, _update_job, _cancel_requested
+import models
+
+HEARTBEAT_SECONDS = 30
+
+
+# ============================================
+# PLANNING
+# ============================================
+
+def default_departments(db: Session, semester: int) -> List[str]:
+    """Departments that have schedulable courses in this semester."""
+    rows = db.query(models.CourseMaster.department_code).filter(
+        models.CourseMaster.semester == semester,
+        models.CourseMaster.is_open_elective == False,
+    ).distinct().all()
+    return sorted(r[0] for r in rows)
+
+
+def build_interaction_graph(db: Session, semester: int, departments: List[str]) -> dict:
+    """
+    Returns {"adjacency": {dept: set(dept)}, "edges": [...], "load": {dept: weekly_sessions}}.
+    Resources mirror what generate_schedule actually reads: faculty via
+    CourseFacultyMap (by course code), venues via DepartmentVenueMap,
+    CourseVenueMap and CommonCourseMap.venue_name, and common courses.
+    """
+    dept_set = set(departments)
+    faculty = {d: set() for d in departments}
+    venues = {d: set() for d in departments}
+    common = {d: set() for d in departments}
+    load = {d: 0 for d in departments}
+
+    courses = db.query(
+        models.CourseMaster.department_code, models.CourseMaster.course_code, models.CourseMaster.weekly_sessions
+    ).filter(
+        models.CourseMaster.department_code.in_(departments),
+        models.CourseMaster.semester == semester,
+        models.CourseMaster.is_open_elective == False,
+    ).all()
+    depts_by_course = {}
+    for dept, code, ws in courses:
+        depts_by_course.setdefault(code, set()).add(dept)
+        load[dept] += ws or 0
+
+    if depts_by_course:
+        for code, fid in db.query(models.CourseFacultyMap.course_code, models.CourseFacultyMap.faculty_id).filter(
+            models.CourseFacultyMap.course_code.in_(list(depts_by_course))
+        ).all():
+            for dept in depts_by_course.get(code, ()):
+                faculty[dept].add(fid)
+
+    venue_names = dict(db.query(models.VenueMaster.venue_id, models.VenueMaster.venue_name).all())
+    for dept, vid in db.query(models.DepartmentVenueMap.department_code, models.DepartmentVenueMap.venue_id).filter(
+        models.DepartmentVenueMap.department_code.in_(departments),
+        models.DepartmentVenueMap.semester == semester,
+    ).all():
+        if vid in venue_names:
+            venues[dept].add(venue_names[vid])
+    for dept, code, vid in db.query(
+        models.CourseVenueMap.department_code, models.CourseVenueMap.course_code, models.CourseVenueMap.venue_id
+    ).filter(models.CourseVenueMap.department_code.in_(departments)).all():
+        if vid in venue_names and dept in depts_by_course.get(code, ()):
+            venues[dept].add(venue_names[vid])
+
+    for code, dept, venue_name in db.query(
+        models.CommonCourseMap.course_code, models.CommonCourseMap.department_code, models.CommonCourseMap.venue_name
+    ).filter(models.CommonCourseMap.semester == semester).all():
+        if dept in dept_set:
+            common[dept].add(code)
+            if venue_name:
+                venues[dept].add(venue_name)
+
+    # Invert resource -> departments, then pair up departments sharing each resource
+    edge_reasons = {}
+
+    def link(owners: Dict[str, set], reason: str):
+        holders = {}
+        for dept, items in owners.items():
+            for item in items:
+                holders.setdefault(item, []).append(dept)
+        for item, ds in holders.items():
+            ds = sorted(ds)
+            for i in range(len(ds)):
+                for j in range(i + 1, len(ds)):
+                    counts = edge_reasons.setdefault((ds[i], ds[j]), {"shared_faculty": 0, "shared_venues": 0, "common_courses": 0})
+                    counts[reason] += 1
+
+    link(faculty, "shared_faculty")
+    link(venues, "shared_venues")
+    link(common, "common_courses")
+
+    adjacency = {d: set() for d in departments}
+    for a, b in edge_reasons:
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+
+    return {
+        "adjacency": adjacency,
+        "edges": [{"a": a, "b": b, **counts} for (a, b), counts in sorted(edge_reasons.items())],
+        "load": load,
+    }
+
+
+def plan_batch(db: Session, semester: int, departments: Optional[List[str]] = None) -> dict:
+    """Connected components + round assignment. Deterministic for a given DB state."""
+    departments = sorted(set(departments)) if departments else default_departments(db, semester)
+    graph = build_interaction_graph(db, semester, departments)
+    adjacency, load = graph["adjacency"], graph["load"]
+
+    # Union-find over the interaction edges
+    parent = {d: d for d in departments}
+
+    def find(d):
+        while parent[d] != d:
+            parent[d] = parent[parent[d]]
+            d = parent[d]
+        return d
+
+    for e in graph["edges"]:
+        ra, rb = find(e["a"]), find(e["b"])
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups = {}
+    for d in departments:
+        groups.setdefault(find(d), []).append(d)
+
+    order_key = lambda d: (-load.get(d, 0), d)
+    rounds = {}
+    components = []
+    for members in sorted(groups.values(), key=lambda m: min(m)):
+        # Greedy colouring: smallest round not used by an already-placed neighbour
+        for d in sorted(members, key=order_key):
+            taken = {rounds[n] for n in adjacency[d] if n in rounds}
+            r = 0
+            while r in taken:
+                r += 1
+            rounds[d] = r
+        by_round = {}
+        for d in sorted(members, key=order_key):
+            by_round.setdefault(rounds[d], []).append(d)
+        components.append({"departments": sorted(members), "rounds": [by_round[r] for r in sorted(by_round)]})
+
+    return {
+        "semester": semester,
+        "departments": departments,
+        "components": components,
+        "rounds": rounds,
+        "edges": graph["edges"],
+        "adjacency": {d: sorted(ns) for d, ns in adjacency.items()},
+    }
+
+
+# ============================================
+# SUBMISSION
+# ============================================
+
+class BatchConflictError(Exception):
+    """A department in the batch already has an active generation job."""
+
+
+def submit_batch_job(db: Session, semester: int, mentor_day: str, mentor_period: int = 8,
+                     hard_mode: bool = False, learning_mode_ids=None,
+                     departments: Optional[List[str]] = None, mentor_days: Optional[Dict[str, str]] = None,
+                     start: bool = True) -> models.BackgroundJob:
+    """
+    Create the BATCH_GENERATE row plus one queued GENERATE child per department
+    in a single commit. With start=True the coordinator runs on a daemon thread
+    and feeds the shared process pool; the CLI passes start=False and runs it
+    in the foreground.
+    """
+    plan = plan_batch(db, semester, departments)
+    if not plan["departments"]:
+        raise ValueError(f"No departments with courses found for semester {semester}.")
+
+    mentor_days = mentor_days or {}
+    batch = models.BackgroundJob(
+        id=uuid.uuid4().hex,
+        job_type="BATCH_GENERATE",
+        dedup_key=make_dedup_key("BATCH", semester, learning_mode_ids),
+        status="QUEUED",
+        progress=0,
+        cancel_requested=False,
+        params_json=json.dumps({
+            "semester": semester, "mentor_day": mentor_day, "mentor_period": mentor_period,
+            "hard_mode": hard_mode, "learning_mode_ids": learning_mode_ids,
+            "mentor_days": mentor_days, "plan": plan,
+        }),
+        created_at=_now(),
+    )
+    db.add(batch)
+    for dept in plan["departments"]:
+        db.add(models.BackgroundJob(
+            id=uuid.uuid4().hex,
+            job_type="GENERATE",
+            parent_id=batch.id,
+            dedup_key=make_dedup_key(dept, semester, learning_mode_ids),
+            status="QUEUED",
+            progress=0,
+            cancel_requested=False,
+            params_json=json.dumps({
+                "department_code": dept, "semester": semester,
+                "mentor_day": mentor_days.get(dept, mentor_day), "mentor_period": mentor_period,
+                "hard_mode": hard_mode, "learning_mode_ids": learning_mode_ids,
+            }),
+            created_at=_now(),
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise BatchConflictError("A generation job is already queued or running for this semester or one of its departments.")
+
+    if start:
+        threading.Thread(target=run_batch_job, args=(batch.id,), daemon=True).start()
+    return batch
+
+
+def get_children(db: Session, batch_id: str) -> List[models.BackgroundJob]:
+    return db.query(models.BackgroundJob).filter_by(parent_id=batch_id).all()
+
+
+# ============================================
+# COORDINATOR
+# ============================================
+
+def _touch_jobs(job_ids: List[str]):
+    db = generation_jobs._status_session()
+    try:
+        db.query(models.BackgroundJob).filter(models.BackgroundJob.id.in_(job_ids)).update(
+            {"updated_at": _now()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_batch_job(batch_id: str, executor: Optional[ProcessPoolExecutor] = None) -> Optional[dict]:
+    """
+    Dispatch department jobs as their lower-round neighbours finish and record
+    the per-department timing report on the batch row. Never raises.
+    """
+    executor = executor or generation_jobs.get_executor()
+    db = generation_jobs._status_session()
+    try:
+        batch = db.query(models.BackgroundJob).filter_by(id=batch_id).first()
+        if batch is None or batch.status != "QUEUED":
+            return None
+        params = json.loads(batch.params_json)
+        batch.status = "RUNNING"
+        batch.phase = "SOLVE"
+        batch.started_at = batch.updated_at = _now()
+        db.commit()
+        child_ids = {json.loads(c.params_json)["department_code"]: c.id for c in get_children(db, batch_id)}
+    finally:
+        db.close()
+
+    plan = params["plan"]
+    rounds = plan["rounds"]
+    adjacency = {d: set(ns) for d, ns in plan["adjacency"].items()}
+    departments = list(plan["departments"])
+    component_of = {d: i for i, comp in enumerate(plan["components"]) for d in comp["departments"]}
+    predecessors = {d: {n for n in adjacency[d] if rounds[n] < rounds[d]} for d in departments}
+    # Everything in the batch except finished predecessors is "not yet scheduled" for d
+    ignore = {d: sorted(set(departments) - predecessors[d] - {d}) for d in departments}
+
+    print(f"[BATCH] Semester {plan['semester']}: {len(departments)} departments, "
+          f"{len(plan['components'])} independent groups, up to {max(rounds.values()) + 1} rounds")
+
+    t0 = time.perf_counter()
+    report = {}
+    pending = sorted(departments, key=lambda d: (rounds[d], d))
+    running = {}
+    finished = set()
+    cancelled = False
+    last_beat = t0
+
+    while pending or running:
+        if time.perf_counter() - last_beat > HEARTBEAT_SECONDS:
+            # Departments waiting on earlier rounds must not look abandoned
+            _touch_jobs([batch_id] + [child_ids[d] for d in pending])
+            last_beat = time.perf_counter()
+
+        if not cancelled and _cancel_requested(batch_id):
+            cancelled = True
+        if cancelled:
+            for d in pending:
+                _update_job(child_ids[d], status="CANCELLED", cancel_requested=True, finished_at=_now())
+                report[d] = {"status": "CANCELLED", "round": rounds[d] + 1, "component": component_of[d] + 1}
+            pending = []
+
+        for d in [d for d in pending if predecessors[d] <= finished]:
+            pending.remove(d)
+            fut = executor.submit(generation_jobs.execute_generation_job, child_ids[d], ignore[d], batch_id)
+            running[fut] = (d, time.perf_counter())
+
+        if not running:
+            continue
+        done, _ = wait(list(running), timeout=1.0, return_when=FIRST_COMPLETED)
+        for fut in done:
+            d, submitted = running.pop(fut)
+            try:
+                outcome = fut.result() or {"status": "SKIPPED", "timings": {}}
+            except Exception as e:  # worker process died
+                outcome = {"status": "FAILED", "timings": {}, "error": str(e)}
+                _update_job(child_ids[d], status="FAILED", error=str(e), finished_at=_now())
+            finished.add(d)
+            report[d] = {
+                **outcome,
+                "round": rounds[d] + 1,
+                "component": component_of[d] + 1,
+                "finished_at_seconds": round(time.perf_counter() - t0, 3),
+                "wait_seconds": round(submitted - t0, 3),
+            }
+            print(f"[BATCH]   {d}: {outcome['status']} in {outcome.get('timings', {}).get('total', 0)}s")
+        _update_job(batch_id, progress=int(100 * len(report) / len(departments)))
+
+    total = round(time.perf_counter() - t0, 3)
+    solver_seconds = round(sum(r.get("timings", {}).get("total", 0) for r in report.values()), 3)
+    statuses = {r["status"] for r in report.values()}
+    if cancelled:
+        status = "CANCELLED"
+    elif statuses <= {"SUCCEEDED"}:
+        status = "SUCCEEDED"
+    else:
+        status = "FAILED"
+
+    result = {
+        "semester": plan["semester"],
+        "departments": {d: report[d] for d in sorted(report)},
+        "succeeded": sorted(d for d, r in report.items() if r["status"] == "SUCCEEDED"),
+        "failed": sorted(d for d, r in report.items() if r["status"] not in ("SUCCEEDED", "CANCELLED")),
+        "components": plan["components"],
+        "total_wall_seconds": total,
+        "sum_department_seconds": solver_seconds,
+    }
+    _update_job(batch_id, status=status, progress=100, result_json=json.dumps(result), finished_at=_now())
+    print(f"[BATCH] Done: {status} — wall {total}s vs {solver_seconds}s sequential")
+    return result
+
+
+# ============================================
+# CLI
+# ============================================
+
+def main(argv=None):
+    import argparse
+    from utils.database import SessionLocal, engine, Base
+
+    parser = argparse.ArgumentParser(description="Generate timetables for every department of a semester.")
+    parser.add_argument("--semester", type=int, required=True)
+    parser.add_argument("--departments", nargs="*", help="Department codes (default: all with courses)")
+    parser.add_argument("--mentor-day", default="Wednesday")
+    parser.add_argument("--mentor-period", type=int, default=8)
+    parser.add_argument("--learning-modes", type=int, nargs="*", default=None)
+    parser.add_argument("--hard-mode", action="store_true")
+    parser.add_argument("--workers", type=int, default=None, help="Solver processes (default: settings.generation_max_workers)")
+    parser.add_argument("--plan-only", action="store_true", help="Print the interaction plan and exit")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.plan_only:
+            plan = plan_batch(db, args.semester, args.departments)
+            for i, comp in enumerate(plan["components"], 1):
+                print(f"Group {i}: " + " -> ".join("[" + ", ".join(r) + "]" for r in comp["rounds"]))
+            return 0
+        batch = submit_batch_job(
+            db, args.semester, args.mentor_day, args.mentor_period, args.hard_mode,
+            args.learning_modes, args.departments, start=False,
+        )
+        batch_id = batch.id
+    finally:
+        db.close()
+
+    import multiprocessing
+    from config.settings import settings
+    workers = args.workers or settings.generation_max_workers
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+        result = run_batch_job(batch_id, executor=pool)
+
+    print(f"\n{'Dept':<10}{'Status':<11}{'Group':>6}{'Round':>6}{'Fetch':>8}{'Model':>8}{'Solve':>8}{'Save':>8}{'Total':>8}")
+    for dept, r in result["departments"].items():
+        t = r.get("timings", {})
+        print(f"{dept:<10}{r['status']:<11}{r['component']:>6}{r['round']:>6}"
+              + "".join(f"{t.get(k, 0):>8.2f}" for k in ("FETCH", "MODEL_BUILD", "SOLVE", "SAVE", "total")))
+    print(f"\nTotal wall-clock: {result['total_wall_seconds']:.2f}s (sequential sum {result['sum_department_seconds']:.2f}s)")
+    return 0 if not result["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,85 +1,151 @@
-import collections
 from typing import Dict, List, Any
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 import models
+from services import venue_index
+
+_TABLE = models.TimetableEntry.__table__
+_COLUMNS = ["department_code", "semester", "course_code", "section_number",
+            "faculty_id", "faculty_name", "day_of_week", "period_number", "venue_name"]
+_PLACEHOLDERS = {"NONE", "UNASSIGNED", ""}
+
+
+def _load_frame(db: Session, *conditions) -> pd.DataFrame:
+    """Only the columns the checks need, in id order. Kept as object columns so values
+    come back exactly as stored (None section numbers, None faculty names)."""
+    query = select(*(_TABLE.c[c] for c in _COLUMNS)).where(*conditions).order_by(_TABLE.c.id)
+    return pd.DataFrame(db.connection().execute(query).all(), columns=_COLUMNS, dtype=object)
+
+
+def _target_filters(target_department: str = None, target_semester: int = None):
+    """SQL pre-filters: a conflict that involves the target has a target row in the
+    same (day, period) — for faculty with the same faculty_id, for venues with a
+    venue in common (looked up in the timetable_entry_venues index)."""
+    E = _TABLE.c
+    slot = tuple_(E.day_of_week, E.period_number)
+    slot_filters, faculty_filters, venue_filters = [], [], []
+    if target_department:
+        T = _TABLE.alias()
+        slot_filters.append(slot.in_(select(T.c.day_of_week, T.c.period_number).where(T.c.department_code == target_department)))
+        faculty_filters.append(tuple_(E.day_of_week, E.period_number, E.faculty_id).in_(
+            select(T.c.day_of_week, T.c.period_number, T.c.faculty_id).where(T.c.department_code == target_department)))
+        V = models.TimetableEntryVenue.__table__
+        venue_filters.append(E.id.in_(
+            select(V.c.entry_id).where(tuple_(V.c.day_of_week, V.c.period_number, V.c.venue_name).in_(
+                venue_index.venue_slots(_TABLE.c.department_code == target_department)))
+        ))
+    if target_semester:
+        T = _TABLE.alias()
+        slot_filters.append(slot.in_(select(T.c.day_of_week, T.c.period_number).where(T.c.semester == target_semester)))
+    return slot_filters, faculty_filters, venue_filters
+
+
+def _real(values: pd.Series) -> np.ndarray:
+    """Not None/blank/'Unassigned' — evaluated once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    ok = np.array([str(u).strip().upper() not in _PLACEHOLDERS for u in uniques] + [False], dtype=bool)
+    return ok[codes]
+
+
+def _explode_venues(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per listed venue ("LAB 1, LAB 2" -> LAB 1, LAB 2), like get_venue_timetable."""
+    codes, uniques = pd.factorize(df["venue_name"])
+    pairs = [(i, v.strip()) for i, name in enumerate(uniques) for v in str(name).split(",")
+             if v.strip().upper() not in _PLACEHOLDERS]
+    venues = pd.DataFrame({"_venue_code": np.array([i for i, _ in pairs], dtype=codes.dtype),
+                           "venue": pd.Series([v for _, v in pairs], dtype=object)})
+    return df.assign(_venue_code=codes).merge(venues, on="_venue_code", how="inner")
+
+
+def _clashes(df: pd.DataFrame, key: str, target_department: str, target_semester: int):
+    """Yield (day, period, key, rows) for every (day, period, key) group that holds more
+    than one distinct (course, section) and involves the target, in first-seen order."""
+    if df.empty:
+        return
+    # dropna=False: day_of_week / period_number are nullable, and rows without a slot
+    # still group together (as the dict-based check did) instead of getting NaN groups
+    group = df.groupby(["day_of_week", "period_number", key], sort=False, dropna=False).ngroup().to_numpy()
+    klass = df.groupby(["course_code", "section_number"], sort=False, dropna=False).ngroup().to_numpy()
+    n_groups = group.max() + 1
+
+    distinct = pd.DataFrame({"g": group, "k": klass}).drop_duplicates()
+    keep = np.bincount(distinct["g"].to_numpy(), minlength=n_groups) > 1
+    if target_department:
+        keep &= np.bincount(group, weights=(df["department_code"] == target_department).to_numpy(float), minlength=n_groups) > 0
+    if target_semester:
+        keep &= np.bincount(group, weights=(df["semester"] == target_semester).to_numpy(float), minlength=n_groups) > 0
+
+    rows = np.flatnonzero(keep[group])
+    rows = rows[np.argsort(group[rows], kind="stable")]
+    if not len(rows):
+        return
+    picked = df.iloc[rows]
+    columns = {c: picked[c].tolist() for c in ("department_code", "semester", "course_code", "section_number",
+                                               "faculty_name", "day_of_week", "period_number", key)}
+    columns["_class"] = klass[rows].tolist()
+    bounds = np.flatnonzero(np.diff(group[rows])) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(rows)]):
+        yield (columns["day_of_week"][start], columns["period_number"][start], columns[key][start],
+               {c: v[start:end] for c, v in columns.items()})
+
+
+def _courses(rows: dict) -> List[Dict[str, Any]]:
+    return [
+        {"dept": dept, "sem": sem, "course": f"{code} (S{sec})"}
+        for dept, sem, code, sec in zip(rows["department_code"], rows["semester"], rows["course_code"], rows["section_number"])
+    ]
+
 
 def detect_conflicts(db: Session, target_department: str = None, target_semester: int = None) -> Dict[str, List[Dict[str, Any]]]:
     """
     Scans the TimetableEntry table for genuine conflicts:
     1. Faculty Conflict: Same faculty ID scheduled in the same (day, period).
-    2. Venue Conflict: Same venue name scheduled in the same (day, period) and section_number == 1
+    2. Venue Conflict: Same venue name scheduled in the same (day, period) and section_number != 2
        (section_number=2 implies meant to be split/shared like common courses).
-    
-    Returns a dictionary of conflicts affecting the target_department.
-    """
-    
-    # 1. Fetch all timetable entries (we need global context to detect cross-department clashes)
-    all_entries = db.query(models.TimetableEntry).all()
-    
-    faculty_slots = collections.defaultdict(list)  # (day, period, faculty_id) -> [entries]
-    venue_slots = collections.defaultdict(list)    # (day, period, venue_name) -> [entries]
-    
-    for entry in all_entries:
-        key_fac = (entry.day_of_week, entry.period_number, entry.faculty_id)
-        if entry.faculty_id and entry.faculty_id.strip().upper() not in ('NONE', 'UNASSIGNED', ''):
-            faculty_slots[key_fac].append(entry)
-            
-        key_ven = (entry.day_of_week, entry.period_number, entry.venue_name)
-        # Only count section 1 as taking up the whole room, or if section is not 2
-        # (common courses sync use section_number=2 to share the room)
-        if entry.venue_name and entry.venue_name.strip().upper() not in ('NONE', 'UNASSIGNED', '') and entry.section_number != 2:
-            venue_slots[key_ven].append(entry)
+       Multi-venue strings ("LAB 1, LAB 2") book each listed venue.
 
+    Only the needed columns are read, pre-filtered in SQL to the slots the target
+    uses, and grouped as arrays. Returns a dictionary of conflicts affecting the
+    target_department.
+    """
+    slot_filters, faculty_filters, venue_filters = _target_filters(target_department, target_semester)
+    if target_department:
+        faculty_df = _load_frame(db, *slot_filters, *faculty_filters, _TABLE.c.faculty_id.isnot(None))
+        venue_df = _load_frame(db, *slot_filters, *venue_filters, _TABLE.c.venue_name.isnot(None))
+    else:
+        faculty_df = venue_df = _load_frame(db, *slot_filters)
     faculty_conflicts = []
     venue_conflicts = []
-    
+
     # Process Faculty Conflicts
-    for (day, period, fid), entries in faculty_slots.items():
-        if len(entries) > 1:
-            # Check if any of these entries belong to the target department
-            if target_department and not any(e.department_code == target_department for e in entries):
-                continue
-            if target_semester and not any(e.semester == target_semester for e in entries):
-                continue
-                
-            # Filter out identical common course syncs (same course, same fac, but diff depts)
-            # A real clash is when the *course code* or *section number* is different
-            unique_classes = set((e.course_code, e.section_number) for e in entries)
-            if len(unique_classes) > 1:
-                conflict_details = {
-                    "faculty_id": fid,
-                    "faculty_name": entries[0].faculty_name,
-                    "day": day,
-                    "period": period,
-                    "courses": [
-                        {"dept": e.department_code, "sem": e.semester, "course": f"{e.course_code} (S{e.section_number})"}
-                        for e in entries
-                    ],
-                    "suggestion": f"Faculty {entries[0].faculty_name} is scheduled in {len(unique_classes)} different classes on {day} P{period}. Reassign one course."
-                }
-                faculty_conflicts.append(conflict_details)
-
-    # Process Venue Conflicts
-    for (day, period, vname), entries in venue_slots.items():
-        if len(entries) > 1:
-            if target_department and not any(e.department_code == target_department for e in entries):
-                continue
-            if target_semester and not any(e.semester == target_semester for e in entries):
-                continue
-                
-            unique_classes = set((e.course_code, e.section_number) for e in entries)
-            if len(unique_classes) > 1:
-                conflict_details = {
-                    "venue_name": vname,
-                    "day": day,
-                    "period": period,
-                    "courses": [
-                        {"dept": e.department_code, "sem": e.semester, "course": f"{e.course_code} (S{e.section_number})"}
-                        for e in entries
-                    ],
-                    "suggestion": f"Venue {vname} is booked for {len(unique_classes)} different classes on {day} P{period}. Change venue for one course."
-                }
-                venue_conflicts.append(conflict_details)
+    # A real clash is when the *course code* or *section number* is different
+    # (identical common course syncs across departments are fine)
+    faculty_rows = faculty_df[_real(faculty_df["faculty_id"])]
+    for day, period, fid, entries in _clashes(faculty_rows, "faculty_id", target_department, target_semester):
+        name = entries["faculty_name"][0]
+        n_classes = len(set(entries["_class"]))
+        faculty_conflicts.append({
+            "faculty_id": fid,
+            "faculty_name": name,
+            "day": day,
+            "period": period,
+            "courses": _courses(entries),
+            "suggestion": f"Faculty {name} is scheduled in {n_classes} different classes on {day} P{period}. Reassign one course."
+        })
+
+    # Process Venue Conflicts (common-course syncs use section 2 to share the room)
+    venue_rows = _explode_venues(venue_df[(venue_df["section_number"] != 2).to_numpy(bool)])
+    for day, period, vname, entries in _clashes(venue_rows, "venue", target_department, target_semester):
+        n_classes = len(set(entries["_class"]))
+        venue_conflicts.append({
+            "venue_name": vname,
+            "day": day,
+            "period": period,
+            "courses": _courses(entries),
+            "suggestion": f"Venue {vname} is booked for {n_classes} different classes on {day} P{period}. Change venue for one course."
+        })
 
     return {
         "faculty_conflicts": faculty_conflicts,
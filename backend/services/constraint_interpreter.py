@@ -20,6 +20,7 @@ import datetime
 from typing import List, Dict, Set, Tuple, Optional, Any
 
 import models
+from services.solver_index import VariableIndex
 
 
 class ConstraintInterpreter:
@@ -132,7 +133,8 @@ class ConstraintInterpreter:
         all_days: List[str],
         day_periods: dict,
         slot_lookup: dict,
-        filled_slots: set
+        filled_slots: set,
+        var_index: Optional[VariableIndex] = None
     ):
         """Apply user constraints to the CP-SAT model before solving.
         
@@ -141,28 +143,37 @@ class ConstraintInterpreter:
         The reserved slots are stored in self.reserved_slots for use in post-solve.
         
         For SLOT_BLOCKING: zero out solver variables at specified slots.
+
+        `var_index` is the solver's VariableIndex; one is built here if omitted.
         """
+        if var_index is None and self.constraints:
+            var_index = VariableIndex(theory_vars, lab_vars, merged_lab_vars)
         for c in self.constraints:
             ct = c["constraint_type"]
             try:
                 if ct == "SLOT_BLOCKING":
                     self._apply_slot_blocking(
-                        c, model, theory_vars, lab_vars, merged_lab_vars,
-                        all_days, day_periods, slot_lookup
+                        c, model, var_index, all_days, day_periods, slot_lookup
                     )
                 elif ct == "COURSE_INJECTION":
                     # Pre-compute which slots to reserve and block them
                     self._reserve_injection_slots(
-                        c, model, theory_vars, lab_vars, merged_lab_vars,
-                        all_days, day_periods, slot_lookup
+                        c, model, var_index, all_days, day_periods, slot_lookup
                     )
             except Exception as e:
                 self.warnings.append(
                     f"❌ [{c['name']}] Failed to apply to model: {str(e)}"
                 )
 
+    @staticmethod
+    def _block_slot(model, var_index: VariableIndex, day: str, period: int):
+        """Zero out every theory, lab and merged-lab variable occupying (day, period).
+        Lab blocks span 2 periods, so a block starting at period-1 is blocked too."""
+        for var in var_index.vars_using_slot(day, period):
+            model.Add(var == 0)
+
     def _apply_slot_blocking(
-        self, constraint: dict, model, theory_vars, lab_vars, merged_lab_vars,
+        self, constraint: dict, model, var_index: VariableIndex,
         all_days, day_periods, slot_lookup
     ):
         """Block specific slots from being used by any course."""
@@ -178,34 +189,14 @@ class ConstraintInterpreter:
             if (day, period) not in slot_lookup:
                 continue
 
-            # Zero out all theory vars at this slot
-            for key, var in theory_vars.items():
-                # theory_vars keys are typically (course_code, day, period)
-                if len(key) >= 3 and key[1] == day and key[2] == period:
-                    model.Add(var == 0)
-
-            # Zero out all lab vars at this slot
-            for key, var in lab_vars.items():
-                if len(key) >= 3 and key[1] == day:
-                    lab_start = key[2]
-                    # Lab blocks span 2 periods: lab_start and lab_start+1
-                    if lab_start == period or lab_start + 1 == period:
-                        model.Add(var == 0)
-
-            # Zero out merged lab vars
-            for key, var in merged_lab_vars.items():
-                if len(key) >= 2 and key[0] == day:
-                    lab_start = key[1]
-                    if lab_start == period or lab_start + 1 == period:
-                        model.Add(var == 0)
-
+            self._block_slot(model, var_index, day, period)
             blocked_count += 1
 
         if blocked_count > 0:
             print(f"    🚫 [{name}] Blocked {blocked_count} slots from scheduling")
 
     def _reserve_injection_slots(
-        self, constraint: dict, model, theory_vars, lab_vars, merged_lab_vars,
+        self, constraint: dict, model, var_index: VariableIndex,
         all_days, day_periods, slot_lookup
     ):
         """Pre-compute and reserve slots for COURSE_INJECTION.
@@ -259,26 +250,12 @@ class ConstraintInterpreter:
         # Block each reserved slot in the CP-SAT model
         blocked = 0
         for (day, period) in selected:
-            for key, var in theory_vars.items():
-                if len(key) >= 3 and key[1] == day and key[2] == period:
-                    model.Add(var == 0)
-            for key, var in lab_vars.items():
-                if len(key) >= 3 and key[1] == day:
-                    bs = key[2]
-                    if bs == period or bs + 1 == period:
-                        model.Add(var == 0)
-            for key, var in merged_lab_vars.items():
-                if len(key) >= 2 and key[0] == day:
-                    bs = key[1]
-                    if bs == period or bs + 1 == period:
-                        model.Add(var == 0)
+            self._block_slot(model, var_index, day, period)
 
             # For CONSECUTIVE_2, also block the next period
             if period_structure == "CONSECUTIVE_2":
-                np = period + 1
-                for key, var in theory_vars.items():
-                    if len(key) >= 3 and key[1] == day and key[2] == np:
-                        model.Add(var == 0)
+                for var in var_index.theory_at.get((day, period + 1), []):
+                    model.Add(var == 0)
 
             blocked += 1
 
@@ -289,7 +266,7 @@ class ConstraintInterpreter:
 
     def apply_post_solve(
         self,
-        db,
+        entries,
         department_code: str,
         semester: int,
         filled_slots: set,
@@ -299,21 +276,21 @@ class ConstraintInterpreter:
         all_days: List[str] = None,
         day_periods: dict = None
     ) -> int:
-        """Apply post-solve constraints (course injection, blocked labels).
-        Returns the updated count of entries added."""
+        """Apply post-solve constraints (course injection, blocked labels) by adding
+        rows to the solver's EntryBuffer. Returns the updated count of entries added."""
 
         for c in self.constraints:
             ct = c["constraint_type"]
             try:
                 if ct == "COURSE_INJECTION":
                     count = self._apply_course_injection(
-                        c, db, department_code, semester,
+                        c, entries, department_code, semester,
                         filled_slots, slot_lookup, assign_venue, count,
                         all_days, day_periods
                     )
                 elif ct == "SLOT_BLOCKING":
                     count = self._apply_slot_blocking_labels(
-                        c, db, department_code, semester,
+                        c, entries, department_code, semester,
                         filled_slots, slot_lookup, count
                     )
             except Exception as e:
@@ -324,7 +301,7 @@ class ConstraintInterpreter:
         return count
 
     def _apply_course_injection(
-        self, constraint: dict, db, department_code: str, semester: int,
+        self, constraint: dict, entries, department_code: str, semester: int,
         filled_slots: set, slot_lookup: dict, assign_venue, count: int,
         all_days: List[str], day_periods: dict
     ) -> int:
@@ -366,7 +343,7 @@ class ConstraintInterpreter:
 
             sec_num = 1  # reserved slots are guaranteed clean
 
-            entry = models.TimetableEntry(
+            entries.add(
                 department_code=department_code,
                 semester=semester,
                 course_code=course_code,
@@ -381,7 +358,6 @@ class ConstraintInterpreter:
                 section_number=sec_num,
                 created_at=datetime.datetime.utcnow()
             )
-            db.add(entry)
             filled_slots.add((day, period))
             count += 1
 
@@ -391,7 +367,7 @@ class ConstraintInterpreter:
                 next_slot = slot_lookup.get((day, next_p))
                 if next_slot:
 
-                    entry2 = models.TimetableEntry(
+                    entries.add(
                         department_code=department_code,
                         semester=semester,
                         course_code=course_code,
@@ -403,10 +379,9 @@ class ConstraintInterpreter:
                         day_of_week=day,
                         period_number=next_p,
                         venue_name=venue,
-                        section_number=2 if already_there_2 else 1,
+                        section_number=sec_num,
                         created_at="now"
                     )
-                    db.add(entry2)
                     filled_slots.add((day, next_p))
                     count += 1
 
@@ -417,7 +392,7 @@ class ConstraintInterpreter:
         return count
 
     def _apply_slot_blocking_labels(
-        self, constraint: dict, db, department_code: str, semester: int,
+        self, constraint: dict, entries, department_code: str, semester: int,
         filled_slots: set, slot_lookup: dict, count: int
     ) -> int:
         """Insert label entries for blocked slots (e.g. 'Assembly')."""
@@ -435,7 +410,7 @@ class ConstraintInterpreter:
 
             # Only inject label if slot is not already filled with a regular course
             if (day, period) not in filled_slots:
-                entry = models.TimetableEntry(
+                entries.add(
                     department_code=department_code,
                     semester=semester,
                     course_code="BLOCKED",
@@ -450,7 +425,6 @@ class ConstraintInterpreter:
                     section_number=1,
                     created_at="now"
                 )
-                db.add(entry)
                 filled_slots.add((day, period))
                 count += 1
 
@@ -0,0 +1,44 @@
+"""
+Change tokens for cached, derived data.
+
+Anything that writes timetable rows calls bump(db, TIMETABLE) before its
+commit, and student/registration writes bump REGISTRATIONS; readers that keep
+a per-process cache (services/occupancy, services/response_cache) compare
+current(db, name) with the token they built from. Tokens are random, so a
+rolled-back bump can never be mistaken for a committed one.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import models
+
+TIMETABLE = "timetable"
+REGISTRATIONS = "registrations"
+
+
+def bump(db, name: str = TIMETABLE) -> str:
+    """Give `name` a new token in the caller's transaction (no commit)."""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow().isoformat()
+    updated = db.query(models.DataVersion).filter_by(name=name).update(
+        {"version": token, "updated_at": now}, synchronize_session=False
+    )
+    if not updated:
+        db.add(models.DataVersion(name=name, version=token, updated_at=now))
+        db.flush()
+    return token
+
+
+def current(db, name: str = TIMETABLE) -> Optional[str]:
+    row = db.query(models.DataVersion.version).filter_by(name=name).first()
+    return row[0] if row else None
+
+
+def current_many(db, names) -> tuple:
+    """Tokens for `names`, in order, with one query."""
+    rows = dict(db.query(models.DataVersion.name, models.DataVersion.version)
+                .filter(models.DataVersion.name.in_(names)).all())
+    return tuple(rows.get(name) for name in names)
+
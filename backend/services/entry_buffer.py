@@ -0,0 +1,91 @@
+"""
+In-memory buffer for the solver's TimetableEntry output.
+
+The save and gap-fill phases used to create one ORM object per entry and
+db.add() it, and helpers such as day_has_lab rescanned db.new to see what had
+been placed so far. EntryBuffer keeps plain row dicts instead, indexed by
+(day, session_type) and by course, and writes them with a single executemany
+INSERT when the solver commits.
+
+    entries = EntryBuffer(department_code="CSE", semester=6, learning_mode_ids="1,2")
+    entries.add(course_code="CS601", session_type="LAB", day_of_week="Monday", ...)
+    entries.has_session("Monday", "LAB")
+    entries.replace(db)     # delete dept/sem rows + bulk insert, caller commits
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+import models
+
+_TABLE = models.TimetableEntry.__table__
+COLUMNS = tuple(c.name for c in _TABLE.columns if c.name != "id")
+# Column-level Python defaults (session_type, section_number, learning_mode_ids)
+# don't apply when a key is passed explicitly as None, so fill them in here.
+_DEFAULTS = {
+    c.name: c.default.arg for c in _TABLE.columns
+    if c.name != "id" and c.default is not None and c.default.is_scalar
+}
+
+
+class EntryBuffer:
+    def __init__(self, **defaults):
+        unknown = set(defaults) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown TimetableEntry columns: {sorted(unknown)}")
+        self.defaults = defaults
+        self.rows: List[dict] = []
+        self._by_day_session: Dict[tuple, List[dict]] = defaultdict(list)
+        self._by_course: Dict[str, List[dict]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def add(self, **fields) -> dict:
+        """Queue one entry; keys are TimetableEntry column names. Returns the row dict
+        (still editable until the buffer is flushed)."""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown TimetableEntry columns: {sorted(unknown)}")
+        row = {name: None for name in COLUMNS}
+        row.update(self.defaults)
+        row.update(fields)
+        for name, value in _DEFAULTS.items():
+            if row[name] is None:
+                row[name] = value
+        self.rows.append(row)
+        self._by_day_session[(row["day_of_week"], row["session_type"])].append(row)
+        self._by_course[row["course_code"]].append(row)
+        return row
+
+    def has_session(self, day: str, session_type: str) -> bool:
+        return bool(self._by_day_session.get((day, session_type)))
+
+    def for_course(self, course_code: str) -> List[dict]:
+        return self._by_course.get(course_code, [])
+
+    def flush(self, db) -> int:
+        """Bulk insert the buffered rows in the caller's transaction."""
+        if not self.rows:
+            return 0
+        # Core table insert: one executemany. The ORM-enabled insert(models.TimetableEntry)
+        # would split the rows into batches by which columns are NULL.
+        db.execute(insert(_TABLE), self.rows)
+        return len(self.rows)
+
+    def replace(self, db, department_code: str, semester: int) -> int:
+        """Swap the dept/sem timetable for the buffered rows (no commit), keeping
+        the venue index in step."""
+        from services import venue_index
+        scope = (models.TimetableEntry.department_code == department_code,
+                 models.TimetableEntry.semester == semester)
+        venue_index.forget(db, *scope)
+        db.query(models.TimetableEntry).filter(*scope).delete(synchronize_session=False)
+        count = self.flush(db)
+        venue_index.reindex(db, *scope)
+        return count
@@ -0,0 +1,219 @@
+"""
+Timetable workbooks written in openpyxl's write-only mode.
+
+The export used to build a whole openpyxl Workbook in memory (every cell an
+object) and then copy it into a BytesIO. Here rows are streamed out of SQLite
+with yield_per, grouped into one sheet per department/section/faculty/venue,
+and each sheet is written row by row. openpyxl spools finished sheets to disk
+and the zip goes to a temporary file that the response reads in chunks, so
+memory holds one sheet's cells at a time however many sheets are requested.
+
+    out = excel_export.export_file(db, "department")      # one sheet per dept/semester
+    return StreamingResponse(excel_export.iter_file(out), ...)
+"""
+
+import re
+import tempfile
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+import models
+
+E, V = models.TimetableEntry, models.TimetableEntryVenue
+
+SHEET_KINDS = ("department", "section", "faculty", "venue")
+DAYS_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+CHUNK_SIZE = 64 * 1024
+_YIELD_PER = 2000
+
+# Columns a grid cell needs; the venue sheets take day/period from the index row
+_CELL_COLUMNS = (E.course_code, E.course_name, E.faculty_name, E.venue_name, E.session_type)
+
+
+class Grid:
+    """Days, periods and period header texts, computed once per export."""
+
+    def __init__(self, slots: List[tuple]):
+        """slots: (day_of_week, period_number, start_time, end_time) rows."""
+        self.days = [d for d in DAYS_ORDER if any(s[0] == d for s in slots)] or DAYS_ORDER[:5]
+        self.periods = list(range(1, max((s[1] for s in slots), default=8) + 1))
+        # Header times come from Monday's slots, as they always have
+        monday = {period: (start, end) for day, period, start, end in slots if day == "Monday"}
+        self.headers = []
+        for p in self.periods:
+            time_str = f"{monday[p][0]} - {monday[p][1]}" if p in monday else ""
+            self.headers.append(f"Period {p}\n({time_str})")
+
+    @classmethod
+    def from_slots(cls, db) -> Optional["Grid"]:
+        S = models.SlotMaster
+        slots = db.execute(select(S.day_of_week, S.period_number, S.start_time, S.end_time)).all()
+        return cls(slots) if slots else None
+
+
+def entry_filters(department_code: Optional[str], semester: Optional[int]) -> list:
+    conditions = []
+    if department_code:
+        conditions.append(E.department_code == department_code)
+    if semester:
+        conditions.append(E.semester == semester)
+    return conditions
+
+
+def _sheet_query(kind: Optional[str], conditions: list):
+    """(select, number of leading key columns, title(key))."""
+    if kind is None:
+        return select(E.day_of_week, E.period_number, *_CELL_COLUMNS).where(*conditions).order_by(E.id), 0, None
+    if kind == "department":
+        keys = (E.department_code, E.semester)
+        title = lambda k: f"{k[0]} S{k[1]}"
+    elif kind == "section":
+        keys = (E.department_code, E.semester, E.section_number)
+        title = lambda k: f"{k[0]} S{k[1]} Sec {k[2] or 1}"
+    elif kind == "faculty":
+        keys = (E.faculty_name,)
+        title = lambda k: k[0]
+        conditions = conditions + [E.faculty_name.isnot(None), E.faculty_name != ""]
+    elif kind == "venue":
+        query = (select(V.venue_name, V.day_of_week, V.period_number, *_CELL_COLUMNS)
+                 .join(E, E.id == V.entry_id).where(*conditions).order_by(V.venue_name, E.id))
+        return query, 1, lambda k: k[0]
+    else:
+        raise ValueError(f"Unknown sheet kind: {kind}")
+    query = (select(*keys, E.day_of_week, E.period_number, *_CELL_COLUMNS)
+             .where(*conditions).order_by(*keys, E.id))
+    return query, len(keys), title
+
+
+def sheet_groups(db, kind: Optional[str] = None, department_code: Optional[str] = None,
+                 semester: Optional[int] = None) -> Iterator[Tuple[str, Dict[tuple, list]]]:
+    """Yield (title, {(day, period): [cell rows]}) per sheet, one sheet at a time.
+    kind None gives the single "Timetable" sheet of every matching entry."""
+    query, n_keys, title = _sheet_query(kind, entry_filters(department_code, semester))
+    rows = db.execute(query.execution_options(yield_per=_YIELD_PER))
+    if n_keys == 0:
+        yield "Timetable", _cells(rows, 0)
+        return
+    for key, group in groupby(rows, key=lambda r: tuple(r[:n_keys])):
+        yield title(key), _cells(group, n_keys)
+
+
+def _cells(rows: Iterable[tuple], n_keys: int) -> Dict[tuple, list]:
+    cells = {}
+    for row in rows:
+        day, period, *cell = row[n_keys:]
+        cells.setdefault((day, period), []).append(cell)
+    return cells
+
+
+_INVALID_TITLE = re.compile(r"[\[\]:*?/\\]")
+
+
+def sheet_title(title: str, used: set) -> str:
+    """Excel-safe, unique (case-insensitively) sheet title of at most 31 chars."""
+    base = _INVALID_TITLE.sub("-", str(title)).strip("'").strip() or "Sheet"
+    candidate, n = base[:31], 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _add_styles(wb) -> None:
+    """Register the grid's cell styles once as named styles; cells then take a
+    style by name instead of hashing font/fill/border objects per cell."""
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+    thin = Side(border_style="thin", color="D1D5DB")
+    border = Border(top=thin, left=thin, right=thin, bottom=thin)
+    align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    solid = lambda color: PatternFill(start_color=color, end_color=color, fill_type="solid")
+    for name, font, fill in (
+        ("tt_corner", Font(bold=True, color="1F2937", size=11), solid("F9FAFB")),
+        ("tt_header", Font(bold=True, color="374151", size=10), solid("F9FAFB")),
+        ("tt_day", Font(bold=True, size=12, color="1F2937"), solid("F9FAFB")),
+        ("tt_empty", Font(italic=True, color="9CA3AF", size=10), solid("F3F4F6")),
+        ("tt_class", Font(bold=False, size=10, color="111827"), solid("FFFFFF")),
+        ("tt_lab", Font(bold=False, size=10, color="111827"), solid("FEF9C3")),
+    ):
+        wb.add_named_style(NamedStyle(name=name, font=font, fill=fill, border=border, alignment=align))
+
+
+def _cell_text(cell_rows: list) -> str:
+    return "\n---\n".join(
+        f"{code}\n{name or ''}\n({faculty or 'Unassigned'})\n[{venue or ''}]"
+        for code, name, faculty, venue, _ in cell_rows
+    )
+
+
+def _write_sheet(wb, title: str, cells: Dict[tuple, list], grid: Grid) -> None:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    ws = wb.create_sheet(title)
+
+    def cell(value, style):
+        c = WriteOnlyCell(ws, value=value)
+        c.style = style
+        return c
+
+    ws.column_dimensions["A"].width = 16
+    for i in range(len(grid.periods)):
+        ws.column_dimensions[get_column_letter(i + 2)].width = 24
+    ws.append([])
+    ws.append([cell("DAY / PERIOD", "tt_corner")] + [cell(h, "tt_header") for h in grid.headers])
+    for row_idx, day in enumerate(grid.days, start=3):
+        ws.row_dimensions[row_idx].height = 85
+        row = [cell(day[:3].upper(), "tt_day")]
+        for p in grid.periods:
+            cell_rows = cells.get((day, p))
+            if not cell_rows:
+                row.append(cell("Empty Slot", "tt_empty"))
+                continue
+            is_lab = any(r[4] and r[4].upper() == "LAB" for r in cell_rows)
+            row.append(cell(_cell_text(cell_rows), "tt_lab" if is_lab else "tt_class"))
+        ws.append(row)
+
+
+def write_workbook(groups: Iterable[Tuple[str, Dict[tuple, list]]], grid: Grid, fileobj) -> int:
+    """Write one grid sheet per group into fileobj (a path or binary file).
+    Returns the number of sheets; an empty groups still gives one empty grid."""
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    _add_styles(wb)
+    used, count = set(), 0
+    for title, cells in groups:
+        _write_sheet(wb, sheet_title(title, used), cells, grid)
+        count += 1
+    if count == 0:
+        _write_sheet(wb, "Timetable", {}, grid)
+    wb.save(fileobj)
+    return max(count, 1)
+
+
+def export_file(db, kind: Optional[str] = None, department_code: Optional[str] = None,
+                semester: Optional[int] = None, grid: Optional[Grid] = None):
+    """Workbook in an anonymous temporary file, positioned at 0. The caller
+    closes it (which deletes it)."""
+    grid = grid or Grid.from_slots(db)
+    out = tempfile.TemporaryFile()
+    try:
+        write_workbook(sheet_groups(db, kind, department_code, semester), grid, out)
+        out.seek(0)
+    except BaseException:
+        out.close()
+        raise
+    return out
+
+
+def iter_file(fileobj, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Read fileobj in chunks for a StreamingResponse, closing it at the end
+    (or when the client goes away)."""
+    with fileobj:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
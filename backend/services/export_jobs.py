@@ -0,0 +1,248 @@
+"""
+Background Excel exports with an on-disk artifact cache.
+
+POST /export/jobs hashes the timetable rows the export would read (plus the
+slot grid and the export options) and looks for <digest>.xlsx in the artifact
+directory. A hit is recorded as an already SUCCEEDED job, so an identical
+export after no data change downloads immediately. A miss queues an EXPORT
+BackgroundJob that a spawned worker process renders with excel_export; the
+same digest is deduplicated by the active-job index, so concurrent requests
+for the same export share one render.
+
+Artifacts are written to a temporary name and renamed into place, and every
+hit refreshes the file's mtime. evict() drops artifacts older than
+settings.export_cache_max_age_seconds, then the least recently used ones until
+the directory fits in settings.export_cache_max_bytes.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+import models
+from services import excel_export
+from services.generation_jobs import _claim_job, _expire_stale_jobs, _find_active_job, _now, _update_job
+
+# Bump when the workbook layout changes so old artifacts stop matching
+FORMAT_VERSION = 1
+_HASH_BATCH = 5000
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+E, S = models.TimetableEntry, models.SlotMaster
+_HASHED_ENTRY_COLUMNS = (E.id, E.department_code, E.semester, E.section_number, E.course_code, E.course_name,
+                         E.faculty_name, E.venue_name, E.session_type, E.day_of_week, E.period_number)
+
+
+def artifact_dir() -> str:
+    path = settings.export_artifact_dir or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "database", "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def artifact_path(digest: str, fmt: str = "xlsx") -> str:
+    return os.path.join(artifact_dir(), f"{digest}.{fmt}")
+
+
+def content_digest(db, params: dict) -> str:
+    """sha256 over the export options, the slot grid and every TimetableEntry
+    row the export reads, streamed in id order."""
+    h = hashlib.sha256(json.dumps([FORMAT_VERSION, params], sort_keys=True).encode())
+    slots = db.execute(select(S.day_of_week, S.period_number, S.start_time, S.end_time)
+                       .order_by(S.day_of_week, S.period_number)).all()
+    h.update(repr([tuple(s) for s in slots]).encode())
+    conditions = excel_export.entry_filters(params.get("department_code"), params.get("semester"))
+    rows = db.execute(select(*_HASHED_ENTRY_COLUMNS).where(*conditions).order_by(E.id)
+                      .execution_options(yield_per=_HASH_BATCH))
+    for batch in rows.partitions():
+        h.update(repr([tuple(r) for r in batch]).encode())
+    return h.hexdigest()
+
+
+def _touch(path: str) -> bool:
+    """Mark an artifact as used; False if it has been evicted."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def evict(directory: Optional[str] = None, max_bytes: Optional[int] = None,
+          max_age_seconds: Optional[int] = None, keep: Optional[str] = None) -> int:
+    """Delete expired artifacts, then least recently used ones over the size
+    cap, never `keep` (the artifact just written). Returns the number of files
+    removed."""
+    directory = directory or artifact_dir()
+    max_bytes = settings.export_cache_max_bytes if max_bytes is None else max_bytes
+    max_age_seconds = settings.export_cache_max_age_seconds if max_age_seconds is None else max_age_seconds
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.startswith("."):
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, entry.path))
+    files.sort()
+    cutoff = time.time() - max_age_seconds
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+# ============================================
+# EXECUTOR
+# ============================================
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Separate from the solver pool so an export never waits behind a CP-SAT run
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.export_max_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ============================================
+# API SIDE
+# ============================================
+
+def submit_export_job(db: Session, params: dict) -> Tuple[models.BackgroundJob, bool]:
+    """
+    Returns (job, created). A cached artifact gives a job that is already
+    SUCCEEDED; an identical export that is queued/running is returned as is
+    (created False). `params`: department_code, semester, sheets, format.
+    """
+    digest = content_digest(db, params)
+    dedup_key = f"EXPORT|{digest}"
+    fmt = params.get("format", "xlsx")
+    _expire_stale_jobs(db, dedup_key)
+
+    existing = _find_active_job(db, dedup_key)
+    if existing:
+        return existing, False
+
+    job = models.BackgroundJob(
+        id=uuid.uuid4().hex,
+        job_type="EXPORT",
+        dedup_key=dedup_key,
+        status="QUEUED",
+        progress=0,
+        cancel_requested=False,
+        params_json=json.dumps(params),
+        created_at=_now(),
+    )
+    if _touch(artifact_path(digest, fmt)):
+        job.status, job.progress = "SUCCEEDED", 100
+        job.started_at = job.finished_at = job.created_at
+        job.result_json = json.dumps({"digest": digest, "format": fmt, "cached": True})
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = _find_active_job(db, dedup_key)
+        if existing:
+            return existing, False
+        raise
+
+    if job.status == "QUEUED":
+        get_executor().submit(run_export_job, job.id)
+    return job, True
+
+
+def job_artifact(job: models.BackgroundJob) -> Optional[str]:
+    """Path of a finished export's artifact, or None if it is gone."""
+    result = json.loads(job.result_json) if job.result_json else {}
+    if job.status != "SUCCEEDED" or "digest" not in result:
+        return None
+    path = artifact_path(result["digest"], result.get("format", "xlsx"))
+    return path if _touch(path) else None
+
+
+# ============================================
+# WORKER SIDE (runs in the pool process)
+# ============================================
+
+def render_artifact(db, params: dict, attempts: int = 3) -> dict:
+    """Render the export and store it under the digest of the data it was
+    rendered from: the digest is taken before and after rendering, and a
+    render that raced a timetable write is redone."""
+    fmt = params.get("format", "xlsx")
+    digest = content_digest(db, params)
+    for _ in range(attempts):
+        if _touch(artifact_path(digest, fmt)):
+            return {"digest": digest, "format": fmt, "cached": True}
+        tmp = os.path.join(artifact_dir(), f".{uuid.uuid4().hex}.tmp")
+        try:
+            grid = excel_export.Grid.from_slots(db)
+            if grid is None:
+                raise ValueError("No slots configured")
+            groups = excel_export.sheet_groups(db, params.get("sheets"), params.get("department_code"),
+                                               params.get("semester"))
+            sheets = excel_export.write_workbook(groups, grid, tmp)
+            after = content_digest(db, params)
+            if after == digest:
+                os.replace(tmp, artifact_path(digest, fmt))
+                evict(keep=artifact_path(digest, fmt))
+                return {"digest": digest, "format": fmt, "cached": False, "sheets": sheets,
+                        "bytes": os.path.getsize(artifact_path(digest, fmt))}
+            digest = after
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    raise RuntimeError("Timetable kept changing while exporting; try again")
+
+
+def run_export_job(job_id: str):
+    """Pool entry point. Never raises."""
+    from utils.database import SessionLocal
+
+    params = _claim_job(job_id)
+    if params is None:
+        return
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        _update_job(job_id, phase="RENDER", progress=10)
+        result = render_artifact(db, params)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        _update_job(job_id, status="SUCCEEDED", progress=100, result_json=json.dumps(result), finished_at=_now())
+    except Exception as e:
+        print(f"[EXPORT] Export job {job_id} failed: {e}")
+        _update_job(job_id, status="FAILED", error=str(e), finished_at=_now())
+    finally:
+        db.close()
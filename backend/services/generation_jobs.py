@@ -0,0 +1,312 @@
+"""
+Background timetable generation jobs.
+
+POST /generate/jobs records a BackgroundJob row and hands its id to a small
+process pool; the HTTP request returns immediately. The worker process runs
+`generate_schedule` with progress / cancel hooks that read and write the same
+row, so any API worker can poll or cancel a job regardless of which one
+started it.
+
+Processes (not threads) are used so a CP-SAT search can't starve the web
+workers, and the pool is capped by `settings.generation_max_workers`.
+"""
+
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from config.settings import settings
+import models
+
+ACTIVE_STATUSES = ("QUEUED", "RUNNING", "CANCELLING")
+FINISHED_STATUSES = ("CANCELLED", "SUCCEEDED", "FAILED")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def make_dedup_key(department_code: str, semester: int, learning_mode_ids=None) -> str:
+    """Jobs for the same (dept, sem, learning modes) are interchangeable."""
+    modes = ",".join(sorted(map(str, learning_mode_ids))) if learning_mode_ids else "1,2"
+    return f"{department_code}|{semester}|{modes}"
+
+
+def job_to_dict(job: models.BackgroundJob) -> dict:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "parent_id": job.parent_id,
+        "status": job.status,
+        "phase": job.phase,
+        "progress": job.progress or 0,
+        "cancel_requested": bool(job.cancel_requested),
+        "params": json.loads(job.params_json) if job.params_json else {},
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# ============================================
+# EXECUTOR
+# ============================================
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: never fork a process that holds SQLite connections / uvicorn threads
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.generation_max_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_executor():
+    """Called from the app lifespan on shutdown. Running solves are abandoned and
+    their rows are picked up as stale by the next submit."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ============================================
+# API SIDE
+# ============================================
+
+def _expire_stale_jobs(db: Session, dedup_key: str):
+    """Active jobs that haven't been touched within the stale window belong to a
+    worker that died (restart, OOM). Fail them so they stop blocking new submissions."""
+    cutoff = (datetime.utcnow() - timedelta(seconds=settings.generation_job_stale_seconds)).isoformat()
+    stale = db.query(models.BackgroundJob).filter(
+        models.BackgroundJob.dedup_key == dedup_key,
+        models.BackgroundJob.status.in_(ACTIVE_STATUSES),
+        func.coalesce(models.BackgroundJob.updated_at, models.BackgroundJob.created_at) < cutoff,
+    ).all()
+    for job in stale:
+        job.status = "FAILED"
+        job.error = "Job abandoned (worker stopped before finishing)."
+        job.finished_at = _now()
+    if stale:
+        db.commit()
+
+
+def _find_active_job(db: Session, dedup_key: str) -> Optional[models.BackgroundJob]:
+    return db.query(models.BackgroundJob).filter(
+        models.BackgroundJob.dedup_key == dedup_key,
+        models.BackgroundJob.status.in_(ACTIVE_STATUSES),
+    ).first()
+
+
+def submit_generation_job(db: Session, params: dict) -> Tuple[models.BackgroundJob, bool]:
+    """
+    Queue a generation run. Returns (job, created) — created is False when an
+    identical job is already queued/running and that job is returned instead.
+    `params` holds the keyword arguments for generate_schedule (minus db).
+    """
+    dedup_key = make_dedup_key(params["department_code"], params["semester"], params.get("learning_mode_ids"))
+    _expire_stale_jobs(db, dedup_key)
+
+    existing = _find_active_job(db, dedup_key)
+    if existing:
+        return existing, False
+
+    job = models.BackgroundJob(
+        id=uuid.uuid4().hex,
+        job_type="GENERATE",
+        dedup_key=dedup_key,
+        status="QUEUED",
+        progress=0,
+        cancel_requested=False,
+        params_json=json.dumps(params),
+        created_at=_now(),
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another API worker inserted the same key between our check and commit
+        db.rollback()
+        existing = _find_active_job(db, dedup_key)
+        if existing:
+            return existing, False
+        raise
+
+    get_executor().submit(run_generation_job, job.id)
+    return job, True
+
+
+def cancel_job(db: Session, job: models.BackgroundJob) -> models.BackgroundJob:
+    """Queued jobs are cancelled outright; running ones are flagged and the
+    worker stops the CP-SAT search on its next poll. Cancelling a batch also
+    cancels its department jobs that haven't started."""
+    if job.status in FINISHED_STATUSES:
+        return job
+    job.cancel_requested = True
+    if job.status == "QUEUED":
+        job.status = "CANCELLED"
+        job.finished_at = _now()
+    else:
+        job.status = "CANCELLING"
+    if job.job_type == "BATCH_GENERATE":
+        db.query(models.BackgroundJob).filter_by(parent_id=job.id, status="QUEUED").update(
+            {"status": "CANCELLED", "cancel_requested": True, "finished_at": _now()}
+        )
+    db.commit()
+    return job
+
+
+# ============================================
+# WORKER SIDE (runs in the pool process)
+# ============================================
+
+_status_sessionmaker = None
+
+
+def _status_session() -> Session:
+    """Status updates use their own NullPool engine, so a progress write never
+    waits for (or commits) the solver's pooled connection."""
+    global _status_sessionmaker
+    if _status_sessionmaker is None:
+        from utils.database import SQLALCHEMY_DATABASE_URL
+        from utils.db_engine import create_db_engine
+        status_engine = create_db_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+        _status_sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=status_engine)
+    return _status_sessionmaker()
+
+
+def _update_job(job_id: str, **fields):
+    db = _status_session()
+    try:
+        fields["updated_at"] = _now()
+        db.query(models.BackgroundJob).filter_by(id=job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _cancel_requested(job_id: str) -> bool:
+    db = _status_session()
+    try:
+        flag = db.query(models.BackgroundJob.cancel_requested).filter_by(id=job_id).scalar()
+        return bool(flag)
+    finally:
+        db.close()
+
+
+def _claim_job(job_id: str) -> Optional[dict]:
+    """QUEUED -> RUNNING. Returns the job params, or None if the job was
+    cancelled / expired before a worker got to it.
+
+    One conditional UPDATE, so a cancel_job committed meanwhile is never
+    overwritten: either it finds the job RUNNING or the claim matches no row."""
+    db = _status_session()
+    try:
+        now = _now()
+        claimed = db.query(models.BackgroundJob).filter_by(id=job_id, status="QUEUED").update(
+            {"status": "RUNNING", "started_at": now, "updated_at": now}, synchronize_session=False)
+        db.commit()
+        if claimed == 0:
+            return None
+        return json.loads(db.query(models.BackgroundJob.params_json).filter_by(id=job_id).scalar())
+    finally:
+        db.close()
+
+
+def execute_generation_job(job_id: str, ignore_departments=None, parent_id: Optional[str] = None) -> Optional[dict]:
+    """
+    Run one GENERATE job row to completion and record the outcome on it.
+    Never raises. Returns {"status", "entries_saved", "timings"} or None if
+    the job was no longer queued. Cancelling the parent batch also stops it.
+    """
+    from utils.database import SessionLocal
+    from services.solver_engine import generate_schedule
+
+    params = _claim_job(job_id)
+    if params is None:
+        return None
+
+    print(f"[JOBS] Running generation job {job_id} ({params.get('department_code')} Sem {params.get('semester')})")
+
+    # Wall time per phase, measured between progress callbacks
+    timings = {}
+    clock = {"phase": None, "t": time.perf_counter()}
+    started = clock["t"]
+
+    def progress(phase, percent):
+        now = time.perf_counter()
+        if clock["phase"]:
+            timings[clock["phase"]] = round(now - clock["t"], 3)
+        clock["phase"], clock["t"] = phase, now
+        _update_job(job_id, phase=phase, progress=percent)
+
+    def should_stop():
+        return _cancel_requested(job_id) or (parent_id is not None and _cancel_requested(parent_id))
+
+    solver_db = SessionLocal()
+    try:
+        result = generate_schedule(
+            solver_db,
+            params["department_code"],
+            params["semester"],
+            params["mentor_day"],
+            params.get("mentor_period", 8),
+            params.get("hard_mode", False),
+            params.get("learning_mode_ids"),
+            progress=progress,
+            should_stop=should_stop,
+            ignore_departments=ignore_departments,
+            repair=params.get("repair", False),
+            repair_scope=params.get("repair_scope"),
+            warm_start=params.get("warm_start", False),
+            hint_source=params.get("hint_source", "entries"),
+            solver_params=params.get("solver_params"),
+        )
+        end = time.perf_counter()
+        if clock["phase"]:
+            timings[clock["phase"]] = round(end - clock["t"], 3)
+        timings["total"] = round(end - started, 3)
+        result["timings"] = timings
+
+        fields = {"result_json": json.dumps(result), "finished_at": _now()}
+        if any(e.get("type") == "CANCELLED" for e in result.get("errors", [])):
+            fields["status"] = "CANCELLED"
+        elif result.get("success"):
+            fields["status"] = "SUCCEEDED"
+            fields["progress"] = 100
+        else:
+            fields["status"] = "FAILED"
+        _update_job(job_id, **fields)
+        return {"status": fields["status"], "entries_saved": result.get("entries_saved", 0), "timings": timings}
+    except Exception as e:
+        solver_db.rollback()
+        print(f"[JOBS] Generation job {job_id} failed: {e}")
+        timings["total"] = round(time.perf_counter() - started, 3)
+        _update_job(job_id, status="FAILED", error=str(e), finished_at=_now())
+        return {"status": "FAILED", "entries_saved": 0, "timings": timings, "error": str(e)}
+    finally:
+        solver_db.close()
+
+
+def run_generation_job(job_id: str):
+    """Pool entry point for single-department jobs."""
+    execute_generation_job(job_id)
@@ -0,0 +1,380 @@
+"""
+Retention for log.db: old months move out to compressed archives.
+
+A month's partitions (utils/log_partitions.py) are archived once the month
+ended more than settings.log_retention_days ago, or - oldest first, never
+the current month - while log.db holds more than settings.log_max_bytes.
+Archiving a partition:
+
+  1. stream it, in id order, into <archive dir>/<table>_YYYYMM.ndjson.gz
+     (temporary name, renamed into place; a rerun after a crash, or late
+     rows for an archived month, are merged into the existing archive),
+  2. delete the rows it wrote (id up to the highest archived id)
+     settings.log_retention_delete_batch at a time, each batch its own short
+     transaction, so log writers are never held up for long,
+  3. drop the table if it is now empty. Rows written to the month after the
+     archive was made stay in the table for the next run.
+
+Afterwards SQLite gives the freed pages back with incremental_vacuum in
+small steps. log.db is created with auto_vacuum=INCREMENTAL
+(utils/log_database.py); an older file keeps its free pages until an admin
+converts it with compact(), a full VACUUM that blocks log writes while it
+runs (POST /api/admin/logs/compact).
+
+Runs are BackgroundJob rows (job_type LOG_RETENTION or LOG_COMPACTION,
+sharing one dedup key): the active-job index lets only one of them run at a
+time across API workers, and the last run shows in stats().
+scheduler() runs retention every settings.log_retention_interval_hours.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import false, func, select, text
+from sqlalchemy.exc import IntegrityError
+
+from config.settings import settings
+import models
+from models.log_models import ActivityLog, AuthLog
+from utils import log_partitions
+
+DEDUP_KEY = "LOG_RETENTION"
+LOG_TYPES = {"activity": ActivityLog, "auth": AuthLog}
+_ARCHIVE = re.compile(r"^(activity_logs|auth_logs)_(\d{6})\.ndjson\.gz$")
+_DAY_MS = 86400 * 1000
+
+
+def archive_dir() -> str:
+    path = settings.log_archive_dir or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "database", "log_archive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def archive_path(model, month: str) -> str:
+    return os.path.join(archive_dir(), f"{log_partitions.partition_name(model, month)}.ndjson.gz")
+
+
+def archives() -> List[dict]:
+    """Archive inventory, newest month first."""
+    found = []
+    for entry in os.scandir(archive_dir()):
+        match = _ARCHIVE.match(entry.name)
+        if match and entry.is_file():
+            log_type = "activity" if match.group(1) == ActivityLog.__tablename__ else "auth"
+            found.append({"type": log_type, "month": match.group(2), "file": entry.name,
+                          "bytes": entry.stat().st_size})
+    return sorted(found, key=lambda a: (a["month"], a["type"]), reverse=True)
+
+
+def read_archive(model, month: str) -> Iterator[dict]:
+    """Rows of an archived month in id order. FileNotFoundError if there is none."""
+    with gzip.open(archive_path(model, month), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+# ============================================
+# SIZE
+# ============================================
+
+def used_bytes(engine) -> int:
+    """Bytes of log.db in use (SQLite: excluding free pages)."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            pages = conn.exec_driver_sql("PRAGMA page_count").scalar()
+            free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            return (pages - free) * page_size
+        if engine.dialect.name == "postgresql":
+            return conn.execute(text("SELECT pg_database_size(current_database())")).scalar()
+    return 0
+
+
+def _sqlite_pragmas(engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("page_size", "page_count", "freelist_count", "auto_vacuum")}
+
+
+def incremental_vacuum(engine) -> int:
+    """Return free pages to the filesystem in small steps. Returns pages freed.
+    Does nothing unless log.db is auto_vacuum=INCREMENTAL (see compact())."""
+    if engine.dialect.name != "sqlite":
+        return 0
+    before = _sqlite_pragmas(engine)
+    if before["freelist_count"] == 0:
+        return 0
+    if before["auto_vacuum"] != 2:
+        print(f"[LOG_RETENTION] {before['freelist_count']} free pages kept: log.db is not "
+              f"auto_vacuum=INCREMENTAL (convert it with POST /api/admin/logs/compact)")
+        return 0
+    step = max(1, settings.log_vacuum_pages_per_step)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        while conn.exec_driver_sql("PRAGMA freelist_count").scalar() > 0:
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({step})")
+    return before["freelist_count"] - _sqlite_pragmas(engine)["freelist_count"]
+
+
+def compact(engine=None) -> dict:
+    """Switch log.db to auto_vacuum=INCREMENTAL and rebuild it with a full
+    VACUUM, giving back all free pages. Log writes wait until it finishes,
+    so this only runs when an admin asks for it."""
+    if engine is None:
+        from utils.log_database import log_engine as engine
+    if engine.dialect.name != "sqlite":
+        return {}
+    before = _sqlite_pragmas(engine)
+    print(f"[LOG_RETENTION] Compacting log.db ({before['page_count'] * before['page_size']} bytes, full VACUUM)")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # auto_vacuum can only change on an empty file or through a full VACUUM
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    after = _sqlite_pragmas(engine)
+    return {"bytes_before": before["page_count"] * before["page_size"],
+            "bytes_after": after["page_count"] * after["page_size"],
+            "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(after["auto_vacuum"])}
+
+
+# ============================================
+# ARCHIVING
+# ============================================
+
+def _write_archive(engine, model, table, month: str) -> Tuple[int, Optional[int]]:
+    """Write the partition's rows (merged with an existing archive) to the
+    month's archive file. Returns rows written and the highest archived id
+    of the partition (None if it was empty)."""
+    path = archive_path(model, month)
+    tmp = os.path.join(archive_dir(), f".{uuid.uuid4().hex}.tmp")
+    written, seen, max_id = 0, set(), None
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8") as out:
+            if os.path.exists(path):
+                with gzip.open(path, "rt", encoding="utf-8") as existing:
+                    for line in existing:
+                        seen.add(line)
+                        out.write(line)
+                        written += 1
+            with engine.connect() as conn:
+                rows = conn.execution_options(yield_per=settings.log_retention_delete_batch).execute(
+                    select(table).order_by(table.c.id))
+                for row in rows.mappings():
+                    max_id = row["id"]
+                    # Whole-row match: a partition recreated by late rows restarts its ids
+                    line = json.dumps(dict(row), separators=(",", ":")) + "\n"
+                    if line not in seen:
+                        out.write(line)
+                        written += 1
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return written, max_id
+
+
+def _delete_in_batches(engine, table, max_id: int) -> int:
+    """Delete the archived rows (id <= max_id) of a partition."""
+    deleted, batch = 0, max(1, settings.log_retention_delete_batch)
+    while True:
+        with engine.begin() as conn:
+            ids = (select(table.c.id).where(table.c.id <= max_id).order_by(table.c.id)
+                   .limit(batch).scalar_subquery())
+            count = conn.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+        deleted += count
+        if count < batch:
+            return deleted
+
+
+def _drop_if_empty(engine, table) -> bool:
+    """Drop the partition unless rows were added since it was archived."""
+    with engine.begin() as conn:
+        # Take the write lock before looking, so no insert lands between the check and the DROP
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(f'LOCK TABLE "{table.name}" IN ACCESS EXCLUSIVE MODE'))
+        else:
+            conn.execute(table.delete().where(false()))
+        if conn.execute(select(table.c.id).limit(1)).first() is not None:
+            return False
+        log_partitions.drop_partition(conn, table)
+    return True
+
+
+def archive_month(engine, model, month: str) -> dict:
+    """Archive one partition and drop it if nothing was added meanwhile."""
+    table = log_partitions.partition_table(model, month)
+    rows, max_id = _write_archive(engine, model, table, month)
+    deleted = _delete_in_batches(engine, table, max_id) if max_id is not None else 0
+    dropped = _drop_if_empty(engine, table)
+    print(f"[LOG_RETENTION] Archived {table.name}: {rows} rows -> {os.path.basename(archive_path(model, month))}"
+          + ("" if dropped else " (newer rows kept for the next run)"))
+    return {"table": table.name, "rows": rows, "deleted": deleted, "dropped": dropped}
+
+
+def run_retention(engine=None, now_ms: Optional[int] = None, progress=None) -> dict:
+    """Archive every month past the age limit, then the oldest months while
+    log.db is over the size limit."""
+    from services import log_viewer
+    if engine is None:
+        from utils.log_database import log_engine as engine
+    now_ms = log_partitions.now_ms() if now_ms is None else now_ms
+    current = log_partitions.month_of(now_ms)
+    cutoff = now_ms - settings.log_retention_days * _DAY_MS
+    months = sorted({m for model in LOG_TYPES.values() for m, _ in log_partitions.partitions(engine, model)})
+
+    before = used_bytes(engine)
+    archived = []
+
+    def archive(month):
+        for model in LOG_TYPES.values():
+            if any(m == month for m, _ in log_partitions.partitions(engine, model)):
+                archived.append(archive_month(engine, model, month))
+        log_viewer.clear_counts()
+        if progress:
+            progress(month)
+
+    remaining = []
+    for month in months:
+        if month != current and log_partitions.month_bounds(month)[1] <= cutoff:
+            archive(month)
+        else:
+            remaining.append(month)
+    for month in remaining:
+        if month == current or used_bytes(engine) <= settings.log_max_bytes:
+            break
+        archive(month)
+
+    freed_pages = incremental_vacuum(engine) if archived else 0
+    return {"archived": archived, "bytes_before": before, "bytes_after": used_bytes(engine),
+            "vacuumed_pages": freed_pages}
+
+
+# ============================================
+# SCHEDULING
+# ============================================
+
+def _last_run(db, job_type: str = "LOG_RETENTION") -> Optional[models.BackgroundJob]:
+    return (db.query(models.BackgroundJob).filter(models.BackgroundJob.job_type == job_type)
+            .order_by(models.BackgroundJob.created_at.desc()).first())
+
+
+def _start_job(job_type: str) -> Optional[str]:
+    """Insert a RUNNING job under DEDUP_KEY; None if one is already running."""
+    from services.generation_jobs import _now
+    from utils.database import SessionLocal
+
+    with SessionLocal() as db:
+        job = models.BackgroundJob(id=uuid.uuid4().hex, job_type=job_type, dedup_key=DEDUP_KEY,
+                                   status="RUNNING", progress=0, cancel_requested=False, params_json="{}",
+                                   created_at=_now(), started_at=_now(), updated_at=_now())
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker is running retention or a compaction
+            return None
+        return job.id
+
+
+def _finish_job(job_id: str, run) -> Optional[dict]:
+    from services.generation_jobs import _now, _update_job
+
+    try:
+        result = run()
+        _update_job(job_id, status="SUCCEEDED", progress=100, result_json=json.dumps(result), finished_at=_now())
+        return result
+    except Exception as e:
+        print(f"[LOG_RETENTION] Job {job_id} failed: {e}")
+        _update_job(job_id, status="FAILED", error=str(e), finished_at=_now())
+        return None
+
+
+def run_scheduled(force: bool = False) -> Optional[dict]:
+    """Run retention as a LOG_RETENTION job unless another worker is running
+    it or (without force) the last run is more recent than the interval.
+    Returns the run's result, or None if it didn't run or failed."""
+    from datetime import datetime, timedelta
+    from services.generation_jobs import _expire_stale_jobs, _update_job
+    from utils.database import SessionLocal
+
+    with SessionLocal() as db:
+        _expire_stale_jobs(db, DEDUP_KEY)
+        last = _last_run(db)
+        if not force and last is not None and last.created_at:
+            due = datetime.fromisoformat(last.created_at) + timedelta(hours=settings.log_retention_interval_hours)
+            if datetime.utcnow() < due:
+                return None
+    job_id = _start_job("LOG_RETENTION")
+    if job_id is None:
+        return None
+    # Heartbeat per archived month keeps the job from looking abandoned
+    return _finish_job(job_id, lambda: run_retention(
+        progress=lambda month: _update_job(job_id, phase=f"ARCHIVE {month}")))
+
+
+def run_compaction() -> Optional[dict]:
+    """compact() as a LOG_COMPACTION job, never alongside a retention run."""
+    from services.generation_jobs import _expire_stale_jobs
+    from utils.database import SessionLocal
+
+    with SessionLocal() as db:
+        _expire_stale_jobs(db, DEDUP_KEY)
+    job_id = _start_job("LOG_COMPACTION")
+    if job_id is None:
+        return None
+    return _finish_job(job_id, compact)
+
+
+async def scheduler(first_delay: float = 60.0):
+    """Lifespan task: run retention every log_retention_interval_hours."""
+    if settings.log_retention_interval_hours <= 0:
+        return
+    await asyncio.sleep(first_delay)
+    while True:
+        try:
+            await asyncio.to_thread(run_scheduled)
+        except Exception as e:
+            print(f"[LOG_RETENTION] Scheduler error: {e}")
+        # Check every hour; run_scheduled skips until the interval has passed
+        await asyncio.sleep(min(3600, settings.log_retention_interval_hours * 3600))
+
+
+# ============================================
+# STATS
+# ============================================
+
+def stats(engine=None) -> dict:
+    """Partition row counts, database size, the archive inventory and the
+    last retention run and compaction."""
+    from services.generation_jobs import job_to_dict
+    from utils.database import SessionLocal
+    if engine is None:
+        from utils.log_database import log_engine as engine
+
+    tables = []
+    with engine.connect() as conn:
+        for log_type, model in LOG_TYPES.items():
+            for month, table in log_partitions.partitions(conn, model):
+                entry = {"type": log_type, "month": month, "table": table.name,
+                         "rows": conn.execute(select(func.count()).select_from(table)).scalar()}
+                if engine.dialect.name == "postgresql":
+                    entry["bytes"] = conn.execute(text("SELECT pg_total_relation_size(:t)"),
+                                                  {"t": table.name}).scalar()
+                tables.append(entry)
+    database = {"used_bytes": used_bytes(engine), "max_bytes": settings.log_max_bytes,
+                "retention_days": settings.log_retention_days}
+    if engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas(engine)
+        database["file_bytes"] = pragmas["page_count"] * pragmas["page_size"]
+        database["free_bytes"] = pragmas["freelist_count"] * pragmas["page_size"]
+        database["auto_vacuum"] = {0: "none", 1: "full", 2: "incremental"}.get(pragmas["auto_vacuum"])
+    with SessionLocal() as db:
+        last, compaction = _last_run(db), _last_run(db, "LOG_COMPACTION")
+        last_run = job_to_dict(last) if last else None
+        last_compaction = job_to_dict(compaction) if compaction else None
+    return {"database": database, "partitions": sorted(tables, key=lambda t: (t["month"], t["type"]), reverse=True),
+            "archives": archives(), "last_run": last_run, "last_compaction": last_compaction}
@@ -0,0 +1,200 @@
+"""
+Admin log viewer queries over the monthly log partitions (utils/log_partitions.py).
+
+Pages are newest first and keyset-based: the cursor "YYYYMM:id" names the
+partition and the last row shown, and the next page reads id < that id
+there, then the older partitions - page 1000 costs what page 1 does.
+page=N without a cursor still works: whole partitions are skipped by their
+counts and only the remainder is an OFFSET.
+
+Filters: date (an IST day, as a timestamp_ms range that also rules out the
+other months), exact method / status code / event type, and email / action
+substring search through each partition's FTS5 index (ilike for terms under
+3 characters or off SQLite).
+
+Totals are per-partition counts cached in this process. A closed month's
+count is kept while the partition's lowest and highest ids stay the same -
+two primary key lookups that catch late rows moved in by
+migrate_legacy_rows and retention deletes made by any worker; the current
+month's is recounted after settings.log_count_cache_seconds.
+
+Months moved out by services/log_retention.py are read from their archive
+file with read_archive_page(): same filters, applied while streaming it.
+"""
+
+import math
+import threading
+from collections import deque
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from config.settings import settings
+from models.log_models import IST, ActivityLog, AuthLog
+from utils import log_partitions
+
+FIELDS = {
+    "auth": ("id", "user_id", "email", "event_type", "timestamp_ist", "timestamp_gmt", "user_agent"),
+    "activity": ("id", "user_id", "email", "action", "method", "status_code", "timestamp_ist", "timestamp_gmt"),
+}
+MODELS = {"auth": AuthLog, "activity": ActivityLog}
+
+_counts: Dict[tuple, Tuple[int, float, Optional[tuple]]] = {}  # (table, filters) -> (count, expires at, id range)
+_counts_lock = threading.Lock()
+
+
+def clear_counts() -> None:
+    with _counts_lock:
+        _counts.clear()
+
+
+def ist_day_bounds(date: str) -> Tuple[int, int]:
+    """[start, end) in epoch ms of a YYYY-MM-DD day in IST. ValueError if malformed."""
+    start = IST.localize(datetime.strptime(date, "%Y-%m-%d"))
+    end = IST.localize(datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1))
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    month, _, last_id = cursor.partition(":")
+    if len(month) != 6 or not month.isdigit() or not last_id.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return month, int(last_id)
+
+
+class _Filters:
+    def __init__(self, log_type: str, date: Optional[str] = None, email: Optional[str] = None,
+                 action: Optional[str] = None, method: Optional[str] = None,
+                 status_code: Optional[int] = None, event_type: Optional[str] = None):
+        self.range = ist_day_bounds(date) if date else None
+        self.exact = {k: v for k, v in (("method", method.upper() if method else None),
+                                        ("status_code", status_code), ("event_type", event_type)) if v}
+        search = {"email": email, "action": action if log_type == "activity" else None}
+        self.search = {k: v.strip() for k, v in search.items() if v and v.strip()}
+        self.key = (self.range, tuple(sorted(self.exact.items())), tuple(sorted(self.search.items())))
+
+    def overlaps(self, month: str) -> bool:
+        if self.range is None:
+            return True
+        start, end = log_partitions.month_bounds(month)
+        return start < self.range[1] and self.range[0] < end
+
+    def conditions(self, table, fts: bool) -> list:
+        conds = []
+        if self.range is not None:
+            conds += [table.c.timestamp_ms >= self.range[0], table.c.timestamp_ms < self.range[1]]
+        conds += [table.c[name] == value for name, value in self.exact.items()]
+        if self.search:
+            query = log_partitions.fts_query(self.search) if fts else None
+            if query is not None:
+                conds.append(table.c.id.in_(log_partitions.fts_rowids(table, query)))
+            else:
+                conds += [table.c[name].ilike(f"%{term}%") for name, term in self.search.items()]
+        return conds
+
+    def matches(self, row: dict) -> bool:
+        """The same filters on a row read from an archive file."""
+        if self.range is not None and not self.range[0] <= (row.get("timestamp_ms") or 0) < self.range[1]:
+            return False
+        if any(row.get(name) != value for name, value in self.exact.items()):
+            return False
+        return all(term.lower() in (row.get(name) or "").lower() for name, term in self.search.items())
+
+
+def _id_range(db, table) -> tuple:
+    """(min id, max id) of a partition; separate subqueries so each is an index lookup."""
+    return tuple(db.execute(select(select(func.min(table.c.id)).scalar_subquery(),
+                                   select(func.max(table.c.id)).scalar_subquery())).one())
+
+
+def _count(db, table, month: str, filters: _Filters, fts: bool) -> int:
+    key = (str(db.get_bind().url), table.name, filters.key)
+    closed = month < log_partitions.current_month()
+    id_range = _id_range(db, table) if closed else None
+    now = time.monotonic()
+    with _counts_lock:
+        cached = _counts.get(key)
+    if cached is not None and cached[1] > now and cached[2] == id_range:
+        return cached[0]
+    count = db.execute(select(func.count()).select_from(table).where(*filters.conditions(table, fts))).scalar()
+    with _counts_lock:
+        _counts[key] = (count, math.inf if closed else now + settings.log_count_cache_seconds, id_range)
+    return count
+
+
+def read_page(db, log_type: str, limit: int = 50, page: int = 1, cursor: Optional[str] = None,
+              **filter_args) -> Dict[str, Any]:
+    """One page of `log_type` ("auth" / "activity") logs, newest first.
+    Raises ValueError for a malformed date or cursor."""
+    model, fields = MODELS[log_type], FIELDS[log_type]
+    filters = _Filters(log_type, **filter_args)
+    fts = log_partitions.has_fts(db.get_bind())
+    parts = [(m, t) for m, t in log_partitions.partitions(db.get_bind(), model) if filters.overlaps(m)]
+    counts = [_count(db, table, month, filters, fts) for month, table in parts]
+    total = sum(counts)
+
+    start_month, before_id, skip = None, None, 0
+    if cursor:
+        start_month, before_id = parse_cursor(cursor)
+    else:
+        skip = (page - 1) * limit
+
+    rows: List[dict] = []
+    last = None
+    for (month, table), count in zip(parts, counts):
+        if start_month is not None and month > start_month:
+            continue
+        if skip >= count:
+            skip -= count
+            continue
+        conds = filters.conditions(table, fts)
+        if month == start_month:
+            conds.append(table.c.id < before_id)
+        query = (select(*(table.c[f] for f in fields)).where(*conds)
+                 .order_by(table.c.id.desc()).limit(limit - len(rows)).offset(skip))
+        skip = 0
+        for row in db.execute(query):
+            rows.append(dict(row._mapping))
+            last = (month, row.id)
+        if len(rows) >= limit:
+            break
+
+    return {
+        "data": rows,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "total_pages": math.ceil(total / limit) if total > 0 else 0,
+        "next_cursor": f"{last[0]}:{last[1]}" if last and len(rows) >= limit else None,
+    }
+
+
+def read_archive_page(log_type: str, month: str, limit: int = 50, page: int = 1,
+                      **filter_args) -> Dict[str, Any]:
+    """One page of an archived month's logs, newest first. Raises
+    FileNotFoundError if the month has no archive, ValueError for a bad
+    month or date."""
+    from services import log_retention
+    if len(month) != 6 or not month.isdigit():
+        raise ValueError(f"Invalid month: {month}")
+    fields = FIELDS[log_type]
+    filters = _Filters(log_type, **filter_args)
+    # The archive is in id order: keep only the newest page * limit matches
+    newest: deque = deque(maxlen=page * limit)
+    total = 0
+    for row in log_retention.read_archive(MODELS[log_type], month):
+        if filters.matches(row):
+            total += 1
+            newest.append(row)
+    skip = (page - 1) * limit
+    rows = [{f: row.get(f) for f in fields} for row in list(reversed(newest))[skip:skip + limit]]
+    return {
+        "data": rows,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "total_pages": math.ceil(total / limit) if total > 0 else 0,
+        "month": month,
+    }
@@ -0,0 +1,156 @@
+"""
+Cross-department slot occupancy, shared by the solver and the smart editor.
+
+OccupancyIndex reads every TimetableEntry once (only the columns it needs)
+and groups it by (day, period):
+
+    slot.faculty_ids[faculty_id]     -> [Owner(department_code, semester, course_code), ...]
+    slot.faculty_names[faculty_name] -> [...]
+    slot.venues[venue]               -> [...]   # "A, B" venue strings are split
+
+get_index(db) keeps one index per process and database, and rebuilds it only
+when the "timetable" token in data_versions has changed (see
+services/data_version), so a write in one gunicorn worker is seen by all.
+"""
+
+import threading
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import models
+from services import data_version
+
+Owner = namedtuple("Owner", "department_code semester course_code")
+
+_UNASSIGNED = ("", "Unassigned")
+
+
+def split_venues(venue_name: Optional[str]) -> List[str]:
+    if not venue_name:
+        return []
+    return [v.strip() for v in venue_name.split(",") if v.strip()]
+
+
+class SlotOccupancy:
+    __slots__ = ("faculty_ids", "faculty_names", "venues")
+
+    def __init__(self):
+        self.faculty_ids: Dict[str, List[Owner]] = defaultdict(list)
+        self.faculty_names: Dict[str, List[Owner]] = defaultdict(list)
+        self.venues: Dict[str, List[Owner]] = defaultdict(list)
+
+
+_EMPTY_SLOT = SlotOccupancy()
+
+
+class OccupancyIndex:
+    def __init__(self, rows: Iterable[tuple], version: Optional[str] = None):
+        """rows: (department_code, semester, course_code, faculty_id, faculty_name,
+        day_of_week, period_number, venue_name) tuples, in id order."""
+        self.version = version
+        self.slots: Dict[Tuple[str, int], SlotOccupancy] = defaultdict(SlotOccupancy)
+        self.rows = 0
+        for dept, sem, course, fid, fname, day, period, venue_name in rows:
+            slot = self.slots[(day, period)]
+            owner = Owner(dept, sem, course)
+            if fid:
+                slot.faculty_ids[fid].append(owner)
+            if fname and fname not in _UNASSIGNED:
+                slot.faculty_names[fname].append(owner)
+            for venue in split_venues(venue_name):
+                slot.venues[venue].append(owner)
+            self.rows += 1
+
+    def slot(self, day: str, period: int) -> SlotOccupancy:
+        return self.slots.get((day, period), _EMPTY_SLOT)
+
+    def busy_faculty_names(self, day: str, period: int) -> Set[str]:
+        return set(self.slot(day, period).faculty_names)
+
+    def busy_venues(self, day: str, period: int) -> Set[str]:
+        return set(self.slot(day, period).venues)
+
+    def faculty_owners(self, day: str, period: int, faculty_name: str) -> List[Owner]:
+        return self.slot(day, period).faculty_names.get(faculty_name, [])
+
+    def venue_owners(self, day: str, period: int, venue: str) -> List[Owner]:
+        return self.slot(day, period).venues.get(venue, [])
+
+    def faculty_busy_map(self, exclude_departments: Iterable[str] = ()) -> Dict[Tuple[str, int], Set[str]]:
+        """(day, period) -> faculty ids taught there by other departments (any semester)."""
+        excluded = set(exclude_departments)
+        return {
+            key: {fid for fid, owners in slot.faculty_ids.items()
+                  if any(o.department_code not in excluded for o in owners)}
+            for key, slot in self.slots.items()
+        }
+
+    def venue_busy_map(self, semester: int, exclude_departments: Iterable[str] = ()) -> Dict[Tuple[str, int], Set[str]]:
+        """(day, period) -> venues used by other departments in `semester`."""
+        excluded = set(exclude_departments)
+        return {
+            key: {venue for venue, owners in slot.venues.items()
+                  if any(o.semester == semester and o.department_code not in excluded for o in owners)}
+            for key, slot in self.slots.items()
+        }
+
+
+def find_conflicts(index: OccupancyIndex, entries: Iterable, department_code: str, semester: int) -> Iterator[dict]:
+    """Editor entries (faculty_name, venue_name, day_of_week, period_number) against
+    everyone but department_code/semester. Yields faculty/venue conflict dicts in entry
+    order, each message once."""
+    own = (department_code, semester)
+    seen = set()
+    for entry in entries:
+        day, period = entry.day_of_week, entry.period_number
+        checks = []
+        if entry.faculty_name and entry.faculty_name.strip() and entry.faculty_name not in _UNASSIGNED:
+            checks.append(("faculty", entry.faculty_name, index.faculty_owners(day, period, entry.faculty_name)))
+        if entry.venue_name and entry.venue_name.strip():
+            owners = [o for v in split_venues(entry.venue_name) for o in index.venue_owners(day, period, v)]
+            checks.append(("venue", entry.venue_name, owners))
+        for kind, name, owners in checks:
+            for b in owners:
+                if (b.department_code, b.semester) == own:
+                    continue
+                msg = f"{name} is occupied by {b.department_code} Sem {b.semester} ({b.course_code}) at {day} Period {period}"
+                if (kind, msg) in seen:
+                    continue
+                seen.add((kind, msg))
+                yield {"type": kind, "name": name, "day": day, "period": period, "occupied_by_dept": b.department_code,
+                       "occupied_by_sem": b.semester, "occupied_by_course": b.course_code, "message": msg}
+
+
+def load_index(db, version: Optional[str] = None) -> OccupancyIndex:
+    E = models.TimetableEntry
+    rows = db.query(
+        E.department_code, E.semester, E.course_code, E.faculty_id, E.faculty_name,
+        E.day_of_week, E.period_number, E.venue_name
+    ).order_by(E.id).all()
+    return OccupancyIndex(rows, version)
+
+
+_cache: Dict[str, OccupancyIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def get_index(db) -> OccupancyIndex:
+    """Cached index for db's database; one token lookup per call, a full reload
+    only after a timetable write. Uncommitted writes in `db` aren't tracked, so
+    call it before changing rows in the same session."""
+    version = data_version.current(db)      # None until the first bump; still a valid key
+    key = str(db.get_bind().engine.url)
+    index = _cache.get(key)
+    if index is not None and index.version == version:
+        return index
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is None or index.version != version:
+            index = _cache[key] = load_index(db, version)
+        return index
+
+
+def invalidate():
+    """Drop every cached index (tests, or after writing rows without a bump)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,147 @@
+"""
+Read-through cache for the timetable read endpoints.
+
+    return cached_json(request, db, ("venue", venue_name), lambda: build(...))
+
+The rendered JSON body is kept per (database, endpoint, params) together with
+the data_versions tokens it was built from (see services/data_version). A
+lookup reads the current tokens in one query; if they still match, the stored
+body is returned without touching the timetable tables. Writers only bump a
+token, so every gunicorn worker drops its stale copies on its next request.
+
+Every response carries an ETag; a client that sends it back in If-None-Match
+gets 304 Not Modified with no body. Entries are evicted least-recently-used
+once their bodies exceed settings.response_cache_max_bytes (0 disables
+storage, ETags still work).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from config.settings import settings
+from services import data_version
+
+
+class CachedBody:
+    __slots__ = ("versions", "body", "etag")
+
+    def __init__(self, versions: tuple, body: bytes):
+        self.versions = versions
+        self.body = body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.not_modified = self.evictions = 0
+
+    def get(self, key: Hashable, versions: tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, versions: tuple, body: bytes) -> CachedBody:
+        entry = CachedBody(versions, body)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old.body)
+            self._entries[key] = entry
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
+
+
+cache = ResponseCache(settings.response_cache_max_bytes)
+
+
+_adapters: Dict[object, TypeAdapter] = {}
+
+
+def _adapter(response_model) -> TypeAdapter:
+    if response_model not in _adapters:
+        _adapters[response_model] = TypeAdapter(response_model)
+    return _adapters[response_model]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def cached_json(request: Request, db, key: Tuple, compute: Callable[[], object],
+                depends: Iterable[str] = (data_version.TIMETABLE,), response_model=None,
+                encoded: bool = False) -> Response:
+    """JSON response for `key`, from the cache while the `depends` tokens are
+    unchanged. compute() may raise HTTPException; errors are never cached.
+    With response_model the result is validated and dumped like the route's
+    own response_model would (in one pass, by pydantic-core); encoded=True
+    means compute() already returns plain JSON types and skips jsonable_encoder."""
+    versions = data_version.current_many(db, tuple(depends))
+    scoped = (str(db.get_bind().engine.url),) + tuple(key)
+    entry = cache.get(scoped, versions)
+    if entry is None:
+        if response_model is not None:
+            adapter = _adapter(response_model)
+            body = adapter.dump_json(adapter.validate_python(compute(), from_attributes=True))
+        else:
+            result = compute()
+            body = JSONResponse(result if encoded else jsonable_encoder(result)).body
+        entry = cache.put(scoped, versions, body)
+    return json_response(request, entry.body, entry.etag)
+
+
+def json_response(request: Request, body: bytes, etag: Optional[str] = None) -> Response:
+    """Already rendered JSON with an ETag; 304 when the client has it."""
+    etag = etag or CachedBody((), body).etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        cache.count_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
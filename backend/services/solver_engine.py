@@ -16,25 +16,135 @@ def print(*args, **kwargs):
             safe_args.append(s.encode(sys.stdout.encoding or 'utf-8', errors='replace').decode(sys.stdout.encoding or 'utf-8', errors='replace'))
         _builtin_print(*safe_args, **kwargs)
 
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional
+import threading
 
-def generate_schedule(db: Session, department_code: str, semester: int, mentor_day: str, mentor_period: int = 8, hard_mode: bool = False, learning_mode_ids: Optional[List[int]] = None):
+# Phase -> overall progress (%) reported through the `progress` hook
+PHASE_PROGRESS = {"FETCH": 10, "MODEL_BUILD": 30, "SOLVE": 50, "SAVE": 85}
+
+
+class _SolveTimer(cp_model.CpSolverSolutionCallback):
+    """Records when CP-SAT reports its first feasible solution."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_solution_seconds = None
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        if self.first_solution_seconds is None:
+            self.first_solution_seconds = self.WallTime()
+        self.solutions += 1
+
+
+def _cancelled_result(department_code, semester):
+    return {"success": False, "errors": [{"type": "CANCELLED", "severity": "ERROR", "course_code": None, "course_name": None, "details": {}, "context": {"department": department_code, "semester": semester}, "suggestion": "Generation was cancelled before it finished."}], "warnings": [], "entries_saved": 0}
+
+
+def generate_schedule(db: Session, department_code: str, semester: int, mentor_day: str, mentor_period: int = 8, hard_mode: bool = False, learning_mode_ids: Optional[List[int]] = None,
+                      progress: Optional[Callable[[str, int], None]] = None, should_stop: Optional[Callable[[], bool]] = None,
+                      ignore_departments: Optional[Iterable[str]] = None,
+                      repair: bool = False, repair_scope: Optional[dict] = None,
+                      warm_start: bool = False, hint_source: str = "entries",
+                      solver_params: Optional[dict] = None):
     """
     Generates a timetable matching real BIT college pattern, driven by SchedulerConfig.
+
+    `progress(phase, percent)` is called at each phase boundary and `should_stop()` is
+    polled between phases and during the solve; both are optional and used by the
+    background job runner (services/generation_jobs.py).
+
+    `ignore_departments` lists departments whose saved entries should be treated as not
+    yet scheduled (faculty/venue occupancy, common-course anchors). Batch generation
+    passes the departments still waiting in the same round order.
+
+    `repair=True` keeps every course whose inputs are unchanged on (a subset of) its
+    currently saved slots and only re-solves the affected ones; `repair_scope`
+    ({"courses", "faculty_ids", "slots"}) marks extra courses as affected. If the
+    pinned model is infeasible it falls back to a full solve. The result gains a
+    "repair" block with the affected courses and a diff of moved entries.
+
+    `warm_start=True` hints every decision variable from the previous timetable
+    (hint_source "entries" = saved TimetableEntry rows, "snapshot" = TimetableData,
+    which has no learning-mode split and is refused for mode-specific runs)
+    without constraining anything. Every successful result carries "solve_stats"
+    with time-to-first-solution so hinted and cold runs can be compared.
+
+    CP-SAT parameters come from the "solver" config category; `solver_params`
+    overrides them per call (see services.solver_runtime.SOLVER_DEFAULTS). The
+    search threads are leased from a process-wide budget before solving.
+
+    Every call is instrumented (services/solver_telemetry.py): per-phase wall time
+    and query counts, model size and CP-SAT statistics come back as
+    result["telemetry"] and are stored as a GenerationRun row.
     """
+    from services.solver_telemetry import GenerationTelemetry
+    learning_mode_str = ",".join(sorted(map(str, learning_mode_ids))) if learning_mode_ids else "1,2"
+    telemetry = GenerationTelemetry(db, department_code, semester, learning_mode_str)
+    try:
+        result = _generate_schedule(
+            db, department_code, semester, mentor_day, mentor_period, hard_mode, learning_mode_ids,
+            progress=progress, should_stop=should_stop, ignore_departments=ignore_departments,
+            repair=repair, repair_scope=repair_scope, warm_start=warm_start, hint_source=hint_source,
+            solver_params=solver_params, telemetry=telemetry,
+        )
+    except Exception as e:
+        # The run is stored on another connection: release this session's write lock first
+        db.rollback()
+        telemetry.finish(error=str(e))
+        raise
+    summary = telemetry.finish(result)
+    if isinstance(result, dict):
+        result["telemetry"] = summary
+    return result
+
+
+def _generate_schedule(db: Session, department_code: str, semester: int, mentor_day: str, mentor_period: int = 8, hard_mode: bool = False, learning_mode_ids: Optional[List[int]] = None,
+                       progress: Optional[Callable[[str, int], None]] = None, should_stop: Optional[Callable[[], bool]] = None,
+                       ignore_departments: Optional[Iterable[str]] = None,
+                       repair: bool = False, repair_scope: Optional[dict] = None,
+                       warm_start: bool = False, hint_source: str = "entries",
+                       solver_params: Optional[dict] = None, *, telemetry):
     import json
     DEFAULT_CONFIG = {}
-    
+
+    def report(phase):
+        if progress:
+            try:
+                progress(phase, PHASE_PROGRESS[phase])
+            except Exception as e:
+                print(f"⚠️ Progress hook failed: {e}")
+
+    def stop_requested():
+        try:
+            return bool(should_stop and should_stop())
+        except Exception:
+            return False
+
     print(f"🚀 Starting Solver for Dept: {department_code}, Sem: {semester}...")
+    report("FETCH")
+    telemetry.mark("CONFIG_FETCH")
     
     learning_mode_str = ",".join(sorted(map(str, learning_mode_ids))) if learning_mode_ids else "1,2"
-    db.query(models.TimetableEntry).filter_by(department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str).delete()
+    excluded_depts = {department_code} | set(ignore_departments or ())
+
+    previous_placements = []
+    if repair or warm_start:
+        from services.solver_hints import load_previous_placements
+        previous_placements = load_previous_placements(db, department_code, semester, learning_mode_str, source=hint_source)
+    # Existing rows for this dept/sem are replaced in section 5. Deleting them there
+    # (not here) keeps the SQLite write lock out of the solve.
 
     # =========================================================
     # 0. FETCH CONFIG
     # =========================================================
     config_record = db.query(models.SchedulerConfig).first()
     config = config_record.config_json if config_record and config_record.config_json else DEFAULT_CONFIG
+    if isinstance(config, str):
+        try:
+            config = json.loads(config)
+        except ValueError:
+            config = DEFAULT_CONFIG
 
     def get_conf(category, key, field='value', default=None):
         try:
@@ -75,9 +185,13 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
 
     lab_block_starts = get_conf('hard_constraints', 'lab_block_starts', 'value', [1, 3, 5])
 
+    from services.solver_runtime import resolve_solver_params
+    solver_settings = resolve_solver_params(get_conf, solver_params)
+
     # =========================================================
     # 1. FETCH DATA
     # =========================================================
+    telemetry.mark("DATA_FETCH")
 
     courses = db.query(models.CourseMaster).filter_by(
         department_code=department_code, semester=semester, is_open_elective=False
@@ -183,14 +297,40 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             elif vtype == 'LAB':
                 cv_lookup[cv.course_code]['lab'] = v.venue_name
 
-    # Override cv_lookup for common courses with their GLOBAL venue
-    # This ensures all departments share the same venue for common courses
-    common_entries = db.query(models.CommonCourseMap).filter(
+    # Common-course groups and the placements of whichever other department
+    # scheduled them first, fetched once for every course of this dept.
+    # Used for the venue override below, CP-SAT pinning and section 5.5.
+    common_rows = db.query(models.CommonCourseMap).filter(
         models.CommonCourseMap.course_code.in_([c.course_code for c in courses]),
         models.CommonCourseMap.semester == semester,
-        models.CommonCourseMap.venue_name != None
     ).all()
-    for cc in common_entries:
+    common_course_depts = {}   # course_code -> [department_code per mapping row]
+    for cc in common_rows:
+        common_course_depts.setdefault(cc.course_code, []).append(cc.department_code)
+
+    common_anchors = {}        # course_code -> {"department": anchor dept, "entries": [(day, period, session_type)]}
+    shared_codes = [code for code, depts in common_course_depts.items() if len(depts) >= 2]
+    if shared_codes:
+        anchor_rows = db.query(
+            models.TimetableEntry.course_code, models.TimetableEntry.department_code,
+            models.TimetableEntry.day_of_week, models.TimetableEntry.period_number,
+            models.TimetableEntry.session_type,
+        ).filter(
+            models.TimetableEntry.course_code.in_(shared_codes),
+            models.TimetableEntry.semester == semester,
+            models.TimetableEntry.department_code.notin_(excluded_depts)
+        ).order_by(models.TimetableEntry.id).all()
+        for r in anchor_rows:
+            # First department found for a course is its anchor; other depts' copies are ignored
+            anchor = common_anchors.setdefault(r.course_code, {"department": r.department_code, "entries": []})
+            if r.department_code == anchor["department"]:
+                anchor["entries"].append((r.day_of_week, r.period_number, r.session_type))
+
+    # Override cv_lookup for common courses with their GLOBAL venue
+    # This ensures all departments share the same venue for common courses
+    for cc in common_rows:
+        if cc.venue_name is None:
+            continue
         vtype = (cc.venue_type or 'BOTH').upper()
         if cc.course_code not in cv_lookup:
             cv_lookup[cc.course_code] = {}
@@ -290,16 +430,8 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         return sorted(all_fac, key=lambda f: priority.get(f[2], 3))
 
     # Global faculty occupancy: check what faculty are busy across ALL departments
-    global_faculty_busy = {}  # (day, period) -> set(faculty_ids)
-    all_existing = db.query(models.TimetableEntry).filter(
-        models.TimetableEntry.department_code != department_code
-    ).all()
-    for e in all_existing:
-        key = (e.day_of_week, e.period_number)
-        if key not in global_faculty_busy:
-            global_faculty_busy[key] = set()
-        if e.faculty_id:
-            global_faculty_busy[key].add(e.faculty_id)
+    from services.occupancy import get_index as get_occupancy
+    global_faculty_busy = get_occupancy(db).faculty_busy_map(excluded_depts)  # (day, period) -> set(faculty_ids)
 
     # Current run faculty occupancy (within this generation)
     run_faculty_busy = {}  # (day, period) -> set(faculty_ids)
@@ -442,6 +574,11 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     # =========================================================
     # 2. CP-SAT MODEL
     # =========================================================
+    if stop_requested():
+        db.rollback()
+        return _cancelled_result(department_code, semester)
+    report("MODEL_BUILD")
+    telemetry.mark("MODEL_BUILD")
     model = cp_model.CpModel()
 
     # Determine which periods regular theory can use
@@ -620,28 +757,20 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                         f'lab_{c.course_code}_{day}_{bs}'
                     )
 
+    # Per-course / per-day / per-slot views of the variables, built once for all constraints below
+    from services.solver_index import VariableIndex
+    var_index = VariableIndex(theory_vars, lab_vars, merged_lab_vars)
+    merged_course_codes = {c.course_code for c in core_lab_courses} if batch_rotation_needed else set()
+
     # ---------------------------------------------------------
     # COMMON COURSE OR-TOOLS PINNING (REGULAR/LAB CROSS-DEPT SYNC)
     # ---------------------------------------------------------
     for c in regular_courses:
-        common_depts = db.query(models.CommonCourseMap).filter_by(
-            course_code=c.course_code, semester=semester
-        ).all()
-        if len(common_depts) >= 2:
-            anchor_entry = db.query(models.TimetableEntry).filter(
-                models.TimetableEntry.course_code == c.course_code,
-                models.TimetableEntry.semester == semester,
-                models.TimetableEntry.department_code != department_code
-            ).first()
-            if anchor_entry:
-                anchor_entries = db.query(models.TimetableEntry).filter(
-                    models.TimetableEntry.course_code == c.course_code,
-                    models.TimetableEntry.semester == semester,
-                    models.TimetableEntry.department_code == anchor_entry.department_code
-                ).all()
-                
-                anchor_theory = {(ae.day_of_week, ae.period_number) for ae in anchor_entries if ae.session_type == 'THEORY'}
-                anchor_lab = {(ae.day_of_week, ae.period_number) for ae in anchor_entries if ae.session_type == 'LAB'}
+        if len(common_course_depts.get(c.course_code, [])) >= 2:
+            anchor = common_anchors.get(c.course_code)
+            if anchor:
+                anchor_theory = {(day, period) for day, period, stype in anchor["entries"] if stype == 'THEORY'}
+                anchor_lab = {(day, period) for day, period, stype in anchor["entries"] if stype == 'LAB'}
                 
                 if anchor_theory and course_theory_count[c.course_code] > 0:
                     for day in all_days:
@@ -662,7 +791,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                 else:
                                     model.Add(lab_vars[(c.course_code, day, bs)] == 0)
                 
-                print(f"  🔗 CP-SAT constraint: pinned {c.course_code} to anchor dept {anchor_entry.department_code}")
+                print(f"  🔗 CP-SAT constraint: pinned {c.course_code} to anchor dept {anchor['department']}")
 
     # =========================================================
     # 3. CONSTRAINTS
@@ -670,7 +799,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
 
     # --- C6: Weekly session counts ---
     for c in regular_courses:
-        theory_sum = [theory_vars[k] for k in theory_vars if k[0] == c.course_code]
+        theory_sum = var_index.theory_by_course.get(c.course_code, [])
         if course_theory_count[c.course_code] > 0:
             model.Add(sum(theory_sum) == course_theory_count[c.course_code])
         else:
@@ -681,7 +810,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             if batch_rotation_needed and c in core_lab_courses:
                 pass # Handled globally below
             else:
-                lab_sum = [lab_vars[k] for k in lab_vars if k[0] == c.course_code]
+                lab_sum = var_index.lab_by_course.get(c.course_code, [])
                 model.Add(sum(lab_sum) == course_lab_blocks[c.course_code])
 
     if batch_rotation_needed and core_lab_courses:
@@ -717,25 +846,11 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         for period in day_periods.get(day, []):
             if period > max_regular_period:
                 continue
-            occupants = []
-            for c in regular_courses:
-                key = (c.course_code, day, period)
-                if key in theory_vars:
-                    occupants.append(theory_vars[key])
-                if course_lab_blocks[c.course_code] > 0:
-                    for bs in lab_block_starts:
-                        if period in [bs, bs + 1]:
-                            lkey = (c.course_code, day, bs)
-                            if lkey in lab_vars:
-                                occupants.append(lab_vars[lkey])
-
-            if batch_rotation_needed:
-                for bs in lab_block_starts:
-                    if period in [bs, bs + 1]:
-                        mkey = (day, bs)
-                        if mkey in merged_lab_vars:
-                            occupants.append(merged_lab_vars[mkey])
-                            break
+            occupants = (
+                var_index.theory_at.get((day, period), [])
+                + var_index.lab_covering.get((day, period), [])
+                + var_index.merged_covering.get((day, period), [])[:1]
+            )
 
             if not occupants:
                 continue
@@ -768,56 +883,27 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
 
     for c in regular_courses:
         for day in all_days:
-            day_theory = [theory_vars[(c.course_code, day, p)]
-                          for p in day_periods.get(day, [])
-                          if (c.course_code, day, p) in theory_vars]
+            day_theory = var_index.theory_by_course_day.get((c.course_code, day), [])
             if day_theory:
                 model.Add(sum(day_theory) <= max_theory_per_day)
 
     # --- C9: Max 1 lab block per day GLOBALLY (across all courses) ---
     for day in all_days:
-        all_lab_blocks_on_day = []
-        for c in regular_courses:
-            if course_lab_blocks[c.course_code] == 0:
-                continue
-            for bs in lab_block_starts:
-                if (c.course_code, day, bs) in lab_vars:
-                    all_lab_blocks_on_day.append(lab_vars[(c.course_code, day, bs)])
-        if batch_rotation_needed:
-            for bs in lab_block_starts:
-                mkey = (day, bs)
-                if mkey in merged_lab_vars:
-                    all_lab_blocks_on_day.append(merged_lab_vars[mkey])
-                    
+        all_lab_blocks_on_day = var_index.lab_by_day.get(day, []) + var_index.merged_by_day.get(day, [])
         if len(all_lab_blocks_on_day) > c_max_lab_blocks:
             model.Add(sum(all_lab_blocks_on_day) <= c_max_lab_blocks)
 
     # --- C10: Lab blocks on NON-CONSECUTIVE days GLOBALLY ---
     # No lab day followed by another lab day (across all courses)
     lab_spread_penalties = []
+    # Count total lab blocks available to decide hard vs soft
+    total_lab_blocks = sum(course_lab_blocks[c.course_code] for c in regular_courses)
     for i in range(len(all_days) - 1):
         day1 = all_days[i]
         day2 = all_days[i + 1]
-        labs_day1 = []
-        labs_day2 = []
-        for c in regular_courses:
-            if course_lab_blocks[c.course_code] == 0:
-                continue
-            for bs in lab_block_starts:
-                if (c.course_code, day1, bs) in lab_vars:
-                    labs_day1.append(lab_vars[(c.course_code, day1, bs)])
-                if (c.course_code, day2, bs) in lab_vars:
-                    labs_day2.append(lab_vars[(c.course_code, day2, bs)])
-                    
-        if batch_rotation_needed:
-            for bs in lab_block_starts:
-                if (day1, bs) in merged_lab_vars:
-                    labs_day1.append(merged_lab_vars[(day1, bs)])
-                if (day2, bs) in merged_lab_vars:
-                    labs_day2.append(merged_lab_vars[(day2, bs)])
+        labs_day1 = var_index.lab_by_day.get(day1, []) + var_index.merged_by_day.get(day1, [])
+        labs_day2 = var_index.lab_by_day.get(day2, []) + var_index.merged_by_day.get(day2, [])
         if labs_day1 and labs_day2:
-            # Count total lab blocks available to decide hard vs soft
-            total_lab_blocks = sum(course_lab_blocks[c.course_code] for c in regular_courses)
             if total_lab_blocks <= 3:
                 # 3 or fewer lab blocks can always fit Mon/Wed/Fri — hard constraint
                 model.Add(sum(labs_day1) + sum(labs_day2) <= 1)
@@ -876,7 +962,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                         if course_lab_blocks.get(cc, 0) > 0:
                             for bs in lab_block_starts:
                                 if period in [bs, bs + 1]:
-                                    if batch_rotation_needed and any(x for x in core_lab_courses if x.course_code == cc):
+                                    if cc in merged_course_codes:
                                         mkey = (day, bs)
                                         if mkey in merged_lab_vars:
                                             occupants.append(merged_lab_vars[mkey])
@@ -893,17 +979,11 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         if course_lab_blocks[c.course_code] == 0 or course_theory_count[c.course_code] == 0:
             continue
         for day in all_days:
-            if batch_rotation_needed and c in core_lab_courses:
-                day_lab_vars = [merged_lab_vars[(day, bs)]
-                                for bs in lab_block_starts
-                                if (day, bs) in merged_lab_vars]
+            if c.course_code in merged_course_codes:
+                day_lab_vars = var_index.merged_by_day.get(day, [])
             else:
-                day_lab_vars = [lab_vars[(c.course_code, day, bs)]
-                                for bs in lab_block_starts
-                                if (c.course_code, day, bs) in lab_vars]
-            day_theory_vars = [theory_vars[(c.course_code, day, p)]
-                               for p in day_periods.get(day, [])
-                               if (c.course_code, day, p) in theory_vars]
+                day_lab_vars = var_index.lab_by_course_day.get((c.course_code, day), [])
+            day_theory_vars = var_index.theory_by_course_day.get((c.course_code, day), [])
             if day_lab_vars and day_theory_vars:
                 lab_on_day = model.NewBoolVar(f'lab_day_{c.course_code}_{day}')
                 theory_on_day = model.NewBoolVar(f'th_day_{c.course_code}_{day}')
@@ -931,7 +1011,8 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         all_days=all_days,
         day_periods=day_periods,
         slot_lookup=slot_lookup,
-        filled_slots=set()
+        filled_slots=set(),
+        var_index=var_index,
     )
 
     # --- OBJECTIVE ---
@@ -952,41 +1033,157 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     if objective_terms:
         model.Maximize(sum(objective_terms))
 
+    # --- REPAIR MODE: pin untouched courses to their previous slots ---
+    repair_info = None
+    keep_previous = None
+    if repair:
+        from services.solver_hints import previous_assignment, find_affected_courses, add_hints
+        merged_codes = {c.course_code for c in core_lab_courses} if batch_rotation_needed else set()
+        decoded, decoded_from = previous_assignment(
+            db, department_code, semester, learning_mode_str, previous_placements,
+            theory_vars, lab_vars, merged_lab_vars, merged_codes
+        )
+        affected = find_affected_courses(
+            [c.course_code for c in regular_courses], decoded, previous_placements,
+            course_theory_count, course_lab_blocks, course_faculty, global_faculty_busy,
+            merged_codes, repair_scope
+        )
+        pinned_codes = {c.course_code for c in regular_courses} - set(affected)
+
+        # A single assumption literal gates every pin, so an infeasible repair can
+        # be retried as a full solve without rebuilding the model.
+        keep_previous = model.NewBoolVar('keep_previous')
+        hinted_vars = add_hints(model, decoded, theory_vars, lab_vars, merged_lab_vars)
+        for key, var in theory_vars.items():
+            if key[0] in pinned_codes and key not in decoded["theory"]:
+                model.Add(var == 0).OnlyEnforceIf(keep_previous)
+        for key, var in lab_vars.items():
+            if key[0] in pinned_codes and key not in decoded["lab"]:
+                model.Add(var == 0).OnlyEnforceIf(keep_previous)
+        pin_merged = bool(merged_codes) and merged_codes <= pinned_codes and decoded["merged"]
+        for key, var in merged_lab_vars.items():
+            if pin_merged and key not in decoded["merged"]:
+                model.Add(var == 0).OnlyEnforceIf(keep_previous)
+        model.AddHint(keep_previous, True)
+        model.AddAssumptions([keep_previous])
+
+        repair_info = {
+            "mode": "REPAIR",
+            "baseline": decoded_from,   # "solution" (stored solver decisions) or "entries" (decoded rows)
+            "affected_courses": [{"course_code": k, "reason": v} for k, v in sorted(affected.items())],
+            "pinned_courses": len(pinned_codes),
+        }
+        print(f"  🩹 Repair mode: {len(pinned_codes)} courses pinned, {len(affected)} re-solved {sorted(affected)}")
+
+    # --- WARM START: hint the previous timetable, constrain nothing ---
+    hint_info = {"hinted": False}
+    if repair:
+        hint_info = {"hinted": bool(previous_placements), "hint_source": decoded_from, "hinted_vars": hinted_vars}
+    elif warm_start and previous_placements:
+        from services.solver_hints import previous_assignment, add_hints
+        merged_codes = {c.course_code for c in core_lab_courses} if batch_rotation_needed else set()
+        decoded, decoded_from = previous_assignment(
+            db, department_code, semester, learning_mode_str, previous_placements,
+            theory_vars, lab_vars, merged_lab_vars, merged_codes
+        )
+        hinted_vars = add_hints(model, decoded, theory_vars, lab_vars, merged_lab_vars)
+        hint_info = {"hinted": True, "hint_source": decoded_from if decoded_from == "solution" else hint_source, "hinted_vars": hinted_vars}
+        print(f"  🔥 Warm start: hinted {hinted_vars} variables from {hint_info['hint_source']}")
+
     # =========================================================
     # 4. SOLVE
     # =========================================================
+    if stop_requested():
+        db.rollback()
+        return _cancelled_result(department_code, semester)
+    report("SOLVE")
+    telemetry.record_model(model)
+    telemetry.mark("SOLVE")
+    from services.solver_runtime import acquire_threads, release_threads, apply_solver_params, lease_holder, SolverBusyError
+    # Lease long enough to cover a repair fallback re-solve
+    try:
+        lease = acquire_threads(
+            solver_settings["num_workers"], lease_holder(department_code, semester),
+            ttl_seconds=2 * solver_settings["time_limit_seconds"] + 60, should_stop=stop_requested,
+        )
+    except SolverBusyError as e:
+        print(f"❌ {e}")
+        db.rollback()
+        return {"success": False, "errors": [{"type": "SOLVER_BUSY", "severity": "ERROR", "course_code": None, "course_name": None, "details": {}, "context": {"department": department_code, "semester": semester}, "suggestion": str(e)}], "warnings": [], "entries_saved": 0}
+    if lease is None:
+        db.rollback()
+        return _cancelled_result(department_code, semester)
+
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60.0
-    solver.parameters.num_workers = 4
+    apply_solver_params(solver, solver_settings, num_workers=lease["threads"])
+    if lease["threads"] < solver_settings["num_workers"]:
+        print(f"  🧵 Solving with {lease['threads']}/{solver_settings['num_workers']} threads (shared budget)")
+
+    # Poll the cancel flag while CP-SAT searches; StopSearch() makes Solve() return
+    # early with the best solution found so far (or UNKNOWN).
+    cancelled = threading.Event()
+    timer = _SolveTimer()
+
+    def run_solver():
+        nonlocal timer
+        timer = _SolveTimer()
+        solve_done = threading.Event()
+        if should_stop:
+            def _watch_cancel():
+                while not solve_done.wait(0.5):
+                    if stop_requested():
+                        cancelled.set()
+                        solver.StopSearch()
+                        return
+            threading.Thread(target=_watch_cancel, daemon=True).start()
+        try:
+            return solver.Solve(model, timer)
+        finally:
+            solve_done.set()
 
-    status = solver.Solve(model)
+    try:
+        status = run_solver()
+
+        if keep_previous is not None and status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) and not cancelled.is_set():
+            print(f"  🩹 Repair pins infeasible ({solver.StatusName(status)}); re-solving all courses.")
+            model.ClearAssumptions()
+            repair_info["mode"] = "FULL_FALLBACK"
+            status = run_solver()
+    finally:
+        release_threads(lease)
+
+    telemetry.record_solver(solver, status, timer.first_solution_seconds, bool(objective_terms))
+
+    if cancelled.is_set():
+        print("🛑 Solve cancelled.")
+        db.rollback()
+        return _cancelled_result(department_code, semester)
 
     if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
         print(f"❌ No solution found ({solver.StatusName(status)}).")
         return {"success": False, "errors": [{"type": "SOLVER_FAILED", "severity": "ERROR", "course_code": None, "course_name": None, "details": {}, "context": {"department": department_code, "semester": semester}, "suggestion": "Try relaxing constraints or adding more resources."}], "warnings": [], "entries_saved": 0}
 
     print(f"✅ Solution Found ({solver.StatusName(status)})")
+    solve_stats = {
+        **hint_info,
+        "status": solver.StatusName(status),
+        "first_solution_seconds": round(timer.first_solution_seconds, 4) if timer.first_solution_seconds is not None else None,
+        "solve_seconds": round(solver.WallTime(), 4),
+        "solutions_found": timer.solutions,
+        "objective": solver.ObjectiveValue() if objective_terms else None,
+        "params": solver_settings,
+        "threads": lease["threads"],
+        "admission_wait_seconds": lease["waited_seconds"],
+    }
+    print(f"  ⏱️ First solution after {solve_stats['first_solution_seconds']}s, solve {solve_stats['solve_seconds']}s (hinted={hint_info['hinted']})")
 
     # =========================================================
     # 4b. GLOBAL VENUE TRACKING
     # =========================================================
-    from sqlalchemy import and_
-    other_entries = db.query(models.TimetableEntry).filter(
-        and_(
-            models.TimetableEntry.semester == semester,
-            models.TimetableEntry.department_code != department_code
-        )
-    ).all()
-    
-    global_occupancy = {}
-    for e in other_entries:
-        if not e.venue_name: continue
-        venues = [v.strip() for v in e.venue_name.split(',')]
-        key = (e.day_of_week, e.period_number)
-        if key not in global_occupancy:
-            global_occupancy[key] = set()
-        global_occupancy[key].update(venues)
-        
+    telemetry.mark("VENUE_ASSIGNMENT")
+    # Re-read: other departments may have saved while we were solving
+    global_occupancy = get_occupancy(db).venue_busy_map(semester, excluded_depts)  # (day, period) -> set(venues)
+
     current_run_occupancy = {}
 
     def assign_venue(day, period, course_code, is_lab, required_idx):
@@ -1035,9 +1232,11 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     # =========================================================
     # 5. SAVE ENTRIES
     # =========================================================
-    db.query(models.TimetableEntry).filter_by(
-        department_code=department_code, semester=semester
-    ).delete()
+    report("SAVE")
+    telemetry.mark("SAVE")
+    # Entries are buffered and bulk-inserted at commit (old rows are deleted then too)
+    from services.entry_buffer import EntryBuffer
+    entries = EntryBuffer(department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str)
 
     count = 0
     filled_slots = set()
@@ -1091,8 +1290,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                             c_venue = assign_venue(day, period, gc.course_code, False, count + sec)
                             display_name = gc_name
                             
-                            entry = models.TimetableEntry(
-                                department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                            entries.add(
                                 course_code=gc.course_code, course_name=display_name,
                                 faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                                 session_type='THEORY',
@@ -1102,7 +1300,6 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                 section_number=sec + 1,
                                 created_at="now"
                             )
-                            db.add(entry)
                             mark_faculty_busy(fac_assigned[0], day, period)
                             assigned_sections += 1
                     
@@ -1156,8 +1353,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                     total_secs = get_course_sections(gc.course_code, True)
                                     display_name = gc_name
                                     
-                                    entry = models.TimetableEntry(
-                                        department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                                    entries.add(
                                         course_code=gc.course_code, course_name=display_name,
                                         faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                                         session_type='LAB',
@@ -1167,7 +1363,6 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                         section_number=sec + 1,
                                         created_at="now"
                                     )
-                                    db.add(entry)
                                     filled_slots.add((day, p))
                                     count += 1
                             mark_faculty_busy(fac_assigned[0], day, bs)
@@ -1221,8 +1416,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                         c_v = assign_venue(day, p, c.course_code, True, batch_idx)
                         slot_obj = slot_lookup.get((day, p))
                         if slot_obj:
-                            db.add(models.TimetableEntry(
-                                department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                            entries.add(
                                 course_code=c.course_code,
                                 course_name=f"B{batch_idx+1}: {cname}" if len(core_lab_courses_to_merge) > 1 else cname,
                                 faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
@@ -1232,7 +1426,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                 venue_name=c_v,
                                 section_number=batch_idx + 1,
                                 created_at="now"
-                            ))
+                            )
                             filled_slots.add((day, p))
                             count += 1
                     mark_faculty_busy(fac_assigned[0], day, bs)
@@ -1260,8 +1454,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                         c_v = assign_venue(day, p, c.course_code, False, batch_idx)
                         slot_obj = slot_lookup.get((day, p))
                         if slot_obj:
-                            db.add(models.TimetableEntry(
-                                department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                            entries.add(
                                 course_code=c.course_code,
                                 course_name=f"{cname} (Theory)",
                                 faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
@@ -1271,7 +1464,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                 venue_name=c_v,
                                 section_number=batch_idx + 1,
                                 created_at="now"
-                            ))
+                            )
                             filled_slots.add((day, p))
                             count += 1
                     mark_faculty_busy(fac_assigned[0], day, bs)
@@ -1285,22 +1478,14 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
 
     for c in honours_courses:
         # Check if this course is registered as a common course
-        common_depts = db.query(models.CommonCourseMap).filter_by(
-            course_code=c.course_code, semester=semester
-        ).all()
-        if not common_depts:
+        dept_codes = common_course_depts.get(c.course_code)
+        if not dept_codes:
             continue  # not a common course — handled by Section 6 normally
-
-        dept_codes = [r.department_code for r in common_depts]
         if len(dept_codes) < 2:
             continue  # only one dept — not truly shared
 
-        # Look for an existing TimetableEntry for this course in ANY other dept
-        anchor_entry = db.query(models.TimetableEntry).filter(
-            models.TimetableEntry.course_code == c.course_code,
-            models.TimetableEntry.semester == semester,
-            models.TimetableEntry.department_code != department_code
-        ).first()
+        # Existing placement of this course in another dept (prefetched in section 1)
+        anchor = common_anchors.get(c.course_code)
 
         fids  = course_faculty.get(c.course_code, [])
         cname = course_names.get(c.course_code, c.course_code)
@@ -1317,21 +1502,16 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             course_lab_blocks.get(c.course_code, 0) * 2
         )
 
-        if anchor_entry:
+        if anchor:
             # ── Sync mode: reuse existing slots from anchor dept ──
-            anchor_entries = db.query(models.TimetableEntry).filter(
-                models.TimetableEntry.course_code == c.course_code,
-                models.TimetableEntry.semester == semester,
-                models.TimetableEntry.department_code == anchor_entry.department_code
-            ).all()
             # Deduplicate by (day, period)
             seen_slots = set()
             anchor_slots = []
-            for ae in anchor_entries:
-                key = (ae.day_of_week, ae.period_number)
+            for day, period, _ in anchor["entries"]:
+                key = (day, period)
                 if key not in seen_slots:
                     seen_slots.add(key)
-                    anchor_slots.append((ae.day_of_week, ae.period_number))
+                    anchor_slots.append(key)
 
             for (day, period) in anchor_slots:
                 if (day, period) not in slot_lookup:
@@ -1341,8 +1521,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                 already_there = (day, period) in filled_slots
                 sec_num = 2 if already_there else 1
                 c_venue = assign_venue(day, period, c.course_code, False, count)
-                db.add(models.TimetableEntry(
-                    department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                entries.add(
                     course_code=c.course_code, course_name=cname,
                     faculty_id=fid, faculty_name=fname,
                     session_type=stype,
@@ -1351,10 +1530,10 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     venue_name=c_venue,
                     section_number=sec_num,
                     created_at="now"
-                ))
+                )
                 filled_slots.add((day, period))
                 count += 1
-            print(f"  🔗 Common course {c.course_code} synced to {len(anchor_slots)} slots from dept {anchor_entry.department_code}")
+            print(f"  🔗 Common course {c.course_code} synced to {len(anchor_slots)} slots from dept {anchor['department']}")
         else:
             # ── Anchor mode: this dept is first — schedule normally in P8 ──
             # Use the standard day-group logic; other depts will sync later.
@@ -1376,8 +1555,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             for (day, period) in free_p8[:needed]:
                 slot_obj = slot_lookup[(day, period)]
                 c_venue = assign_venue(day, period, c.course_code, False, count)
-                db.add(models.TimetableEntry(
-                    department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                entries.add(
                     course_code=c.course_code, course_name=cname,
                     faculty_id=fid, faculty_name=fname,
                     session_type=stype,
@@ -1386,7 +1564,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     venue_name=c_venue,
                     section_number=1,
                     created_at="now"
-                ))
+                )
                 filled_slots.add((day, period))
                 count += 1
             print(f"  ⚓ Common course {c.course_code} anchored in {len(free_p8[:needed])} P8 slots (first dept)")
@@ -1399,6 +1577,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     # =========================================================
     # 6. POST-SOLVE: Honours in P8, fill gaps
     # =========================================================
+    telemetry.mark("GAP_FILL")
 
 
     # --- Place HONOURS/MINOR in P8 with alternating-day groups ---
@@ -1451,8 +1630,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             fid, fname = get_faculty(course)
             cname = course_names.get(course.course_code, course.course_code)
             c_venue = assign_venue(day, period, course.course_code, False, count)
-            db.add(models.TimetableEntry(
-                department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+            entries.add(
                 course_code=course.course_code, course_name=cname,
                 faculty_id=fid, faculty_name=fname,
                 session_type=stype,
@@ -1461,7 +1639,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                 venue_name=c_venue,
                 section_number=sec_num,
                 created_at="now"
-            ))
+            )
             filled_slots.add((day, period))
             count += 1
 
@@ -1531,8 +1709,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     # --- MENTOR entry ---
     if (mentor_day_clean, mentor_period) in slot_lookup:
         slot_obj = slot_lookup[(mentor_day_clean, mentor_period)]
-        entry = models.TimetableEntry(
-            department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+        entries.add(
             course_code='MENTOR', course_name='Mentor Interaction',
             faculty_id=None, faculty_name=None,
             session_type='MENTOR',
@@ -1540,7 +1717,6 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             day_of_week=mentor_day_clean, period_number=mentor_period,
             created_at="now"
         )
-        db.add(entry)
         filled_slots.add((mentor_day_clean, mentor_period))
         count += 1
 
@@ -1598,10 +1774,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
     
     # Helper to check if a day has a LAB for any course
     def day_has_lab(target_day):
-        for entry in db.new:
-            if isinstance(entry, models.TimetableEntry) and entry.day_of_week == target_day and entry.session_type == 'LAB':
-                return True
-        return False
+        return entries.has_session(target_day, 'LAB')
 
     # 3. Assign Mini Projects to 2-period blocks first
     for mp in mini_projects:
@@ -1624,8 +1797,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     slot_obj = slot_lookup.get((day, p))
                     c_v = assign_venue(day, p, mp.course_code, True, count + sec)
                     if slot_obj:
-                        db.add(models.TimetableEntry(
-                            department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                        entries.add(
                             course_code=mp.course_code, course_name=mp.course_name,
                             faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                             session_type='LAB',
@@ -1634,7 +1806,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                             venue_name=c_v,
                             section_number=sec + 1,
                             created_at="now"
-                        ))
+                        )
                         filled_slots.add((day, p))
                         count += 1
                 mark_faculty_busy(fac_assigned[0], day, p1)
@@ -1684,8 +1856,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                         slot_obj = slot_lookup.get((day, p))
                         c_v = assign_venue(day, p, c.course_code, True, count + sec)
                         if slot_obj:
-                            db.add(models.TimetableEntry(
-                                department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                            entries.add(
                                 course_code=c.course_code, course_name=c.course_name,
                                 faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                                 session_type='LAB',
@@ -1694,7 +1865,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                                 venue_name=c_v,
                                 section_number=sec + 1,
                                 created_at="now"
-                            ))
+                            )
                             filled_slots.add((day, p))
                             count += 1
                     mark_faculty_busy(fac_assigned[0], day, p1)
@@ -1738,8 +1909,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     slot_obj = slot_lookup.get((day, p))
                     c_venue = assign_venue(day, p, c.course_code, False, count + sec)
                     if slot_obj:
-                        db.add(models.TimetableEntry(
-                            department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                        entries.add(
                             course_code=c.course_code, course_name=c.course_name,
                             faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                             session_type='THEORY',
@@ -1748,7 +1918,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                             venue_name=c_venue,
                             section_number=sec + 1,
                             created_at="now"
-                        ))
+                        )
                         filled_slots.add((day, p))
                         count += 1
                     mark_faculty_busy(fac_assigned[0], day, p)
@@ -1786,8 +1956,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             slot_obj = slot_lookup.get((day, p))
             
             if slot_obj:
-                db.add(models.TimetableEntry(
-                    department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                entries.add(
                     course_code=global_oe.course_code, course_name=global_oe.course_name,
                     faculty_id=None, faculty_name="Unassigned",
                     session_type='OPEN_ELECTIVE',
@@ -1795,7 +1964,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     day_of_week=day, period_number=p,
                     venue_name=c_venue,
                     created_at="now"
-                ))
+                )
                 filled_slots.add((day, p))
                 count += 1
                 oe_slots_needed -= 1
@@ -1828,8 +1997,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                     slot_obj = slot_lookup.get((day, p))
                     c_venue = assign_venue(day, p, c.course_code, False, count + sec)
                     if slot_obj:
-                        db.add(models.TimetableEntry(
-                            department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+                        entries.add(
                             course_code=c.course_code, course_name=c.course_name,
                             faculty_id=fac_assigned[0], faculty_name=fac_assigned[1],
                             session_type='THEORY',
@@ -1838,7 +2006,7 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
                             venue_name=c_venue,
                             section_number=sec + 1,
                             created_at="now"
-                        ))
+                        )
                         filled_slots.add((day, p))
                         count += 1
                     mark_faculty_busy(fac_assigned[0], day, p)
@@ -1862,14 +2030,13 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
             highest_elective = dept_electives[0]
             
             # Find all entries for this highest elective and update the name
-            for entry in db.new:
-                if isinstance(entry, models.TimetableEntry) and entry.course_code == highest_elective.course_code:
-                    if "OPEN ELECTIVE" not in str(entry.course_name).upper():
-                        entry.course_name = f"{entry.course_name} / OPEN ELECTIVE"
+            for entry in entries.for_course(highest_elective.course_code):
+                if "OPEN ELECTIVE" not in str(entry["course_name"]).upper():
+                    entry["course_name"] = f"{entry['course_name']} / OPEN ELECTIVE"
 
     # --- USER-DEFINED CONSTRAINTS (post-solve) ---
     count = user_interpreter.apply_post_solve(
-        db=db,
+        entries=entries,
         department_code=department_code,
         semester=semester,
         filled_slots=filled_slots,
@@ -1895,6 +2062,25 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         print(f"❌ Hard mode generation aborted during save phase with {len(generation_errors)} errors.")
         return {"success": False, "errors": generation_errors, "warnings": generation_warnings, "entries_saved": 0}
 
+    if stop_requested():
+        db.rollback()
+        return _cancelled_result(department_code, semester)
+
+    telemetry.mark("COMMIT")
+    from services import data_version, student_cache
+    touched_courses = student_cache.touched_courses(
+        db, models.TimetableEntry.department_code == department_code, models.TimetableEntry.semester == semester,
+        new_codes=(row["course_code"] for row in entries))
+    entries.replace(db, department_code, semester)
+    data_version.bump(db)
+    student_cache.invalidate(db, touched_courses, semester)
+    from services.solver_hints import save_solution
+    save_solution(db, department_code, semester, learning_mode_str, {
+        "theory": {k for k, v in theory_vars.items() if solver.Value(v)},
+        "lab": {k for k, v in lab_vars.items() if solver.Value(v)},
+        "merged": {k for k, v in merged_lab_vars.items() if solver.Value(v)},
+    })
+
     try:
         db.commit()
         print(f"💾 Saved {count} timetable entries.")
@@ -1902,5 +2088,22 @@ def generate_schedule(db: Session, department_code: str, semester: int, mentor_d
         db.rollback()
         print(f"❌ Database commit failed: {str(e)}")
         raise e
+
+    # Students of the changed courses get their timetable re-materialized; on
+    # failure their rows stay invalidated and are rebuilt on first read.
+    telemetry.mark("MATERIALIZE")
+    try:
+        refreshed = student_cache.refresh(db, touched_courses, semester)
+        print(f"🎓 Materialized {refreshed} student timetables.")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Student timetable materialization failed: {str(e)}")
     # Return structured dict
-    return {"success": True, "errors": generation_errors, "warnings": generation_warnings, "entries_saved": count}
+    result = {"success": True, "errors": generation_errors, "warnings": generation_warnings, "entries_saved": count,
+              "solve_stats": solve_stats}
+    if repair_info is not None:
+        from services.solver_hints import load_previous_placements, diff_placements
+        saved = load_previous_placements(db, department_code, semester, learning_mode_str)
+        repair_info["diff"] = diff_placements(previous_placements, saved)
+        result["repair"] = repair_info
+    return result
@@ -0,0 +1,266 @@
+"""
+Helpers for seeding CP-SAT from an existing timetable.
+
+Saved TimetableEntry rows (or the TimetableData JSON snapshot) are decoded
+back onto the solver's decision variables:
+
+    theory_vars[(course, day, period)]   <- THEORY rows at that slot
+    lab_vars[(course, day, block_start)] <- LAB rows at block_start and block_start + 1
+    merged_lab_vars[(day, block_start)]  <- LAB rows of any batch-rotation course
+
+Gap-fill extras are saved as ordinary THEORY/LAB rows, so a decode can show
+more slots than the solver picked. The solver's own decisions are therefore
+also kept in SolverSolution and preferred while they still match the rows.
+
+Used by repair mode (pin untouched courses, free the changed ones) and by
+warm starts (AddHint only).
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import models
+
+
+def check_hint_source(source: str, learning_mode_str: str) -> None:
+    """ValueError if `source` can't seed a run of these learning modes. A
+    TimetableData snapshot holds every mode of the dept/sem and its rows carry
+    no mode, so it only fits combined ("1,2") runs."""
+    if source == "snapshot" and learning_mode_str != "1,2":
+        raise ValueError("hint_source 'snapshot' covers all learning modes; "
+                         "use 'entries' for a learning-mode-specific run.")
+
+
+def load_previous_placements(db, department_code: str, semester: int, learning_mode_str: str = "1,2",
+                             source: str = "entries") -> List[dict]:
+    """Current rows for dept/sem/modes as plain dicts. source="snapshot" reads the
+    TimetableData JSON instead (same keys); it has no learning-mode split, so it is
+    only accepted for combined "1,2" runs (ValueError otherwise, see check_hint_source)."""
+    check_hint_source(source, learning_mode_str)
+    if source == "snapshot":
+        record = db.query(models.TimetableData).filter_by(department=department_code, semester=semester).first()
+        if not record or not record.data:
+            return []
+        try:
+            rows = json.loads(record.data)
+        except ValueError:
+            return []
+        return [
+            {
+                "course_code": r.get("course_code"),
+                "session_type": r.get("session_type"),
+                "day_of_week": r.get("day_of_week"),
+                "period_number": r.get("period_number"),
+                "section_number": r.get("section_number") or 1,
+                "faculty_id": r.get("faculty_id"),
+                "venue_name": r.get("venue_name"),
+            }
+            for r in rows
+        ]
+
+    rows = db.query(
+        models.TimetableEntry.course_code, models.TimetableEntry.session_type,
+        models.TimetableEntry.day_of_week, models.TimetableEntry.period_number,
+        models.TimetableEntry.section_number, models.TimetableEntry.faculty_id,
+        models.TimetableEntry.venue_name,
+    ).filter_by(department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str).all()
+    return [
+        {
+            "course_code": r.course_code,
+            "session_type": r.session_type,
+            "day_of_week": r.day_of_week,
+            "period_number": r.period_number,
+            "section_number": r.section_number or 1,
+            "faculty_id": r.faculty_id,
+            "venue_name": r.venue_name,
+        }
+        for r in rows
+    ]
+
+
+def load_saved_solution(db, department_code: str, semester: int, learning_mode_str: str = "1,2") -> Optional[Dict[str, set]]:
+    record = db.query(models.SolverSolution).filter_by(
+        department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str
+    ).first()
+    if not record:
+        return None
+    try:
+        data = json.loads(record.assignment_json)
+    except ValueError:
+        return None
+    return {
+        "theory": {tuple(k) for k in data.get("theory", [])},
+        "lab": {tuple(k) for k in data.get("lab", [])},
+        "merged": {tuple(k) for k in data.get("merged", [])},
+    }
+
+
+def save_solution(db, department_code: str, semester: int, learning_mode_str: str, assignment: Dict[str, set]):
+    """Upsert in the caller's transaction (committed together with the entries)."""
+    from datetime import datetime
+    payload = json.dumps({kind: sorted(list(k) for k in keys) for kind, keys in assignment.items()})
+    record = db.query(models.SolverSolution).filter_by(
+        department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str
+    ).first()
+    if record:
+        record.assignment_json = payload
+        record.created_at = datetime.utcnow().isoformat()
+    else:
+        db.add(models.SolverSolution(
+            department_code=department_code, semester=semester, learning_mode_ids=learning_mode_str,
+            assignment_json=payload, created_at=datetime.utcnow().isoformat()
+        ))
+
+
+def solution_matches(solution: Dict[str, set], placements: Iterable[dict]) -> bool:
+    """True when every stored decision still has its rows — i.e. nobody moved
+    them by hand through /timetable/save since the solve."""
+    theory_cells, lab_cells = set(), set()
+    for p in placements:
+        cell = (p["course_code"], p["day_of_week"], p["period_number"])
+        if p["session_type"] == "THEORY":
+            theory_cells.add(cell)
+        elif p["session_type"] == "LAB":
+            lab_cells.add(cell)
+    lab_slots = {(day, period) for (_, day, period) in lab_cells}
+    return (
+        all(k in theory_cells for k in solution["theory"])
+        and all((c, d, bs) in lab_cells and (c, d, bs + 1) in lab_cells for (c, d, bs) in solution["lab"])
+        and all((d, bs) in lab_slots for (d, bs) in solution["merged"])
+    )
+
+
+def previous_assignment(db, department_code: str, semester: int, learning_mode_str: str, placements: List[dict],
+                        theory_vars: dict, lab_vars: dict, merged_lab_vars: dict, merged_codes: Set[str]) -> Tuple[Dict[str, set], str]:
+    """Best available 0/1 picture of the last timetable: the stored solver
+    solution when it still matches the rows, else a decode of the rows."""
+    saved = load_saved_solution(db, department_code, semester, learning_mode_str)
+    if saved is not None and placements and solution_matches(saved, placements):
+        return {
+            "theory": {k for k in saved["theory"] if k in theory_vars},
+            "lab": {k for k in saved["lab"] if k in lab_vars},
+            "merged": {k for k in saved["merged"] if k in merged_lab_vars},
+        }, "solution"
+    return decode_placements(placements, theory_vars, lab_vars, merged_lab_vars, merged_codes), "entries"
+
+
+def decode_placements(placements: Iterable[dict], theory_vars: dict, lab_vars: dict, merged_lab_vars: dict,
+                      merged_codes: Set[str]) -> Dict[str, set]:
+    """Which variables were 1 in the saved timetable. Keys missing from the model
+    (dropped slots, removed courses) are simply skipped."""
+    theory_on, lab_on, merged_on = set(), set(), set()
+    lab_cells = set()
+    for p in placements:
+        day, period, code = p["day_of_week"], p["period_number"], p["course_code"]
+        if p["session_type"] == "THEORY":
+            if (code, day, period) in theory_vars:
+                theory_on.add((code, day, period))
+        elif p["session_type"] == "LAB":
+            lab_cells.add((code, day, period))
+
+    for (code, day, period) in lab_cells:
+        if (code, day, period + 1) not in lab_cells:
+            continue
+        if (code, day, period) in lab_vars:
+            lab_on.add((code, day, period))
+        if code in merged_codes and (day, period) in merged_lab_vars:
+            merged_on.add((day, period))
+
+    return {"theory": theory_on, "lab": lab_on, "merged": merged_on}
+
+
+def add_hints(model, decoded: Dict[str, set], theory_vars: dict, lab_vars: dict, merged_lab_vars: dict) -> int:
+    """Hint every decision variable (1 where the previous timetable had it, else 0).
+    A complete hint lets CP-SAT start from a full assignment instead of only a few
+    fixed literals. Returns the number of hinted variables."""
+    for kind, variables in (("theory", theory_vars), ("lab", lab_vars), ("merged", merged_lab_vars)):
+        on = decoded[kind]
+        for key, var in variables.items():
+            model.AddHint(var, key in on)
+    return len(theory_vars) + len(lab_vars) + len(merged_lab_vars)
+
+
+def find_affected_courses(course_codes: List[str], decoded: Dict[str, set], placements: Iterable[dict],
+                          theory_count: Dict[str, int], lab_blocks: Dict[str, int],
+                          course_faculty: Dict[str, list], global_faculty_busy: Dict[Tuple[str, int], set],
+                          merged_codes: Set[str], scope: Optional[dict] = None) -> Dict[str, str]:
+    """
+    course_code -> reason for every course whose inputs no longer match the
+    saved timetable, plus whatever the caller names in `scope`
+    ({"courses": [...], "faculty_ids": [...], "slots": [[day, period], ...]}).
+    """
+    scope = scope or {}
+    affected = {}
+
+    theory_by_course, lab_by_course = {}, {}
+    for (code, day, period) in decoded["theory"]:
+        theory_by_course.setdefault(code, set()).add((day, period))
+    for (code, day, bs) in decoded["lab"]:
+        lab_by_course.setdefault(code, set()).add((day, bs))
+
+    placed_faculty, placed_slots = {}, {}
+    for p in placements:
+        placed_slots.setdefault(p["course_code"], set()).add((p["day_of_week"], p["period_number"]))
+        if p.get("faculty_id"):
+            placed_faculty.setdefault(p["course_code"], set()).add(p["faculty_id"])
+
+    scope_courses = set(scope.get("courses") or [])
+    scope_faculty = set(scope.get("faculty_ids") or [])
+    scope_slots = {(s[0], int(s[1])) for s in (scope.get("slots") or [])}
+
+    for code in course_codes:
+        mapped = {f[0] for f in course_faculty.get(code, []) if f[0]}
+        slots_used = placed_slots.get(code, set())
+
+        if code in scope_courses:
+            affected[code] = "requested"
+        elif code not in placed_slots:
+            affected[code] = "new course"
+        elif len(theory_by_course.get(code, ())) < theory_count.get(code, 0):
+            affected[code] = "theory sessions changed"
+        elif code not in merged_codes and len(lab_by_course.get(code, ())) < lab_blocks.get(code, 0):
+            affected[code] = "lab blocks changed"
+        elif placed_faculty.get(code, set()) - mapped:
+            affected[code] = "faculty mapping changed"
+        elif mapped & scope_faculty:
+            affected[code] = "faculty requested"
+        elif slots_used & scope_slots:
+            affected[code] = "slot requested"
+        else:
+            for slot in slots_used:
+                if mapped and mapped <= global_faculty_busy.get(slot, set()):
+                    affected[code] = "faculty now busy elsewhere"
+                    break
+    return affected
+
+
+def diff_placements(before: Iterable[dict], after: Iterable[dict]) -> dict:
+    """Per (course, session type, section): slots that moved, plus rows that
+    appeared or disappeared without a counterpart."""
+    def group(rows):
+        out = {}
+        for r in rows:
+            key = (r["course_code"], r["session_type"], r.get("section_number") or 1)
+            out.setdefault(key, set()).add((r["day_of_week"], r["period_number"]))
+        return out
+
+    old, new = group(before), group(after)
+    moved, added, removed = [], [], []
+    unchanged = 0
+    day_order = {d: i for i, d in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])}
+    slot_key = lambda s: (day_order.get(s[0], 9), s[1])
+
+    for key in sorted(set(old) | set(new), key=lambda k: (k[0], k[1] or "", k[2])):
+        o, n = old.get(key, set()), new.get(key, set())
+        unchanged += len(o & n)
+        gone, came = sorted(o - n, key=slot_key), sorted(n - o, key=slot_key)
+        code, stype, sec = key
+        for src, dst in zip(gone, came):
+            moved.append({"course_code": code, "session_type": stype, "section_number": sec,
+                          "from": {"day": src[0], "period": src[1]}, "to": {"day": dst[0], "period": dst[1]}})
+        for src in gone[len(came):]:
+            removed.append({"course_code": code, "session_type": stype, "section_number": sec, "day": src[0], "period": src[1]})
+        for dst in came[len(gone):]:
+            added.append({"course_code": code, "session_type": stype, "section_number": sec, "day": dst[0], "period": dst[1]})
+
+    return {"unchanged": unchanged, "moved": moved, "added": added, "removed": removed}
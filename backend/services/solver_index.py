@@ -0,0 +1,56 @@
+"""
+Lookup tables over the solver's decision variables.
+
+Model construction used to filter theory_vars / lab_vars / merged_lab_vars
+with a full scan for every course or blocked slot, which made model build
+quadratic in the number of courses x slots. VariableIndex walks the three
+dicts once and groups the variables by course, day and (day, period), so each
+constraint builder reads exactly the variables it needs.
+
+    theory_vars[(course, day, period)]
+    lab_vars[(course, day, block_start)]     # block covers block_start and block_start + 1
+    merged_lab_vars[(day, block_start)]
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+
+class VariableIndex:
+    def __init__(self, theory_vars: dict, lab_vars: dict, merged_lab_vars: dict):
+        self.theory_by_course: Dict[str, list] = defaultdict(list)
+        self.theory_by_course_day: Dict[tuple, list] = defaultdict(list)
+        self.theory_at: Dict[tuple, list] = defaultdict(list)          # (day, period) -> vars
+
+        self.lab_by_course: Dict[str, list] = defaultdict(list)
+        self.lab_by_course_day: Dict[tuple, list] = defaultdict(list)
+        self.lab_by_day: Dict[str, list] = defaultdict(list)
+        self.lab_covering: Dict[tuple, list] = defaultdict(list)       # (day, period) -> blocks using it
+
+        self.merged_by_day: Dict[str, list] = defaultdict(list)
+        self.merged_covering: Dict[tuple, list] = defaultdict(list)
+
+        for (code, day, period), var in theory_vars.items():
+            self.theory_by_course[code].append(var)
+            self.theory_by_course_day[(code, day)].append(var)
+            self.theory_at[(day, period)].append(var)
+
+        for (code, day, bs), var in lab_vars.items():
+            self.lab_by_course[code].append(var)
+            self.lab_by_course_day[(code, day)].append(var)
+            self.lab_by_day[day].append(var)
+            self.lab_covering[(day, bs)].append(var)
+            self.lab_covering[(day, bs + 1)].append(var)
+
+        for (day, bs), var in merged_lab_vars.items():
+            self.merged_by_day[day].append(var)
+            self.merged_covering[(day, bs)].append(var)
+            self.merged_covering[(day, bs + 1)].append(var)
+
+    def vars_using_slot(self, day: str, period: int) -> List:
+        """Every theory, lab and merged-lab variable that would occupy (day, period)."""
+        return (
+            self.theory_at.get((day, period), [])
+            + self.lab_covering.get((day, period), [])
+            + self.merged_covering.get((day, period), [])
+        )
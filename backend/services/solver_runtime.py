@@ -0,0 +1,159 @@
+"""
+CP-SAT parameters and process-wide thread admission.
+
+Solver parameters come from the "solver" category of SchedulerConfig and can
+be overridden per request (GenerateRequest.solver). Before searching, every
+generation leases its CP-SAT threads from the solver_leases table, so the
+total across gunicorn workers and job processes stays under
+settings.solver_max_total_threads. When the budget is partly used a solve
+starts with fewer threads instead of waiting; it only waits when nothing is
+free.
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, insert, literal, select, text
+
+from config.settings import settings
+import models
+
+# Defaults match the values that used to be hard-coded in generate_schedule,
+# and random_seed CP-SAT's own default (1), so an unconfigured solve searches
+# exactly as before. 0 / False means "leave the CP-SAT default" for the others.
+SOLVER_DEFAULTS = {
+    "time_limit_seconds": 60.0,
+    "num_workers": 4,
+    "relative_gap_limit": 0.0,
+    "random_seed": 1,
+    "deterministic_time_limit": 0.0,
+    "stop_at_first_solution": False,
+}
+
+
+class SolverBusyError(Exception):
+    """No CP-SAT threads became free within settings.solver_admission_timeout_seconds."""
+
+
+def resolve_solver_params(get_conf: Callable, overrides: Optional[dict] = None) -> dict:
+    """SchedulerConfig values (via the solver's get_conf) with request overrides on top."""
+    params = {key: get_conf("solver", key, "value", default) for key, default in SOLVER_DEFAULTS.items()}
+    for key, value in (overrides or {}).items():
+        if key in SOLVER_DEFAULTS and value is not None:
+            params[key] = value
+
+    params["time_limit_seconds"] = max(float(params["time_limit_seconds"] or SOLVER_DEFAULTS["time_limit_seconds"]), 0.1)
+    params["num_workers"] = max(1, min(int(params["num_workers"] or 1), thread_budget()))
+    params["relative_gap_limit"] = max(float(params["relative_gap_limit"] or 0.0), 0.0)
+    if params["random_seed"] in (None, ""):
+        params["random_seed"] = SOLVER_DEFAULTS["random_seed"]
+    params["random_seed"] = int(params["random_seed"])
+    params["deterministic_time_limit"] = max(float(params["deterministic_time_limit"] or 0.0), 0.0)
+    params["stop_at_first_solution"] = bool(params["stop_at_first_solution"])
+    return params
+
+
+def apply_solver_params(solver, params: dict, num_workers: Optional[int] = None):
+    p = solver.parameters
+    p.max_time_in_seconds = params["time_limit_seconds"]
+    p.num_workers = num_workers or params["num_workers"]
+    p.random_seed = params["random_seed"]
+    if params["relative_gap_limit"] > 0:
+        p.relative_gap_limit = params["relative_gap_limit"]
+    if params["deterministic_time_limit"] > 0:
+        p.max_deterministic_time = params["deterministic_time_limit"]
+    if params["stop_at_first_solution"]:
+        p.stop_after_first_solution = True
+
+
+# ============================================
+# ADMISSION
+# ============================================
+
+def thread_budget() -> int:
+    return settings.solver_max_total_threads or os.cpu_count() or 4
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def _try_lease(db, holder: str, wanted: int, ttl_seconds: float) -> Optional[models.SolverLease]:
+    """Grant up to `wanted` threads if any are free. The insert re-checks the
+    budget in the same statement, so two processes can't both take the last threads
+    (SQLite serializes writers; PostgreSQL needs the table lock for that)."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE solver_leases IN SHARE ROW EXCLUSIVE MODE"))
+    now = _now()
+    live = models.SolverLease.expires_at > now.isoformat()
+    db.query(models.SolverLease).filter(models.SolverLease.expires_at <= now.isoformat()).delete()
+    used = db.query(func.coalesce(func.sum(models.SolverLease.threads), 0)).filter(live).scalar()
+    grant = min(wanted, thread_budget() - used)
+    if grant < 1:
+        db.commit()  # keep the expired-lease cleanup and release the table lock
+        return None
+
+    lease_id = uuid.uuid4().hex
+    expires = (now + timedelta(seconds=ttl_seconds)).isoformat()
+    still_free = (
+        select(literal(lease_id), literal(holder), literal(grant), literal(now.isoformat()), literal(expires))
+        .where(select(func.coalesce(func.sum(models.SolverLease.threads), 0)).where(live).scalar_subquery() + grant <= thread_budget())
+    )
+    inserted = db.execute(insert(models.SolverLease).from_select(
+        ["id", "holder", "threads", "acquired_at", "expires_at"], still_free
+    ))
+    db.commit()
+    if not inserted.rowcount:
+        return None
+    return db.query(models.SolverLease).filter_by(id=lease_id).first()
+
+
+def acquire_threads(wanted: int, holder: str, ttl_seconds: float,
+                    should_stop: Optional[Callable[[], bool]] = None, poll_seconds: float = 0.5) -> Optional[dict]:
+    """
+    Block until at least one CP-SAT thread is free and lease up to `wanted`.
+    Returns {"id", "threads", "waited_seconds"}, or None if should_stop() fired
+    while waiting. Raises SolverBusyError after the admission timeout.
+    Leases expire on their own (ttl) if the holder dies without releasing.
+    """
+    from services.generation_jobs import _status_session
+
+    started = time.perf_counter()
+    deadline = started + settings.solver_admission_timeout_seconds
+    announced = False
+    while True:
+        db = _status_session()
+        try:
+            lease = _try_lease(db, holder, wanted, ttl_seconds)
+            if lease:
+                return {"id": lease.id, "threads": lease.threads, "waited_seconds": round(time.perf_counter() - started, 3)}
+        finally:
+            db.close()
+
+        if should_stop and should_stop():
+            return None
+        if time.perf_counter() > deadline:
+            raise SolverBusyError(f"All {thread_budget()} solver threads are busy; try again shortly.")
+        if not announced:
+            print(f"⏳ Waiting for solver threads ({thread_budget()} in use)...")
+            announced = True
+        time.sleep(poll_seconds)
+
+
+def release_threads(lease: Optional[dict]):
+    if not lease:
+        return
+    from services.generation_jobs import _status_session
+    db = _status_session()
+    try:
+        db.query(models.SolverLease).filter_by(id=lease["id"]).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def lease_holder(department_code: str, semester: int) -> str:
+    return f"{department_code}|{semester}|pid {os.getpid()}"
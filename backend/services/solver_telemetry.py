@@ -0,0 +1,172 @@
+"""
+Per-run instrumentation for generate_schedule.
+
+The solver marks phase boundaries (CONFIG_FETCH, DATA_FETCH, MODEL_BUILD,
+SOLVE, VENUE_ASSIGNMENT, SAVE, GAP_FILL, COMMIT); each phase records wall time
+and the number of SQL statements the solver's session issued. Model size and
+CP-SAT search statistics are added around the solve. The summary is returned
+as result["telemetry"] and stored as a GenerationRun row.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import models
+
+_run_sessionmakers = {}
+
+
+def _run_session(url):
+    """NullPool session on the solver's database, so run records commit apart
+    from the solver's transaction (see generation_jobs._status_session)."""
+    key = str(url)
+    if key not in _run_sessionmakers:
+        from utils.db_engine import create_db_engine
+        run_engine = create_db_engine(url, poolclass=NullPool)
+        _run_sessionmakers[key] = sessionmaker(autocommit=False, autoflush=False, bind=run_engine)
+    return _run_sessionmakers[key]()
+
+
+class GenerationTelemetry:
+    def __init__(self, db, department_code: str, semester: int, learning_mode_str: str = "1,2"):
+        self.department_code = department_code
+        self.semester = semester
+        self.learning_mode_str = learning_mode_str
+        self.started_at = datetime.utcnow().isoformat()
+        self.phases = {}
+        self.model = {}
+        self.solver = {}
+        self.total_queries = 0
+        self._phase = None
+        self._phase_started = self._t0 = time.perf_counter()
+        self._phase_queries = 0
+
+        # Engine-wide hook, so only count statements from the solver's own thread
+        self._thread = threading.get_ident()
+        self._engine = db.get_bind()
+        event.listen(self._engine, "before_cursor_execute", self._count_query)
+
+    def _count_query(self, *args, **kwargs):
+        if threading.get_ident() == self._thread:
+            self.total_queries += 1
+            self._phase_queries += 1
+
+    def mark(self, phase: str):
+        """Close the current phase and start `phase`."""
+        now = time.perf_counter()
+        if self._phase:
+            entry = self.phases.setdefault(self._phase, {"seconds": 0.0, "queries": 0})
+            entry["seconds"] = round(entry["seconds"] + now - self._phase_started, 4)
+            entry["queries"] += self._phase_queries
+        self._phase, self._phase_started, self._phase_queries = phase, now, 0
+
+    def record_model(self, model):
+        proto = model.Proto()
+        bools = sum(1 for v in proto.variables if list(v.domain) == [0, 1])
+        self.model = {
+            "variables": len(proto.variables),
+            "bool_vars": bools,
+            "constraints": len(proto.constraints),
+            "hinted_vars": len(proto.solution_hint.vars),
+        }
+
+    def record_solver(self, solver, status, first_solution_seconds: Optional[float] = None, has_objective: bool = True):
+        feasible = solver.StatusName(status) in ("OPTIMAL", "FEASIBLE")
+        self.solver = {
+            "status": solver.StatusName(status),
+            "wall_seconds": round(solver.WallTime(), 4),
+            "first_solution_seconds": round(first_solution_seconds, 4) if first_solution_seconds is not None else None,
+            "conflicts": solver.NumConflicts(),
+            "branches": solver.NumBranches(),
+            "booleans": solver.NumBooleans(),
+            "objective": solver.ObjectiveValue() if feasible and has_objective else None,
+            "best_bound": solver.BestObjectiveBound() if feasible and has_objective else None,
+            "workers": solver.parameters.num_workers,
+            "response_stats": solver.ResponseStats(),
+        }
+
+    def finish(self, result=None, error: Optional[str] = None) -> dict:
+        """Close the last phase, detach the query hook and persist a GenerationRun."""
+        self.mark(None)
+        event.remove(self._engine, "before_cursor_execute", self._count_query)
+
+        if error is not None:
+            status, error_type = "ERROR", "EXCEPTION"
+        elif isinstance(result, dict) and result.get("success"):
+            status, error_type = "SUCCEEDED", None
+        else:
+            errors = result.get("errors", []) if isinstance(result, dict) else []
+            error_type = errors[0].get("type") if errors else None
+            status = "CANCELLED" if error_type == "CANCELLED" else "FAILED"
+
+        summary = {
+            "status": status,
+            "error_type": error_type,
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._t0, 4),
+            "total_queries": self.total_queries,
+            "phases": self.phases,
+            "model": self.model,
+            "solver": {k: v for k, v in self.solver.items() if k != "response_stats"},
+        }
+        entries_saved = result.get("entries_saved", 0) if isinstance(result, dict) else 0
+        summary["run_id"] = self._persist(summary, entries_saved, error)
+        return summary
+
+    def _persist(self, summary: dict, entries_saved: int, error: Optional[str]) -> Optional[int]:
+        db = _run_session(self._engine.url)
+        try:
+            run = models.GenerationRun(
+                department_code=self.department_code,
+                semester=self.semester,
+                learning_mode_ids=self.learning_mode_str,
+                status=summary["status"],
+                error_type=summary["error_type"],
+                error=error,
+                started_at=self.started_at,
+                total_seconds=summary["total_seconds"],
+                solve_seconds=self.solver.get("wall_seconds"),
+                query_count=self.total_queries,
+                bool_vars=self.model.get("bool_vars"),
+                constraints=self.model.get("constraints"),
+                entries_saved=entries_saved,
+                telemetry_json=json.dumps({**summary, "response_stats": self.solver.get("response_stats")}),
+            )
+            db.add(run)
+            db.commit()
+            return run.id
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Could not store generation telemetry: {e}")
+            return None
+        finally:
+            db.close()
+
+
+def run_to_dict(run: models.GenerationRun, detail: bool = False) -> dict:
+    data = {
+        "run_id": run.id,
+        "department_code": run.department_code,
+        "semester": run.semester,
+        "learning_mode_ids": run.learning_mode_ids,
+        "status": run.status,
+        "error_type": run.error_type,
+        "started_at": run.started_at,
+        "total_seconds": run.total_seconds,
+        "solve_seconds": run.solve_seconds,
+        "query_count": run.query_count,
+        "bool_vars": run.bool_vars,
+        "constraints": run.constraints,
+        "entries_saved": run.entries_saved,
+    }
+    if detail:
+        data["telemetry"] = json.loads(run.telemetry_json) if run.telemetry_json else None
+        data["error"] = run.error
+    return data
@@ -0,0 +1,128 @@
+"""
+Materialized student timetables (student_timetable_cache).
+
+/timetable/student/{id} reads one row by primary key. Rows are kept correct
+in two steps around every write that can change a student's view:
+
+    courses = student_cache.touched_courses(db, *scope, new_codes=...)
+    ...write entries / registrations...
+    student_cache.invalidate(db, courses, semester)   # same transaction
+    db.commit()
+    student_cache.refresh(db, courses, semester)     # after: rebuild those students
+
+Invalidation is part of the writer's transaction, so a crash before refresh()
+only leaves rows missing; read() then resolves the student and stores the row.
+Stores are conditional on the data_versions tokens read before resolving, so
+a result computed from data that changed in the meantime is never saved.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select
+
+import models
+from services import data_version
+from services.student_timetable import encode_views, resolve_many, resolve_student
+
+R, E = models.CourseRegistration, models.TimetableEntry
+_CACHE = models.StudentTimetableCache.__table__
+_VERSIONS = models.DataVersion.__table__
+_TOKENS = (data_version.TIMETABLE, data_version.REGISTRATIONS)
+
+
+def dumps(view) -> str:
+    """Same rendering as fastapi's JSONResponse."""
+    return json.dumps(view, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def touched_courses(db, *conditions, new_codes: Iterable[str] = ()) -> Set[str]:
+    """Course codes of the entries matching conditions (call before deleting
+    them) plus the codes about to be written."""
+    old = {code for (code,) in db.query(E.course_code).filter(*conditions).distinct()}
+    return old | set(new_codes)
+
+
+def _registrants(course_codes, semester: Optional[int]):
+    query = select(R.student_id).where(R.course_code.in_(list(course_codes)))
+    if semester is not None:
+        query = query.where(R.semester == semester)
+    return query.correlate(None)
+
+
+def _lock_tokens(db) -> None:
+    """SQLite serializes writers, so a store can't interleave with a writer's
+    invalidate. Elsewhere both take the data_versions row locks first."""
+    if db.get_bind().dialect.name != "sqlite":
+        db.execute(select(_VERSIONS.c.name).where(_VERSIONS.c.name.in_(_TOKENS)).with_for_update()).all()
+
+
+def invalidate(db, course_codes: Iterable[str] = (), semester: Optional[int] = None,
+               student_ids: Iterable[str] = ()) -> None:
+    """Drop the rows of everyone registered in course_codes (in `semester`, or any),
+    and of student_ids (no commit)."""
+    course_codes, student_ids = list(course_codes), list(student_ids)
+    if course_codes or student_ids:
+        _lock_tokens(db)
+    if course_codes:
+        db.execute(delete(_CACHE).where(_CACHE.c.student_id.in_(_registrants(course_codes, semester))))
+    if student_ids:
+        db.execute(delete(_CACHE).where(_CACHE.c.student_id.in_(student_ids)))
+
+
+def _store(db, payloads: Dict[str, str], tokens: tuple) -> None:
+    """Upsert rows, but only if the tokens are still the ones read before
+    resolving — checked inside the INSERT, so it is atomic in SQLite."""
+    if not payloads:
+        return
+    _lock_tokens(db)
+    unchanged = and_(*(
+        func.coalesce(select(_VERSIONS.c.version).where(_VERSIONS.c.name == name).scalar_subquery(), "")
+        == (token or "")
+        for name, token in zip(_TOKENS, tokens)
+    ))
+    db.execute(delete(_CACHE).where(_CACHE.c.student_id.in_(list(payloads))))
+    db.execute(
+        insert(_CACHE).from_select(
+            ["student_id", "payload", "built_at"],
+            select(bindparam("sid", type_=_CACHE.c.student_id.type),
+                   bindparam("payload", type_=_CACHE.c.payload.type),
+                   bindparam("built_at", type_=_CACHE.c.built_at.type)).where(unchanged),
+        ),
+        [{"sid": sid, "payload": payload, "built_at": datetime.utcnow().isoformat()}
+         for sid, payload in payloads.items()],
+    )
+
+
+def refresh(db, course_codes: Iterable[str], semester: Optional[int] = None) -> int:
+    """Rebuild the rows of everyone registered in course_codes. Commits; returns
+    the number of students resolved."""
+    course_codes = list(course_codes)
+    if not course_codes:
+        return 0
+    tokens = data_version.current_many(db, _TOKENS)
+    views = encode_views(resolve_many(db, R.student_id.in_(_registrants(course_codes, semester))))
+    _store(db, {sid: dumps(view) for sid, view in views.items()}, tokens)
+    db.commit()
+    return len(views)
+
+
+def read(db, student_id: str) -> Optional[str]:
+    """The student's rendered timetable, or None for an unknown student. A
+    missing row is resolved and stored."""
+    row = db.execute(select(_CACHE.c.payload).where(_CACHE.c.student_id == student_id)).first()
+    if row is not None:
+        return row[0]
+    tokens = data_version.current_many(db, _TOKENS)
+    view = resolve_student(db, student_id)
+    if view is None:
+        return None
+    payload = dumps(encode_views({student_id: view})[student_id])
+    try:
+        _store(db, {student_id: payload}, tokens)
+        db.commit()
+    except Exception as e:       # a busy database must not fail the read
+        db.rollback()
+        print(f"[STUDENT CACHE] Could not store {student_id}: {e}")
+    return payload
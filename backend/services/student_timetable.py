@@ -0,0 +1,186 @@
+"""
+Student timetables from registrations, without a query per registration.
+
+For every registration the student's rows are picked like this:
+
+1. Entries of the registered course/semester whose learning_mode_ids include
+   the student's learning_mode_id.
+2. Those of the student's own department when there are any, otherwise the
+   course's entries wherever it is hosted (common courses, electives).
+3. Per session type the course runs in n sections (the highest
+   section_number). The course's registrants are ranked by student_id —
+   within the student's department in case 2, across all departments
+   otherwise — and split into n contiguous, equal blocks:
+   section = rank * n // registrants + 1. The rule is deterministic, so the
+   same student always lands in the same section.
+4. One entry per (course, day, period).
+
+resolve_student() and resolve_cohort() run the same three queries whatever
+the number of registrations: the registrations to resolve, the ranks among
+each course's registrants (counted in SQL for one student, registrant ids
+for many) and every entry of those courses in one join. A cohort is a whole
+department/semester resolved in that one pass.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, select
+
+import models
+
+R, S, E = models.CourseRegistration, models.StudentMaster, models.TimetableEntry
+
+
+class Registrants:
+    """Sorted registrant ids per (course, semester) and per (course, semester,
+    department) — used when resolving many students at once."""
+
+    def __init__(self, rows):
+        self.by_course = defaultdict(list)
+        self.by_dept = defaultdict(list)
+        for course_code, semester, student_id, department_code in sorted(rows, key=lambda r: r[2]):
+            self.by_course[(course_code, semester)].append(student_id)
+            self.by_dept[(course_code, semester, department_code)].append(student_id)
+
+    def rank(self, student_id: str, course: tuple, department_code: Optional[str] = None):
+        """(rank, registrants) of student_id in the course, optionally within a department."""
+        ids = self.by_course[course] if department_code is None else self.by_dept[course + (department_code,)]
+        return bisect_left(ids, student_id), len(ids)
+
+
+class StudentRanks:
+    """One student's (rank, registrants) per course, counted in SQL — a single
+    student doesn't need every registrant id of a 3000-student common course."""
+
+    def __init__(self, rows):
+        self.ranks = {(code, sem): (dept_rank, dept_size, rank, size)
+                      for code, sem, dept_rank, dept_size, rank, size in rows}
+
+    def rank(self, student_id: str, course: tuple, department_code: Optional[str] = None):
+        dept_rank, dept_size, rank, size = self.ranks.get(course, (0, 0, 0, 0))
+        return (rank, size) if department_code is None else (dept_rank, dept_size)
+
+
+def _in_mode(entry, mode) -> bool:
+    if mode is None or not entry.learning_mode_ids:
+        return True
+    return str(mode) in entry.learning_mode_ids.split(",")
+
+
+def pick_entries(student: tuple, courses: List[tuple], registrants,
+                 entries: Dict[tuple, list]) -> List[models.TimetableEntry]:
+    """student: (student_id, department_code, learning_mode_id); courses: its
+    registered (course_code, semester) pairs in registration order; entries:
+    (course_code, semester) -> TimetableEntry rows in id order."""
+    student_id, department_code, mode = student
+    picked, seen = [], set()
+    for course in courses:
+        candidates = [e for e in entries.get(course, ()) if _in_mode(e, mode)]
+        own = [e for e in candidates if e.department_code == department_code]
+        if own:
+            candidates = own
+            rank, size = registrants.rank(student_id, course, department_code)
+        else:
+            rank, size = registrants.rank(student_id, course)
+        by_type = defaultdict(list)
+        for e in candidates:
+            by_type[e.session_type].append(e)
+        for group in by_type.values():
+            sections = sorted({e.section_number or 1 for e in group})
+            wanted = rank * sections[-1] // max(size, 1) + 1
+            if wanted not in sections:
+                wanted = sections[0]
+            for e in group:
+                key = (e.course_code, e.day_of_week, e.period_number)
+                if (e.section_number or 1) == wanted and key not in seen:
+                    seen.add(key)
+                    picked.append(e)
+    return picked
+
+
+def clashes(entries: List[models.TimetableEntry]) -> List[str]:
+    """Slots holding more than one registered course."""
+    slot_map = defaultdict(list)
+    for e in entries:
+        slot_map[(e.day_of_week, e.period_number)].append(e)
+    conflicts = set()
+    for (day, period), items in slot_map.items():
+        course_codes = set(i.course_code for i in items)
+        if len(course_codes) > 1:
+            conflicts.add(f"Conflict on {day} Period {period}: {' & '.join(sorted(course_codes))}")
+    return sorted(conflicts)
+
+
+def resolve_many(db, *conditions) -> Dict[str, dict]:
+    """student_id -> {"conflicts", "timetable"} for the registrations matching
+    conditions (on CourseRegistration/StudentMaster), in student_id order.
+    Subqueries on course_registrations in conditions must be .correlate(None)."""
+    regs = db.execute(
+        select(R.student_id, R.course_code, R.semester, S.department_code, S.learning_mode_id)
+        .join(S, S.student_id == R.student_id).where(*conditions).order_by(R.student_id, R.id)
+    ).all()
+    if not regs:
+        return {}
+
+    courses = (select(R.course_code, R.semester).join(S, S.student_id == R.student_id)
+               .where(*conditions).distinct().subquery())
+    on_course = lambda col_code, col_sem: (courses.c.course_code == col_code) & (courses.c.semester == col_sem)
+    registrations = (select(R.course_code, R.semester).join(S, S.student_id == R.student_id)
+                     .join(courses, on_course(R.course_code, R.semester)))
+    if len({r[0] for r in regs}) == 1:
+        student_id, department_code = regs[0][0], regs[0][3]
+        same_dept = S.department_code == department_code
+        before = R.student_id < student_id
+        counted = lambda cond: func.sum(case((cond, 1), else_=0))
+        registrants = StudentRanks(db.execute(
+            registrations.add_columns(counted(same_dept & before), counted(same_dept), counted(before), func.count())
+            .group_by(R.course_code, R.semester)
+        ).all())
+    else:
+        registrants = Registrants(db.execute(registrations.add_columns(R.student_id, S.department_code)).all())
+    entries = defaultdict(list)
+    for entry in db.query(E).join(courses, on_course(E.course_code, E.semester)).order_by(E.id):
+        entries[(entry.course_code, entry.semester)].append(entry)
+
+    students, registered = {}, defaultdict(list)
+    for student_id, course_code, semester, department_code, mode in regs:
+        students[student_id] = (student_id, department_code, mode)
+        registered[student_id].append((course_code, semester))
+    views = {}
+    for student_id, student in students.items():
+        picked = pick_entries(student, registered[student_id], registrants, entries)
+        views[student_id] = {"conflicts": clashes(picked), "timetable": picked}
+    return views
+
+
+def resolve_student(db, student_id: str) -> Optional[dict]:
+    """{"conflicts", "timetable"} for one student, or None if unknown."""
+    views = resolve_many(db, R.student_id == student_id)
+    if student_id in views:
+        return views[student_id]
+    if db.query(S.student_id).filter_by(student_id=student_id).first() is None:
+        return None
+    return {"conflicts": [], "timetable": []}
+
+
+def encode_views(views: Dict[str, dict]) -> Dict[str, dict]:
+    """JSON-ready copy of resolve_cohort() output. Students share entries, so
+    each entry is encoded once instead of once per student."""
+    from fastapi.encoders import jsonable_encoder
+    encoded = {}
+
+    def entry_json(entry):
+        if entry.id not in encoded:
+            encoded[entry.id] = jsonable_encoder(entry)
+        return encoded[entry.id]
+
+    return {sid: {"conflicts": view["conflicts"], "timetable": [entry_json(e) for e in view["timetable"]]}
+            for sid, view in views.items()}
+
+
+def resolve_cohort(db, department_code: str, semester: int) -> Dict[str, dict]:
+    """student_id -> {"conflicts", "timetable"} for every student of
+    department_code with registrations in `semester`."""
+    return resolve_many(db, S.department_code == department_code, R.semester == semester)
@@ -2,23 +2,31 @@
 CMS Sync Service
 ----------------
 1. Syncs data from the remote MySQL CMS database into the local cms_local.db.
-2. After sync, migrates Semester 4 student data into college_scheduler.db.
+2. After sync, migrates Semester 4 student data into the scheduler database
+   (college_scheduler.db, or settings.database_url - SQLite or PostgreSQL).
    - student_master: upserts student_id, name, department_code, learning_mode_id
    - course_registrations: inserts mapped course registrations (sem=4)
    No other tables or rows in college_scheduler.db are touched.
 """
 
+import hashlib
+import json
 import sqlite3
 import os
 from collections import defaultdict
 
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+
+import models
+from services import data_version
+
 # ---------------------------------------------------------------------------
 # Paths  — resolved relative to THIS file so they work regardless of CWD
 # ---------------------------------------------------------------------------
 _HERE = os.path.dirname(os.path.abspath(__file__))
 _DB_DIR = os.path.normpath(os.path.join(_HERE, "..", "..", "database"))
 CMS_LOCAL_DB  = os.path.join(_DB_DIR, "cms_local.db")
-SCHEDULER_DB  = os.path.join(_DB_DIR, "college_scheduler.db")
 USERS_DB      = os.path.join(_DB_DIR, "users.db")
 
 # Env / settings for MySQL connection
@@ -62,63 +70,247 @@ def _noop(level, message):
     print(f"[{level.upper()}] {message}")
 
 
-# ============================================================
-# PART 1: Sync MySQL → cms_local.db
-# ============================================================
+# Each table is read on its own source connection (settings.cms_sync_workers
+# at once), settings.cms_sync_chunk_rows rows per fetch from an unbuffered
+# cursor, and written into "<table>__shadow". Once every worker is done the
+# shadow tables replace the live ones in a single transaction: cms_local.db
+# never holds a half-synced table, and a table that failed keeps its
+# previous copy. Shadow tables are not per run: sync_databases() makes sure
+# only one sync runs at a time.
+#
+# Tables whose source fingerprint (MySQL: CHECKSUM TABLE) and query match
+# the last sync, recorded in _sync_state, are not copied again.
 
-def _sync_mysql_to_local(emit) -> dict:
-    try:
-        import mysql.connector
-    except ImportError:
-        raise RuntimeError("mysql-connector-python is not installed. Run: pip install mysql-connector-python")
+_SHADOW_SUFFIX = "__shadow"
+_STATE_TABLE = "_sync_state"
 
-    emit("info", f"Connecting to MySQL at {MYSQL_CONFIG['host']}:{MYSQL_CONFIG['port']} ...")
-    try:
-        mysql_conn = mysql.connector.connect(**MYSQL_CONFIG)
-        emit("success", "Connected to MySQL successfully.")
-    except Exception as e:
-        emit("error", f"Failed to connect to MySQL: {e}")
-        raise
 
-    mysql_cursor = mysql_conn.cursor(dictionary=True)
-    sqlite_conn = sqlite3.connect(CMS_LOCAL_DB)
-    summary = {"synced": [], "skipped": []}
+class MySQLSource:
+    """The CMS MySQL database."""
+
+    def __init__(self, config: dict = None):
+        self.config = config or MYSQL_CONFIG
 
-    total = len(SYNC_QUERIES)
-    for i, (table_name, query) in enumerate(SYNC_QUERIES.items(), 1):
-        emit("info", f"[{i}/{total}] Syncing table: {table_name} ...")
+    def describe(self) -> str:
+        return f"MySQL at {self.config['host']}:{self.config['port']}"
+
+    def connect(self):
+        try:
+            import mysql.connector
+        except ImportError:
+            raise RuntimeError("mysql-connector-python is not installed. Run: pip install mysql-connector-python")
+        return mysql.connector.connect(**self.config)
+
+    def fingerprint(self, conn, table: str):
+        """CHECKSUM TABLE of the whole table (None if the server can't tell)."""
+        cur = conn.cursor()
         try:
-            mysql_cursor.execute(query)
-            rows = mysql_cursor.fetchall()
+            cur.execute(f"CHECKSUM TABLE `{table}`")
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        return None if row is None or row[1] is None else str(row[1])
 
-            if rows:
-                columns = list(rows[0].keys())
-            else:
-                columns = [desc[0] for desc in mysql_cursor.description]
 
-            sqlite_conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-            col_defs = ", ".join([f'"{c}" TEXT' for c in columns])
-            sqlite_conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({col_defs})")
+class SQLiteSource:
+    """A SQLite copy of the CMS tables, for tests and offline syncs. SQLite has
+    no table checksum, so the fingerprint hashes the rows."""
 
-            if rows:
-                placeholders = ",".join(["?" for _ in columns])
-                sqlite_conn.executemany(
-                    f"INSERT INTO {table_name} VALUES ({placeholders})",
-                    [[row[c] for c in columns] for row in rows]
-                )
+    def __init__(self, path: str):
+        self.path = path
 
-            sqlite_conn.commit()
-            emit("success", f"  {table_name}: {len(rows)} rows imported.")
-            summary["synced"].append(table_name)
+    def describe(self) -> str:
+        return f"SQLite at {self.path}"
 
-        except Exception as e:
-            emit("warning", f"  Skipped {table_name}: {e}")
-            summary["skipped"].append({"table": table_name, "reason": str(e)})
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
 
-    mysql_cursor.close()
-    mysql_conn.close()
-    sqlite_conn.close()
-    emit("success", f"MySQL sync done. {len(summary['synced'])} tables synced, {len(summary['skipped'])} skipped.")
+    def fingerprint(self, conn, table: str):
+        digest = hashlib.sha1()
+        for row in conn.execute(f'SELECT * FROM "{table}"'):
+            digest.update(repr(row).encode())
+        return digest.hexdigest()
+
+
+def _sqlite_value(value):
+    # Decimal, date, datetime, ... are stored as text, like the TEXT columns they go into
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    return str(value)
+
+
+def _read_sync_state(target: str) -> tuple:
+    """({table: (query, fingerprint)}, tables in cms_local.db)"""
+    conn = sqlite3.connect(target)
+    try:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_STATE_TABLE} "
+                     f"(table_name TEXT PRIMARY KEY, query TEXT, fingerprint TEXT, row_count INTEGER, synced_at TEXT)")
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for name in [t for t in tables if t.endswith(_SHADOW_SUFFIX)]:
+            # Left over from an interrupted sync (sync_databases runs one sync at a time)
+            conn.execute(f'DROP TABLE "{name}"')
+            tables.discard(name)
+        conn.commit()
+        state = {t: (q, f) for t, q, f in conn.execute(f"SELECT table_name, query, fingerprint FROM {_STATE_TABLE}")}
+    finally:
+        conn.close()
+    return state, tables
+
+
+def _copy_table(src, dst, write_lock, table: str, query: str, chunk_rows: int) -> int:
+    """Stream `query` into "<table>__shadow". Returns rows copied."""
+    shadow = f"{table}{_SHADOW_SUFFIX}"
+    cur = src.cursor()   # mysql.connector cursors are unbuffered: rows arrive as they are fetched
+    try:
+        cur.execute(query)
+        columns = [desc[0] for desc in cur.description]
+        col_defs = ", ".join([f'"{c}" TEXT' for c in columns])
+        insert = f'INSERT INTO "{shadow}" VALUES ({",".join(["?" for _ in columns])})'
+        with write_lock:
+            dst.execute(f'DROP TABLE IF EXISTS "{shadow}"')
+            dst.execute(f'CREATE TABLE "{shadow}" ({col_defs})')
+            dst.commit()
+        copied = 0
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            # One short write transaction per chunk; the other workers keep reading meanwhile
+            with write_lock:
+                dst.executemany(insert, [[_sqlite_value(v) for v in row] for row in rows])
+                dst.commit()
+            copied += len(rows)
+        return copied
+    finally:
+        cur.close()
+
+
+def _recover(source, src, dst, write_lock, table: str, target: str) -> tuple:
+    """After a failed table: drop its shadow and reconnect to the source (a
+    half-read unbuffered result leaves the connection unusable)."""
+    if dst is not None:
+        try:
+            dst.rollback()
+            with write_lock:
+                dst.execute(f'DROP TABLE IF EXISTS "{table}{_SHADOW_SUFFIX}"')
+                dst.commit()
+        except Exception:
+            dst.close()
+            dst = None
+    if src is not None:
+        try:
+            src.close()
+        except Exception:
+            pass
+    try:
+        src = source.connect()
+    except Exception:
+        src = None
+    if dst is None:
+        try:
+            dst = sqlite3.connect(target, timeout=60)
+        except Exception:
+            dst = None
+    return src, dst
+
+
+def _swap_shadow_tables(target: str, done: list) -> None:
+    """Replace the live tables with their shadows, all in one transaction."""
+    from datetime import datetime
+    conn = sqlite3.connect(target, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table, query, fingerprint, rows in done:
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+                conn.execute(f'ALTER TABLE "{table}{_SHADOW_SUFFIX}" RENAME TO "{table}"')
+                conn.execute(f"INSERT OR REPLACE INTO {_STATE_TABLE} VALUES (?, ?, ?, ?, ?)",
+                             (table, query, fingerprint, rows, datetime.now().isoformat()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def _sync_mysql_to_local(emit, source=None, target: str = CMS_LOCAL_DB, queries: dict = None) -> dict:
+    import queue
+    import threading
+
+    source = source or MySQLSource()
+    queries = SYNC_QUERIES if queries is None else queries
+    chunk_rows = max(1, settings.cms_sync_chunk_rows)
+    n_workers = max(1, min(settings.cms_sync_workers, len(queries)))
+
+    emit("info", f"Connecting to {source.describe()} ...")
+    try:
+        source.connect().close()
+        emit("success", "Connected successfully.")
+    except Exception as e:
+        emit("error", f"Failed to connect: {e}")
+        raise
+
+    previous, local_tables = _read_sync_state(target)
+    summary = {"synced": [], "unchanged": [], "skipped": []}
+    done = []
+    results_lock = threading.Lock()
+    write_lock = threading.Lock()
+    pending = queue.Queue()
+    total = len(queries)
+    for i, item in enumerate(queries.items(), 1):
+        pending.put((i,) + item)
+
+    def worker():
+        src = dst = None
+        try:
+            src = source.connect()
+            dst = sqlite3.connect(target, timeout=60)
+        except Exception as e:
+            emit("warning", f"  Worker could not connect: {e}")
+        while True:
+            try:
+                i, table_name, query = pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if src is None or dst is None:
+                    raise RuntimeError("no connection")
+                try:
+                    fingerprint = source.fingerprint(src, table_name)
+                except Exception:
+                    fingerprint = None   # can't tell - copy it
+                if (fingerprint is not None and previous.get(table_name) == (query, fingerprint)
+                        and table_name in local_tables):
+                    emit("info", f"[{i}/{total}] {table_name}: unchanged, skipped.")
+                    with results_lock:
+                        summary["unchanged"].append(table_name)
+                    continue
+                emit("info", f"[{i}/{total}] Syncing table: {table_name} ...")
+                rows = _copy_table(src, dst, write_lock, table_name, query, chunk_rows)
+                emit("success", f"  {table_name}: {rows} rows copied.")
+                with results_lock:
+                    done.append((table_name, query, fingerprint, rows))
+            except Exception as e:
+                emit("warning", f"  Skipped {table_name}: {e}")
+                with results_lock:
+                    summary["skipped"].append({"table": table_name, "reason": str(e)})
+                src, dst = _recover(source, src, dst, write_lock, table_name, target)
+        for conn in (src, dst):
+            if conn is not None:
+                conn.close()
+
+    threads = [threading.Thread(target=worker, name=f"cms-sync-{n}", daemon=True) for n in range(n_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if done:
+        _swap_shadow_tables(target, done)
+    summary["synced"] = sorted(table for table, *_ in done)
+    emit("success", f"CMS sync done. {len(summary['synced'])} tables synced, "
+                    f"{len(summary['unchanged'])} unchanged, {len(summary['skipped'])} skipped.")
     return summary
 
 
@@ -126,108 +318,106 @@ def _sync_mysql_to_local(emit) -> dict:
 # PART 2: Migrate Sem-4 students → college_scheduler.db
 # ============================================================
 
-def _migrate_sem4_students(emit) -> dict:
+def _migrate_sem4_students(emit, db: Session, cms_db: str = CMS_LOCAL_DB) -> dict:
     emit("info", "Starting Semester 4 student migration into college_scheduler.db ...")
 
-    con_cms   = sqlite3.connect(CMS_LOCAL_DB)
-    con_sched = sqlite3.connect(SCHEDULER_DB)
-    cur_cms   = con_cms.cursor()
-    cur_sched = con_sched.cursor()
-
-    summary = {"students_upserted": 0, "registrations_inserted": 0, "unmapped_courses": set()}
-
-    sem4_row = cur_cms.execute(
-        "SELECT id FROM academic_calendar WHERE current_semester = 4 LIMIT 1"
-    ).fetchone()
-    if not sem4_row:
-        con_cms.close(); con_sched.close()
-        raise RuntimeError("No row with current_semester=4 found in cms_local.db academic_calendar.")
-
-    sem4_year_id = sem4_row[0]
-    emit("info", f"Academic calendar: Semester 4 = year_id {sem4_year_id}")
-
-    students = cur_cms.execute("""
-        SELECT s.register_no, s.student_name, d.department_code, s.learning_mode_id, s.id
-        FROM students s
-        LEFT JOIN departments d ON s.department_id = d.id
-        WHERE CAST(s.year AS INTEGER) = ? AND CAST(s.status AS INTEGER) = 1
-    """, (sem4_year_id,)).fetchall()
+    con_cms = sqlite3.connect(cms_db)
+    cur_cms = con_cms.cursor()
+    try:
+        sem4_row = cur_cms.execute(
+            "SELECT id FROM academic_calendar WHERE current_semester = 4 LIMIT 1"
+        ).fetchone()
+        if not sem4_row:
+            raise RuntimeError("No row with current_semester=4 found in cms_local.db academic_calendar.")
+
+        sem4_year_id = sem4_row[0]
+        emit("info", f"Academic calendar: Semester 4 = year_id {sem4_year_id}")
+
+        students = cur_cms.execute("""
+            SELECT s.register_no, s.student_name, d.department_code, s.learning_mode_id, s.id
+            FROM students s
+            LEFT JOIN departments d ON s.department_id = d.id
+            WHERE CAST(s.year AS INTEGER) = ? AND CAST(s.status AS INTEGER) = 1
+        """, (sem4_year_id,)).fetchall()
+        cms_regs = cur_cms.execute("""
+            SELECT sc.student_id, c.course_code
+            FROM student_courses sc
+            JOIN courses c ON sc.course_id = c.id
+        """).fetchall()
+    finally:
+        con_cms.close()
     emit("info", f"Found {len(students)} active Semester 4 students.")
 
     # Build course-code map
-    sched_course_codes = [
-        row[0] for row in cur_sched.execute("SELECT course_code FROM course_master").fetchall()
-    ]
     course_map = {}
-    for sc_code in sched_course_codes:
+    for (sc_code,) in db.execute(select(models.CourseMaster.course_code)):
         for part in [p.strip() for p in sc_code.split("/")]:
             course_map[part] = sc_code
 
-    # Upsert students
-    student_id_pairs = []
+    # Upsert students: update the ones already there, insert the rest
+    # (portable, so the scheduler database can be SQLite or PostgreSQL)
+    student_rows, cms_ids = {}, {}
     for reg_no, s_name, dept_code, l_mode, cms_id in students:
         if not reg_no or not str(reg_no).strip():
             continue
         reg_no = str(reg_no).strip()
-        try:
-            cur_sched.execute("""
-                INSERT INTO student_master (student_id, name, email, department_code, learning_mode_id)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(student_id) DO UPDATE SET
-                    name             = excluded.name,
-                    department_code  = excluded.department_code,
-                    learning_mode_id = excluded.learning_mode_id
-            """, (reg_no, s_name, "", dept_code, l_mode))
-            summary["students_upserted"] += 1
-            student_id_pairs.append((cms_id, reg_no))
-        except Exception as e:
-            emit("warning", f"Student upsert failed for {reg_no}: {e}")
-
-    emit("info", f"Upserted {summary['students_upserted']} students into student_master.")
+        if not s_name or not dept_code:
+            emit("warning", f"Student upsert failed for {reg_no}: missing name or department")
+            continue
+        student_rows[reg_no] = {"student_id": reg_no, "name": s_name, "email": "", "semester": 4,
+                                "department_code": dept_code, "learning_mode_id": l_mode}
+        cms_ids[reg_no] = cms_id
+
+    students_table = models.StudentMaster.__table__
+    existing = set(db.execute(select(students_table.c.student_id)).scalars())
+    updates = [{"b_student_id": reg_no, "name": row["name"], "department_code": row["department_code"],
+                "learning_mode_id": row["learning_mode_id"]}
+               for reg_no, row in student_rows.items() if reg_no in existing]
+    inserts = [row for reg_no, row in student_rows.items() if reg_no not in existing]
+    if updates:
+        db.execute(students_table.update().where(students_table.c.student_id == bindparam("b_student_id"))
+                   .values(name=bindparam("name"), department_code=bindparam("department_code"),
+                           learning_mode_id=bindparam("learning_mode_id")), updates)
+    if inserts:
+        db.execute(students_table.insert(), inserts)
+    students_upserted = len(student_rows)
+    emit("info", f"Upserted {students_upserted} students into student_master.")
 
     # Fetch & map registrations
     emit("info", "Mapping course registrations ...")
-    from collections import defaultdict
-    cms_regs = cur_cms.execute("""
-        SELECT sc.student_id, c.course_code
-        FROM student_courses sc
-        JOIN courses c ON sc.course_id = c.id
-    """).fetchall()
-
     regs_by_cms_id = defaultdict(list)
     for cms_sid, c_code in cms_regs:
         if c_code:
             regs_by_cms_id[int(cms_sid)].append(str(c_code).strip())
 
-    for cms_sid, reg_no in student_id_pairs:
+    registrations = models.CourseRegistration.__table__
+    registered = {tuple(row) for row in db.execute(
+        select(registrations.c.student_id, registrations.c.course_code).where(registrations.c.semester == 4))}
+    new_registrations, unmapped_courses = [], set()
+    for reg_no, cms_sid in cms_ids.items():
         for cms_code in regs_by_cms_id.get(int(cms_sid), []):
             mapped = course_map.get(cms_code)
-            if mapped:
-                try:
-                    cur_sched.execute("""
-                        INSERT INTO course_registrations (student_id, course_code, semester)
-                        VALUES (?, ?, 4)
-                        ON CONFLICT(student_id, course_code, semester) DO NOTHING
-                    """, (reg_no, mapped))
-                    summary["registrations_inserted"] += 1
-                except Exception as e:
-                    if "UNIQUE constraint failed" not in str(e):
-                        emit("warning", f"Registration error {reg_no}/{mapped}: {e}")
-            else:
-                summary["unmapped_courses"].add(cms_code)
-
-    con_sched.commit()
-    con_cms.close()
-    con_sched.close()
-
-    unmapped = list(summary["unmapped_courses"])
-    emit("success", f"Students upserted: {summary['students_upserted']}, Registrations: {summary['registrations_inserted']}")
+            if not mapped:
+                unmapped_courses.add(cms_code)
+            elif (reg_no, mapped) not in registered:
+                registered.add((reg_no, mapped))
+                new_registrations.append({"student_id": reg_no, "course_code": mapped, "semester": 4})
+    if new_registrations:
+        db.execute(registrations.insert(), new_registrations)
+
+    # Cached student timetables were built from the old registrations
+    data_version.bump(db, data_version.REGISTRATIONS)
+    db.execute(models.StudentTimetableCache.__table__.delete())   # rebuilt on read
+    db.commit()
+
+    unmapped = list(unmapped_courses)
+    emit("success", f"Students upserted: {students_upserted}, Registrations: {len(new_registrations)}")
     if unmapped:
         emit("warning", f"{len(unmapped)} CMS course codes could not be mapped (e.g. {unmapped[:3]})")
 
     return {
-        "students_upserted":      summary["students_upserted"],
-        "registrations_inserted": summary["registrations_inserted"],
+        "students_upserted":      students_upserted,
+        "registrations_inserted": len(new_registrations),
         "unmapped_courses":       unmapped,
     }
 
@@ -299,73 +489,72 @@ def _sync_users_db(emit) -> dict:
 # PART 4: Recalculate enrollment counts (per course & dept)
 # ============================================================
 
-def _recalculate_enrollment_counts(emit) -> dict:
-    import json
+def _recalculate_enrollment_counts(emit, db: Session) -> dict:
     emit("info", "--- Step 4: Recalculating enrollment counts (including Learning Modes) ---")
-    
-    conn = sqlite3.connect(SCHEDULER_DB)
-    cur = conn.cursor()
-    
-    # helper for defaultdict behavior in loop
-    from collections import defaultdict
-    
+
+    registrations = models.CourseRegistration.__table__
+    students = models.StudentMaster.__table__
+    registered = registrations.join(students, registrations.c.student_id == students.c.student_id)
+
     # 1. Update CourseMaster counts
     emit("info", "Calculating per-course enrollment data ...")
-    
+
     # Get all registrations with learning mode
-    cur.execute("""
-        SELECT r.course_code, r.semester, s.learning_mode_id, COUNT(*)
-        FROM course_registrations r
-        JOIN student_master s ON r.student_id = s.student_id
-        GROUP BY r.course_code, r.semester, s.learning_mode_id
-    """)
-    course_reg_rows = cur.fetchall()
-    
+    course_reg_rows = db.execute(
+        select(registrations.c.course_code, registrations.c.semester, students.c.learning_mode_id, func.count())
+        .select_from(registered)
+        .group_by(registrations.c.course_code, registrations.c.semester, students.c.learning_mode_id)
+    ).all()
+
     # Organize data: (course, sem) -> { mode_id: count }
     course_data = defaultdict(dict)
     for c_code, sem, mode_id, count in course_reg_rows:
         course_data[(c_code, sem)][str(mode_id or 1)] = count
-        
-    for (c_code, sem), modes in course_data.items():
-        total = sum(modes.values())
-        modes_json = json.dumps(modes)
-        cur.execute("""
-            UPDATE course_master 
-            SET enrolled_students = ?, enrollment_data = ?
-            WHERE course_code = ? AND semester = ?
-        """, (total, modes_json, c_code, sem))
+
+    courses = models.CourseMaster.__table__
+    if course_data:
+        db.execute(courses.update()
+                   .where(courses.c.course_code == bindparam("b_course_code"),
+                          courses.c.semester == bindparam("b_semester"))
+                   .values(enrolled_students=bindparam("total"), enrollment_data=bindparam("modes")),
+                   [{"b_course_code": c_code, "b_semester": sem, "total": sum(modes.values()),
+                     "modes": json.dumps(modes)} for (c_code, sem), modes in course_data.items()])
 
     # 2. Update DepartmentSemesterCount counts
     emit("info", "Calculating per-department capacity data ...")
-    
+
     # Get unique students per dept/sem with learning mode
-    cur.execute("""
-        SELECT s.department_code, r.semester, s.learning_mode_id, COUNT(DISTINCT r.student_id)
-        FROM course_registrations r
-        JOIN student_master s ON r.student_id = s.student_id
-        GROUP BY s.department_code, r.semester, s.learning_mode_id
-    """)
-    dept_reg_rows = cur.fetchall()
-    
+    dept_reg_rows = db.execute(
+        select(students.c.department_code, registrations.c.semester, students.c.learning_mode_id,
+               func.count(registrations.c.student_id.distinct()))
+        .select_from(registered)
+        .group_by(students.c.department_code, registrations.c.semester, students.c.learning_mode_id)
+    ).all()
+
     # Organize data: (dept, sem) -> { mode_id: count }
     dept_data = defaultdict(dict)
     for dept_code, sem, mode_id, count in dept_reg_rows:
         dept_data[(dept_code, sem)][str(mode_id or 1)] = count
-        
-    for (dept_code, sem), modes in dept_data.items():
-        total = sum(modes.values())
-        modes_json = json.dumps(modes)
-        
-        cur.execute("""
-            INSERT INTO department_semester_count (department_code, semester, student_count, student_count_data)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(department_code, semester) DO UPDATE SET
-                student_count = excluded.student_count,
-                student_count_data = excluded.student_count_data
-        """, (dept_code, sem, total, modes_json))
-        
-    conn.commit()
-    conn.close()
+
+    # Upsert: update the (dept, sem) rows already there, insert the rest
+    counts = models.DepartmentSemesterCount.__table__
+    existing = {tuple(row) for row in db.execute(select(counts.c.department_code, counts.c.semester))}
+    rows = [{"b_department_code": dept_code, "b_semester": sem, "student_count": sum(modes.values()),
+             "student_count_data": json.dumps(modes)} for (dept_code, sem), modes in dept_data.items()]
+    updates = [row for row in rows if (row["b_department_code"], row["b_semester"]) in existing]
+    inserts = [{"department_code": row["b_department_code"], "semester": row["b_semester"],
+                "student_count": row["student_count"], "student_count_data": row["student_count_data"]}
+               for row in rows if (row["b_department_code"], row["b_semester"]) not in existing]
+    if updates:
+        db.execute(counts.update()
+                   .where(counts.c.department_code == bindparam("b_department_code"),
+                          counts.c.semester == bindparam("b_semester"))
+                   .values(student_count=bindparam("student_count"),
+                           student_count_data=bindparam("student_count_data")), updates)
+    if inserts:
+        db.execute(counts.insert(), inserts)
+
+    db.commit()
     emit("success", f"Recalculation complete. Updated counts for {len(course_data)} courses and {len(dept_data)} dept/sem pairs.")
     return {"courses_recalculated": len(course_data), "dept_sem_recalculated": len(dept_data)}
 
@@ -374,6 +563,31 @@ def _recalculate_enrollment_counts(emit) -> dict:
 # PUBLIC ENTRY POINT
 # ============================================================
 
+SYNC_DEDUP_KEY = "CMS_SYNC"
+
+
+def _start_sync_job(db: Session) -> str:
+    """Record a RUNNING CMS_SYNC job. The active-job index on background_jobs
+    allows one per dedup key, so a second sync - from the other sync route or
+    another API worker - is refused instead of dropping this one's shadow
+    tables. RuntimeError if a sync is already running."""
+    import uuid
+    from sqlalchemy.exc import IntegrityError
+    from services.generation_jobs import _expire_stale_jobs, _now
+
+    _expire_stale_jobs(db, SYNC_DEDUP_KEY)
+    job = models.BackgroundJob(id=uuid.uuid4().hex, job_type="CMS_SYNC", dedup_key=SYNC_DEDUP_KEY,
+                               status="RUNNING", progress=0, cancel_requested=False, params_json="{}",
+                               created_at=_now(), started_at=_now(), updated_at=_now())
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise RuntimeError("A CMS sync is already running.")
+    return job.id
+
+
 def sync_databases(emit=None) -> dict:
     """
     Full sync pipeline:
@@ -381,23 +595,51 @@ def sync_databases(emit=None) -> dict:
       2. Migrate Semester 4 students       → college_scheduler.db
       3. Sync users table                  → users.db
       4. Recalculate enrollment counts      → course_master & department_semester_count
+
+    Runs as a CMS_SYNC job: only one sync at a time, across routes and workers.
     """
+    from services.generation_jobs import _now, _update_job
+    from utils.database import SessionLocal
+
     if emit is None:
         emit = _noop
 
+    with SessionLocal() as db:
+        job_id = _start_sync_job(db)
+
+    def emit_and_heartbeat(level, message):
+        emit(level, message)
+        _update_job(job_id)   # keeps the job from looking abandoned
+
+    try:
+        result = _run_sync(emit_and_heartbeat)
+    except Exception as e:
+        _update_job(job_id, status="FAILED", error=str(e), finished_at=_now())
+        raise
+    _update_job(job_id, status="SUCCEEDED", progress=100, result_json=json.dumps(result, default=str),
+                finished_at=_now())
+    return result
+
+
+def _run_sync(emit) -> dict:
     emit("info", "=== CMS Sync Pipeline Starting ===")
 
     emit("info", "--- Step 1: Syncing MySQL tables to cms_local.db ---")
     mysql_summary = _sync_mysql_to_local(emit)
 
+    # Steps 2 and 4 write the scheduler database (settings.database_url)
+    from utils.database import SessionLocal
+
     emit("info", "--- Step 2: Migrating Semester 4 students ---")
-    migrate_summary = _migrate_sem4_students(emit)
+    with SessionLocal() as db:
+        migrate_summary = _migrate_sem4_students(emit, db)
 
     emit("info", "--- Step 3: Syncing users to users.db ---")
     users_summary = _sync_users_db(emit)
 
     emit("info", "--- Step 4: Recalculating enrollment numbers ---")
-    recalculate_summary = _recalculate_enrollment_counts(emit)
+    with SessionLocal() as db:
+        recalculate_summary = _recalculate_enrollment_counts(emit, db)
 
     emit("success", "=== CMS Sync Pipeline Complete ===")
     return {
@@ -0,0 +1,116 @@
+"""
+timetable_entry_venues: which single venues each TimetableEntry books.
+
+venue_name on an entry may list several rooms ("LAB 1, LAB 2"); answering
+"what is in LAB 2" used to mean reading every entry and splitting strings.
+The index keeps one (entry_id, venue_name, day, period) row per listed
+venue so that lookup is a join on idx_entry_venue_slot.
+
+Writers keep it in step inside their own transaction:
+
+    venue_index.forget(db, *conditions)    # before deleting/replacing entries
+    ...write entries, db.flush()...
+    venue_index.reindex(db, *conditions)   # after, for the same conditions
+
+where conditions are column expressions on TimetableEntry (e.g.
+TimetableEntry.department_code == "CSE"). backfill() builds the index for
+databases created before it existed; it runs at startup, after
+drop_outdated_table().
+"""
+
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, insert, select
+
+import models
+
+_ENTRIES = models.TimetableEntry.__table__
+_VENUES = models.TimetableEntryVenue.__table__
+
+
+def split_names(venue_name: Optional[str]) -> List[str]:
+    """Distinct stripped names in listed order; blanks dropped."""
+    if not venue_name:
+        return []
+    names = []
+    for part in venue_name.split(","):
+        part = part.strip()
+        if part and part not in names:
+            names.append(part)
+    return names
+
+
+def index_rows(entries: Iterable[tuple]) -> List[dict]:
+    """(id, venue_name, day_of_week, period_number) entry tuples -> index rows."""
+    return [
+        {"entry_id": entry_id, "venue_name": name, "day_of_week": day, "period_number": period}
+        for entry_id, venue_name, day, period in entries
+        for name in split_names(venue_name)
+    ]
+
+
+def forget(db, *conditions) -> None:
+    """Drop index rows of the entries matching conditions (no commit)."""
+    db.execute(delete(_VENUES).where(_VENUES.c.entry_id.in_(select(_ENTRIES.c.id).where(*conditions))))
+
+
+def reindex(db, *conditions) -> int:
+    """Rebuild index rows for the entries matching conditions (no commit).
+    Flush ORM-added entries first so they have ids."""
+    forget(db, *conditions)
+    entries = db.execute(
+        select(_ENTRIES.c.id, _ENTRIES.c.venue_name, _ENTRIES.c.day_of_week, _ENTRIES.c.period_number)
+        .where(_ENTRIES.c.venue_name.isnot(None), *conditions)
+    ).all()
+    rows = index_rows(entries)
+    if rows:
+        db.execute(insert(_VENUES), rows)
+    return len(rows)
+
+
+def rebuild(db) -> int:
+    """Re-create the whole index from timetable_entries (no commit)."""
+    db.execute(delete(_VENUES))
+    return reindex(db)
+
+
+def drop_outdated_table(bind) -> bool:
+    """The first version of the table had a venue_id column, a foreign key to
+    venue_master that went stale when venues were renamed and blocked venue
+    deletes on PostgreSQL. Drop such a table so create_all() re-creates it and
+    backfill() refills it. Returns whether it was dropped."""
+    from sqlalchemy import inspect
+    inspector = inspect(bind)
+    if not inspector.has_table(_VENUES.name):
+        return False
+    if "venue_id" not in {c["name"] for c in inspector.get_columns(_VENUES.name)}:
+        return False
+    _VENUES.drop(bind=bind, checkfirst=True)
+    return True
+
+
+def backfill(db) -> Optional[int]:
+    """Build the index once for existing timetables: only when it is empty while
+    entries with venues exist. Idempotent if several workers race (the rebuild
+    replaces whatever another worker wrote). Commits."""
+    if db.execute(select(_VENUES.c.id).limit(1)).first() is not None:
+        return None
+    if db.execute(select(_ENTRIES.c.id).where(_ENTRIES.c.venue_name.isnot(None)).limit(1)).first() is None:
+        return None
+    count = rebuild(db)
+    db.commit()
+    return count
+
+
+def entries_in_venue(db, venue_name: str):
+    """TimetableEntry rows booking venue_name, in id order."""
+    E, V = models.TimetableEntry, models.TimetableEntryVenue
+    return (db.query(E).join(V, V.entry_id == E.id)
+            .filter(V.venue_name == venue_name).order_by(E.id).all())
+
+
+def venue_slots(*conditions):
+    """SELECT (day, period, venue) booked by entries matching conditions, for IN
+    filters. Never correlated, so it can sit inside a query on timetable_entries."""
+    return (select(_VENUES.c.day_of_week, _VENUES.c.period_number, _VENUES.c.venue_name)
+            .join(_ENTRIES, _ENTRIES.c.id == _VENUES.c.entry_id).where(*conditions).correlate(None))
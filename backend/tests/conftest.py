@@ -1,35 +1,84 @@
+import os
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
-from models import Base
+from sqlalchemy.sql import ClauseElement
+from models import Base, DepartmentMaster, SlotMaster
 from fastapi.testclient import TestClient
 from main import app
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Database tests run twice: on SQLite and on PostgreSQL. Without
+# TEST_DATABASE_URL=postgresql+psycopg2://... (an empty database) the PostgreSQL
+# run uses a compatibility mode that needs no server: SQLite with the checks
+# PostgreSQL makes and SQLite skips by default (foreign keys, case-sensitive
+# LIKE), where every statement must also compile for the postgresql dialect.
+TEST_DATABASE_URLS = {
+    "sqlite": "sqlite:///:memory:",
+    "postgresql": os.getenv("TEST_DATABASE_URL"),
+}
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _create_engine(url):
+    return create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+
+
+def _postgresql_compatible_engine():
+    engine = _create_engine("sqlite:///:memory:")
+    dialect = postgresql.dialect()
+
+    @event.listens_for(engine, "connect")
+    def _strict(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA case_sensitive_like=ON")
+        cursor.close()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(engine, "before_execute")
+    def _compiles_for_postgresql(conn, clauseelement, multiparams, params, execution_options):
+        # Raw SQL strings can't be checked; SQLAlchemy statements must not be SQLite-only
+        if isinstance(clauseelement, ClauseElement):
+            clauseelement.compile(dialect=dialect)
 
-@pytest.fixture(scope="session")
-def db_engine():
+    return engine
+
+
+@pytest.fixture(scope="session", params=list(TEST_DATABASE_URLS))
+def db_engine(request):
+    url = TEST_DATABASE_URLS[request.param]
+    engine = _create_engine(url) if url else _postgresql_compatible_engine()
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 @pytest.fixture(scope="function")
 def db_session(db_engine):
     connection = db_engine.connect()
     transaction = connection.begin()
     session = TestingSessionLocal(bind=connection)
-    
+
     yield session
-    
+
     session.close()
     transaction.rollback()
     connection.close()
 
+@pytest.fixture
+def departments(db_session):
+    """Departments the test timetables belong to (foreign keys are checked on PostgreSQL)."""
+    db_session.add_all([DepartmentMaster(department_code=code) for code in ("CSE", "ECE", "IT", "MECH")])
+    db_session.flush()
+
+@pytest.fixture
+def slot(db_session, departments):
+    """Slot 1 (Monday, period 1), the slot_id of the test timetable entries."""
+    db_session.add(SlotMaster(slot_id=1, day_of_week="Monday", period_number=1, start_time="08:00", end_time="09:00"))
+    db_session.flush()
+
 @pytest.fixture(scope="module")
 def client():
     with TestClient(app) as c:
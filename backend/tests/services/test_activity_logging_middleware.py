@@ -0,0 +1,60 @@
+import jwt
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from config.settings import settings
+from middleware import activity_logging_middleware as alm
+from middleware.auth_middleware import AuthMiddleware
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(alm.ActivityLoggingMiddleware)
+    app.add_middleware(AuthMiddleware)
+
+    @app.post("/api/things")
+    def create():
+        return {"ok": True}
+
+    @app.get("/api/things/export")
+    def export():
+        return StreamingResponse(iter([b"a" * 10, b"b" * 10, b"c"]), media_type="application/octet-stream")
+
+    @app.delete("/api/things/export")
+    def delete():
+        return StreamingResponse(iter([b"gone"]), status_code=202)
+
+    return app
+
+
+def test_logs_mutations_once_per_token_and_streams_untouched(monkeypatch):
+    logged, decodes = [], []
+    monkeypatch.setattr(alm, "log_activity", lambda **kw: logged.append(kw))
+    real_decode = jwt.decode
+    monkeypatch.setattr(alm.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+    token = jwt.encode({"email": "staff@bitsathy.ac.in", "n": 1}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(_app())
+
+    r = client.get("/api/things/export", headers=headers)
+    assert r.content == b"a" * 10 + b"b" * 10 + b"c"
+    assert "x-process-time" in r.headers
+    assert logged == [] and decodes == []  # GETs never decode the token
+
+    client.post("/api/things", headers=headers)
+    client.delete("/api/things/export", headers=headers)
+    client.post("/api/things")
+    assert [(e["email"], e["method"], e["status_code"]) for e in logged] == [
+        ("staff@bitsathy.ac.in", "Generate", 200), ("staff@bitsathy.ac.in", "Delete", 202), (None, "Generate", 200)]
+    assert len(decodes) == 1
+
+
+def test_forged_payload_with_cached_signature_is_rejected():
+    token = jwt.encode({"email": "real@bitsathy.ac.in"}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    assert alm.email_from_token(token) == "real@bitsathy.ac.in"
+    _, _, signature = token.split(".")
+    forged_payload = jwt.utils.base64url_encode(b'{"email":"forged@x"}').decode()
+    forged = f"{token.split('.')[0]}.{forged_payload}.{signature}"
+    assert alm.email_from_token(forged) is None
+    assert alm.email_from_token(token) == "real@bitsathy.ac.in"
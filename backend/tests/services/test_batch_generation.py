@@ -0,0 +1,60 @@
+import json
+
+import models
+from services import batch_generation, generation_jobs
+
+
+def _course(dept, code, weekly_sessions=3, semester=6):
+    return models.CourseMaster(course_code=code, department_code=dept, semester=semester,
+                               course_name=code, weekly_sessions=weekly_sessions)
+
+
+def _seed(db):
+    for dept in ("AAA", "BBB", "CCC", "DDD"):
+        db.add(models.DepartmentMaster(department_code=dept))
+    db.flush()
+    db.add_all([
+        _course("AAA", "A1", 5), _course("BBB", "B1", 3),
+        _course("CCC", "C1", 4), _course("DDD", "D1", 2),
+        _course("DDD", "X1", 2), _course("CCC", "X1", 2),
+    ])
+    db.add(models.FacultyMaster(faculty_id="F1", faculty_name="Shared", department_code="AAA"))
+    db.flush()
+    # AAA and BBB share a faculty member
+    db.add(models.CourseFacultyMap(course_code="A1", faculty_id="F1", department_code="AAA"))
+    db.add(models.CourseFacultyMap(course_code="B1", faculty_id="F1", department_code="BBB"))
+    # CCC and DDD share a common course
+    db.add(models.CommonCourseMap(course_code="X1", semester=6, department_code="CCC"))
+    db.add(models.CommonCourseMap(course_code="X1", semester=6, department_code="DDD"))
+    db.commit()
+
+
+def test_plan_groups_coupled_departments_into_ordered_rounds(db_session):
+    _seed(db_session)
+    plan = batch_generation.plan_batch(db_session, 6)
+
+    assert plan["departments"] == ["AAA", "BBB", "CCC", "DDD"]
+    assert plan["components"] == [
+        {"departments": ["AAA", "BBB"], "rounds": [["AAA"], ["BBB"]]},  # heavier load goes first
+        {"departments": ["CCC", "DDD"], "rounds": [["CCC"], ["DDD"]]},
+    ]
+    edge = next(e for e in plan["edges"] if (e["a"], e["b"]) == ("AAA", "BBB"))
+    assert edge["shared_faculty"] == 1
+
+
+def test_plan_independent_departments_share_first_round(db_session):
+    _seed(db_session)
+    plan = batch_generation.plan_batch(db_session, 6, ["AAA", "CCC"])
+
+    assert [c["rounds"] for c in plan["components"]] == [[["AAA"]], [["CCC"]]]
+
+
+def test_cancel_batch_cancels_queued_children(db_session):
+    _seed(db_session)
+    batch = batch_generation.submit_batch_job(db_session, 6, "Wednesday", start=False)
+    children = batch_generation.get_children(db_session, batch.id)
+    assert sorted(json.loads(c.params_json)["department_code"] for c in children) == ["AAA", "BBB", "CCC", "DDD"]
+
+    generation_jobs.cancel_job(db_session, batch)
+    db_session.expire_all()
+    assert {c.status for c in batch_generation.get_children(db_session, batch.id)} == {"CANCELLED"}
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+from config.settings import settings
+from services import data_version
+from services.sync_cms_to_local import (SQLiteSource, _migrate_sem4_students, _recalculate_enrollment_counts,
+                                        _start_sync_job, _sync_mysql_to_local)
+
+QUERIES = {
+    "courses": "SELECT id, course_code, credit FROM courses",
+    "students": "SELECT id, student_name, year FROM students",
+    "departments": "SELECT * FROM departments",
+}
+
+
+@pytest.fixture
+def cms(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cms_sync_chunk_rows", 7)
+    monkeypatch.setattr(settings, "cms_sync_workers", 2)
+    source = tmp_path / "cms.db"
+    conn = sqlite3.connect(source)
+    conn.execute("CREATE TABLE courses (id INTEGER, course_code TEXT, credit REAL)")
+    conn.execute("CREATE TABLE students (id INTEGER, student_name TEXT, year INTEGER)")
+    conn.execute("CREATE TABLE departments (id INTEGER, department_code TEXT)")
+    conn.executemany("INSERT INTO courses VALUES (?, ?, ?)", [(i, f"22CS{i:03}", 3.5) for i in range(30)])
+    conn.executemany("INSERT INTO students VALUES (?, ?, ?)", [(i, f"S{i}", 2) for i in range(20)])
+    conn.execute("INSERT INTO departments VALUES (1, 'CSE')")
+    conn.commit()
+    conn.close()
+    return SQLiteSource(str(source)), str(tmp_path / "cms_local.db")
+
+
+def _sync(source, target, queries=QUERIES):
+    return _sync_mysql_to_local(lambda level, message: None, source=source, target=target, queries=queries)
+
+
+def _rows(target, table):
+    conn = sqlite3.connect(target)
+    try:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY CAST(id AS INTEGER)").fetchall()
+    finally:
+        conn.close()
+
+
+def test_tables_are_copied_in_chunks_and_unchanged_ones_skipped(cms):
+    source, target = cms
+    summary = _sync(source, target)
+    assert summary["synced"] == ["courses", "departments", "students"] and not summary["skipped"]
+    assert len(_rows(target, "courses")) == 30
+    assert _rows(target, "courses")[29] == ("29", "22CS029", "3.5")   # TEXT columns, as before
+
+    assert _sync(source, target)["unchanged"] and _sync(source, target)["synced"] == []
+
+    conn = sqlite3.connect(source.path)
+    conn.execute("UPDATE students SET student_name = 'Renamed' WHERE id = 3")
+    conn.commit()
+    conn.close()
+    summary = _sync(source, target)
+    assert summary["synced"] == ["students"] and sorted(summary["unchanged"]) == ["courses", "departments"]
+    assert _rows(target, "students")[3][1] == "Renamed"
+
+
+def test_failed_table_keeps_its_previous_copy(cms):
+    source, target = cms
+    _sync(source, target)
+    conn = sqlite3.connect(source.path)
+    conn.execute("DELETE FROM courses WHERE id >= 10")
+    conn.execute("ALTER TABLE students RENAME TO students_old")
+    conn.commit()
+    conn.close()
+
+    summary = _sync(source, target)
+    assert summary["synced"] == ["courses"] and [s["table"] for s in summary["skipped"]] == ["students"]
+    assert len(_rows(target, "courses")) == 10
+    assert len(_rows(target, "students")) == 20
+    conn = sqlite3.connect(target)
+    names = {n for (n,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert not any(n.endswith("__shadow") for n in names)
+
+
+def test_changed_query_resyncs_table(cms):
+    source, target = cms
+    _sync(source, target)
+    queries = dict(QUERIES, courses="SELECT id, course_code FROM courses")
+    summary = _sync(source, target, queries)
+    assert summary["synced"] == ["courses"]
+    assert _rows(target, "courses")[0] == ("0", "22CS000")
+
+
+@pytest.fixture
+def cms_local(tmp_path):
+    path = tmp_path / "cms_local.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE academic_calendar (id TEXT, current_semester TEXT);
+        CREATE TABLE departments (id TEXT, department_code TEXT);
+        CREATE TABLE students (id TEXT, student_name TEXT, register_no TEXT, department_id TEXT,
+                               learning_mode_id TEXT, status TEXT, year TEXT);
+        CREATE TABLE courses (id TEXT, course_code TEXT);
+        CREATE TABLE student_courses (student_id TEXT, course_id TEXT);
+        INSERT INTO academic_calendar VALUES ('2', '4');
+        INSERT INTO departments VALUES ('1', 'CSE');
+        INSERT INTO students VALUES ('10', 'Asha', '7376221CS101', '1', '1', '1', '2'),
+                                    ('11', 'Bala', '7376221CS102', '1', '2', '1', '2'),
+                                    ('12', 'Left', '7376221CS103', '1', '1', '0', '2'),
+                                    ('13', 'No Dept', '7376221CS104', '9', '1', '1', '2');
+        INSERT INTO courses VALUES ('1', '22CS401'), ('2', '22CS402'), ('3', '22XX999');
+        INSERT INTO student_courses VALUES ('10', '1'), ('10', '2'), ('11', '1'), ('11', '3');
+    """)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_sem4_migration_and_recount_upsert_on_the_scheduler_database(db_session, cms_local):
+    db_session.add(models.DepartmentMaster(department_code="CSE"))
+    db_session.flush()
+    for code in ("22CS401", "22CS402"):
+        db_session.add(models.CourseMaster(course_code=code, department_code="CSE", semester=4,
+                                           course_name=code, weekly_sessions=3))
+    db_session.add(models.StudentMaster(student_id="7376221CS101", name="Old name", department_code="CSE"))
+    db_session.flush()
+    db_session.add(models.CourseRegistration(student_id="7376221CS101", course_code="22CS401", semester=4))
+    db_session.add(models.DepartmentSemesterCount(department_code="CSE", semester=4, student_count=99))
+    db_session.add(models.StudentTimetableCache(student_id="7376221CS101", payload="{}"))
+    db_session.commit()
+    before = data_version.current(db_session, data_version.REGISTRATIONS)
+    messages = []
+    emit = lambda level, message: messages.append((level, message))
+
+    summary = _migrate_sem4_students(emit, db_session, cms_db=cms_local)
+    assert summary["students_upserted"] == 2 and summary["registrations_inserted"] == 2
+    assert summary["unmapped_courses"] == ["22XX999"]
+    assert ("warning", "Student upsert failed for 7376221CS104: missing name or department") in messages
+    assert db_session.get(models.StudentMaster, "7376221CS101").name == "Asha"
+    assert db_session.get(models.StudentMaster, "7376221CS102").semester == 4
+    assert db_session.query(models.CourseRegistration).count() == 3
+    assert db_session.query(models.StudentTimetableCache).count() == 0
+    assert data_version.current(db_session, data_version.REGISTRATIONS) != before
+    # Rerun: nothing new to register
+    assert _migrate_sem4_students(emit, db_session, cms_db=cms_local)["registrations_inserted"] == 0
+
+    assert _recalculate_enrollment_counts(emit, db_session) == {"courses_recalculated": 2, "dept_sem_recalculated": 1}
+    db_session.expire_all()
+    course = db_session.get(models.CourseMaster, ("22CS401", "CSE", 4))
+    assert course.enrolled_students == 2 and json.loads(course.enrollment_data) == {"1": 1, "2": 1}
+    counts = db_session.query(models.DepartmentSemesterCount).one()
+    assert counts.student_count == 2 and json.loads(counts.student_count_data) == {"1": 1, "2": 1}
+
+
+def test_only_one_sync_runs_at_a_time(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    models.BackgroundJob.__table__.create(engine)
+    with Session(engine) as db:
+        first = _start_sync_job(db)
+        # The other sync route, or another API worker, would drop this run's shadow tables
+        with pytest.raises(RuntimeError, match="already running"):
+            _start_sync_job(db)
+        db.get(models.BackgroundJob, first).status = "SUCCEEDED"
+        db.commit()
+        assert _start_sync_job(db) != first
+    engine.dispose()
@@ -0,0 +1,60 @@
+import models
+from services import venue_index
+from services.conflict_detector import detect_conflicts
+
+
+def _entry(dept, sem, course, day, period, faculty=None, venue=None, section=1):
+    return models.TimetableEntry(department_code=dept, semester=sem, course_code=course, slot_id=1,
+                                 day_of_week=day, period_number=period, faculty_id=faculty,
+                                 faculty_name=faculty and f"Prof {faculty}", venue_name=venue, section_number=section)
+
+
+def test_faculty_and_split_venue_clashes(db_session, slot):
+    db_session.add_all([
+        _entry("CSE", 6, "CS601", "Monday", 1, faculty="F1", venue="LAB 1, LAB 2"),
+        _entry("ECE", 6, "EC601", "Monday", 1, faculty="F1", venue="LAB 2"),
+        _entry("IT", 6, "CS601", "Monday", 1, faculty="F9", venue="LAB 1", section=2),   # shared common course
+        _entry("IT", 4, "IT401", "Tuesday", 3, faculty="Unassigned", venue="ROOM 5"),
+        _entry("MECH", 4, "ME401", "Tuesday", 3, faculty="Unassigned", venue="ROOM 5"),
+    ])
+    db_session.flush()
+
+    result = detect_conflicts(db_session)
+    assert [(c["faculty_id"], c["day"], c["period"]) for c in result["faculty_conflicts"]] == [("F1", "Monday", 1)]
+    assert result["faculty_conflicts"][0]["courses"] == [
+        {"dept": "CSE", "sem": 6, "course": "CS601 (S1)"}, {"dept": "ECE", "sem": 6, "course": "EC601 (S1)"}
+    ]
+    assert [c["venue_name"] for c in result["venue_conflicts"]] == ["LAB 2", "ROOM 5"]
+
+
+def test_target_filters_keep_only_its_clashes(db_session, slot):
+    db_session.add_all([
+        _entry("CSE", 6, "CS601", "Monday", 1, faculty="F1", venue="LAB 1, LAB 2"),
+        _entry("ECE", 6, "EC601", "Monday", 1, faculty="F1", venue="LAB 2"),
+        _entry("IT", 4, "IT401", "Monday", 1, venue="ROOM 5"),
+        _entry("MECH", 4, "ME401", "Monday", 1, venue="ROOM 5"),
+    ])
+    db_session.flush()
+    venue_index.rebuild(db_session)
+
+    cse = detect_conflicts(db_session, "CSE", 6)
+    assert len(cse["faculty_conflicts"]) == 1
+    assert [c["venue_name"] for c in cse["venue_conflicts"]] == ["LAB 2"]
+    assert detect_conflicts(db_session, "MECH", 6) == {"faculty_conflicts": [], "venue_conflicts": []}
+    assert [c["venue_name"] for c in detect_conflicts(db_session, None, 4)["venue_conflicts"]] == ["ROOM 5"]
+
+
+def test_entries_without_a_slot(db_session, slot):
+    db_session.add_all([
+        _entry("CSE", 6, "CS601", None, None, faculty="F1", venue="LAB 1"),
+        _entry("CSE", 6, "CS602", "Monday", 1, faculty="F2", venue="LAB 2"),
+    ])
+    db_session.flush()
+    assert detect_conflicts(db_session) == {"faculty_conflicts": [], "venue_conflicts": []}
+
+    # Slot-less rows group together, as the per-entry dict check grouped them
+    db_session.add(_entry("ECE", 6, "EC601", None, None, faculty="F1", venue="LAB 1"))
+    db_session.flush()
+    result = detect_conflicts(db_session)
+    assert [(c["faculty_id"], c["day"], c["period"]) for c in result["faculty_conflicts"]] == [("F1", None, None)]
+    assert [c["venue_name"] for c in result["venue_conflicts"]] == ["LAB 1"]
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from utils.copy_database import copy_database
+
+
+def test_copy_keeps_rows_and_ids(tmp_path):
+    source = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    models.Base.metadata.create_all(source)
+    with sessionmaker(bind=source)() as db:
+        db.add(models.DepartmentMaster(department_code="CSE"))
+        db.add(models.SlotMaster(slot_id=7, day_of_week="Monday", period_number=1, start_time="08:00", end_time="09:00"))
+        db.add_all([models.TimetableEntry(id=40 + i, department_code="CSE", semester=6, course_code=f"CS60{i}", slot_id=7)
+                    for i in range(3)])
+        db.commit()
+
+    copied = copy_database(source, target, models.Base.metadata, batch_size=2)
+    assert copied["timetable_entries"] == 3 and copied["department_master"] == 1
+    with sessionmaker(bind=target)() as db:
+        assert [e.id for e in db.query(models.TimetableEntry).order_by(models.TimetableEntry.id)] == [40, 41, 42]
+
+    with pytest.raises(ValueError):
+        copy_database(source, target, models.Base.metadata)
+    assert copy_database(source, target, models.Base.metadata, replace=True)["timetable_entries"] == 3
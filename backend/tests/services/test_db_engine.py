@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.exc import OperationalError
+
+from models import Base
+from models.log_models import LoggingBase
+from utils.db_engine import create_db_engine
+
+
+def test_connections_get_wal_and_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine, reader = create_db_engine(url), create_db_engine(url, read_only=True)
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() > 0
+        conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+        conn.exec_driver_sql("INSERT INTO t VALUES (1)")
+
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("SELECT x FROM t").scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("INSERT INTO t VALUES (2)")
+    engine.dispose()
+    reader.dispose()
+
+
+def _unique_keys(table):
+    keys = {frozenset(c.name for c in table.primary_key.columns)}
+    keys |= {frozenset(c.name for c in con.columns) for con in table.constraints if isinstance(con, UniqueConstraint)}
+    keys |= {frozenset(c.name for c in index.columns) for index in table.indexes if index.unique}
+    keys |= {frozenset([c.name]) for c in table.columns if c.unique}
+    return keys
+
+
+@pytest.mark.parametrize("metadata", [Base.metadata, LoggingBase.metadata], ids=["app", "log"])
+def test_foreign_keys_reference_a_primary_key_or_unique_constraint(metadata):
+    # PostgreSQL refuses the whole create_all otherwise; SQLite doesn't check
+    bad = [f"{table.name}.{','.join(fk.column_keys)} -> {fk.referred_table.name}"
+           for table in metadata.tables.values() for fk in table.foreign_key_constraints
+           if frozenset(e.column.name for e in fk.elements) not in _unique_keys(fk.referred_table)]
+    assert bad == []
@@ -0,0 +1,37 @@
+import models
+from services.entry_buffer import EntryBuffer
+
+
+def _add(entries, code, stype, day, period, **extra):
+    return entries.add(course_code=code, session_type=stype, slot_id=1,
+                       day_of_week=day, period_number=period, created_at="now", **extra)
+
+
+def test_indexes_and_column_defaults():
+    entries = EntryBuffer(department_code="CSE", semester=6, learning_mode_ids="1")
+    _add(entries, "CS601", "THEORY", "Monday", 1)
+    row = entries.add(course_code="BLOCKED", slot_id=2, day_of_week="Tuesday", period_number=2,
+                      section_number=None, session_type=None)
+
+    assert entries.has_session("Monday", "THEORY") and not entries.has_session("Monday", "LAB")
+    assert row["session_type"] == "THEORY" and row["section_number"] == 1
+    assert row["learning_mode_ids"] == "1" and row["faculty_id"] is None
+    assert entries.for_course("CS601")[0]["day_of_week"] == "Monday"
+
+
+def test_replace_swaps_the_department_rows(db_session, slot):
+    db_session.add(models.TimetableEntry(department_code="CSE", semester=6, course_code="OLD", slot_id=1,
+                                         day_of_week="Friday", period_number=3))
+    db_session.add(models.TimetableEntry(department_code="ECE", semester=6, course_code="KEEP", slot_id=1,
+                                         day_of_week="Friday", period_number=3))
+    db_session.flush()
+
+    entries = EntryBuffer(department_code="CSE", semester=6, learning_mode_ids="1,2")
+    _add(entries, "CS601", "LAB", "Monday", 1, section_number=2)
+    _add(entries, "CS601", "LAB", "Monday", 2, section_number=2)
+    entries.for_course("CS601")[1]["course_name"] = "renamed"
+
+    assert entries.replace(db_session, "CSE", 6) == 2
+    rows = db_session.query(models.TimetableEntry).order_by(models.TimetableEntry.period_number).all()
+    assert [(r.department_code, r.course_code) for r in rows] == [("CSE", "CS601"), ("CSE", "CS601"), ("ECE", "KEEP")]
+    assert rows[1].course_name == "renamed" and rows[0].section_number == 2
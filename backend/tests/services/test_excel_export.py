@@ -0,0 +1,64 @@
+import io
+
+import openpyxl
+
+import models
+from services import excel_export, venue_index
+
+
+def _entry(dept, course, day, period, section=1, faculty="Dr. A", venue="LAB 1", session="THEORY"):
+    return models.TimetableEntry(department_code=dept, semester=6, course_code=course, course_name=course.lower(),
+                                 slot_id=1, day_of_week=day, period_number=period, section_number=section,
+                                 faculty_name=faculty, venue_name=venue, session_type=session)
+
+
+def _setup(db):
+    for day in ("Monday", "Tuesday"):
+        for p in (1, 2):
+            db.add(models.SlotMaster(day_of_week=day, period_number=p, start_time=f"0{7 + p}:00", end_time=f"0{8 + p}:00"))
+    db.flush()
+    db.add_all([
+        _entry("CSE", "CS601", "Monday", 1, session="LAB"), _entry("CSE", "CS601", "Monday", 1, section=2, faculty="Dr. B"),
+        _entry("ECE", "EC601", "Tuesday", 2, faculty="Dr. B", venue="LAB 1, ROOM 5"),
+    ])
+    db.flush()
+    venue_index.rebuild(db)
+
+
+def _export(db, kind):
+    out = io.BytesIO()
+    count = excel_export.write_workbook(excel_export.sheet_groups(db, kind), excel_export.Grid.from_slots(db), out)
+    out.seek(0)
+    return count, openpyxl.load_workbook(out)
+
+
+def test_single_grid_keeps_the_original_layout(db_session, departments):
+    _setup(db_session)
+    _, wb = _export(db_session, None)
+
+    ws = wb["Timetable"]
+    assert ws.cell(2, 1).value == "DAY / PERIOD"
+    assert ws.cell(2, 2).value == "Period 1\n(08:00 - 09:00)"
+    assert [ws.cell(r, 1).value for r in (3, 4)] == ["MON", "TUE"]
+    assert ws.cell(3, 2).value == "CS601\ncs601\n(Dr. A)\n[LAB 1]\n---\nCS601\ncs601\n(Dr. B)\n[LAB 1]"
+    assert ws.cell(3, 2).fill.start_color.rgb.endswith("FEF9C3")
+    assert ws.cell(3, 3).value == "Empty Slot"
+    assert ws.row_dimensions[3].height == 85
+
+
+def test_one_sheet_per_group(db_session, departments):
+    _setup(db_session)
+
+    assert _export(db_session, "department")[1].sheetnames == ["CSE S6", "ECE S6"]
+    assert _export(db_session, "section")[1].sheetnames == ["CSE S6 Sec 1", "CSE S6 Sec 2", "ECE S6 Sec 1"]
+    assert _export(db_session, "faculty")[1].sheetnames == ["Dr. A", "Dr. B"]
+    count, wb = _export(db_session, "venue")
+    assert count == 2 and wb.sheetnames == ["LAB 1", "ROOM 5"]
+    assert wb["ROOM 5"].cell(4, 3).value.startswith("EC601")
+
+
+def test_sheet_titles_are_excel_safe_and_unique():
+    used = set()
+    assert excel_export.sheet_title("LAB 1/2", used) == "LAB 1-2"
+    assert excel_export.sheet_title("lab 1/2", used) == "lab 1-2 (2)"
+    assert len(excel_export.sheet_title("x" * 40, used)) == 31
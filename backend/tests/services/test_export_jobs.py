@@ -0,0 +1,79 @@
+import os
+import time
+
+import openpyxl
+import pytest
+
+import models
+from config.settings import settings
+from services import export_jobs
+
+PARAMS = {"department_code": None, "semester": 6, "sheets": "department", "format": "xlsx"}
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def executor(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "export_artifact_dir", str(tmp_path))
+    fake = FakeExecutor()
+    monkeypatch.setattr(export_jobs, "get_executor", lambda: fake)
+    return fake
+
+
+def _setup(db):
+    db.add(models.SlotMaster(day_of_week="Monday", period_number=1, start_time="08:00", end_time="09:00"))
+    db.flush()
+    for dept in ("CSE", "ECE"):
+        db.add(models.TimetableEntry(department_code=dept, semester=6, course_code=f"{dept}601", slot_id=1,
+                                     day_of_week="Monday", period_number=1))
+    db.flush()
+
+
+def test_digest_follows_the_exported_rows(db_session, departments):
+    _setup(db_session)
+    digest = export_jobs.content_digest(db_session, PARAMS)
+
+    assert export_jobs.content_digest(db_session, dict(PARAMS, sheets="faculty")) != digest
+    # Rows outside the export don't matter, rows inside it do
+    db_session.add(models.TimetableEntry(department_code="CSE", semester=4, course_code="CS401", slot_id=1))
+    db_session.flush()
+    assert export_jobs.content_digest(db_session, PARAMS) == digest
+    db_session.query(models.TimetableEntry).filter_by(course_code="ECE601").update({"venue_name": "LAB 1"})
+    assert export_jobs.content_digest(db_session, PARAMS) != digest
+
+
+def test_unchanged_export_is_served_from_the_artifact_cache(db_session, departments, executor):
+    _setup(db_session)
+    job, created = export_jobs.submit_export_job(db_session, dict(PARAMS))
+    assert created and job.status == "QUEUED" and executor.submitted == [(job.id,)]
+    again, created_again = export_jobs.submit_export_job(db_session, dict(PARAMS))
+    assert again.id == job.id and not created_again
+
+    result = export_jobs.render_artifact(db_session, dict(PARAMS))
+    assert not result["cached"] and result["sheets"] == 2
+    path = export_jobs.artifact_path(result["digest"])
+    assert openpyxl.load_workbook(path).sheetnames == ["CSE S6", "ECE S6"]
+    job.status = "SUCCEEDED"
+    db_session.commit()
+
+    hit, created = export_jobs.submit_export_job(db_session, dict(PARAMS))
+    assert created and hit.status == "SUCCEEDED" and export_jobs.job_artifact(hit) == path
+    assert len(executor.submitted) == 1
+
+
+def test_evict_by_age_then_size(tmp_path):
+    now = time.time()
+    for name, age, size in (("old", 3600, 10), ("a", 30, 40), ("b", 20, 40), ("c", 10, 40)):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age, now - age))
+
+    assert export_jobs.evict(str(tmp_path), max_bytes=100, max_age_seconds=600, keep=str(tmp_path / "a")) == 2
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+from services import generation_jobs
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    fake = FakeExecutor()
+    monkeypatch.setattr(generation_jobs, "get_executor", lambda: fake)
+    return fake
+
+
+PARAMS = {"department_code": "CSE", "semester": 6, "mentor_day": "Wednesday",
+          "mentor_period": 8, "hard_mode": False, "learning_mode_ids": [2, 1]}
+
+
+def test_dedup_key_ignores_mode_order():
+    assert generation_jobs.make_dedup_key("CSE", 6, [2, 1]) == "CSE|6|1,2"
+    assert generation_jobs.make_dedup_key("CSE", 6, None) == "CSE|6|1,2"
+
+
+def test_submit_deduplicates_active_job(db_session, executor):
+    job, created = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    again, created_again = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+
+    assert created and not created_again
+    assert again.id == job.id
+    assert executor.submitted == [(job.id,)]
+
+
+def test_cancel_queued_job_finishes_immediately(db_session, executor):
+    job, _ = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    generation_jobs.cancel_job(db_session, job)
+
+    assert job.status == "CANCELLED"
+    assert job.cancel_requested
+    # A new submit is no longer blocked by the cancelled job
+    _, created = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    assert created
+
+
+def test_cancel_running_job_is_flagged(db_session, executor):
+    job, _ = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    job.status = "RUNNING"
+    db_session.commit()
+
+    generation_jobs.cancel_job(db_session, job)
+    assert job.status == "CANCELLING"
+    assert job.finished_at is None
+
+
+def test_stale_job_does_not_block_submit(db_session, executor):
+    job, _ = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    job.status = "RUNNING"
+    job.created_at = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    db_session.commit()
+
+    fresh, created = generation_jobs.submit_generation_job(db_session, dict(PARAMS))
+    assert created and fresh.id != job.id
+    assert db_session.get(models.BackgroundJob, job.id).status == "FAILED"
+
+
+def test_claim_never_overwrites_a_concurrent_cancel(tmp_path, monkeypatch):
+    from sqlalchemy import event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from utils.db_engine import create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'jobs.db'}", poolclass=NullPool)  # WAL, like the app
+    models.Base.metadata.create_all(engine, tables=[models.BackgroundJob.__table__])
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(generation_jobs, "_status_sessionmaker", Session)
+    with Session() as db:
+        db.add(models.BackgroundJob(id="j1", job_type="GENERATE", dedup_key="CSE|6|1,2", status="QUEUED",
+                                    progress=0, cancel_requested=False, params_json="{}", created_at="t"))
+        db.commit()
+
+    cancelled = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def cancel_during_claim(conn, cursor, statement, *args):
+        # An API worker cancels the job right after the claim's first read
+        if not cancelled and statement.startswith("SELECT"):
+            cancelled.append(True)
+            with Session() as other:
+                generation_jobs.cancel_job(other, other.get(models.BackgroundJob, "j1"))
+
+    params = generation_jobs._claim_job("j1")
+    with Session() as db:
+        job = db.get(models.BackgroundJob, "j1")
+        assert job.cancel_requested
+        # Cancelled while queued (never claimed), or claimed first and then flagged
+        assert (job.status, params) in (("CANCELLED", None), ("CANCELLING", {}))
+    engine.dispose()
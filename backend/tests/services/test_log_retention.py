@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import settings
+from models.log_models import ActivityLog, AuthLog
+from services import log_retention, log_viewer
+from utils import log_partitions
+from utils.db_engine import create_db_engine
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "log_archive_dir", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "log_retention_days", 90)
+    monkeypatch.setattr(settings, "log_max_bytes", 1 << 40)
+    monkeypatch.setattr(settings, "log_retention_delete_batch", 7)
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+    log_viewer.clear_counts()
+    yield engine
+    for model in (ActivityLog, AuthLog):
+        for _, table in log_partitions.partitions(engine, model):
+            log_partitions.drop_partition(engine, table)
+    engine.dispose()
+
+
+def _add(engine, n, ts, email="staff@bitsathy.ac.in"):
+    rows = [dict(email=email if i % 2 else "hod.cse@bitsathy.ac.in", action="/api/timetable/save",
+                 method="EDIT", status_code=200, timestamp_ist="t", timestamp_gmt="t", timestamp_ms=ts + i)
+            for i in range(n)]
+    with sessionmaker(bind=engine)() as db:
+        log_partitions.insert_rows(db, ActivityLog, rows)
+        db.commit()
+
+
+def test_old_months_move_to_archive_and_read_back(engine):
+    _add(engine, 20, _ms(2026, 3, 10))
+    _add(engine, 5, _ms(2026, 9, 1))
+    result = log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+
+    assert [a["table"] for a in result["archived"]] == ["activity_logs_202603"]
+    assert result["archived"][0]["rows"] == result["archived"][0]["deleted"] == 20
+    assert not inspect(engine).has_table("activity_logs_202603")
+    assert not inspect(engine).has_table("activity_logs_202603_fts")
+    assert [m for m, _ in log_partitions.partitions(engine, ActivityLog)] == ["202609"]
+    assert [(a["type"], a["month"]) for a in log_retention.archives()] == [("activity", "202603")]
+
+    page = log_viewer.read_archive_page("activity", "202603", limit=8, page=2)
+    assert page["total"] == 20 and page["total_pages"] == 3
+    assert [r["id"] for r in page["data"]] == list(range(12, 4, -1))
+    assert log_viewer.read_archive_page("activity", "202603", email="HOD.CSE")["total"] == 10
+    with pytest.raises(FileNotFoundError):
+        log_viewer.read_archive_page("auth", "202603")
+
+
+def test_rerun_merges_with_existing_archive(engine):
+    _add(engine, 3, _ms(2026, 1, 5))
+    table = log_partitions.partition_table(ActivityLog, "202601")
+    # A run that died after writing the archive, before deleting the rows
+    log_retention._write_archive(engine, ActivityLog, table, "202601")
+    log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+    assert len(list(log_retention.read_archive(ActivityLog, "202601"))) == 3
+
+    # Late rows for an archived month land in a recreated partition (ids from 1 again)
+    _add(engine, 2, _ms(2026, 1, 6))
+    log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+    rows = list(log_retention.read_archive(ActivityLog, "202601"))
+    assert [r["id"] for r in rows] == [1, 2, 3, 1, 2]
+
+
+def test_size_limit_archives_oldest_closed_months(engine, monkeypatch):
+    for month in (5, 6, 7, 8, 9):
+        _add(engine, 50, _ms(2026, month, 3))
+    monkeypatch.setattr(settings, "log_max_bytes", log_retention.used_bytes(engine) - 1)
+    result = log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+
+    assert [a["table"] for a in result["archived"]] == ["activity_logs_202605"]
+    monkeypatch.setattr(settings, "log_max_bytes", 0)
+    log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+    # The current month stays however large log.db is
+    assert [m for m, _ in log_partitions.partitions(engine, ActivityLog)] == ["202609"]
+
+
+def test_rows_added_after_the_archive_are_kept(engine, monkeypatch):
+    _add(engine, 10, _ms(2026, 1, 5))
+    write_archive = log_retention._write_archive
+
+    def then_a_late_row(*args):
+        written = write_archive(*args)
+        _add(engine, 1, _ms(2026, 1, 31))
+        return written
+
+    monkeypatch.setattr(log_retention, "_write_archive", then_a_late_row)
+    result = log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))
+    assert result["archived"][0]["deleted"] == 10 and not result["archived"][0]["dropped"]
+    assert [m for m, _ in log_partitions.partitions(engine, ActivityLog)] == ["202601"]
+
+    monkeypatch.setattr(log_retention, "_write_archive", write_archive)
+    assert log_retention.run_retention(engine, now_ms=_ms(2026, 9, 15))["archived"][0]["dropped"]
+    assert [r["id"] for r in log_retention.read_archive(ActivityLog, "202601")] == list(range(1, 12))
+
+
+def test_vacuum_needs_incremental_auto_vacuum(engine, tmp_path):
+    _add(engine, 300, _ms(2026, 1, 5))
+    log_retention.run_retention(engine, now_ms=_ms(2026, 5, 15))
+    # An existing file without auto_vacuum keeps its pages until an admin compacts it
+    assert log_retention._sqlite_pragmas(engine)["freelist_count"] > 0
+    assert log_retention.compact(engine)["auto_vacuum"] == "incremental"
+    assert log_retention._sqlite_pragmas(engine)["freelist_count"] == 0
+
+    _add(engine, 300, _ms(2026, 3, 5))
+    result = log_retention.run_retention(engine, now_ms=_ms(2026, 7, 15))
+    assert result["vacuumed_pages"] > 0
+    assert log_retention._sqlite_pragmas(engine)["freelist_count"] == 0
+
+    # A new log.db starts out incremental
+    fresh = create_db_engine(f"sqlite:///{tmp_path / 'fresh.db'}", auto_vacuum="INCREMENTAL")
+    _add(fresh, 1, _ms(2026, 9, 1))
+    assert log_retention._sqlite_pragmas(fresh)["auto_vacuum"] == 2
+    log_partitions.drop_partition(fresh, log_partitions.partition_table(ActivityLog, "202609"))
+    fresh.dispose()
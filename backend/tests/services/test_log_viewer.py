@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from models.log_models import ActivityLog
+from services import log_viewer
+from utils import log_partitions
+from utils.log_database import LoggingBase
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+    LoggingBase.metadata.create_all(engine, tables=[ActivityLog.__table__])
+    log_viewer.clear_counts()
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+def _add(db, n, ts, email="staff@bitsathy.ac.in", action="/api/timetable/save"):
+    rows = [dict(email=email, action=action, method="EDIT", status_code=200, timestamp_ist="t",
+                 timestamp_gmt="t", timestamp_ms=ts + i) for i in range(n)]
+    log_partitions.insert_rows(db, ActivityLog, rows)
+    db.commit()
+
+
+def test_keyset_pages_walk_across_month_partitions(db):
+    _add(db, 4, _ms(2026, 8, 20))
+    _add(db, 3, _ms(2026, 9, 2))
+    assert [m for m, _ in log_partitions.partitions(db.get_bind(), ActivityLog)] == ["202609", "202608"]
+
+    seen, cursor = [], None
+    while True:
+        page = log_viewer.read_page(db, "activity", limit=2, cursor=cursor)
+        seen += [(r["id"], r["email"]) for r in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert page["total"] == 7 and page["total_pages"] == 4
+    assert [i for i, _ in seen] == [3, 2, 1, 4, 3, 2, 1]
+
+    # page=N without a cursor lands on the same rows
+    third = log_viewer.read_page(db, "activity", limit=2, page=3)
+    assert [r["id"] for r in third["data"]] == [3, 2]
+
+
+def test_filters_use_epoch_range_and_fts(db):
+    _add(db, 2, _ms(2026, 9, 1, 18, 40), email="hod.cse@bitsathy.ac.in")   # 2 Sep 00:10 IST
+    _add(db, 1, _ms(2026, 9, 2, 10), action="/api/departments")
+    assert log_viewer.read_page(db, "activity", date="2026-09-02")["total"] == 3
+    assert log_viewer.read_page(db, "activity", date="2026-09-01")["total"] == 0
+    assert log_viewer.read_page(db, "activity", email="CSE@BIT")["total"] == 2
+    assert log_viewer.read_page(db, "activity", action="departm")["total"] == 1
+    assert log_viewer.read_page(db, "activity", email="hod", action="save")["total"] == 2
+    with pytest.raises(ValueError):
+        log_viewer.read_page(db, "activity", date="02-09-2026")
+
+
+def test_closed_month_counts_are_cached_until_its_rows_change(db):
+    counts = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: counts.append(statement) if "count(*)" in statement else None)
+    _add(db, 2, _ms(2025, 1, 5))
+    assert log_viewer.read_page(db, "activity")["total"] == 2
+    assert log_viewer.read_page(db, "activity")["total"] == 2
+    assert len(counts) == 1
+    # A late row (e.g. moved in by another worker's migrate_legacy_rows) and a
+    # delete made elsewhere are both seen without clear_counts()
+    _add(db, 1, _ms(2025, 1, 6))
+    assert log_viewer.read_page(db, "activity")["total"] == 3
+    db.execute(text("DELETE FROM activity_logs_202501 WHERE id = (SELECT min(id) FROM activity_logs_202501)"))
+    db.commit()
+    assert log_viewer.read_page(db, "activity")["total"] == 2
+
+
+def test_legacy_rows_move_into_partitions(db):
+    db.execute(text("INSERT INTO activity_logs (email, action, method, status_code, timestamp_ist, timestamp_gmt) "
+                    "VALUES ('old@x', '/api/generate', 'GENERATE', 200, '2026-03-31 11:45 PM', '2026-03-31 06:15 PM')"))
+    db.commit()
+    assert log_partitions.migrate_legacy_rows(db.get_bind()) == 1
+    assert db.execute(text("SELECT count(*) FROM activity_logs")).scalar() == 0
+    page = log_viewer.read_page(db, "activity", date="2026-03-31")
+    assert [r["email"] for r in page["data"]] == ["old@x"]
+
+
+def test_concurrent_legacy_migrations_move_each_row_once(tmp_path):
+    import threading
+    from sqlalchemy import func, insert, select
+    from utils.db_engine import create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    LoggingBase.metadata.create_all(engine, tables=[ActivityLog.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(ActivityLog.__table__), [
+            dict(email=f"u{i}@x", action="/api/generate", method="GENERATE", status_code=200, timestamp_ist="t",
+                 timestamp_gmt="t", timestamp_ms=_ms(2026, 4, 1) + i) for i in range(3000)])
+
+    moved = []
+    workers = [threading.Thread(target=lambda: moved.append(log_partitions.migrate_legacy_rows(engine, batch_size=100)))
+               for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    table = log_partitions.partition_table(ActivityLog, "202604")
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(table)).scalar() == 3000
+        assert conn.execute(select(func.count()).select_from(ActivityLog.__table__)).scalar() == 0
+    assert sum(moved) == 3000
+    engine.dispose()
+
+
+def test_a_new_month_is_registered_once_under_concurrent_use():
+    import sys
+    import threading
+
+    months = [f"1999{m:02d}" for m in range(1, 13)]
+    tables, errors = [], []
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # make the threads interleave inside partition_table
+    try:
+        for month in months:
+            start = threading.Barrier(8)
+
+            def use_month():
+                start.wait()
+                try:
+                    tables.append(log_partitions.partition_table(ActivityLog, month))
+                except Exception as e:
+                    errors.append(e)
+
+            workers = [threading.Thread(target=use_month) for _ in range(8)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+        for month in months:
+            LoggingBase.metadata.remove(LoggingBase.metadata.tables[log_partitions.partition_name(ActivityLog, month)])
+
+    assert errors == []
+    assert len({id(table) for table in tables}) == len(months)
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from models.log_models import ActivityLog, AuthLog
+from utils import log_partitions
+from utils.log_writer import LogWriter
+
+
+def _log_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+    for model in (ActivityLog, AuthLog):
+        log_partitions.ensure_partitions(engine, model, [log_partitions.current_month()])
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    return engine, sessionmaker(bind=engine), commits
+
+
+def _row(i):
+    return dict(email=f"u{i}@x", action="/api/timetable/save", method="EDIT", status_code=200,
+                timestamp_ist="t", timestamp_gmt="t")
+
+
+def _count(engine, model):
+    table = log_partitions.partition_table(model, log_partitions.current_month())
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_rows_are_written_in_batches(tmp_path):
+    engine, Session, commits = _log_db(tmp_path)
+    writer = LogWriter(Session, batch_size=10, flush_interval=5)
+    for i in range(25):
+        assert writer.submit(ActivityLog, _row(i))
+    writer.submit(AuthLog, dict(email="a@x", event_type="LOGIN", timestamp_ist="t", timestamp_gmt="t"))
+    assert writer.flush()
+    assert _count(engine, ActivityLog) == 25 and _count(engine, AuthLog) == 1
+    assert writer.stats()["written"] == 26
+    assert len(commits) == 3  # 10 + 10 + the 6 before the flush marker
+    writer.shutdown()
+
+
+def test_full_queue_drops_and_shutdown_writes_the_rest(tmp_path):
+    engine, Session, _ = _log_db(tmp_path)
+    writer = LogWriter(Session, batch_size=10, flush_interval=5, max_queue=3)
+    writer.start = lambda: None  # keep the thread from draining while the queue fills
+    results = [writer.submit(ActivityLog, _row(i)) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert writer.stats()["dropped"] == 2
+
+    del writer.start
+    writer.start()
+    writer.shutdown()
+    assert _count(engine, ActivityLog) == 3
+    assert writer.stats() == {"queued": 0, "written": 3, "dropped": 2, "failed": 0}
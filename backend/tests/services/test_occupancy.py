@@ -0,0 +1,55 @@
+import models
+from services import data_version, occupancy
+
+
+def _entry(dept, sem, course, day, period, faculty=None, venue=None):
+    return models.TimetableEntry(department_code=dept, semester=sem, course_code=course, slot_id=1,
+                                 day_of_week=day, period_number=period,
+                                 faculty_id=faculty and faculty.upper(), faculty_name=faculty, venue_name=venue)
+
+
+def test_index_splits_venues_and_filters_owners():
+    rows = [
+        ("CSE", 6, "CS601", "f1", "Anu", "Monday", 1, "LAB 1, LAB 2"),
+        ("ECE", 4, "EC401", "f2", "Unassigned", "Monday", 1, "ROOM 5"),
+        ("IT", 6, "IT601", None, None, "Monday", 2, None),
+    ]
+    index = occupancy.OccupancyIndex(rows)
+
+    assert index.busy_venues("Monday", 1) == {"LAB 1", "LAB 2", "ROOM 5"}
+    assert index.busy_faculty_names("Monday", 1) == {"Anu"}
+    assert index.venue_owners("Monday", 1, "LAB 2") == [occupancy.Owner("CSE", 6, "CS601")]
+    assert index.faculty_busy_map(exclude_departments={"CSE"})[("Monday", 1)] == {"f2"}
+    assert index.venue_busy_map(6, exclude_departments={"ECE"}) == {
+        ("Monday", 1): {"LAB 1", "LAB 2"}, ("Monday", 2): set()
+    }
+    assert index.busy_venues("Friday", 8) == set()
+
+
+def test_cached_index_is_rebuilt_after_a_bump(db_session, slot):
+    occupancy.invalidate()
+    db_session.add(_entry("CSE", 6, "CS601", "Monday", 1, faculty="Anu", venue="LAB 1"))
+    db_session.flush()
+    first = occupancy.get_index(db_session)
+    assert occupancy.get_index(db_session) is first
+
+    db_session.add(_entry("ECE", 6, "EC601", "Monday", 1, faculty="Bala", venue="ROOM 5"))
+    data_version.bump(db_session)
+    second = occupancy.get_index(db_session)
+
+    assert second is not first
+    assert second.busy_faculty_names("Monday", 1) == {"Anu", "Bala"}
+    occupancy.invalidate()
+
+
+def test_find_conflicts_skips_own_timetable_and_repeats():
+    from types import SimpleNamespace as Entry
+    index = occupancy.OccupancyIndex([
+        ("CSE", 6, "CS601", "f1", "Anu", "Monday", 1, "LAB 1"),
+        ("ECE", 4, "EC401", "f1", "Anu", "Monday", 1, "LAB 1, LAB 2"),
+    ])
+    entries = [Entry(faculty_name="Anu", venue_name="LAB 2", day_of_week="Monday", period_number=1)] * 2
+
+    found = list(occupancy.find_conflicts(index, entries, "CSE", 6))
+    assert [(c["type"], c["occupied_by_dept"]) for c in found] == [("faculty", "ECE"), ("venue", "ECE")]
+    assert found[1]["message"] == "LAB 2 is occupied by ECE Sem 4 (EC401) at Monday Period 1"
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from services import data_version, response_cache
+from services.response_cache import ResponseCache, cached_json
+
+
+def _request(if_none_match=None):
+    return SimpleNamespace(headers={"if-none-match": if_none_match} if if_none_match else {})
+
+
+def test_lru_eviction_is_bounded_by_body_bytes():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", (), b"1234")
+    cache.put("b", (), b"1234")
+    assert cache.get("a", ()) is not None        # "b" is now least recently used
+    cache.put("c", (), b"1234")
+    assert cache.get("b", ()) is None
+    cache.put("huge", (), b"x" * 11)             # larger than the cap: never stored
+    assert cache.get("huge", ()) is None
+    assert cache.stats()["bytes"] == 8 and cache.evictions == 1
+
+
+def test_cached_until_the_version_is_bumped_with_etag_revalidation(db_session, monkeypatch):
+    monkeypatch.setattr(response_cache, "cache", ResponseCache(max_bytes=1024))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"timetable": [{"course_code": "CS601"}], "call": len(calls)}
+
+    first = cached_json(_request(), db_session, ("venue", "LAB 1"), compute)
+    again = cached_json(_request(), db_session, ("venue", "LAB 1"), compute)
+    assert first.body == again.body and len(calls) == 1
+    assert first.headers["content-type"] == "application/json"
+
+    not_modified = cached_json(_request(first.headers["etag"]), db_session, ("venue", "LAB 1"), compute)
+    assert not_modified.status_code == 304 and not_modified.body == b""
+
+    data_version.bump(db_session)
+    fresh = cached_json(_request(first.headers["etag"]), db_session, ("venue", "LAB 1"), compute)
+    assert fresh.status_code == 200 and len(calls) == 2
+    assert fresh.headers["etag"] != first.headers["etag"]
+
+    # Student views also follow registrations
+    cached_json(_request(), db_session, ("student", "S1"), compute, depends=(data_version.TIMETABLE, data_version.REGISTRATIONS))
+    data_version.bump(db_session, data_version.REGISTRATIONS)
+    cached_json(_request(), db_session, ("student", "S1"), compute, depends=(data_version.TIMETABLE, data_version.REGISTRATIONS))
+    assert len(calls) == 4
+    assert response_cache.cache.stats()["not_modified"] == 1
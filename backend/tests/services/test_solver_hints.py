@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from ortools.sat.python import cp_model
+
+import models
+from services.solver_hints import (add_hints, decode_placements, diff_placements, find_affected_courses,
+                                   load_previous_placements, solution_matches)
+
+
+def _row(code, stype, day, period, section=1, faculty=None):
+    return {"course_code": code, "session_type": stype, "day_of_week": day, "period_number": period,
+            "section_number": section, "faculty_id": faculty, "venue_name": None}
+
+
+THEORY_VARS = {(c, d, p): object() for c in ("C1", "C2") for d in ("Monday", "Tuesday") for p in range(1, 8)}
+LAB_VARS = {("C2", d, bs): object() for d in ("Monday", "Tuesday") for bs in (1, 3, 5)}
+
+
+def test_decode_maps_rows_onto_variables():
+    rows = [
+        _row("C1", "THEORY", "Monday", 2),
+        _row("C2", "LAB", "Tuesday", 3), _row("C2", "LAB", "Tuesday", 4),
+        _row("C2", "LAB", "Monday", 6),            # half a block: ignored
+        _row("C1", "THEORY", "Friday", 1),         # slot no longer in the model
+    ]
+    decoded = decode_placements(rows, THEORY_VARS, LAB_VARS, {}, set())
+
+    assert decoded["theory"] == {("C1", "Monday", 2)}
+    assert decoded["lab"] == {("C2", "Tuesday", 3)}
+
+
+def test_add_hints_covers_every_variable():
+    model = cp_model.CpModel()
+    theory = {("C1", "Monday", p): model.NewBoolVar(f"t{p}") for p in (1, 2)}
+    lab = {("C2", "Monday", 3): model.NewBoolVar("l3")}
+    decoded = {"theory": {("C1", "Monday", 2)}, "lab": {("C2", "Monday", 3)}, "merged": set()}
+
+    assert add_hints(model, decoded, theory, lab, {}) == 3
+    hint = model.Proto().solution_hint
+    values = dict(zip(hint.vars, hint.values))
+    assert [values[v.Index()] for v in (*theory.values(), *lab.values())] == [0, 1, 1]
+
+
+def test_solution_matches_detects_manual_moves():
+    solution = {"theory": {("C1", "Monday", 2)}, "lab": set(), "merged": set()}
+    assert solution_matches(solution, [_row("C1", "THEORY", "Monday", 2)])
+    assert not solution_matches(solution, [_row("C1", "THEORY", "Monday", 3)])
+
+
+def test_affected_courses_reasons():
+    rows = [_row("C1", "THEORY", "Monday", 2, faculty="F1"), _row("C2", "THEORY", "Monday", 3, faculty="F9")]
+    decoded = decode_placements(rows, THEORY_VARS, LAB_VARS, {}, set())
+    affected = find_affected_courses(
+        ["C1", "C2", "C3"], decoded, rows,
+        theory_count={"C1": 1, "C2": 1, "C3": 2}, lab_blocks={},
+        course_faculty={"C1": [("F1", "A", "THEORY")], "C2": [("F2", "B", "THEORY")]},
+        global_faculty_busy={}, merged_codes=set(),
+    )
+    assert affected == {"C2": "faculty mapping changed", "C3": "new course"}
+
+
+def test_affected_courses_scope_and_busy_faculty():
+    rows = [_row("C1", "THEORY", "Monday", 2, faculty="F1"), _row("C2", "THEORY", "Tuesday", 3, faculty="F2")]
+    decoded = decode_placements(rows, THEORY_VARS, LAB_VARS, {}, set())
+    kwargs = dict(theory_count={"C1": 1, "C2": 1}, lab_blocks={},
+                  course_faculty={"C1": [("F1", "A", "THEORY")], "C2": [("F2", "B", "THEORY")]},
+                  merged_codes=set())
+
+    busy = find_affected_courses(["C1", "C2"], decoded, rows, global_faculty_busy={("Monday", 2): {"F1"}}, **kwargs)
+    assert busy == {"C1": "faculty now busy elsewhere"}
+
+    scoped = find_affected_courses(["C1", "C2"], decoded, rows, global_faculty_busy={},
+                                   scope={"slots": [["Tuesday", 3]]}, **kwargs)
+    assert scoped == {"C2": "slot requested"}
+
+
+def test_diff_pairs_moves_per_section():
+    before = [_row("C1", "THEORY", "Monday", 2, 1), _row("C1", "THEORY", "Monday", 2, 2), _row("C2", "THEORY", "Monday", 4)]
+    after = [_row("C1", "THEORY", "Tuesday", 5, 1), _row("C1", "THEORY", "Monday", 2, 2), _row("C3", "THEORY", "Monday", 6)]
+    diff = diff_placements(before, after)
+
+    assert diff["unchanged"] == 1
+    assert diff["moved"] == [{"course_code": "C1", "session_type": "THEORY", "section_number": 1,
+                              "from": {"day": "Monday", "period": 2}, "to": {"day": "Tuesday", "period": 5}}]
+    assert [r["course_code"] for r in diff["removed"]] == ["C2"]
+    assert [r["course_code"] for r in diff["added"]] == ["C3"]
+
+
+def test_snapshot_hints_only_for_combined_runs(db_session):
+    # The snapshot holds every learning mode of the dept/sem and its rows carry no mode
+    db_session.add(models.TimetableData(department="CSE", semester=6, created_at="t", data=json.dumps(
+        [_row("C1", "THEORY", "Monday", 1), _row("C2", "THEORY", "Monday", 2)])))
+    db_session.flush()
+
+    assert len(load_previous_placements(db_session, "CSE", 6, "1,2", source="snapshot")) == 2
+    with pytest.raises(ValueError):
+        load_previous_placements(db_session, "CSE", 6, "1", source="snapshot")
+    assert load_previous_placements(db_session, "CSE", 6, "1", source="entries") == []
@@ -0,0 +1,40 @@
+from ortools.sat.python import cp_model
+
+from services.constraint_interpreter import ConstraintInterpreter
+from services.solver_index import VariableIndex
+
+
+def _vars():
+    model = cp_model.CpModel()
+    theory = {(c, d, p): model.NewBoolVar(f"th_{c}_{d}_{p}") for c in ("C1", "C2") for d in ("Monday", "Tuesday") for p in range(1, 5)}
+    lab = {("C1", d, bs): model.NewBoolVar(f"lab_{d}_{bs}") for d in ("Monday", "Tuesday") for bs in (1, 3)}
+    merged = {(d, bs): model.NewBoolVar(f"m_{d}_{bs}") for d in ("Monday",) for bs in (1, 3)}
+    return model, theory, lab, merged
+
+
+def test_index_groups_match_key_filters():
+    _, theory, lab, merged = _vars()
+    index = VariableIndex(theory, lab, merged)
+
+    assert index.theory_by_course["C2"] == [v for k, v in theory.items() if k[0] == "C2"]
+    assert index.theory_by_course_day[("C1", "Tuesday")] == [v for k, v in theory.items() if k[:2] == ("C1", "Tuesday")]
+    # period 4 is the second half of the blocks starting at 3
+    assert index.vars_using_slot("Monday", 4) == [
+        theory[("C1", "Monday", 4)], theory[("C2", "Monday", 4)], lab[("C1", "Monday", 3)], merged[("Monday", 3)]
+    ]
+
+
+def test_slot_blocking_zeroes_everything_in_the_slot():
+    model, theory, lab, merged = _vars()
+    interpreter = ConstraintInterpreter(db=None, department_code="CSE", semester=6)
+    interpreter.constraints = [{
+        "uuid": "u1", "name": "Assembly", "constraint_type": "SLOT_BLOCKING",
+        "rules": {"visual_slots": [{"day": "Monday", "period": 2}]},
+    }]
+    interpreter.apply_to_model(model, theory, lab, merged, core_slot_fills=[], objective_terms=[],
+                               all_days=["Monday", "Tuesday"], day_periods={}, slot_lookup={("Monday", 2): object()},
+                               filled_slots=set())
+
+    # C1/C2 theory at Monday P2 + C1 lab block 1-2 + merged block 1-2
+    assert len(model.Proto().constraints) == 4
+    assert not interpreter.warnings
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import models
+from services import solver_runtime
+
+
+def _conf(saved):
+    def get_conf(category, key, field="value", default=None):
+        return saved.get(category, {}).get(key, {}).get(field, default)
+    return get_conf
+
+
+def test_request_overrides_config_and_workers_are_capped(monkeypatch):
+    monkeypatch.setattr(solver_runtime.settings, "solver_max_total_threads", 8)
+    saved = {"solver": {"time_limit_seconds": {"value": 30}, "num_workers": {"value": 16}}}
+
+    params = solver_runtime.resolve_solver_params(_conf(saved), {"random_seed": 7, "num_workers": None})
+
+    assert params["time_limit_seconds"] == 30.0
+    assert params["num_workers"] == 8
+    assert params["random_seed"] == 7
+    assert params["stop_at_first_solution"] is False
+
+
+def test_unconfigured_solve_keeps_the_cp_sat_defaults():
+    from ortools.sat.python import cp_model
+
+    solver, baseline = cp_model.CpSolver(), cp_model.CpSolver()
+    solver_runtime.apply_solver_params(solver, solver_runtime.resolve_solver_params(_conf({})))
+    assert solver.parameters.random_seed == baseline.parameters.random_seed
+    assert solver.parameters.relative_gap_limit == baseline.parameters.relative_gap_limit
+
+
+def test_leases_share_the_thread_budget(db_session, monkeypatch):
+    monkeypatch.setattr(solver_runtime.settings, "solver_max_total_threads", 6)
+
+    first = solver_runtime._try_lease(db_session, "A", 4, ttl_seconds=60)
+    second = solver_runtime._try_lease(db_session, "B", 4, ttl_seconds=60)
+    assert (first.threads, second.threads) == (4, 2)   # second is trimmed to what's left
+    assert solver_runtime._try_lease(db_session, "C", 1, ttl_seconds=60) is None
+
+
+def test_expired_leases_stop_counting(db_session, monkeypatch):
+    monkeypatch.setattr(solver_runtime.settings, "solver_max_total_threads", 4)
+    db_session.add(models.SolverLease(id="dead", holder="crashed", threads=4,
+                                      expires_at=(datetime.utcnow() - timedelta(seconds=1)).isoformat()))
+    db_session.commit()
+
+    lease = solver_runtime._try_lease(db_session, "A", 4, ttl_seconds=60)
+    assert lease.threads == 4
+    assert db_session.query(models.SolverLease).filter_by(id="dead").first() is None
+
+
+def test_refused_lease_still_commits_expired_cleanup(db_session, monkeypatch):
+    monkeypatch.setattr(solver_runtime.settings, "solver_max_total_threads", 2)
+    expired = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    db_session.add(models.SolverLease(id="dead", holder="crashed", threads=2, expires_at=expired))
+    db_session.add(models.SolverLease(id="busy", holder="B", threads=2,
+                                      expires_at=(datetime.utcnow() + timedelta(seconds=60)).isoformat()))
+    db_session.commit()
+
+    assert solver_runtime._try_lease(db_session, "A", 1, ttl_seconds=60) is None
+    assert not db_session.in_transaction()   # the cleanup was committed, not left open
+    assert db_session.query(models.SolverLease).filter_by(id="dead").first() is None
@@ -0,0 +1,69 @@
+from ortools.sat.python import cp_model
+
+import models
+from services import solver_telemetry
+
+
+def test_phases_count_time_and_queries(db_session, monkeypatch):
+    monkeypatch.setattr(solver_telemetry.GenerationTelemetry, "_persist", lambda self, *a: 1)
+    telemetry = solver_telemetry.GenerationTelemetry(db_session, "CSE", 6)
+
+    telemetry.mark("DATA_FETCH")
+    db_session.query(models.CourseMaster).all()
+    db_session.query(models.FacultyMaster).all()
+    telemetry.mark("SOLVE")
+    summary = telemetry.finish({"success": True, "entries_saved": 3})
+
+    assert summary["status"] == "SUCCEEDED"
+    assert summary["phases"]["DATA_FETCH"]["queries"] == 2
+    assert summary["phases"]["SOLVE"]["queries"] == 0
+    assert summary["total_queries"] == 2
+
+    # The hook is detached once the run is finished
+    db_session.query(models.CourseMaster).all()
+    assert telemetry.total_queries == 2
+
+
+def test_model_and_solver_stats(db_session, monkeypatch):
+    monkeypatch.setattr(solver_telemetry.GenerationTelemetry, "_persist", lambda self, *a: 1)
+    telemetry = solver_telemetry.GenerationTelemetry(db_session, "CSE", 6)
+
+    model = cp_model.CpModel()
+    x, y = model.NewBoolVar("x"), model.NewBoolVar("y")
+    model.Add(x + y == 1)
+    model.Maximize(x)
+    solver = cp_model.CpSolver()
+    status = solver.Solve(model)
+    telemetry.record_model(model)
+    telemetry.record_solver(solver, status)
+    summary = telemetry.finish({"success": False, "errors": [{"type": "CANCELLED"}]})
+
+    assert summary["model"]["bool_vars"] == 2 and summary["model"]["constraints"] == 1
+    assert summary["solver"]["status"] == "OPTIMAL" and summary["solver"]["objective"] == 1
+    assert summary["status"] == "CANCELLED"
+
+
+def test_a_failed_run_is_stored_after_its_writes_are_rolled_back(tmp_path, monkeypatch):
+    import pytest
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from config.settings import settings
+    from services import solver_engine
+
+    monkeypatch.setattr(settings, "sqlite_busy_timeout_ms", 200)
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"timeout": 0.2})
+    models.Base.metadata.create_all(engine)
+
+    def fails_after_writing(db, *args, **kwargs):
+        db.add(models.DepartmentMaster(department_code="CSE"))
+        db.flush()  # holds the SQLite write lock
+        raise RuntimeError("solver crashed")
+
+    monkeypatch.setattr(solver_engine, "_generate_schedule", fails_after_writing)
+    with sessionmaker(bind=engine)() as db:
+        with pytest.raises(RuntimeError):
+            solver_engine.generate_schedule(db, "CSE", 6, "Wednesday")
+        runs = db.query(models.GenerationRun).all()
+        assert [(run.status, run.error) for run in runs] == [("ERROR", "solver crashed")]
+        assert db.query(models.DepartmentMaster).count() == 0
+    engine.dispose()
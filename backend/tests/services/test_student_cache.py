@@ -0,0 +1,60 @@
+import json
+
+import models
+from services import data_version, student_cache
+
+
+def _setup(db):
+    db.add(models.TimetableEntry(department_code="CSE", semester=6, course_code="CS601", slot_id=1,
+                                 day_of_week="Monday", period_number=1, section_number=1, learning_mode_ids="1"))
+    for sid in ("S1", "S2"):
+        db.add(models.StudentMaster(student_id=sid, name=sid, department_code="CSE", semester=6, learning_mode_id=1))
+        db.flush()
+        db.add(models.CourseRegistration(student_id=sid, course_code="CS601", semester=6))
+    db.flush()
+
+
+def _cached(db):
+    return sorted(sid for (sid,) in db.query(models.StudentTimetableCache.student_id))
+
+
+def test_read_stores_and_invalidate_drops_rows(db_session, slot):
+    _setup(db_session)
+
+    view = json.loads(student_cache.read(db_session, "S1"))
+    assert [e["course_code"] for e in view["timetable"]] == ["CS601"]
+    assert _cached(db_session) == ["S1"]
+    assert student_cache.read(db_session, "NOPE") is None
+
+    student_cache.invalidate(db_session, ["CS601"], 6)
+    assert _cached(db_session) == []
+    assert student_cache.refresh(db_session, ["CS601"], 6) == 2
+    assert _cached(db_session) == ["S1", "S2"]
+
+
+def test_results_of_stale_data_are_not_stored(db_session, slot):
+    _setup(db_session)
+    tokens = data_version.current_many(db_session, (data_version.TIMETABLE, data_version.REGISTRATIONS))
+    data_version.bump(db_session)
+
+    student_cache._store(db_session, {"S1": "{}"}, tokens)
+    assert _cached(db_session) == []
+
+
+def test_failed_refresh_does_not_fail_a_committed_save(db_session, slot, monkeypatch):
+    import schemas
+    from routes import legacy_routes
+    _setup(db_session)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(student_cache, "refresh", broken)
+    request = schemas.TimetableSaveRequest(department_code="CSE", semester=6, learning_mode_ids="1", entries=[
+        schemas.TimetableEntryCreate(department_code="CSE", semester=6, course_code="CS601", slot_id=1,
+                                     day_of_week="Tuesday", period_number=2, learning_mode_ids="1")])
+
+    assert legacy_routes.save_timetable(request, db_session) == {"status": "success"}
+    assert [e.day_of_week for e in db_session.query(models.TimetableEntry)] == ["Tuesday"]
+    # The rows stay invalidated and are rebuilt on read
+    assert _cached(db_session) == []
+    assert json.loads(student_cache.read(db_session, "S1"))["timetable"][0]["day_of_week"] == "Tuesday"
@@ -0,0 +1,55 @@
+import models
+from services.student_timetable import resolve_cohort, resolve_student
+
+
+def _entry(dept, course, day, period, section=1, modes="1,2", session="THEORY"):
+    return models.TimetableEntry(department_code=dept, semester=6, course_code=course, slot_id=1, session_type=session,
+                                 day_of_week=day, period_number=period, section_number=section, learning_mode_ids=modes)
+
+
+def _student(db, sid, dept="CSE", mode=1, courses=("CS601",)):
+    db.add(models.StudentMaster(student_id=sid, name=sid, department_code=dept, semester=6, learning_mode_id=mode))
+    db.flush()
+    for code in courses:
+        db.add(models.CourseRegistration(student_id=sid, course_code=code, semester=6))
+
+
+def _slots(view):
+    return [(e.course_code, e.day_of_week, e.period_number) for e in view["timetable"]]
+
+
+def _setup(db):
+    db.add_all([
+        # CS601 runs two parallel sections in CSE
+        _entry("CSE", "CS601", "Monday", 1, section=1), _entry("CSE", "CS601", "Monday", 1, section=2),
+        _entry("CSE", "CS601", "Tuesday", 2, section=1), _entry("CSE", "CS601", "Tuesday", 3, section=2),
+        # Mode-1-only tutorial, and an elective hosted by ECE
+        _entry("CSE", "CS601", "Friday", 8, modes="1", session="TUTORIAL"),
+        _entry("ECE", "OE601", "Tuesday", 2),
+    ])
+    for sid in ("S1", "S2", "S3", "S4"):
+        _student(db, sid, mode=1 if sid in ("S1", "S2") else 2, courses=("CS601", "OE601"))
+    db.flush()
+
+
+def test_students_are_split_over_sections_and_modes(db_session, slot):
+    _setup(db_session)
+
+    first, last = resolve_student(db_session, "S1"), resolve_student(db_session, "S4")
+    assert _slots(first) == [("CS601", "Monday", 1), ("CS601", "Tuesday", 2), ("CS601", "Friday", 8), ("OE601", "Tuesday", 2)]
+    assert _slots(last) == [("CS601", "Monday", 1), ("CS601", "Tuesday", 3), ("OE601", "Tuesday", 2)]
+    assert {e.section_number for e in last["timetable"] if e.course_code == "CS601"} == {2}
+    assert first["conflicts"] == ["Conflict on Tuesday Period 2: CS601 & OE601"]
+    assert last["conflicts"] == []
+
+
+def test_cohort_matches_single_student_resolution(db_session, slot):
+    _setup(db_session)
+    _student(db_session, "E1", dept="ECE", courses=("OE601",))
+    db_session.flush()
+
+    cohort = resolve_cohort(db_session, "CSE", 6)
+    assert list(cohort) == ["S1", "S2", "S3", "S4"]
+    for sid, view in cohort.items():
+        assert _slots(view) == _slots(resolve_student(db_session, sid))
+    assert resolve_student(db_session, "NOPE") is None
@@ -0,0 +1,55 @@
+from sqlalchemy import create_engine, inspect, text
+
+import models
+from services import venue_index
+from services.entry_buffer import EntryBuffer
+
+
+def _entry(dept, course, day, period, venue):
+    return models.TimetableEntry(department_code=dept, semester=6, course_code=course, slot_id=1,
+                                 day_of_week=day, period_number=period, venue_name=venue)
+
+
+def _indexed(db):
+    V = models.TimetableEntryVenue
+    return sorted(db.query(V.venue_name, V.day_of_week, V.period_number).all())
+
+
+def test_rebuild_splits_venue_lists(db_session, slot):
+    db_session.add_all([
+        _entry("CSE", "CS601", "Monday", 1, "LAB 1, LAB 2, LAB 1"),
+        _entry("ECE", "EC601", "Monday", 2, "LAB 1"),
+        _entry("IT", "IT601", "Monday", 3, None),
+    ])
+    db_session.flush()
+
+    assert venue_index.rebuild(db_session) == 3
+    assert _indexed(db_session) == [("LAB 1", "Monday", 1), ("LAB 1", "Monday", 2), ("LAB 2", "Monday", 1)]
+    assert [e.course_code for e in venue_index.entries_in_venue(db_session, "LAB 1")] == ["CS601", "EC601"]
+
+
+def test_replacing_a_timetable_keeps_the_index_in_step(db_session, slot):
+    db_session.add_all([_entry("CSE", "CS601", "Monday", 1, "LAB 1"), _entry("ECE", "EC601", "Monday", 1, "ROOM 5")])
+    db_session.flush()
+    venue_index.rebuild(db_session)
+
+    entries = EntryBuffer(department_code="CSE", semester=6)
+    entries.add(course_code="CS602", slot_id=1, day_of_week="Tuesday", period_number=4, venue_name="LAB 3, LAB 4")
+    entries.replace(db_session, "CSE", 6)
+
+    assert [v for v, *_ in _indexed(db_session)] == ["LAB 3", "LAB 4", "ROOM 5"]
+    assert venue_index.entries_in_venue(db_session, "LAB 1") == []
+
+
+def test_outdated_table_with_venue_id_is_dropped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE timetable_entry_venues (id INTEGER PRIMARY KEY, entry_id INTEGER, "
+                          "venue_id INTEGER REFERENCES venue_master(venue_id), venue_name TEXT, "
+                          "day_of_week TEXT, period_number INTEGER)"))
+    assert venue_index.drop_outdated_table(engine) is True
+    assert not inspect(engine).has_table("timetable_entry_venues")
+
+    models.Base.metadata.create_all(engine, tables=[models.TimetableEntry.__table__, models.TimetableEntryVenue.__table__])
+    assert venue_index.drop_outdated_table(engine) is False
+    engine.dispose()
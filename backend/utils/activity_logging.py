@@ -2,9 +2,13 @@
 Activity Logging Utilities.
 
 Functions to log user activity events (API calls, HTTP requests)
-to the centralized log.db database.
+to the centralized log.db database. Rows are queued for the batched
+writer in utils/log_writer.py unless settings.log_writer_enabled is off.
 """
 
+from config.settings import settings
+from utils import log_writer
+from utils import log_partitions
 from utils.log_database import get_log_db_transaction
 from models.log_models import ActivityLog, get_ist_time, get_gmt_time
 from typing import Optional
@@ -28,20 +32,24 @@ def log_activity(
         user_id: Optional internal user ID
     
     Returns:
-        True if logged successfully, False otherwise
+        True if logged (or queued) successfully, False otherwise
     """
+    row = dict(
+        user_id=user_id,
+        email=email,
+        action=action,
+        method=method.upper(),
+        status_code=status_code,
+        timestamp_ist=get_ist_time(),
+        timestamp_gmt=get_gmt_time(),
+        timestamp_ms=log_partitions.now_ms(),
+    )
+    if settings.log_writer_enabled:
+        # Called from the event loop: never wait for queue space
+        return log_writer.submit(ActivityLog, row)
     try:
         with get_log_db_transaction() as db:
-            log_entry = ActivityLog(
-                user_id=user_id,
-                email=email,
-                action=action,
-                method=method.upper(),
-                status_code=status_code,
-                timestamp_ist=get_ist_time(),
-                timestamp_gmt=get_gmt_time(),
-            )
-            db.add(log_entry)
+            log_partitions.insert_rows(db, ActivityLog, [row])
             # db.commit() is handled by context manager
             return True
     except Exception as e:
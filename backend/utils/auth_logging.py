@@ -2,9 +2,13 @@
 Authentication Logging Utilities.
 
 Functions to log user authentication events (Login, Logout, Token Refresh, etc.)
-to the centralized log.db database.
+to the centralized log.db database. Rows are queued for the batched
+writer in utils/log_writer.py unless settings.log_writer_enabled is off.
 """
 
+from config.settings import settings
+from utils import log_writer
+from utils import log_partitions
 from utils.log_database import get_log_db_transaction
 from models.log_models import AuthLog, get_ist_time, get_gmt_time
 from typing import Optional
@@ -26,19 +30,22 @@ def log_auth_event(
         user_id: Optional internal user ID
     
     Returns:
-        True if logged successfully, False otherwise
+        True if logged (or queued) successfully, False otherwise
     """
+    row = dict(
+        user_id=user_id,
+        email=email,
+        event_type=event_type,
+        timestamp_ist=get_ist_time(),
+        timestamp_gmt=get_gmt_time(),
+        timestamp_ms=log_partitions.now_ms(),
+        user_agent=user_agent,
+    )
+    if settings.log_writer_enabled:
+        return log_writer.submit(AuthLog, row, block_seconds=settings.log_queue_block_ms / 1000)
     try:
         with get_log_db_transaction() as db:
-            log_entry = AuthLog(
-                user_id=user_id,
-                email=email,
-                event_type=event_type,
-                timestamp_ist=get_ist_time(),
-                timestamp_gmt=get_gmt_time(),
-                user_agent=user_agent,
-            )
-            db.add(log_entry)
+            log_partitions.insert_rows(db, AuthLog, [row])
             # db.commit() is handled by context manager
             return True
     except Exception as e:
@@ -1,26 +1,29 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import QueuePool, SingletonThreadPool
 from contextlib import contextmanager
 from typing import Generator
 import os
 from config.settings import settings
+from utils.db_engine import create_db_engine
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "college_scheduler.db"))
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_FILE}"
-
-# Application DB Engine with customized recycling logic
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    poolclass=SingletonThreadPool,
-    pool_size=20,
-    pool_recycle=1800,  # Recycle connection every 30 minutes to avoid memory leaks
-    pool_pre_ping=True
+# settings.database_url (e.g. postgresql+psycopg2://...) overrides the bundled SQLite file
+SQLALCHEMY_DATABASE_URL = settings.database_url or f"sqlite:///{DB_FILE}"
+
+# Application DB Engine: pooled, SQLite pragmas applied (see utils/db_engine.py)
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+
+# Read-only pool for GET endpoints (optionally a replica): with WAL these run
+# while a generation commit holds the write lock, and they never queue behind
+# writers for a connection
+read_engine = create_db_engine(
+    settings.database_read_url or SQLALCHEMY_DATABASE_URL,
+    read_only=True,
+    pool_size=settings.db_read_pool_size,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
@@ -35,6 +38,14 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def get_read_db() -> Generator:
+    """FastAPI Dependency for read-only GET endpoints (writes raise)."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 @contextmanager
 def get_db_transaction() -> Generator:
     """Context manager for enforcing strict transaction boundaries in background 
@@ -49,3 +60,25 @@ def get_db_transaction() -> Generator:
         raise
     finally:
         db.close()
+
+
+def create_missing_indexes(bind, metadata) -> list:
+    """create_all() skips tables that already exist, and with them any Index
+    declared after the table was first created. Create those; returns their names."""
+    from sqlalchemy import inspect
+    from sqlalchemy.exc import DatabaseError
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                try:
+                    index.create(bind=bind, checkfirst=True)
+                except DatabaseError:
+                    continue  # another worker created it first
+                created.append(index.name)
+    return created
@@ -0,0 +1,86 @@
+"""
+Engines for the application and log databases, from a database URL.
+
+SQLite (the default, a file under database/) and PostgreSQL are supported;
+the URL comes from settings.database_url / log_database_url. Both use a
+QueuePool sized by settings.db_pool_size / db_max_overflow / db_pool_timeout
+/ db_pool_recycle.
+
+SQLite connections additionally get, on connect:
+
+    journal_mode=WAL      readers no longer block on a writer and vice versa
+    synchronous=NORMAL    fsync at checkpoints, not on every commit (safe with WAL)
+    busy_timeout          wait for the write lock instead of "database is locked"
+    mmap_size, cache_size larger page cache for the read-heavy timetable queries
+
+journal_mode is stored in the database file, so it is only set by writable
+engines. So is auto_vacuum, which an engine can ask for with
+auto_vacuum="INCREMENTAL" (log.db does); SQLite only applies it while the
+file is still empty, so it is issued before journal_mode and is a no-op on
+an existing file. Read-only engines make every connection read-only (query_only on
+SQLite, a read-only session on PostgreSQL) so a stray write fails loudly.
+"""
+
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from config.settings import settings
+
+
+def is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def apply_pragmas(dbapi_connection, read_only: bool = False, auto_vacuum: Optional[str] = None) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if auto_vacuum and not read_only:
+            cursor.execute(f"PRAGMA auto_vacuum={auto_vacuum}")
+        if settings.sqlite_wal and not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")  # negative = KiB
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _set_read_only(dbapi_connection) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+def create_db_engine(url, read_only: bool = False, poolclass=QueuePool, auto_vacuum: Optional[str] = None,
+                     **kwargs):
+    """create_engine() for the app/log database at `url`. QueuePool options
+    default to the db_pool_* settings; auto_vacuum (SQLite) applies to new files."""
+    if poolclass is QueuePool:
+        kwargs.setdefault("pool_size", settings.db_pool_size)
+        kwargs.setdefault("max_overflow", settings.db_max_overflow)
+        kwargs.setdefault("pool_timeout", settings.db_pool_timeout)
+        kwargs.setdefault("pool_recycle", settings.db_pool_recycle)
+    sqlite = is_sqlite(url)
+    if sqlite:
+        kwargs.setdefault("connect_args", {"check_same_thread": False})
+    else:
+        kwargs.setdefault("pool_pre_ping", True)  # server restarts / idle disconnects
+    engine = create_engine(url, poolclass=poolclass, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if sqlite:
+            apply_pragmas(dbapi_connection, read_only, auto_vacuum)
+        elif read_only and engine.dialect.name == "postgresql":
+            _set_read_only(dbapi_connection)
+
+    return engine
@@ -3,29 +3,27 @@ Separate SQLAlchemy engine and session for centralized logging (log.db).
 This maintains complete isolation from the main application database.
 """
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import SingletonThreadPool
 from contextlib import contextmanager
 from typing import Generator
 import os
 
+from sqlalchemy.engine import make_url
+
+from config.settings import settings
+from utils.db_engine import create_db_engine
+
 # Construct the path to log.db in the database folder
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "log.db"))
-LOG_DATABASE_URL = f"sqlite:///{DB_FILE}"
-
-print(f"[LOG_DB] Using database: {DB_FILE}")
-
-# Logging DB Engine - Separate from main application DB with recycling
-log_engine = create_engine(
-    LOG_DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    poolclass=SingletonThreadPool,
-    pool_size=20,
-    pool_recycle=1800,
-    pool_pre_ping=True
-)
+LOG_DATABASE_URL = settings.log_database_url or f"sqlite:///{DB_FILE}"
+
+print(f"[LOG_DB] Using database: {make_url(LOG_DATABASE_URL).render_as_string(hide_password=True)}")
+
+# Logging DB Engine - Separate from main application DB (own pool, same pragmas).
+# A new log.db is created with auto_vacuum=INCREMENTAL so retention can hand
+# freed pages back in small steps (services/log_retention.incremental_vacuum).
+log_engine = create_db_engine(LOG_DATABASE_URL, auto_vacuum="INCREMENTAL")
 
 LoggingBase = declarative_base()
 LogSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=log_engine)
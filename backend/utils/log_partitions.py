@@ -0,0 +1,240 @@
+"""
+Monthly partitions of the activity and auth logs (log.db).
+
+Rows are written to activity_logs_YYYYMM / auth_logs_YYYYMM, picked by the
+UTC month of their timestamp_ms (epoch milliseconds, indexed) - the
+readable timestamp_ist / timestamp_gmt strings don't sort and can't be
+range-queried. Each partition copies the model's columns; on SQLite it also
+gets an external-content FTS5 table over the searchable columns (trigram
+tokenizer, so MATCH finds substrings the way ilike('%x%') did), kept current
+by triggers.
+
+Partitions are registered in LoggingBase.metadata as they are first used
+(or found by register_existing), so create_all and utils.copy_database treat
+them like the other log tables. Rows still in the unpartitioned
+activity_logs / auth_logs tables are moved by migrate_legacy_rows() at startup.
+"""
+
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DDL, BigInteger, Column, Index, Table, column, event, inspect, select, text
+from sqlalchemy.exc import DatabaseError
+
+from models.log_models import IST, ActivityLog, AuthLog
+from utils.log_database import LoggingBase
+
+# Base table -> columns indexed for search
+SEARCH_COLUMNS = {
+    ActivityLog.__tablename__: ("email", "action"),
+    AuthLog.__tablename__: ("email", "event_type"),
+}
+MODELS = (ActivityLog, AuthLog)
+_LEGACY_BATCH = 5000
+_MONTH = re.compile(r"^(\d{6})$")
+
+_ensured = set()  # (engine url, table name) created by this process
+_ensured_lock = threading.Lock()  # also guards partition Tables in LoggingBase.metadata
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def month_of(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y%m")
+
+
+def current_month() -> str:
+    return month_of(now_ms())
+
+
+def month_bounds(month: str) -> Tuple[int, int]:
+    """[start, end) of a YYYYMM month in epoch milliseconds."""
+    year, mon = int(month[:4]), int(month[4:])
+    start = datetime(year, mon, 1, tzinfo=timezone.utc)
+    end = datetime(year + mon // 12, mon % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def partition_name(model, month: str) -> str:
+    return f"{model.__tablename__}_{month}"
+
+
+def fts_name(table) -> str:
+    return f"{table.name}_fts"
+
+
+def partition_table(model, month: str) -> Table:
+    """The Table for `model`'s rows of `month`, registered in LoggingBase.metadata.
+
+    The log writer and viewer requests can ask for a new month together; the
+    lookup and registration happen under _ensured_lock so only one defines it."""
+    name = partition_name(model, month)
+    with _ensured_lock:
+        table = LoggingBase.metadata.tables.get(name)
+        if table is not None:
+            return table
+        columns = [Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable,
+                          autoincrement=c.autoincrement) for c in model.__table__.columns]
+        table = Table(name, LoggingBase.metadata, *columns, Index(f"idx_{name}_ts", "timestamp_ms"))
+        _add_fts(table, SEARCH_COLUMNS[model.__tablename__])
+        return table
+
+
+def _add_fts(table: Table, columns: Iterable[str]) -> None:
+    fts, cols = fts_name(table), ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table.name}', "
+        f"content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {table.name}_ai AFTER INSERT ON {table.name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table.name}_ad AFTER DELETE ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+    ]
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "before_drop", DDL(f"DROP TABLE IF EXISTS {fts}").execute_if(dialect="sqlite"))
+
+
+def has_fts(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def fts_query(terms: Dict[str, str]) -> Optional[str]:
+    """FTS5 MATCH expression requiring each column to contain its term, or
+    None if a term is too short for the trigram index."""
+    if any(len(term) < 3 for term in terms.values()):
+        return None
+    return " AND ".join(f'{col} : "{term.replace(chr(34), chr(34) * 2)}"' for col, term in terms.items())
+
+
+def fts_rowids(table: Table, query: str):
+    """SELECT rowid FROM <partition>_fts WHERE MATCH query, usable in id.in_()."""
+    fts = fts_name(table)
+    return text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_query").bindparams(
+        fts_query=query).columns(column("rowid", BigInteger))
+
+
+def ensure_partitions(engine, model, months: Iterable[str]) -> List[Table]:
+    """Create (once per process) and return the partitions for `months`."""
+    tables = []
+    for month in months:
+        table = partition_table(model, month)
+        key = (str(engine.url), table.name)
+        if key not in _ensured:
+            with _ensured_lock:
+                if key not in _ensured:
+                    try:
+                        table.create(bind=engine, checkfirst=True)
+                    except DatabaseError:
+                        # Another worker created it between the check and the CREATE
+                        if not inspect(engine).has_table(table.name):
+                            raise
+                    _ensured.add(key)
+        tables.append(table)
+    return tables
+
+
+def insert_rows(db, model, rows: List[dict]) -> None:
+    """Insert log rows (dicts of `model`'s columns) into their month partitions
+    in the session's transaction; the caller commits."""
+    by_month: Dict[str, list] = {}
+    for row in rows:
+        if row.get("timestamp_ms") is None:
+            row["timestamp_ms"] = now_ms()
+        by_month.setdefault(month_of(row["timestamp_ms"]), []).append(row)
+    tables = ensure_partitions(db.get_bind(), model, by_month)
+    for table, month_rows in zip(tables, by_month.values()):
+        db.execute(table.insert(), month_rows)
+
+
+def partitions(bind, model) -> List[Tuple[str, Table]]:
+    """(month, table) of every existing partition of `model`, newest first."""
+    prefix = f"{model.__tablename__}_"
+    found = []
+    for name in inspect(bind).get_table_names():
+        if name.startswith(prefix) and _MONTH.match(name[len(prefix):]):
+            month = name[len(prefix):]
+            found.append((month, partition_table(model, month)))
+    return sorted(found, key=lambda p: p[0], reverse=True)
+
+
+def register_existing(bind) -> int:
+    """Register every partition in the database with LoggingBase.metadata."""
+    return sum(len(partitions(bind, model)) for model in MODELS)
+
+
+def drop_partition(bind, table: Table) -> None:
+    """DROP a partition (and its FTS table) and forget it, so create_all
+    doesn't bring it back. `bind` is an engine or a connection in a transaction."""
+    table.drop(bind=bind, checkfirst=True)
+    with _ensured_lock:
+        _ensured.discard((str(bind.engine.url), table.name))
+        LoggingBase.metadata.remove(table)
+
+
+# ============================================
+# ROWS FROM BEFORE PARTITIONING
+# ============================================
+
+def _legacy_ms(row: dict) -> int:
+    """timestamp_ms from the readable strings (minute precision)."""
+    for key, tz in (("timestamp_gmt", timezone.utc), ("timestamp_ist", None)):
+        try:
+            parsed = datetime.strptime(row.get(key) or "", "%Y-%m-%d %I:%M %p")
+        except ValueError:
+            continue
+        parsed = parsed.replace(tzinfo=tz) if tz else IST.localize(parsed)
+        return int(parsed.timestamp() * 1000)
+    return now_ms()
+
+
+def migrate_legacy_rows(engine, batch_size: int = _LEGACY_BATCH) -> int:
+    """Move rows from the unpartitioned tables into their month partitions,
+    oldest first, one short transaction per batch. Returns rows moved.
+
+    Every API worker runs this at startup. A batch is deleted from the old
+    table before it is copied, in the same transaction: if the delete doesn't
+    remove every id, another worker moved (some of) them first, and the batch
+    is rolled back and read again."""
+    moved = 0
+    inspector = inspect(engine)
+    for model in MODELS:
+        base = model.__table__
+        if not inspector.has_table(base.name):
+            continue
+        present = {c["name"] for c in inspector.get_columns(base.name)}
+        columns = [c for c in base.columns if c.name in present]
+        while True:
+            with engine.connect() as conn:
+                batch = [dict(r._mapping) for r in conn.execute(
+                    select(*columns).order_by(base.c.id).limit(batch_size))]
+            if not batch:
+                break
+            ids = [row.pop("id") for row in batch]
+            by_month: Dict[str, list] = {}
+            for row in batch:
+                if not row.get("timestamp_ms"):
+                    row["timestamp_ms"] = _legacy_ms(row)
+                by_month.setdefault(month_of(row["timestamp_ms"]), []).append(row)
+            # Partitions first: a table created inside the copy transaction would
+            # postdate its snapshot
+            tables = ensure_partitions(engine, model, by_month)
+            with engine.connect() as conn:
+                with conn.begin() as transaction:
+                    # The delete takes the write lock (SQLite) / row locks (PostgreSQL)
+                    claimed = conn.execute(base.delete().where(base.c.id.in_(ids))).rowcount
+                    if claimed != len(ids):
+                        transaction.rollback()
+                        continue
+                    for table, rows in zip(tables, by_month.values()):
+                        conn.execute(table.insert(), rows)
+            moved += len(batch)
+    return moved
+
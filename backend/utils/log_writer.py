@@ -0,0 +1,198 @@
+"""
+Batched writer for the activity and auth logs (log.db).
+
+log_activity() / log_auth_event() used to open a log session, INSERT one row
+and COMMIT on the caller's thread - for the middleware that is the event loop,
+so every mutating request paid a log.db commit before its response went out.
+They now put the row on an in-process queue and return. A daemon thread
+drains the queue and writes a batch whenever settings.log_batch_size rows
+are waiting or settings.log_flush_interval_ms has passed since the first
+one, one executemany INSERT per month partition (utils/log_partitions.py) and a
+single COMMIT per batch.
+
+The queue holds at most settings.log_queue_max rows. When it is full the
+middleware drops the row rather than wait (the event loop must not block);
+auth events, which come from threadpool routes, wait up to
+settings.log_queue_block_ms for space first. Dropped rows are counted in
+stats(). shutdown() (lifespan exit) writes whatever is still queued.
+
+    log_writer.submit(ActivityLog, {...}, block_seconds=0)
+    log_writer.flush()      # everything submitted so far is committed
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+_STOP = object()
+
+
+class LogWriter:
+    def __init__(self, session_factory, batch_size: int = 500, flush_interval: float = 0.2,
+                 max_queue: int = 20000):
+        self._session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0  # rows committed
+        self.dropped = 0  # rows refused because the queue was full
+        self.failed = 0  # rows lost to a failed batch
+
+    # ---------- producer side ----------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, model, row: dict, block_seconds: float = 0.0) -> bool:
+        """Queue one row for `model`'s table. False if it was dropped."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        try:
+            if block_seconds > 0:
+                self._queue.put((model, row), timeout=block_seconds)
+            else:
+                self._queue.put_nowait((model, row))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                print(f"[LOG_WRITER] Queue full, {dropped} log rows dropped so far")
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every row submitted before the call is committed (or
+        failed). False on timeout or if the writer isn't running."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """Write what is queued and stop the thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("[LOG_WRITER] Queue still full at shutdown; remaining rows are lost")
+            return
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "written": self.written,
+                "dropped": self.dropped, "failed": self.failed}
+
+    # ---------- writer thread ----------
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if stop:
+                # Rows queued behind the stop marker still get written
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start:start + self.batch_size])
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[tuple]) -> None:
+        if not batch:
+            return
+        from utils import log_partitions
+        by_model: Dict[object, list] = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+        db = self._session_factory()
+        try:
+            for model, rows in by_model.items():
+                log_partitions.insert_rows(db, model, rows)
+            db.commit()
+            self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            self.failed += len(batch)
+            print(f"[LOG_WRITER] Failed to write {len(batch)} log rows: {e}")
+        finally:
+            db.close()
+
+
+_writer: Optional[LogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> LogWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            from utils.log_database import LogSessionLocal
+            _writer = LogWriter(
+                LogSessionLocal,
+                batch_size=settings.log_batch_size,
+                flush_interval=settings.log_flush_interval_ms / 1000,
+                max_queue=settings.log_queue_max,
+            )
+        return _writer
+
+
+def submit(model, row: dict, block_seconds: float = 0.0) -> bool:
+    return get_writer().submit(model, row, block_seconds)
+
+
+def flush(timeout: Optional[float] = 5.0) -> bool:
+    return get_writer().flush(timeout)
+
+
+def stats() -> Dict[str, int]:
+    return get_writer().stats()
+
+
+def shutdown(timeout: Optional[float] = 10.0) -> Optional[Dict[str, int]]:
+    """Stop the writer after writing what is queued; its final stats."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is None:
+        return None
+    writer.shutdown(timeout)
+    return writer.stats()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import {
     Shield, LogOut, RefreshCw, FileText, Clock, AlertCircle,
     CheckCircle, ChevronLeft, ChevronRight, Filter, Loader2, Activity
@@ -21,10 +21,20 @@ function AdminDashboard({ onLogout }) {
     const [logsLoading, setLogsLoading] = useState(false);
     const [logsError, setLogsError] = useState(null);
     const logsLimit = 25;
+    // next_cursor of each page fetched so far: page p is read with logsCursors.current[p - 1]
+    const logsCursors = useRef([null]);
 
     // Date filters
     const today = new Date().toISOString().split('T')[0];
     const [filterDate, setFilterDate] = useState(today);
+    const [emailSearch, setEmailSearch] = useState('');
+    const [filterEmail, setFilterEmail] = useState('');
+    // Archived month (YYYYMM) being viewed instead of log.db, '' for live logs
+    const [archiveMonth, setArchiveMonth] = useState('');
+    const [archivedMonths, setArchivedMonths] = useState([]);
+
+    // Cursors are only valid for the filters they were fetched with
+    useEffect(() => { logsCursors.current = [null]; }, [logType, filterDate, filterEmail]);
 
     // Active tab
     const [activeTab, setActiveTab] = useState('sync');
@@ -34,8 +44,13 @@ function AdminDashboard({ onLogout }) {
         setLogsLoading(true);
         setLogsError(null);
         try {
-            const res = await api.fetchAdminLogs(logType, logsPage, logsLimit, filterDate);
+            const cursor = logsCursors.current[logsPage - 1] || null;
+            const res = archiveMonth
+                ? await api.fetchArchivedLogs(logType, archiveMonth, logsPage, logsLimit, { email: filterEmail || null })
+                : await api.fetchAdminLogs(logType, logsPage, logsLimit, filterDate,
+                    { cursor, email: filterEmail || null });
             const payload = res.data;
+            logsCursors.current[logsPage] = payload.next_cursor || null;
             setLogs(payload.data || []);
             setLogsTotal(payload.total || 0);
             setLogsTotalPages(payload.total_pages || 0);
@@ -45,7 +60,7 @@ function AdminDashboard({ onLogout }) {
         } finally {
             setLogsLoading(false);
         }
-    }, [logType, logsPage, filterDate]);
+    }, [logType, logsPage, filterDate, filterEmail, archiveMonth]);
 
     const pollSyncStatus = useCallback(async () => {
         try {
@@ -77,6 +92,13 @@ function AdminDashboard({ onLogout }) {
         }
     }, [activeTab, fetchLogs]);
 
+    useEffect(() => {
+        if (activeTab !== 'logs') return;
+        api.getAdminLogStats()
+            .then(res => setArchivedMonths([...new Set((res.data.archives || []).map(a => a.month))]))
+            .catch(() => setArchivedMonths([]));
+    }, [activeTab]);
+
     useEffect(() => {
         // Check if sync is already running when component mounts
         api.getAdminSyncStatus().then(res => {
@@ -302,10 +324,33 @@ function AdminDashboard({ onLogout }) {
                                         style={{ border: 'none', outline: 'none', fontSize: '13px', color: '#111827', fontWeight: '600', cursor: 'pointer' }}
                                     />
                                 </div>
+                                <input
+                                    type="search"
+                                    placeholder="Search email (Enter)"
+                                    value={emailSearch}
+                                    onChange={(e) => setEmailSearch(e.target.value)}
+                                    onKeyDown={(e) => { if (e.key === 'Enter') { setFilterEmail(emailSearch.trim()); setLogsPage(1); } }}
+                                    style={{ background: 'white', padding: '6px 12px', borderRadius: '10px', border: '1px solid #e5e7eb', fontSize: '13px', color: '#111827' }}
+                                />
+                                {archivedMonths.length > 0 && (
+                                    <select
+                                        value={archiveMonth}
+                                        onChange={(e) => { setArchiveMonth(e.target.value); setLogsPage(1); }}
+                                        style={{ background: 'white', padding: '6px 12px', borderRadius: '10px', border: '1px solid #e5e7eb', fontSize: '13px', color: '#111827' }}
+                                    >
+                                        <option value="">Live logs</option>
+                                        {archivedMonths.map(m => (
+                                            <option key={m} value={m}>Archive {m.slice(0, 4)}-{m.slice(4)}</option>
+                                        ))}
+                                    </select>
+                                )}
                             </div>
                             <div style={{ display: 'flex', gap: '10px' }}>
                                 <button onClick={() => {
                                     setFilterDate(today);
+                                    setEmailSearch('');
+                                    setFilterEmail('');
+                                    setArchiveMonth('');
                                     setLogsPage(1);
                                 }} className="admin-logs-refresh-btn" style={{ backgroundColor: '#f3f4f6', color: '#4b5563', border: '1px solid #d1d5db' }}>
                                     Reset to Today
@@ -71,6 +71,13 @@ const CATEGORIES = {
         color: 'pink',
         description: 'Period restrictions for honours/minor courses',
         badge: 'SPECIAL'
+    },
+    solver: {
+        label: 'Solver',
+        icon: Settings,
+        color: 'gray',
+        description: 'CP-SAT time budget, threads and stopping criteria',
+        badge: 'ENGINE'
     }
 };
 
@@ -981,21 +981,22 @@ export default function TimetableEditor({ department, semester, initialData, mas
     // ─── Drag Logic ───
     const handleDragStart = ({ active }) => setDraggedItem(active.data.current);
 
+    const conflictCheckData = (entriesToCheck) => ({
+        department_code: department,
+        semester: parseInt(semester),
+        entries: entriesToCheck.map(e => ({
+            faculty_name: e.faculty_name || '',
+            venue_name: e.venue_name || '',
+            day_of_week: e.day_of_week,
+            period_number: e.period_number,
+            course_code: e.course_code || ''
+        }))
+    });
+
     // Conflict check helper (Fix 7)
     const checkConflictsForEntries = async (entriesToCheck, onSuccess, rollbackEntries) => {
         try {
-            const checkData = {
-                department_code: department,
-                semester: parseInt(semester),
-                entries: entriesToCheck.map(e => ({
-                    faculty_name: e.faculty_name || '',
-                    venue_name: e.venue_name || '',
-                    day_of_week: e.day_of_week,
-                    period_number: e.period_number,
-                    course_code: e.course_code || ''
-                }))
-            };
-            const res = await api.checkConflicts(checkData);
+            const res = await api.checkConflicts(conflictCheckData(entriesToCheck));
             if (res.data.has_conflicts) {
                 const allConflicts = [...(res.data.faculty_conflicts || []), ...(res.data.venue_conflicts || [])];
                 const msgs = allConflicts.map(c => c.message);
@@ -1180,7 +1181,7 @@ export default function TimetableEditor({ department, semester, initialData, mas
         )));
     };
 
-    const handleSave = async () => {
+    const saveEntries = async () => {
         setIsSaving(true);
         try {
             await onSave(entries, localLearningModes);
@@ -1193,6 +1194,33 @@ export default function TimetableEditor({ department, semester, initialData, mas
         }
     };
 
+    // Whole-timetable conflict check before saving (Fix 8): conflicts are listed
+    // as the streamed check finds them, then the user saves anyway or goes back
+    const handleSave = async () => {
+        setIsSaving(true);
+        const found = [];
+        let summary = null;
+        try {
+            summary = await api.checkConflictsStream(conflictCheckData(entries), (conflict) => {
+                found.push(conflict);
+                setConflictModal({ conflicts: [...found], checking: true });
+            });
+        } catch (err) {
+            console.warn('Conflict check failed, saving anyway:', err);
+        }
+        if (summary?.has_conflicts) {
+            setConflictModal({
+                conflicts: found,
+                checking: false,
+                onProceed: () => { setConflictModal(null); saveEntries(); },
+                onCancel: () => { setConflictModal(null); setIsSaving(false); }
+            });
+            return;
+        }
+        setConflictModal(null);
+        await saveEntries();
+    };
+
     const handleModeSwitch = async (modeId) => {
         const updated = localLearningModes.includes(modeId)
             ? localLearningModes.filter(id => id !== modeId)
@@ -1662,7 +1690,7 @@ export default function TimetableEditor({ department, semester, initialData, mas
                         </button>
                     )}
 
-                    <button onClick={handleSave} title="Save Timetable"
+                    <button onClick={handleSave} disabled={isSaving} title="Save Timetable"
                         className="p-3 bg-violet-600 text-white rounded-full shadow-xl shadow-violet-300 hover:bg-violet-700 transition-all transform hover:scale-110 hover:shadow-violet-400">
                         <Save className="w-5 h-5" />
                     </button>
@@ -1803,6 +1831,37 @@ export default function TimetableEditor({ department, semester, initialData, mas
                 gridMap={gridMap}
                 validPeriods={validPeriods}
             />
+
+            {conflictModal && (
+                <div className="fixed inset-0 z-[100] flex items-center justify-center bg-black/50 backdrop-blur-sm p-4">
+                    <div className="bg-white rounded-2xl shadow-2xl p-6 w-full max-w-lg border border-gray-100 max-h-[85vh] overflow-y-auto">
+                        <div className="flex items-center justify-between mb-4">
+                            <h3 className="text-lg font-bold text-gray-800 flex items-center gap-2">
+                                <AlertTriangle className="w-5 h-5 text-amber-500" /> Conflicts Detected
+                            </h3>
+                            {conflictModal.checking && <span className="text-xs text-violet-500 animate-pulse font-semibold">Still checking...</span>}
+                        </div>
+                        <ul className="flex flex-col gap-2 mb-5">
+                            {conflictModal.conflicts.map((c, idx) => (
+                                <li key={idx} className="text-sm text-gray-700 bg-amber-50 border border-amber-100 rounded-lg px-3 py-2">
+                                    <span className="text-[10px] font-bold uppercase tracking-wider text-amber-700 mr-2">{c.type}</span>
+                                    {c.message}
+                                </li>
+                            ))}
+                        </ul>
+                        <div className="flex justify-end gap-2">
+                            <button onClick={conflictModal.onCancel} disabled={conflictModal.checking}
+                                className="px-4 py-2 rounded-xl text-sm font-bold text-gray-600 hover:bg-gray-100 transition-all disabled:opacity-50">
+                                Keep Editing
+                            </button>
+                            <button onClick={conflictModal.onProceed} disabled={conflictModal.checking}
+                                className="px-4 py-2 rounded-xl text-sm font-bold bg-emerald-600 text-white hover:bg-emerald-700 transition-all disabled:bg-gray-400">
+                                Save Anyway
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            )}
         </DndContext >
     );
 }
@@ -132,6 +132,13 @@ export const deleteBreak = (breakId) => axios.delete(`${API_URL}/breaks/${breakI
 
 // --- Timetable ---
 export const generateTimetable = (data) => axios.post(`${API_URL}/generate`, data);
+export const submitGenerationJob = (data) => axios.post(`${API_URL}/generate/jobs`, data);
+export const getGenerationJob = (jobId) => axios.get(`${API_URL}/generate/jobs/${jobId}`);
+export const cancelGenerationJob = (jobId) => axios.delete(`${API_URL}/generate/jobs/${jobId}`);
+export const submitBatchGeneration = (data) => axios.post(`${API_URL}/generate/batch`, data);
+export const getBatchGenerationPlan = (semester) => axios.get(`${API_URL}/generate/batch/plan?semester=${semester}`);
+export const getGenerationRuns = (params = {}) => axios.get(`${API_URL}/generate/runs`, { params });
+export const getGenerationRun = (runId) => axios.get(`${API_URL}/generate/runs/${runId}`);
 export const getTimetable = (deptCode, sem, modeIds) => {
     let url = `${API_URL}/timetable?department_code=${deptCode}&semester=${sem}`;
     if (modeIds) url += `&learning_mode_ids=${modeIds}`;
@@ -147,14 +154,19 @@ export const getConflicts = (deptCode, sem) => {
     return axios.get(url);
 };
 export const saveTimetable = (data) => axios.post(`${API_URL}/timetable/save`, data);
-export const exportTimetableExcel = (deptCode, sem) => {
+export const exportTimetableExcel = (deptCode, sem, sheets) => {
     let url = `${API_URL}/export/timetable/excel`;
     const params = [];
     if (deptCode) params.push(`department_code=${deptCode}`);
     if (sem) params.push(`semester=${sem}`);
+    if (sheets) params.push(`sheets=${sheets}`);  // department | section | faculty | venue
     if (params.length) url += `?${params.join('&')}`;
     return axios.get(url, { responseType: 'blob' });
 };
+// Background export of large bundles: poll the job, then download its artifact
+export const submitExportJob = (data) => axios.post(`${API_URL}/export/jobs`, data);
+export const getExportJob = (jobId) => axios.get(`${API_URL}/export/jobs/${jobId}`);
+export const downloadExportJob = (jobId) => axios.get(`${API_URL}/export/jobs/${jobId}/download`, { responseType: 'blob' });
 
 // --- Venues ---
 export const getVenues = () => axios.get(`${API_URL}/venues`);
@@ -215,6 +227,8 @@ export const deleteRegistration = (id) => axios.delete(`${API_URL}/registrations
 // --- Personalized Timetables ---
 export const getFacultyTimetable = (facultyId) => axios.get(`${API_URL}/timetable/faculty/${facultyId}`);
 export const getStudentTimetable = (studentId) => axios.get(`${API_URL}/timetable/student/${studentId}`);
+export const getCohortTimetables = (departmentCode, semester) =>
+    axios.get(`${API_URL}/timetable/students`, { params: { department_code: departmentCode, semester } });
 export const getVenueTimetable = (venueName) => axios.get(`${API_URL}/timetable/venue/${venueName}`);
 
 // --- Availability Queries (Smart Editor) ---
@@ -233,6 +247,35 @@ export const getAvailableVenues = (deptCode, semester, day, period, courseCode =
 
 // --- Conflict Check (Cross-Department) ---
 export const checkConflicts = (data) => axios.post(`${API_URL}/check-conflicts`, data);
+// NDJSON variant: calls onConflict(c) as each conflict arrives, resolves with the summary line
+export const checkConflictsStream = async (data, onConflict) => {
+    const headers = { 'Content-Type': 'application/json' };
+    const token = localStorage.getItem('access_token');
+    if (token) headers['Authorization'] = `Bearer ${token}`;
+    const csrfToken = getCookie("csrf_token");
+    if (csrfToken) headers['X-CSRF-Token'] = csrfToken;
+    const res = await fetch(`${API_URL}/check-conflicts?stream=true`, {
+        method: 'POST', credentials: 'include', headers, body: JSON.stringify(data)
+    });
+    if (!res.ok) throw new Error(`Conflict check failed (${res.status})`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let summary = null;
+    for (;;) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const item = JSON.parse(line);
+            if (item.type === 'summary') summary = item;
+            else onConflict(item);
+        }
+        if (done) return summary;
+    }
+};
 
 // --- Scheduler Config ---
 export const getConfig = () => axios.get(`${API_URL}/api/config`);
@@ -331,12 +374,32 @@ export const triggerAdminSync = () =>
 export const getAdminSyncStatus = () =>
     adminApi.get('/sync/status');
 
-export const fetchAdminLogs = (type = 'auth', page = 1, limit = 50, date = null) => {
+// cursor: next_cursor of the previous page (keyset paging); email: substring search
+export const fetchAdminLogs = (type = 'auth', page = 1, limit = 50, date = null, { cursor = null, email = null } = {}) => {
     const params = { type, page, limit };
     if (date) params.date = date;
+    if (cursor) params.cursor = cursor;
+    if (email) params.email = email;
     return adminApi.get('/logs', { params });
 };
 
+// Months moved out of log.db by retention: month is YYYYMM
+export const fetchArchivedLogs = (type = 'auth', month, page = 1, limit = 50, { email = null } = {}) => {
+    const params = { type, month, page, limit };
+    if (email) params.email = email;
+    return adminApi.get('/logs/archive', { params });
+};
+
+export const getAdminLogStats = () =>
+    adminApi.get('/logs/stats');
+
+export const triggerLogRetention = () =>
+    adminApi.post('/logs/retention');
+
+// Full VACUUM of log.db (blocks log writes while it runs)
+export const triggerLogCompaction = () =>
+    adminApi.post('/logs/compact');
+
 export const getAdminToken = () => localStorage.getItem('adminToken');
 export const setAdminToken = (token) => localStorage.setItem('adminToken', token);
 export const clearAdminToken = () => localStorage.removeItem('adminToken');